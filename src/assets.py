@@ -0,0 +1,230 @@
+import hashlib
+import json
+import os
+import posixpath
+import re
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from css import rewrite_css_urls
+from filesystem import DiskFileSystem, FileSystem, make_dirs
+from template import Template
+
+# The number of hex digits of the content hash put into a fingerprinted file name.
+FINGERPRINT_LENGTH = 10
+
+# Files served under a name other sites or crawlers expect, or pages linked to by their URL,
+# keep their name.
+UNFINGERPRINTED_NAMES = ('robots.txt', 'favicon.ico', 'CNAME', '_headers', '_redirects')
+UNFINGERPRINTED_EXTENSIONS = ('.html', '.txt', '.xml', '.webmanifest')
+
+# Where the mapping from original to fingerprinted URLs is published, below the output directory.
+ASSET_MANIFEST_FILE = 'asset-manifest.json'
+
+# The headers file read by static hosts such as Netlify and Cloudflare Pages.
+HEADERS_FILE = '_headers'
+
+# A fingerprinted file never changes, so browsers may keep it for a year without revalidating.
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# A `src` or `href` attribute in template markup.
+MARKUP_URL_PATTERN = re.compile(r'(\b(?:src|href)\s*=\s*)(["\']?)([^"\'\s>]+)\2', re.IGNORECASE)
+
+def fingerprinted_name(name: str, digest: str) -> str:
+    """
+    Inserts a content hash into a file name, before its extension.
+
+    Args:
+        name (str): The file name, e.g. `index.css`.
+        digest (str): The hex digest of the file's contents.
+
+    Returns:
+        str: The fingerprinted name, e.g. `index.3f2a9c01be.css`.
+    """
+    stem, extension = os.path.splitext(name)
+    return f'{stem}.{digest[:FINGERPRINT_LENGTH]}{extension}'
+
+def should_fingerprint(name: str) -> bool:
+    """Returns True if a static file is published under a fingerprinted name."""
+    return name not in UNFINGERPRINTED_NAMES and not name.endswith(UNFINGERPRINTED_EXTENSIONS)
+
+class AssetPipeline:
+    """
+    Publishes static files under content-hashed names, so they can be cached forever.
+
+    Every static file except pages and well-known names such as `robots.txt` is written as
+    `name.<hash>.ext`. Stylesheets are processed last, with their `url(...)` references already
+    pointing at the fingerprinted files, so a changed image also changes the name of the
+    stylesheet using it. Pages are pointed at the new names while they are serialized, through
+    `urls`, and templates when they are compiled.
+
+    Attributes:
+        static_dir (str): The directory of static assets.
+        public_dir (str): The output directory.
+        fs (FileSystem): The filesystem to read from and write to.
+        urls (Dict[str, str]): The fingerprinted URL of each asset, keyed by original URL, e.g.
+            `{'/index.css': '/index.3f2a9c01be.css'}`.
+    """
+
+    def __init__(self, static_dir: str, public_dir: str, fs: FileSystem = None):
+        """
+        Initializes an empty pipeline; `publish` fills in the URLs.
+
+        Args:
+            static_dir (str): The directory of static assets.
+            public_dir (str): The output directory.
+            fs (FileSystem, optional): The filesystem to read from and write to. Defaults to the real disk.
+        """
+        self.static_dir = static_dir
+        self.public_dir = public_dir
+        self.fs = fs if fs is not None else DiskFileSystem()
+        self.urls: Dict[str, str] = {}
+        self._signature: Optional[str] = None
+        self._templates: Dict[int, Tuple[Template, Template]] = {}
+
+    def static_files(self) -> List[Tuple[str, str]]:
+        """
+        Lists the static files.
+
+        Returns:
+            List[Tuple[str, str]]: The source path and URL of every file, stylesheets last.
+        """
+        files = []
+        stack = [(self.static_dir, '/')]
+        while stack:
+            dir_path, url_prefix = stack.pop()
+            for name in sorted(self.fs.listdir(dir_path)):
+                path = os.path.join(dir_path, name)
+                if self.fs.isdir(path):
+                    stack.append((path, f'{url_prefix}{name}/'))
+                else:
+                    files.append((path, url_prefix + name))
+        return sorted(files, key=lambda file: (file[1].endswith('.css'), file[1]))
+
+    def publish(self, overrides: Mapping[str, bytes] = None, generated: Mapping[str, bytes] = None) -> Dict[str, str]:
+        """
+        Writes every static file to the output directory, along with the asset manifest and the
+        headers file.
+
+        A fingerprinted file that already exists holds exactly the right contents, so it is not
+        written again; files that keep their name are only copied when their source is newer.
+
+        Args:
+            overrides (Mapping[str, bytes], optional): Contents to publish instead of a file's
+                source, keyed by URL, such as minified stylesheets. Defaults to None.
+            generated (Mapping[str, bytes], optional): Files the build produces rather than
+                copies from the static directory, keyed by URL, such as the navigation script.
+                They are always published under fingerprinted names. Defaults to None.
+
+        Returns:
+            Dict[str, str]: The content hash of every file this stage wrote or kept, or the source's
+                `mtime_ns` of a file that keeps its name, keyed by destination path, for the build manifest.
+        """
+        overrides = {**(overrides or {}), **(generated or {})}
+        signatures: Dict[str, str] = {}
+        self.urls = {}
+        self._templates = {}
+        self._signature = None
+
+        # Generated files have no source; they are published from `overrides` alone.
+        files = self.static_files() + [(None, url) for url in generated or {}]
+        files.sort(key=lambda file: (file[1].endswith('.css'), file[1]))
+
+        for source, url in files:
+            directory, name = posixpath.split(url)
+            destination_dir = os.path.join(self.public_dir, directory.lstrip('/'))
+            make_dirs(destination_dir, self.fs)
+
+            if not should_fingerprint(name) and source is not None:
+                destination = os.path.join(destination_dir, name)
+                if not self.fs.isfile(destination) or self.fs.mtime_ns(destination) < self.fs.mtime_ns(source):
+                    self.fs.copy(source, destination)
+                # Recorded too, so the copy is removed once its source is deleted.
+                signatures[destination] = str(self.fs.mtime_ns(source))
+                continue
+
+            data = overrides.get(url)
+            if data is None:
+                data = self.fs.read_bytes(source)
+            if name.endswith('.css'):
+                data = rewrite_css_urls(data.decode('utf-8'), url, self.urls).encode('utf-8')
+
+            digest = hashlib.sha256(data).hexdigest()
+            fingerprinted = fingerprinted_name(name, digest)
+            destination = os.path.join(destination_dir, fingerprinted)
+            self.urls[url] = posixpath.join(directory, fingerprinted)
+            signatures[destination] = digest
+
+            # The name is derived from the contents, so an existing file is already up to date.
+            if not self.fs.isfile(destination):
+                print(f"Publishing asset {self.urls[url]}")
+                self.fs.write_bytes(destination, data)
+
+        for file_name, text in ((ASSET_MANIFEST_FILE, self.manifest_json()), (HEADERS_FILE, self.headers())):
+            destination = os.path.join(self.public_dir, file_name)
+            data = text.encode('utf-8')
+            signatures[destination] = hashlib.sha256(data).hexdigest()
+            if not self.fs.isfile(destination) or self.fs.read_bytes(destination) != data:
+                self.fs.write_bytes(destination, data)
+
+        return signatures
+
+    def manifest_json(self) -> str:
+        """Returns the asset manifest: the fingerprinted URL of each asset, keyed by original URL."""
+        return json.dumps(dict(sorted(self.urls.items())), indent=1)
+
+    def headers(self) -> str:
+        """
+        Returns the headers file, which marks every fingerprinted file as immutable.
+
+        Returns:
+            str: One block per file, e.g. `/index.3f2a9c01be.css` followed by an indented
+                `Cache-Control` line.
+        """
+        return ''.join(f'{url}\n  Cache-Control: {IMMUTABLE_CACHE_CONTROL}\n' for url in sorted(self.urls.values()))
+
+    def signature(self) -> str:
+        """
+        Returns a hash of the URL mapping, which changes whenever a page may link to a different file.
+
+        Returns:
+            str: The SHA-256 of the asset manifest.
+        """
+        if self._signature is None:
+            self._signature = hashlib.sha256(self.manifest_json().encode('utf-8')).hexdigest()
+        return self._signature
+
+    def rewrite_markup(self, markup: str) -> str:
+        """
+        Points the `src` and `href` attributes of a piece of markup at fingerprinted files.
+
+        Args:
+            markup (str): The markup, such as the literal text of a template.
+
+        Returns:
+            str: The markup with every attribute naming an asset replaced.
+        """
+        def replace(match: re.Match) -> str:
+            url = self.urls.get(match.group(3))
+            return match.group(0) if url is None else f'{match.group(1)}{match.group(2)}{url}{match.group(2)}'
+
+        return MARKUP_URL_PATTERN.sub(replace, markup)
+
+    def compile(self, template: Template) -> Template:
+        """
+        Rewrites the asset URLs of a template, once per compiled template.
+
+        Args:
+            template (Template): The compiled template.
+
+        Returns:
+            Template: A template whose literal text links to the fingerprinted files.
+        """
+        cached = self._templates.get(id(template))
+        if cached is not None and cached[0] is template:
+            return cached[1]
+
+        compiled = Template(self.rewrite_markup(template.source), template.minify)
+
+        # Holding on to the original template keeps its `id` from being reused by another one.
+        self._templates[id(template)] = (template, compiled)
+        return compiled
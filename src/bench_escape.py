@@ -0,0 +1,94 @@
+import gc
+import html
+import sys
+import time
+from typing import Callable, List
+from unittest import mock
+
+import htmlnode
+from markdown_to_html_node import markdown_to_html_node
+
+# Mostly plain prose, as on a typical page, with a few paragraphs that do need escaping.
+SNIPPET = """## Section {i}
+
+A paragraph with **bold**, *italic*, `code` and a [link](https://example.com/{i}?page=2&sort=asc).
+
+Plain prose makes up most of a page, and most of it contains no character that needs escaping.
+
+* first item
+* second item, where a < b and c > d
+
+```
+if a < b and b > c: print("{i}")
+```
+"""
+
+# The escaping strategies compared, each a replacement for `escape_text` and `escape_attribute`.
+TEXT_TABLE = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', htmlnode.LINE_BREAK: '<br>'})
+ATTRIBUTE_TABLE = str.maketrans({'&': '&amp;', '"': '&quot;', '<': '&lt;', '>': '&gt;'})
+STRATEGIES = {
+    'none (unsafe)': (
+        lambda text: text.replace(htmlnode.LINE_BREAK, '<br>') if htmlnode.LINE_BREAK in text else text,
+        lambda value: value,
+    ),
+    'html.escape on every leaf': (
+        lambda text: html.escape(text, quote=False).replace(htmlnode.LINE_BREAK, '<br>'),
+        lambda value: html.escape(value),
+    ),
+    'str.translate on every leaf': (lambda text: text.translate(TEXT_TABLE), lambda value: value.translate(ATTRIBUTE_TABLE)),
+    'fast path + replace (built in)': (htmlnode.escape_text, htmlnode.escape_attribute),
+}
+
+def measure(label: str, function: Callable[[], None], pages: int, baseline: float = None, repeat: int = 5) -> float:
+    """
+    Times the fastest of several passes of `function` and prints its throughput and overhead.
+
+    Args:
+        label (str): The name printed next to the result.
+        function (Callable[[], None]): Serializes every page once.
+        pages (int): The number of pages serialized per call.
+        baseline (float, optional): The time without escaping, to print the overhead against. Defaults to None.
+        repeat (int, optional): The number of passes; the fastest is least disturbed by other work. Defaults to 5.
+
+    Returns:
+        float: The elapsed time in seconds.
+    """
+    # As in `timeit`, garbage collection is paused so a collection does not land in one strategy's time.
+    elapsed = float('inf')
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            elapsed = min(elapsed, time.perf_counter() - started)
+    finally:
+        gc.enable()
+    overhead = f'{(elapsed / baseline - 1) * 100:+7.1f}%' if baseline else ''
+    print(f'{label:<32} {elapsed:8.3f}s {pages / elapsed:10.0f} pages/s {overhead}')
+    return elapsed
+
+def main(argv: List[str] = None) -> None:
+    """
+    Compares the cost of escaping strategies when serializing large pages.
+
+    Usage: `python3 src/bench_escape.py [PAGES] [SECTIONS]` (defaults to 20 pages of 500 sections).
+
+    Args:
+        argv (List[str], optional): The command-line arguments. Defaults to `sys.argv[1:]`.
+    """
+    args = sys.argv[1:] if argv is None else argv
+    pages = int(args[0]) if args else 20
+    sections = int(args[1]) if len(args) > 1 else 500
+
+    # Only serialization is timed; the trees are built once up front.
+    trees = [markdown_to_html_node(''.join(SNIPPET.format(i=i) for i in range(sections))) for _ in range(pages)]
+    print(f'{pages} pages of {sections} sections, {len(trees[0].to_html()) // 1024} KiB each')
+
+    baseline = None
+    for label, (text, attribute) in STRATEGIES.items():
+        with mock.patch.object(htmlnode, 'escape_text', text), mock.patch.object(htmlnode, 'escape_attribute', attribute):
+            elapsed = measure(label, lambda: [tree.to_html() for tree in trees], pages, baseline)
+        baseline = baseline or elapsed
+
+if __name__ == "__main__":
+    main()
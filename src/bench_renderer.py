@@ -0,0 +1,75 @@
+import sys
+import time
+from typing import Callable, List
+
+from markdown_to_html_node import markdown_to_html_node
+from renderer import Renderer
+
+# A mix of block types so the benchmark exercises every parsing path.
+SNIPPET = """# Heading {i}
+
+A paragraph with **bold**, *italic*, `code` and a [link](https://example.com/{i}).
+
+* first item
+* second item
+
+1. one
+2. two
+
+> a quote
+> over two lines
+
+```
+print({i})
+```
+"""
+
+def measure(label: str, function: Callable[[], None], documents: int) -> float:
+    """
+    Times one pass of `function` and prints its throughput.
+
+    Args:
+        label (str): The name printed next to the result.
+        function (Callable[[], None]): Renders every document once.
+        documents (int): The number of documents rendered per call.
+
+    Returns:
+        float: The number of documents rendered per second.
+    """
+    started = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - started
+    rate = documents / elapsed
+    print(f'{label:<32} {elapsed:8.3f}s {rate:12.0f} docs/s')
+    return rate
+
+def main(argv: List[str] = None) -> None:
+    """
+    Compares the function API with `Renderer` for unique and repeated snippets.
+
+    Usage: `python3 src/bench_renderer.py [COUNT]` (defaults to 2000 documents).
+
+    Args:
+        argv (List[str], optional): The command-line arguments. Defaults to `sys.argv[1:]`.
+    """
+    args = sys.argv[1:] if argv is None else argv
+    count = int(args[0]) if args else 2000
+
+    unique = [SNIPPET.format(i=i) for i in range(count)]
+    # A CMS re-renders the same snippets far more often than it sees new ones.
+    repeated = [SNIPPET.format(i=i % 50) for i in range(count)]
+
+    for name, documents in (('unique', unique), ('repeated', repeated)):
+        print(f'{count} {name} documents')
+        measure('function API', lambda: [markdown_to_html_node(md).to_html() for md in documents], count)
+
+        renderer = Renderer()
+        measure('Renderer.render', lambda: [renderer.render(md) for md in documents], count)
+        renderer = Renderer()
+        measure('Renderer.render_many', lambda: renderer.render_many(documents), count)
+        with Renderer() as renderer:
+            measure('Renderer.render_many(parallel)', lambda: renderer.render_many(documents, parallel=True), count)
+        print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+from filesystem import DiskFileSystem, FileSystem
+from template import Template
+
+class BuildCache:
+    """
+    Keeps parsed templates, directory listings and rendered Markdown between builds.
+
+    A one-shot build gains little from this cache, but a long-running process such as the build
+    daemon reuses it across requests: templates and directory listings are revalidated with a
+    single `os.stat`, and Markdown bodies are memoized by content hash so unchanged pages are not
+    parsed again. All methods are thread-safe.
+
+    Attributes:
+        max_renders (int): The maximum number of rendered bodies kept before the least recently
+            used ones are evicted.
+        hits (int): The number of render lookups served from the cache.
+        misses (int): The number of render lookups that had to parse Markdown.
+    """
+
+    def __init__(self, max_renders: int = 10000):
+        """
+        Initializes an empty cache.
+
+        Args:
+            max_renders (int, optional): The maximum number of rendered bodies to keep. Defaults to 10000.
+        """
+        self.max_renders = max_renders
+        self.hits = 0
+        self.misses = 0
+        self._templates: Dict[Tuple[str, bool], Tuple[int, Template]] = {}
+        self._listings: Dict[str, Tuple[int, List[str]]] = {}
+        self._renders: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def template(self, template_path: str, fs: FileSystem = None, minify: bool = False) -> Template:
+        """
+        Returns the compiled template at `template_path`, recompiling it only when the file changed.
+
+        Args:
+            template_path (str): The path of the HTML template.
+            fs (FileSystem, optional): The filesystem to read from. Defaults to the real disk.
+            minify (bool, optional): Whether to return the minified compilation. Defaults to False.
+
+        Returns:
+            Template: The compiled template.
+        """
+        if fs is None:
+            fs = DiskFileSystem()
+        mtime = fs.mtime_ns(template_path)
+
+        with self._lock:
+            cached = self._templates.get((template_path, minify))
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        template = Template(fs.read_text(template_path), minify)
+
+        with self._lock:
+            self._templates[(template_path, minify)] = (mtime, template)
+        return template
+
+    def listdir(self, dir_path: str, fs: FileSystem = None) -> List[str]:
+        """
+        Returns the entries of a directory, relisting it only when the directory changed.
+
+        A directory's modification time changes whenever an entry is added, removed or renamed,
+        so it is a cheap and reliable validator for the listing.
+
+        Args:
+            dir_path (str): The directory to list.
+            fs (FileSystem, optional): The filesystem to list. Defaults to the real disk.
+
+        Returns:
+            List[str]: The names of the directory's entries.
+        """
+        if fs is None:
+            fs = DiskFileSystem()
+        mtime = fs.mtime_ns(dir_path)
+
+        with self._lock:
+            cached = self._listings.get(dir_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        listing = fs.listdir(dir_path)
+        with self._lock:
+            self._listings[dir_path] = (mtime, listing)
+        return listing
+
+    def render(self, markdown_contents: str, render_function, variant: str = '') -> tuple:
+        """
+        Returns the rendered form of a Markdown document, rendering it only on a miss.
+
+        Args:
+            markdown_contents (str): The Markdown document.
+            render_function (callable): Called with `markdown_contents` on a miss; must return the
+                tuple to cache, such as `render_markdown`'s `RenderedMarkdown`.
+            variant (str, optional): Distinguishes renderings of the same document with different
+                options, e.g. `minify`, so they do not share an entry. Defaults to an empty string.
+
+        Returns:
+            tuple: What `render_function` returned for this document.
+        """
+        digest = hashlib.sha256(markdown_contents.encode('utf-8'))
+        digest.update(variant.encode('utf-8'))
+        key = digest.hexdigest()
+
+        with self._lock:
+            cached = self._renders.get(key)
+            if cached is not None:
+                # Mark the entry as recently used so it survives eviction.
+                self._renders.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        rendered = render_function(markdown_contents)
+
+        with self._lock:
+            self._renders[key] = rendered
+            while len(self._renders) > self.max_renders:
+                self._renders.popitem(last=False)
+        return rendered
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Summarizes the cache's contents.
+
+        Returns:
+            Dict[str, int]: Counts of cached templates, listings and renders, plus hits and misses.
+        """
+        with self._lock:
+            return {
+                'templates': len(self._templates),
+                'listings': len(self._listings),
+                'renders': len(self._renders),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
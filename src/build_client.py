@@ -0,0 +1,189 @@
+import json
+import os
+import socket
+import sys
+from typing import List
+
+# The daemon listens next to the project by default so several checkouts can each run their own.
+DEFAULT_SOCKET_PATH = './.build-daemon.sock'
+
+# The switches of `main.py build`, each with the `build_site` option it sets and the value it sets it to.
+BUILD_SWITCHES = {
+    '--incremental': ('incremental', True),
+    '--check': ('check', True),
+    '--precompress': ('precompress', True),
+    '--minify': ('minify', True),
+    '--critical-css': ('critical_css', True),
+    '--fingerprint': ('fingerprint', True),
+    '--no-image-sizes': ('image_sizes', False),
+    '--fragments': ('fragments', True),
+    '--node-trees': ('node_trees', True),
+    '--no-highlight': ('highlight', False),
+}
+
+# The `build` options that take a value, with the request field each one sets.
+BUILD_VALUES = {
+    '--static': 'static',
+    '--content': 'content',
+    '--template': 'template',
+    '--public': 'public',
+    '--base-url': 'base_url',
+    '--print-template': 'print_template',
+}
+
+# The paths a build uses, with the defaults of `main.py build`. The daemon may run from another
+# directory, so the client always sends them, and any path given on the command line, absolute.
+# They are repeated rather than imported, since importing the build would defeat the thin client.
+BUILD_PATHS = {
+    'static': './static',
+    'content': './content/',
+    'template': './template.html',
+    'public': './public/',
+    'manifest_path': './.cache/build-manifest.json',
+}
+PATH_FIELDS = (*BUILD_PATHS, 'print_template')
+
+def send_request(message: dict, socket_path: str = DEFAULT_SOCKET_PATH, timeout: float = None) -> dict:
+    """
+    Sends one request to the build daemon and waits for its response.
+
+    The protocol is a single line of JSON in each direction over a Unix socket.
+
+    Args:
+        message (dict): The request, e.g. `{'command': 'build'}`.
+        socket_path (str, optional): The daemon's socket path. Defaults to `DEFAULT_SOCKET_PATH`.
+        timeout (float, optional): Seconds to wait for the response. Defaults to None (no limit).
+
+    Returns:
+        dict: The daemon's response.
+
+    Raises:
+        ConnectionError: If no daemon is listening on `socket_path`.
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(timeout)
+            client.connect(socket_path)
+            client.sendall(json.dumps(message).encode('utf-8') + b'\n')
+
+            # Read until the daemon closes the connection after its single response line.
+            chunks = []
+            while True:
+                chunk = client.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+    except (FileNotFoundError, ConnectionRefusedError) as e:
+        raise ConnectionError(f"No build daemon listening on '{socket_path}'") from e
+
+    return json.loads(b''.join(chunks))
+
+def run_in_process(message: dict) -> dict:
+    """
+    Handles a request without a daemon, importing the build only when it is actually needed.
+
+    Args:
+        message (dict): The request that the daemon would have handled.
+
+    Returns:
+        dict: A response in the same shape the daemon would have sent.
+    """
+    # The whole point of the thin client is to avoid these imports when a daemon is running.
+    from build_daemon import handle_request
+
+    return handle_request(message, None)
+
+def build_message(args: List[str]) -> dict:
+    """
+    Turns the options of the `build` command into a build request.
+
+    The options are those of `main.py build`, plus `--static`, `--content`, `--template` and
+    `--public` for the paths, so a build through the daemon matches a build run directly.
+
+    Args:
+        args (List[str]): The arguments after `build`, e.g. `['--incremental', '--minify']`.
+
+    Returns:
+        dict: The request, with every path absolute.
+
+    Raises:
+        ValueError: If an option is unknown or lacks its value.
+    """
+    message = {'command': 'build', **BUILD_PATHS}
+    args = list(args)
+    while args:
+        flag = args.pop(0)
+        if flag in BUILD_SWITCHES:
+            name, value = BUILD_SWITCHES[flag]
+            message[name] = value
+        elif flag in BUILD_VALUES and args:
+            message[BUILD_VALUES[flag]] = args.pop(0)
+        else:
+            raise ValueError(f"Unknown build option '{flag}'")
+
+    for name in PATH_FIELDS:
+        if name in message:
+            message[name] = os.path.abspath(message[name])
+    return message
+
+def main(argv: List[str] = None) -> int:
+    """
+    Command-line entry point: `build_client.py [--socket PATH] build [OPTIONS]|render FILE|status|shutdown`.
+
+    Requests go to the build daemon when one is running. `build` and `render` fall back to running
+    in this process otherwise, so scripts can call the client unconditionally.
+
+    Args:
+        argv (List[str], optional): The command-line arguments. Defaults to `sys.argv[1:]`.
+
+    Returns:
+        int: The process exit status.
+    """
+    args = list(sys.argv[1:] if argv is None else argv)
+
+    # Parse by hand; `argparse` alone costs a noticeable share of this client's startup time.
+    socket_path = DEFAULT_SOCKET_PATH
+    if len(args) >= 2 and args[0] == '--socket':
+        socket_path = args[1]
+        args = args[2:]
+
+    usage = 'usage: build_client.py [--socket PATH] build [OPTIONS]|render FILE|status|shutdown'
+    valid = args and (args[0] == 'build' or (args[0] == 'render') == (len(args) == 2))
+    if not valid or args[0] not in ('build', 'render', 'status', 'shutdown'):
+        print(usage, file=sys.stderr)
+        return 2
+
+    message = {'command': args[0]}
+    if args[0] == 'build':
+        try:
+            message = build_message(args[1:])
+        except ValueError as e:
+            print(f'{usage}\n{e}', file=sys.stderr)
+            return 2
+    elif args[0] == 'render':
+        # The daemon may run from another directory, so send absolute paths. Images are sized
+        # from the same static directory a build uses.
+        message['path'] = os.path.abspath(args[1])
+        message['static'] = os.path.abspath(BUILD_PATHS['static'])
+
+    try:
+        response = send_request(message, socket_path)
+    except ConnectionError:
+        if args[0] in ('status', 'shutdown'):
+            print('No build daemon running')
+            return 1
+        response = run_in_process(message)
+
+    if not response.get('ok'):
+        print(f"Error: {response.get('error')}", file=sys.stderr)
+        return 1
+
+    # `render` prints the page body so it can be piped into other tools; the rest print a summary.
+    if args[0] == 'render':
+        print(response['html'])
+    else:
+        print(json.dumps({k: v for k, v in response.items() if k != 'ok'}, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
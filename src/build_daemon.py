@@ -0,0 +1,182 @@
+import json
+import os
+import socketserver
+import threading
+import time
+
+from build_cache import BuildCache
+from build_client import DEFAULT_SOCKET_PATH, send_request
+from generate_page import fill_template, render_markdown, render_variant
+from highlight import HighlightCache
+from image_size import ImageSizer
+from main import build_site
+
+# The `build_site` options a build request may set, beyond the four directory and template paths.
+BUILD_OPTIONS = ('incremental', 'manifest_path', 'base_url', 'check', 'precompress', 'minify', 'critical_css',
+                 'fingerprint', 'image_sizes', 'fragments', 'highlight', 'print_template', 'node_trees')
+
+class BuildDaemon(socketserver.ThreadingUnixStreamServer):
+    """
+    A long-running build server listening on a Unix socket.
+
+    The daemon keeps the interpreter, the imported modules, the compiled regular expressions and a
+    shared `BuildCache` alive between requests, so repeated builds and single-file renders skip all
+    of the start-up work a fresh `python3 src/main.py` would pay for.
+
+    Attributes:
+        cache (BuildCache): The cache of templates, directory listings and rendered bodies.
+        highlighter (HighlightCache): The highlighted code blocks of single-file renders.
+        build_lock (threading.Lock): Serializes builds, since they all write to the same output directory.
+        started (float): The time the daemon started.
+        builds (int): The number of builds served.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str):
+        """
+        Initializes the daemon and binds its socket.
+
+        Args:
+            socket_path (str): The path of the Unix socket to listen on.
+        """
+        self.cache = BuildCache()
+        self.highlighter = HighlightCache()
+        self.build_lock = threading.Lock()
+        self.started = time.time()
+        self.builds = 0
+        super().__init__(socket_path, BuildRequestHandler)
+
+class BuildRequestHandler(socketserver.StreamRequestHandler):
+    """Reads one JSON request line from the client and writes one JSON response line back."""
+
+    def handle(self) -> None:
+        """Handles a single request."""
+        line = self.rfile.readline()
+        try:
+            message = json.loads(line)
+        except json.JSONDecodeError as e:
+            response = {'ok': False, 'error': f'Invalid request: {e}'}
+        else:
+            response = handle_request(message, self.server)
+
+        self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+        # Shut down from another thread: `shutdown` waits for the serve loop, which must not be blocked by us.
+        if response.get('ok') and message.get('command') == 'shutdown':
+            threading.Thread(target=self.server.shutdown).start()
+
+def handle_request(message: dict, daemon: BuildDaemon = None) -> dict:
+    """
+    Executes a build daemon request.
+
+    Supported commands are `build` (optionally with `static`, `content`, `template` and `public`
+    paths and any of the `BUILD_OPTIONS` of `build_site`), `render` (with a Markdown `path`, an
+    optional `template` and the `static`, `minify`, `highlight` and `image_sizes` options of a
+    build), `status` and `shutdown`. Relative paths are resolved against the
+    daemon's working directory, so clients send absolute ones.
+    Without a daemon the request runs against a fresh cache, which is how the client falls back
+    to an in-process build.
+
+    Args:
+        message (dict): The decoded request.
+        daemon (BuildDaemon, optional): The daemon whose caches to use. Defaults to None.
+
+    Returns:
+        dict: The response; `ok` is False and `error` describes the problem if the request failed.
+    """
+    cache = daemon.cache if daemon is not None else BuildCache()
+    command = message.get('command')
+
+    try:
+        if command == 'build':
+            started = time.perf_counter()
+
+            # Serialize builds so two clients never interleave writes to the same output directory.
+            lock = daemon.build_lock if daemon is not None else threading.Lock()
+            with lock:
+                pages = build_site(
+                    message.get('static', './static'),
+                    message.get('content', './content/'),
+                    message.get('template', './template.html'),
+                    message.get('public', './public/'),
+                    cache,
+                    **{name: message[name] for name in BUILD_OPTIONS if name in message},
+                )
+                if daemon is not None:
+                    daemon.builds += 1
+
+            return {'ok': True, 'pages': len(pages), 'seconds': round(time.perf_counter() - started, 4)}
+
+        if command == 'render':
+            with open(message['path'], 'r', encoding='utf-8') as md_file:
+                markdown_contents = md_file.read()
+
+            # Render with the options and cache variant a build uses, so the body is the one the
+            # built page gets and the two share cache entries.
+            minify = message.get('minify', False)
+            highlighter = None
+            if message.get('highlight', True):
+                highlighter = daemon.highlighter if daemon is not None else HighlightCache()
+            # A file rendered outside a site has no static directory, and no images to size.
+            static_dir = message.get('static', './static')
+            images = ImageSizer(static_dir) if message.get('image_sizes', True) and os.path.isdir(static_dir) else None
+            rendered = cache.render(markdown_contents,
+                                    lambda text: render_markdown(text, minify, None, images, highlighter),
+                                    render_variant(minify, None, images, highlighter))
+
+            # With a template the full page is returned; otherwise only the rendered body.
+            html_string = rendered.html
+            if message.get('template'):
+                template = cache.template(message['template'], minify=minify)
+                html_string = fill_template(template, rendered.title, html_string, rendered.slots)
+            return {'ok': True, 'title': rendered.title, 'html': html_string}
+
+        if command == 'status':
+            return {
+                'ok': True,
+                'pid': os.getpid(),
+                'uptime': round(time.time() - daemon.started, 1) if daemon is not None else 0,
+                'builds': daemon.builds if daemon is not None else 0,
+                'cache': cache.stats(),
+            }
+
+        if command == 'shutdown':
+            return {'ok': daemon is not None}
+
+        return {'ok': False, 'error': f"Unknown command '{command}'"}
+
+    except Exception as e:
+        return {'ok': False, 'error': str(e)}
+
+def run_daemon(socket_path: str = DEFAULT_SOCKET_PATH) -> None:
+    """
+    Runs the build daemon until it is asked to shut down or interrupted.
+
+    Args:
+        socket_path (str, optional): The path of the Unix socket. Defaults to `DEFAULT_SOCKET_PATH`.
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If another daemon is already listening on `socket_path`.
+    """
+    # A socket file left behind by a crashed daemon is stale; a live one means we must not start.
+    if os.path.exists(socket_path):
+        try:
+            send_request({'command': 'status'}, socket_path, timeout=1)
+        except (ConnectionError, OSError):
+            os.remove(socket_path)
+        else:
+            raise ValueError(f"A build daemon is already listening on '{socket_path}'")
+
+    with BuildDaemon(socket_path) as daemon:
+        print(f'Build daemon listening on {socket_path} (pid {os.getpid()})')
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.remove(socket_path)
+            print('Build daemon stopped')
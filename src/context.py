@@ -0,0 +1,261 @@
+import re
+from typing import TYPE_CHECKING, Dict, List, Optional, Set
+
+from enums import TextType
+from htmlnode import LeafNode, ParentNode
+
+if TYPE_CHECKING:
+    from highlight import HighlightCache
+    from image_size import ImageSizer
+
+# A word of searchable text; underscores count as word characters so `snake_case` stays one term.
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# Runs of characters that cannot appear in a URL slug.
+SLUG_PATTERN = re.compile(r'[^a-z0-9]+')
+
+def slugify(text: str) -> str:
+    """
+    Converts text into a lowercase, hyphen-separated URL slug.
+
+    Args:
+        text (str): The text to convert, e.g. `Middle Earth`.
+
+    Returns:
+        str: The slug, e.g. `middle-earth`.
+    """
+    return SLUG_PATTERN.sub('-', text.lower()).strip('-')
+
+class Heading:
+    """
+    An entry of a document's heading outline.
+
+    Attributes:
+        level (int): The heading level, from 1 to 6.
+        text (str): The heading's plain text, without inline Markdown.
+        id (str): The heading's unique `id` attribute.
+    """
+
+    def __init__(self, level: int, text: str, id: str):
+        """
+        Initializes a `Heading`.
+
+        Args:
+            level (int): The heading level, from 1 to 6.
+            text (str): The heading's plain text.
+            id (str): The heading's unique `id` attribute.
+        """
+        self.level = level
+        self.text = text
+        self.id = id
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Heading) and (self.level, self.text, self.id) == (other.level, other.text, other.id)
+
+    def __repr__(self) -> str:
+        return f"Heading({self.level}, {self.text!r}, {self.id!r})"
+
+class RenderContext:
+    """
+    Per-document state collected while a document is converted to HTML nodes.
+
+    One context travels through a single `markdown_to_html_node` call, so anything that needs to
+    know about the whole document, such as which heading IDs are taken, is gathered in the same pass
+    that builds the nodes instead of in a second traversal afterwards.
+
+    Attributes:
+        ids (Set[str]): The element IDs assigned so far.
+        outline (List[Heading]): The document's headings, in document order.
+        references (Dict[str, str]): The document's link reference definitions, mapping the
+            normalized label to the URL.
+        links (List[str]): The `href` of every link in the document, in document order.
+        images (List[str]): The `src` of every image in the document, in document order.
+        terms (Dict[str, List[int]]): The positions of each lowercase word of the document's text,
+            for the search index.
+        token_count (int): The number of words seen so far, i.e. the position of the next word.
+        image_sizes (Optional[ImageSizer]): Looks up the dimensions of static images; None leaves
+            image elements as they are.
+        image_count (int): The number of image elements built so far.
+        highlighter (Optional[HighlightCache]): Highlights fenced code blocks that name their
+            language; None leaves them as plain text.
+    """
+
+    def __init__(self, image_sizes: 'ImageSizer' = None, highlighter: 'HighlightCache' = None):
+        """
+        Initializes an empty context.
+
+        Args:
+            image_sizes (ImageSizer, optional): Looks up the dimensions of static images, which are
+                added to the document's image elements. Defaults to None.
+            highlighter (HighlightCache, optional): Highlights fenced code blocks. Defaults to None.
+        """
+        self.ids: Set[str] = set()
+        self.outline: List[Heading] = []
+        self.references: Dict[str, str] = {}
+        self.links: List[str] = []
+        self.images: List[str] = []
+        self.terms: Dict[str, List[int]] = {}
+        self.token_count = 0
+        self.image_sizes = image_sizes
+        self.image_count = 0
+        self.highlighter = highlighter
+
+    def define_reference(self, label: str, url: str) -> None:
+        """
+        Records a link reference definition; as in CommonMark, the first definition of a label wins.
+
+        Args:
+            label (str): The normalized label.
+            url (str): The URL the label refers to.
+        """
+        self.references.setdefault(label, url)
+
+    def record_links(self, text_nodes: list) -> None:
+        """
+        Records the URL of every link and image among a block's inline nodes, for the site's link
+        graph and the link checker.
+
+        Args:
+            text_nodes (list): The `TextNode` objects of one block of inline text.
+        """
+        for node in text_nodes:
+            if node.text_type is TextType.LINK:
+                self.links.append(node.url)
+            elif node.text_type is TextType.IMAGE:
+                self.images.append(node.url)
+
+    def record_terms(self, text_nodes: list) -> None:
+        """
+        Tokenizes the text of a block's inline nodes for the search index.
+
+        Words are read from the nodes the parser has already produced, so searchable text is
+        collected while the page renders instead of by stripping tags from the finished HTML.
+        Image alt text is not part of the visible text and is skipped.
+
+        Args:
+            text_nodes (list): The `TextNode` objects of one block of inline text.
+        """
+        for node in text_nodes:
+            if node.text_type is TextType.IMAGE or not node.text:
+                continue
+            for match in TOKEN_PATTERN.finditer(node.text.lower()):
+                self.terms.setdefault(match.group(), []).append(self.token_count)
+                self.token_count += 1
+
+    def decorate_image(self, node: LeafNode) -> None:
+        """
+        Adds intrinsic dimensions and lazy loading to an image element, in place.
+
+        With `width` and `height` known the browser reserves the image's space before it loads, so
+        the page does not reflow. Every image but the first is also loaded lazily and decoded off
+        the main thread; the first is usually above the fold and is left to load eagerly.
+
+        Args:
+            node (LeafNode): An HTML node of the document; nodes other than `<img>` are ignored.
+        """
+        if node.tag != 'img' or self.image_sizes is None:
+            return
+
+        size = self.image_sizes.size(node.props['src'])
+        if size is not None:
+            node.props['width'], node.props['height'] = str(size[0]), str(size[1])
+        if self.image_count > 0:
+            node.props['loading'] = 'lazy'
+            node.props['decoding'] = 'async'
+        self.image_count += 1
+
+    def unique_id(self, text: str) -> str:
+        """
+        Returns a slug for `text` that no other element of the document uses yet.
+
+        Repeated slugs get a numeric suffix, so two `## Usage` headings become `usage` and `usage-1`.
+
+        Args:
+            text (str): The text to derive the ID from.
+
+        Returns:
+            str: The unique ID, which is now reserved.
+        """
+        # Headings made only of punctuation or non-Latin text still need an ID.
+        base = slugify(text) or 'section'
+
+        candidate, suffix = base, 0
+        while candidate in self.ids:
+            suffix += 1
+            candidate = f'{base}-{suffix}'
+
+        self.ids.add(candidate)
+        return candidate
+
+    def add_heading(self, level: int, text: str) -> str:
+        """
+        Records a heading in the outline and assigns its ID.
+
+        Args:
+            level (int): The heading level, from 1 to 6.
+            text (str): The heading's plain text.
+
+        Returns:
+            str: The heading's unique ID.
+        """
+        heading_id = self.unique_id(text)
+        self.outline.append(Heading(level, text, heading_id))
+        return heading_id
+
+    def toc_html_node(self, min_level: int = 2, max_level: int = 6) -> Optional[ParentNode]:
+        """
+        Builds a nested list linking to the document's headings.
+
+        The page title is usually the only level-1 heading, so the table of contents starts at
+        level 2 by default. Skipped levels (an H4 directly under an H2) nest one level deeper.
+
+        Args:
+            min_level (int, optional): The shallowest heading level to include. Defaults to 2.
+            max_level (int, optional): The deepest heading level to include. Defaults to 6.
+
+        Returns:
+            Optional[ParentNode]: A `<ul>` element, or None if there are no headings to list.
+        """
+        headings = [heading for heading in self.outline if min_level <= heading.level <= max_level]
+        if not headings:
+            return None
+
+        # Each stack entry is the level of an open list and the items collected for it.
+        stack = [(headings[0].level, [])]
+        for heading in headings:
+            # Close lists deeper than this heading, attaching each to the last item of its parent.
+            while heading.level < stack[-1][0] and len(stack) > 1:
+                close_list(stack)
+            # Open a nested list under the previous item when this heading goes deeper.
+            if heading.level > stack[-1][0] and stack[-1][1]:
+                stack.append((heading.level, []))
+            stack[-1][1].append([LeafNode('a', heading.text, {'href': f'#{heading.id}'})])
+
+        while len(stack) > 1:
+            close_list(stack)
+        return ParentNode('ul', [ParentNode('li', item) for item in stack[0][1]])
+
+    def toc_html(self, min_level: int = 2, max_level: int = 6, minify: bool = False) -> str:
+        """
+        Returns the table of contents as HTML, for the `{{ TOC }}` template slot.
+
+        Args:
+            min_level (int, optional): The shallowest heading level to include. Defaults to 2.
+            max_level (int, optional): The deepest heading level to include. Defaults to 6.
+            minify (bool, optional): Whether to serialize the list minified. Defaults to False.
+
+        Returns:
+            str: The `<ul>` element, or an empty string if there are no headings to list.
+        """
+        node = self.toc_html_node(min_level, max_level)
+        return node.to_html(minify) if node is not None else ''
+
+def close_list(stack: list) -> None:
+    """
+    Closes the innermost open list of a table of contents, nesting it in its parent's last item.
+
+    Args:
+        stack (list): The open lists, as `(level, items)` pairs.
+    """
+    _, items = stack.pop()
+    stack[-1][1][-1].append(ParentNode('ul', [ParentNode('li', item) for item in items]))
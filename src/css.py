@@ -0,0 +1,461 @@
+import hashlib
+import os
+import posixpath
+import re
+from typing import AbstractSet, Dict, FrozenSet, List, Mapping, NamedTuple, Optional, Set, Tuple
+
+from build_cache import BuildCache
+from filesystem import DiskFileSystem, FileSystem
+from template import Template
+
+# Quoted strings, which are copied verbatim, and comments, which are dropped.
+CSS_STRING_PATTERN = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'')
+CSS_STRING_OR_COMMENT_PATTERN = re.compile(rf'({CSS_STRING_PATTERN.pattern})|/\*.*?\*/', re.DOTALL)
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# Punctuation that never needs the whitespace around it. `:` is not included because a space in
+# front of it is a descendant combinator in a selector such as `article :hover`.
+PUNCTUATION_PATTERN = re.compile(r' ?([{};,>]) ?')
+
+# Parenthesized arguments and attribute selectors, whose contents are not type selectors.
+SELECTOR_ARGUMENT_PATTERN = re.compile(r'\([^()]*\)|\[[^\]]*\]')
+
+# A type selector: a name at the start of a compound selector, i.e. after a combinator.
+TYPE_SELECTOR_PATTERN = re.compile(r'(?:^|[ >+~])([a-zA-Z][\w-]*)')
+
+# At-rules whose block holds ordinary rules, which are filtered like top-level rules.
+CONDITIONAL_AT_RULES = ('@media', '@supports')
+
+# The opening tags of a piece of markup, e.g. the template's `<html>`, `<head>` and `<body>`.
+MARKUP_TAG_PATTERN = re.compile(r'<([a-zA-Z][a-zA-Z0-9-]*)')
+
+# A `<link>` element of a template, and the attributes inside it.
+LINK_TAG_PATTERN = re.compile(r'<link\b[^>]*>', re.IGNORECASE)
+ATTRIBUTE_PATTERN = re.compile(r'([\w-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+))')
+
+# A `url(...)` reference in a stylesheet, with or without quotes.
+CSS_URL_PATTERN = re.compile(r'url\(\s*([\'"]?)([^\'")\s]+)\1\s*\)')
+
+# The placeholder a stylesheet `<link>` is replaced with when its critical rules are inlined.
+STYLESHEETS_SLOT = 'Stylesheets'
+
+def minify_css(text: str) -> str:
+    """
+    Removes the comments and insignificant whitespace of a stylesheet.
+
+    Args:
+        text (str): The stylesheet.
+
+    Returns:
+        str: The minified stylesheet. Quoted strings are left as they are.
+    """
+    # A comment still separates what is around it, so it becomes a space rather than nothing.
+    text = CSS_STRING_OR_COMMENT_PATTERN.sub(lambda match: match.group(1) or ' ', text)
+
+    parts = []
+    position = 0
+    for match in CSS_STRING_PATTERN.finditer(text):
+        parts.append(minify_css_code(text[position:match.start()]))
+        parts.append(match.group(0))
+        position = match.end()
+    parts.append(minify_css_code(text[position:]))
+    return ''.join(parts).strip()
+
+def minify_css_code(code: str) -> str:
+    """
+    Minifies stylesheet text that contains no strings or comments.
+
+    Args:
+        code (str): The text between two strings.
+
+    Returns:
+        str: The text with whitespace collapsed, removed around punctuation and after colons,
+            and the last semicolon of each declaration block dropped.
+    """
+    code = WHITESPACE_PATTERN.sub(' ', code)
+    code = PUNCTUATION_PATTERN.sub(r'\1', code)
+    return code.replace(': ', ':').replace(';}', '}')
+
+def rewrite_css_urls(css: str, css_url: str, urls: Mapping[str, str]) -> str:
+    """
+    Points the `url(...)` references of a stylesheet at fingerprinted files.
+
+    Args:
+        css (str): The stylesheet.
+        css_url (str): The stylesheet's own URL, which relative references are resolved against.
+        urls (Mapping[str, str]): The fingerprinted URL of each asset, keyed by original URL.
+
+    Returns:
+        str: The stylesheet with every reference to a fingerprinted asset replaced.
+    """
+    def replace(match: re.Match) -> str:
+        reference = match.group(2)
+        if reference.startswith(('data:', '#')) or '://' in reference:
+            return match.group(0)
+        resolved = posixpath.normpath(posixpath.join(posixpath.dirname(css_url), reference))
+        if resolved not in urls:
+            return match.group(0)
+        return f'url({match.group(1)}{urls[resolved]}{match.group(1)})'
+
+    return CSS_URL_PATTERN.sub(replace, css)
+
+class CssRule(NamedTuple):
+    """
+    One rule of a minified stylesheet.
+
+    Attributes:
+        prelude (str): Everything before the block, e.g. `pre code` or `@media (max-width:600px)`.
+        body (Optional[str]): The declarations between the braces, or None for a statement such
+            as `@import url(x.css);` or a conditional at-rule.
+        children (Optional[List[CssRule]]): The rules inside an `@media` or `@supports` block, or None.
+    """
+    prelude: str
+    body: Optional[str]
+    children: Optional[List['CssRule']]
+
+def find_outside_strings(css: str, characters: str, start: int) -> int:
+    """
+    Returns the index of the first of `characters` at or after `start` that is not inside a string.
+
+    Args:
+        css (str): A minified stylesheet.
+        characters (str): The characters to look for.
+        start (int): Where to start looking.
+
+    Returns:
+        int: The index, or `len(css)` if none is found.
+    """
+    i = start
+    while i < len(css):
+        character = css[i]
+        if character in '"\'':
+            # Skip to the closing quote, honouring escapes.
+            i += 1
+            while i < len(css) and css[i] != character:
+                i += 2 if css[i] == '\\' else 1
+        elif character in characters:
+            return i
+        i += 1
+    return len(css)
+
+def parse_rules(css: str) -> List[CssRule]:
+    """
+    Splits a minified stylesheet into its rules.
+
+    Args:
+        css (str): The stylesheet, as returned by `minify_css`.
+
+    Returns:
+        List[CssRule]: The rules in stylesheet order.
+    """
+    rules: List[CssRule] = []
+    position = 0
+    while position < len(css):
+        end = find_outside_strings(css, '{;', position)
+        prelude = css[position:end]
+        if end == len(css) or css[end] == ';':
+            if prelude:
+                rules.append(CssRule(prelude + ';', None, None))
+            position = end + 1
+            continue
+
+        # Find the brace closing this block, stepping over nested blocks.
+        depth = 1
+        close = end
+        while depth and close < len(css):
+            close = find_outside_strings(css, '{}', close + 1)
+            if close < len(css):
+                depth += 1 if css[close] == '{' else -1
+
+        inner = css[end + 1:close]
+        if prelude.startswith(CONDITIONAL_AT_RULES):
+            rules.append(CssRule(prelude, None, parse_rules(inner)))
+        else:
+            rules.append(CssRule(prelude, inner, None))
+        position = close + 1
+    return rules
+
+def split_selectors(prelude: str) -> List[str]:
+    """
+    Splits a selector list at its top-level commas, so `:is(h1,h2) a,b` gives two selectors.
+
+    Args:
+        prelude (str): The selector list of a rule.
+
+    Returns:
+        List[str]: The individual selectors.
+    """
+    selectors = []
+    depth = 0
+    start = 0
+    for i, character in enumerate(prelude):
+        if character in '([':
+            depth += 1
+        elif character in ')]':
+            depth -= 1
+        elif character == ',' and depth == 0:
+            selectors.append(prelude[start:i])
+            start = i + 1
+    selectors.append(prelude[start:])
+    return selectors
+
+def selector_tags(selector: str) -> Set[str]:
+    """
+    Returns the element names a selector requires, e.g. `{'pre', 'code'}` for `pre code`.
+
+    A selector made only of classes, IDs or pseudo-classes requires no element, so it is always
+    kept. Names inside `:not(...)` and attribute selectors are ignored.
+
+    Args:
+        selector (str): One minified selector.
+
+    Returns:
+        Set[str]: The lowercase element names.
+    """
+    previous = None
+    while previous != selector:
+        previous, selector = selector, SELECTOR_ARGUMENT_PATTERN.sub('', selector)
+    return {name.lower() for name in TYPE_SELECTOR_PATTERN.findall(selector)}
+
+def filter_rules(rules: List[CssRule], tags: AbstractSet[str]) -> str:
+    """
+    Serializes the rules that can apply to a page made of the given elements.
+
+    Args:
+        rules (List[CssRule]): The stylesheet's rules.
+        tags (AbstractSet[str]): The names of the elements the page contains.
+
+    Returns:
+        str: The matching rules, minified. Selectors of a list that cannot match are left out,
+            and at-rules other than `@media` and `@supports`, such as `@font-face`, are always kept.
+    """
+    critical = []
+    for rule in rules:
+        if rule.children is not None:
+            inner = filter_rules(rule.children, tags)
+            if inner:
+                critical.append(f'{rule.prelude}{{{inner}}}')
+        elif rule.body is None:
+            critical.append(rule.prelude)
+        elif rule.prelude.startswith('@'):
+            critical.append(f'{rule.prelude}{{{rule.body}}}')
+        else:
+            selectors = [selector for selector in split_selectors(rule.prelude) if selector_tags(selector) <= tags]
+            if selectors:
+                critical.append(f'{",".join(selectors)}{{{rule.body}}}')
+    return ''.join(critical)
+
+class Stylesheet:
+    """
+    A stylesheet parsed once, with its critical rules computed once per set of page elements.
+
+    Most pages of a site are made of the same few elements, so the critical CSS of each distinct
+    element set is memoized.
+
+    Attributes:
+        digest (str): The SHA-256 of the original stylesheet.
+        minified (str): The minified stylesheet.
+        rules (List[CssRule]): Its rules.
+    """
+
+    def __init__(self, source: str):
+        """
+        Minifies and parses a stylesheet.
+
+        Args:
+            source (str): The stylesheet.
+        """
+        self.digest = hashlib.sha256(source.encode('utf-8')).hexdigest()
+        self.minified = minify_css(source)
+        self.rules = parse_rules(self.minified)
+        self._critical: Dict[FrozenSet[str], str] = {}
+
+    def critical(self, tags: AbstractSet[str]) -> str:
+        """
+        Returns the rules a page made of the given elements needs for its first paint.
+
+        Args:
+            tags (AbstractSet[str]): The names of the elements the page contains.
+
+        Returns:
+            str: The minified critical rules.
+        """
+        key = frozenset(tags)
+        critical = self._critical.get(key)
+        if critical is None:
+            critical = self._critical[key] = filter_rules(self.rules, key)
+        return critical
+
+def markup_tags(markup: str) -> Set[str]:
+    """
+    Returns the names of the elements opened in a piece of markup, such as a template.
+
+    Args:
+        markup (str): The markup.
+
+    Returns:
+        Set[str]: The lowercase element names.
+    """
+    return {name.lower() for name in MARKUP_TAG_PATTERN.findall(markup)}
+
+class StyleInliner:
+    """
+    Minifies the site's stylesheets and inlines the rules each page needs into its `<head>`.
+
+    Every `<link rel="stylesheet">` of the template that points at a stylesheet in `static/` is
+    replaced by a `{{ Stylesheets }}` placeholder. Each page fills it with a `<style>` element
+    holding only the rules that can match the elements it contains, followed by the stylesheet
+    itself loaded without blocking rendering. Stylesheets are parsed once per build and, with a
+    cache, once per content hash across builds.
+
+    Attributes:
+        static_dir (str): The directory of static assets the stylesheets are read from.
+        fs (FileSystem): The filesystem to read from and write to.
+        stylesheets (Dict[str, Stylesheet]): Every stylesheet below `static_dir`, keyed by URL, e.g. `/index.css`.
+    """
+
+    def __init__(self, static_dir: str, fs: FileSystem = None, cache: BuildCache = None):
+        """
+        Reads and parses every stylesheet below the static directory.
+
+        Args:
+            static_dir (str): The directory of static assets.
+            fs (FileSystem, optional): The filesystem to read from. Defaults to the real disk.
+            cache (BuildCache, optional): A cache shared between builds, which keeps parsed
+                stylesheets by content hash. Defaults to None.
+        """
+        self.static_dir = static_dir
+        self.fs = fs if fs is not None else DiskFileSystem()
+        self.stylesheets: Dict[str, Stylesheet] = {}
+        self._templates: Dict[int, Tuple[Template, Template, FrozenSet[str], List[str]]] = {}
+
+        stack = [(static_dir, '/')]
+        while stack:
+            dir_path, url_prefix = stack.pop()
+            for name in sorted(self.fs.listdir(dir_path)):
+                path = os.path.join(dir_path, name)
+                if self.fs.isdir(path):
+                    stack.append((path, f'{url_prefix}{name}/'))
+                elif name.endswith('.css'):
+                    source = self.fs.read_text(path)
+                    if cache is not None:
+                        self.stylesheets[url_prefix + name] = cache.render(source, Stylesheet, 'stylesheet')
+                    else:
+                        self.stylesheets[url_prefix + name] = Stylesheet(source)
+
+    def signature(self) -> str:
+        """
+        Returns a hash of every stylesheet, which changes whenever the inlined rules may change.
+
+        Returns:
+            str: The SHA-256 over each stylesheet's URL and content hash.
+        """
+        digest = hashlib.sha256()
+        for url, stylesheet in sorted(self.stylesheets.items()):
+            digest.update(f'{url}\0{stylesheet.digest}\0'.encode('utf-8'))
+        return digest.hexdigest()
+
+    def write_minified(self, public_dir: str) -> List[str]:
+        """
+        Replaces the copies of the stylesheets in the output directory with their minified form.
+
+        Args:
+            public_dir (str): The output directory the static files were copied to.
+
+        Returns:
+            List[str]: The paths that were rewritten; copies that are already minified are left alone.
+        """
+        written = []
+        for url, stylesheet in sorted(self.stylesheets.items()):
+            destination = os.path.join(public_dir, url.lstrip('/'))
+            data = stylesheet.minified.encode('utf-8')
+            if self.fs.isfile(destination) and self.fs.read_bytes(destination) == data:
+                continue
+            print(f"Minifying stylesheet {destination}")
+            self.fs.write_bytes(destination, data)
+            written.append(destination)
+        return written
+
+    def compile(self, template: Template) -> Tuple[Template, FrozenSet[str], List[str]]:
+        """
+        Replaces a template's stylesheet links with the `{{ Stylesheets }}` placeholder.
+
+        Args:
+            template (Template): The compiled template.
+
+        Returns:
+            Tuple[Template, FrozenSet[str], List[str]]: The rewritten template, the elements the
+                template itself contains, and the URLs of the stylesheets it links to.
+        """
+        cached = self._templates.get(id(template))
+        if cached is not None and cached[0] is template:
+            return cached[1], cached[2], cached[3]
+
+        urls: List[str] = []
+
+        def replace_link(match: re.Match) -> str:
+            attributes = {
+                name.lower(): next(value for value in values if value is not None)
+                for name, *values in ATTRIBUTE_PATTERN.findall(match.group(0))
+            }
+            url = attributes.get('href', '')
+            if attributes.get('rel', '').lower() != 'stylesheet' or url not in self.stylesheets:
+                return match.group(0)
+            urls.append(url)
+            # Every stylesheet is inlined at the position of the first one, keeping their order.
+            return f'{{{{ {STYLESHEETS_SLOT} }}}}' if len(urls) == 1 else ''
+
+        source = LINK_TAG_PATTERN.sub(replace_link, template.source)
+        compiled = Template(source, template.minify)
+        tags = frozenset(markup_tags(''.join(compiled.segments[::2])))
+
+        # Holding on to the original template keeps its `id` from being reused by another one.
+        self._templates[id(template)] = (template, compiled, tags, urls)
+        return compiled, tags, urls
+
+    def head_html(self, urls: List[str], tags: AbstractSet[str], asset_urls: Mapping[str, str] = None) -> str:
+        """
+        Renders the value of the `{{ Stylesheets }}` slot for a page.
+
+        Args:
+            urls (List[str]): The stylesheets the template links to, in order.
+            tags (AbstractSet[str]): The names of the elements the page contains, including the template's.
+            asset_urls (Mapping[str, str], optional): The URL each stylesheet is published at, keyed
+                by its URL in `static/`, when assets are fingerprinted. Defaults to None.
+
+        Returns:
+            str: A `<style>` element with the critical rules, and for each stylesheet a `<link>`
+                that preloads it and applies it once loaded, with a `<noscript>` fallback.
+        """
+        if not urls:
+            return ''
+        if asset_urls:
+            # Inlined rules must reference the fingerprinted files just like the published stylesheet.
+            critical = ''.join(rewrite_css_urls(self.stylesheets[url].critical(tags), url, asset_urls) for url in urls)
+            urls = [asset_urls.get(url, url) for url in urls]
+        else:
+            critical = ''.join(self.stylesheets[url].critical(tags) for url in urls)
+        loaders = ''.join(
+            f'<link rel="preload" href="{url}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">'
+            f'<noscript><link href="{url}" rel="stylesheet"></noscript>'
+            for url in urls
+        )
+        return f'<style>{critical}</style>{loaders}'
+
+    def apply(self, template: Template, tags: AbstractSet[str],
+              asset_urls: Mapping[str, str] = None) -> Tuple[Template, str]:
+        """
+        Prepares a template for one page.
+
+        Args:
+            template (Template): The compiled template.
+            tags (AbstractSet[str]): The names of the elements of the page's HTML tree.
+            asset_urls (Mapping[str, str], optional): The URL each stylesheet is published at,
+                when assets are fingerprinted. Defaults to None.
+
+        Returns:
+            Tuple[Template, str]: The rewritten template and the value of its `{{ Stylesheets }}` slot.
+        """
+        compiled, template_tags, urls = self.compile(template)
+        return compiled, self.head_html(urls, template_tags | tags, asset_urls)
@@ -0,0 +1,439 @@
+import itertools
+import os
+import queue
+import threading
+import urllib.parse
+from http import HTTPStatus
+from typing import Dict, List, Optional, Tuple
+
+from document import Document
+from generate_page import fill_template
+from highlight import HighlightCache
+from image_size import ImageSizer
+from live_reload import LIVE_RELOAD_SCRIPT, LiveReloadHub, inject_script
+from serve import PreviewRequestHandler, PreviewServer, StaticFile, normalize_url_path
+
+class RenderError(Exception):
+    """Raised when a page requested from the development server cannot be rendered."""
+
+class RouteIndex:
+    """
+    Maps request paths to Markdown source files under the content directory.
+
+    The index is built lazily: nothing is scanned at startup, and each route is resolved the first
+    time it is requested by checking the handful of source paths it could map to. Resolved routes
+    are remembered, so a site with tens of thousands of pages starts instantly and only pays for
+    the pages that are actually viewed.
+
+    Attributes:
+        content_dir (str): The directory containing the Markdown sources.
+    """
+
+    def __init__(self, content_dir: str):
+        """
+        Initializes an empty route index.
+
+        Args:
+            content_dir (str): The directory containing the Markdown sources.
+        """
+        self.content_dir = os.path.abspath(content_dir)
+        self._routes: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, url_path: str) -> Optional[str]:
+        """
+        Returns the Markdown source for a normalized URL path, or None if it is not a page.
+
+        The mapping mirrors `generate_page_recursive`: `content/a/b.md` is published as `/a/b.html`,
+        and `content/a/index.md` is published as `/a/index.html`, which is also served for `/a/`.
+
+        Args:
+            url_path (str): A normalized URL path such as `/majesty/`.
+
+        Returns:
+            Optional[str]: The path of the Markdown file, or None if no source exists.
+        """
+        with self._lock:
+            source = self._routes.get(url_path)
+
+        # Revalidate remembered routes; a deleted source must stop being served.
+        if source is not None and os.path.isfile(source):
+            return source
+
+        for candidate in self.candidates(url_path):
+            if os.path.isfile(candidate):
+                with self._lock:
+                    self._routes[url_path] = candidate
+                return candidate
+
+        # Forget routes whose sources disappeared, and do not remember misses so new pages show up.
+        with self._lock:
+            self._routes.pop(url_path, None)
+        return None
+
+    def candidates(self, url_path: str) -> Tuple[str, ...]:
+        """
+        Lists the source paths a URL path could be rendered from.
+
+        Args:
+            url_path (str): A normalized URL path.
+
+        Returns:
+            Tuple[str, ...]: The candidate Markdown paths, most specific first.
+        """
+        parts = [part for part in url_path.split('/') if part]
+
+        # Directory URLs map to the directory's `index.md`.
+        if url_path.endswith('/'):
+            return (os.path.join(self.content_dir, *parts, 'index.md'),)
+
+        # Generated pages keep their `.html` extension in the URL.
+        if parts and parts[-1].endswith('.html'):
+            return (os.path.join(self.content_dir, *parts[:-1], parts[-1][:-len('.html')] + '.md'),)
+
+        return ()
+
+    def is_section(self, url_path: str) -> bool:
+        """
+        Checks whether a slashless URL path names a content directory with an `index.md`.
+
+        Args:
+            url_path (str): A normalized URL path without a trailing slash.
+
+        Returns:
+            bool: True if `url_path + '/'` would resolve to a page.
+        """
+        parts = [part for part in url_path.split('/') if part]
+        return os.path.isfile(os.path.join(self.content_dir, *parts, 'index.md'))
+
+class CachedPage:
+    """
+    A page rendered by the development server, together with what it was rendered from.
+
+    Attributes:
+        source_mtime (int): The `mtime_ns` of the Markdown source when the page was rendered.
+        template_mtime (int): The `mtime_ns` of the template when the page was rendered.
+        file (StaticFile): The complete page, ready to be served.
+        title (str): The page title.
+        blocks (List[str]): The serialized top-level blocks of the page body, used for live reload diffs.
+        version (int): A number that increases every time any page is rendered.
+        slots (Dict[str, str]): The template slots filled outside the body, such as the `TOC`.
+    """
+
+    def __init__(self, source_mtime: int, template_mtime: int, file: StaticFile, title: str, blocks: List[str], version: int,
+                 slots: Dict[str, str] = None):
+        """
+        Initializes a `CachedPage`.
+
+        Args:
+            source_mtime (int): The `mtime_ns` of the Markdown source.
+            template_mtime (int): The `mtime_ns` of the template.
+            file (StaticFile): The complete page.
+            title (str): The page title.
+            blocks (List[str]): The serialized top-level blocks of the page body.
+            version (int): The render version.
+            slots (Dict[str, str], optional): The template slots filled outside the body. Defaults to None.
+        """
+        self.source_mtime = source_mtime
+        self.template_mtime = template_mtime
+        self.file = file
+        self.title = title
+        self.blocks = blocks
+        self.version = version
+        self.slots = slots or {}
+
+class PageCache:
+    """
+    Renders pages on demand and keeps the results in memory.
+
+    Each cached page remembers the modification times of its source and of the template it was
+    rendered with. A cached entry is reused until either file changes, so repeat views cost two
+    `os.stat` calls and nothing is ever written to disk.
+
+    In live mode the page body is tagged with its render version and the live reload client
+    script is injected, so the browser can apply block-level patches pushed by `LiveReloadHub`.
+
+    Pages are rendered with the same highlighter and image sizer as a build, so the preview shows
+    the same code and image markup. Both are kept for the life of the cache, so a code block or an
+    image is only highlighted or measured once however often its page is rendered again.
+
+    Attributes:
+        template_path (str): The path of the HTML template used for every page.
+        live (bool): Whether pages are rendered for live reload.
+        highlighter (Optional[HighlightCache]): Highlights fenced code blocks, or None.
+        images (Optional[ImageSizer]): Sizes static images and loads them lazily, or None.
+    """
+
+    def __init__(self, template_path: str, live: bool = False, highlighter: HighlightCache = None,
+                 images: ImageSizer = None):
+        """
+        Initializes an empty page cache.
+
+        Args:
+            template_path (str): The path of the HTML template used for every page.
+            live (bool, optional): Whether to render pages for live reload. Defaults to False.
+            highlighter (HighlightCache, optional): Highlights fenced code blocks that name their
+                language. Defaults to None.
+            images (ImageSizer, optional): Adds the dimensions of static images and lazy loading
+                to the pages' images. Defaults to None.
+        """
+        self.template_path = template_path
+        self.live = live
+        self.highlighter = highlighter
+        self.images = images
+        self._pages: Dict[str, CachedPage] = {}
+        self._template: Tuple[int, str] = (-1, '')
+        self._versions = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def get(self, source_path: str) -> CachedPage:
+        """
+        Returns the rendered page for a Markdown source, rendering it if it is missing or stale.
+
+        Args:
+            source_path (str): The path of the Markdown source.
+
+        Returns:
+            CachedPage: The rendered page, whose `file` has its ETag and gzip variant precomputed.
+
+        Raises:
+            RenderError: If the page cannot be rendered (e.g. it has no H1 heading).
+        """
+        source_mtime = os.stat(source_path).st_mtime_ns
+        template_mtime, template_contents = self.template()
+
+        with self._lock:
+            cached = self._pages.get(source_path)
+        if cached is not None and (cached.source_mtime, cached.template_mtime) == (source_mtime, template_mtime):
+            return cached
+
+        with open(source_path, 'r', encoding='utf-8') as md_file:
+            markdown_contents = md_file.read()
+
+        # Render outside the lock so that concurrent requests for different pages proceed in parallel.
+        try:
+            document = Document(markdown_contents, image_sizes=self.images, highlighter=self.highlighter)
+        except Exception as e:
+            raise RenderError(f"{source_path}: {e}") from e
+        if document.title is None:
+            raise RenderError(f"{source_path}: Markdown does not contain a title / H1 heading")
+        title = document.title
+
+        # Serialize the top-level blocks individually; joined, they are exactly `document.body`'s contents.
+        blocks = [child.to_html() for child in document.node.children] if document.node is not None else []
+        slots = document.slots()
+        version = next(self._versions)
+
+        if self.live:
+            content = f'<div data-live-root data-live-version="{version}">{"".join(blocks)}</div>'
+            html = inject_script(fill_template(template_contents, title, content, slots), LIVE_RELOAD_SCRIPT)
+        else:
+            html = fill_template(template_contents, title, f'<div>{"".join(blocks)}</div>', slots)
+
+        file = StaticFile(html.encode('utf-8'), 'text/html; charset=utf-8', max(source_mtime, template_mtime))
+        page = CachedPage(source_mtime, template_mtime, file, title, blocks, version, slots)
+
+        with self._lock:
+            self._pages[source_path] = page
+        return page
+
+    def template(self) -> Tuple[int, str]:
+        """
+        Returns the template's modification time and contents, rereading it only when it changed.
+
+        Returns:
+            Tuple[int, str]: The template's `mtime_ns` and its contents.
+        """
+        mtime = os.stat(self.template_path).st_mtime_ns
+
+        with self._lock:
+            if self._template[0] == mtime:
+                return self._template
+
+        with open(self.template_path, 'r', encoding='utf-8') as template_file:
+            template = (mtime, template_file.read())
+
+        with self._lock:
+            self._template = template
+        return template
+
+class DevRequestHandler(PreviewRequestHandler):
+    """
+    Serves rendered pages from the `PageCache` and everything else straight from the static directory.
+
+    Conditional requests, compression and range handling are inherited from `PreviewRequestHandler`,
+    so rendered pages get the same ETag and gzip behaviour as a built site. When live reload is
+    enabled, `/__live__?page=<path>` opens the Server-Sent Events stream for an open page.
+    """
+
+    # How long an idle event stream waits before sending a keep-alive comment.
+    heartbeat_interval = 15
+
+    def do_GET(self) -> None:
+        """Handles a GET request, routing live reload subscriptions to `stream_events`."""
+        if self.server.live_hub is not None and urllib.parse.urlsplit(self.path).path == '/__live__':
+            self.stream_events()
+            return
+        super().do_GET()
+
+    def stream_events(self) -> None:
+        """
+        Streams live reload events for the page named in the `page` query parameter.
+
+        The response has no length, so the connection is closed when the stream ends; the browser's
+        `EventSource` reconnects by itself.
+        """
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        url_path = normalize_url_path(query.get('page', ['/'])[0])
+        source_path = self.server.route_index.resolve(url_path) if url_path is not None else None
+        if source_path is None:
+            self.send_error(HTTPStatus.NOT_FOUND, 'Page not found')
+            return
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        hub: LiveReloadHub = self.server.live_hub
+        events = hub.subscribe(source_path)
+        try:
+            while True:
+                try:
+                    self.wfile.write(events.get(timeout=self.heartbeat_interval))
+                except queue.Empty:
+                    # A comment line keeps proxies from closing the idle stream and detects dead clients.
+                    self.wfile.write(b': ping\n\n')
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            hub.unsubscribe(source_path, events)
+
+    def resolve(self) -> Tuple[Optional[StaticFile], Optional[str]]:
+        """
+        Resolves the request path to a rendered page, a static file or a redirect target.
+
+        Returns:
+            Tuple[Optional[StaticFile], Optional[str]]: The file to serve (or None) and the location
+            to redirect to (or None).
+        """
+        url_path = normalize_url_path(self.path)
+        if url_path is None:
+            return None, None
+
+        # Pages take precedence over static files, matching the build where pages are written last.
+        source_path = self.server.route_index.resolve(url_path)
+        if source_path is not None:
+            return self.server.page_cache.get(source_path).file, None
+
+        # `/majesty/index.html` is the same page as `/majesty/`.
+        if url_path.endswith('/index.html'):
+            source_path = self.server.route_index.resolve(url_path[:-len('index.html')])
+            if source_path is not None:
+                return self.server.page_cache.get(source_path).file, None
+
+        # Redirect `/majesty` to `/majesty/` so relative links inside the page resolve correctly.
+        if not url_path.endswith('/') and self.server.route_index.is_section(url_path):
+            query = urllib.parse.urlsplit(self.path).query
+            return None, url_path + '/' + (f'?{query}' if query else '')
+
+        return super().resolve()
+
+    def send_file(self, include_body: bool) -> None:
+        """
+        Sends the response for the current request, reporting render failures as a 500 error.
+
+        Args:
+            include_body (bool): Whether to write the response body (False for HEAD requests).
+        """
+        try:
+            super().send_file(include_body)
+        except RenderError as e:
+            # Rendering errors are the author's Markdown mistakes; show them instead of dropping the connection.
+            self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR, f'Error rendering page: {e}')
+
+class DevServer(PreviewServer):
+    """
+    A preview server that renders Markdown pages on first request instead of serving a built site.
+
+    Static files are served directly from the static directory, and rendered pages are held in
+    memory, so the server starts immediately and never writes to `public/`.
+
+    Attributes:
+        route_index (RouteIndex): The lazily built mapping from URL paths to Markdown sources.
+        page_cache (PageCache): The in-memory cache of rendered pages.
+        live_hub (Optional[LiveReloadHub]): The live reload hub, or None if live reload is disabled.
+    """
+
+    def __init__(self, address: Tuple[str, int], content_dir: str, template_path: str, static_dir: str,
+                 handler_class: type = DevRequestHandler, live_reload: bool = False, highlight: bool = True,
+                 image_sizes: bool = True):
+        """
+        Initializes the development server.
+
+        Args:
+            address (Tuple[str, int]): The `(host, port)` pair to bind to.
+            content_dir (str): The directory containing the Markdown sources.
+            template_path (str): The path of the HTML template.
+            static_dir (str): The directory of static assets served as-is.
+            handler_class (type, optional): The request handler class. Defaults to `DevRequestHandler`.
+            live_reload (bool, optional): Whether to push page and stylesheet changes to open browsers.
+                Defaults to False.
+            highlight (bool, optional): Whether to syntax highlight fenced code blocks, as a build
+                does by default. Defaults to True.
+            image_sizes (bool, optional): Whether to add image dimensions and lazy loading, as a
+                build does by default. Defaults to True.
+        """
+        self.route_index = RouteIndex(content_dir)
+        highlighter = HighlightCache() if highlight else None
+        images = ImageSizer(static_dir) if image_sizes else None
+        self.page_cache = PageCache(template_path, live_reload, highlighter, images)
+        self.live_hub = LiveReloadHub(self.page_cache, static_dir) if live_reload else None
+        super().__init__(address, static_dir, handler_class)
+
+    def server_close(self) -> None:
+        """Stops the live reload watcher along with the server."""
+        if self.live_hub is not None:
+            self.live_hub.stop()
+        super().server_close()
+
+def serve_dev(content_dir: str = './content', template_path: str = './template.html', static_dir: str = './static',
+              host: str = '', port: int = 8888, live_reload: bool = True, highlight: bool = True,
+              image_sizes: bool = True) -> None:
+    """
+    Runs the on-demand rendering development server until interrupted.
+
+    Args:
+        content_dir (str, optional): The directory containing the Markdown sources. Defaults to `./content`.
+        template_path (str, optional): The path of the HTML template. Defaults to `./template.html`.
+        static_dir (str, optional): The directory of static assets. Defaults to `./static`.
+        host (str, optional): The interface to bind to. Defaults to '' (all interfaces).
+        port (int, optional): The port to listen on. Defaults to 8888.
+        live_reload (bool, optional): Whether to push changes to open browsers. Defaults to True.
+        highlight (bool, optional): Whether to syntax highlight fenced code blocks. Defaults to True.
+        image_sizes (bool, optional): Whether to add image dimensions and lazy loading. Defaults to True.
+
+    Returns:
+        None
+    """
+    # Only validate the inputs; nothing is scanned or rendered until the first request arrives.
+    for path in (content_dir, static_dir):
+        if not os.path.isdir(path):
+            raise ValueError(f"Directory '{path}' does not exist. Please check the path and try again.")
+    if not os.path.isfile(template_path):
+        raise ValueError(f"Template '{template_path}' does not exist. Please check the path and try again.")
+
+    with DevServer((host, port), content_dir, template_path, static_dir, live_reload=live_reload,
+                   highlight=highlight, image_sizes=image_sizes) as server:
+        print(f"Development server rendering {content_dir} at http://{host or 'localhost'}:{server.server_address[1]}/")
+
+        if server.live_hub is not None:
+            server.live_hub.start()
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print('Server stopped')
@@ -0,0 +1,388 @@
+import datetime
+import io
+import re
+import textwrap
+import tomllib
+from typing import TYPE_CHECKING, Any, Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple
+
+from context import Heading, RenderContext
+from enums import BlockType
+from filesystem import DiskFileSystem, FileSystem
+from htmlnode import ParentNode, node_tags, strip_line_breaks
+from markdown_to_blocks import block_to_block_type, markdown_to_blocks
+from markdown_to_html_node import block_to_html_node
+
+if TYPE_CHECKING:
+    from highlight import HighlightCache
+    from image_size import ImageSizer
+
+# Front matter is fenced by `---` (YAML-lite) or `+++` (TOML) lines at the very top of a document.
+FRONT_MATTER_DELIMITERS = ('---', '+++')
+
+# A YAML-lite `key: value` line; the value may be empty when a `- item` list follows.
+YAML_KEY_PATTERN = re.compile(r'^([A-Za-z_][\w-]*):[ \t]*(.*)$')
+
+# A YAML-lite list item belonging to the preceding key.
+YAML_ITEM_PATTERN = re.compile(r'^[ \t]*- (.*)$')
+
+# An ISO 8601 calendar date, which TOML parses natively and YAML-lite converts to match.
+DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+class Document:
+    """
+    A Markdown document parsed once into everything the build needs to know about it.
+
+    Splitting the blocks, classifying them and building the HTML tree happens exactly once. The
+    title is taken from the first level-1 heading block of that parse rather than from a second
+    scan of the raw text, and the front matter is available without rendering the page at all
+    through `read_metadata`.
+
+    Attributes:
+        metadata (Dict[str, Any]): The parsed front matter, or an empty dictionary.
+        source (str): The Markdown body, without the front matter.
+        blocks (List[str]): The body's blocks, as returned by `markdown_to_blocks`.
+        block_types (List[BlockType]): The type of each block, in the same order.
+        node (Optional[ParentNode]): The `<div>` holding the HTML node of every block; None if the
+            body has no blocks.
+        context (RenderContext): The state collected while building `node`, including the heading outline.
+        title (Optional[str]): The text of the first level-1 heading, falling back to a `title`
+            front matter field; None if the document has neither.
+        minify (bool): Whether the body, summary and table of contents are serialized minified.
+        asset_urls (Optional[Mapping[str, str]]): The published URL of each static file, keyed by
+            its original URL, which image and link URLs are replaced with when serializing.
+    """
+
+    def __init__(self, text: str, minify: bool = False, asset_urls: Mapping[str, str] = None,
+                 image_sizes: 'ImageSizer' = None, highlighter: 'HighlightCache' = None):
+        """
+        Parses a Markdown document.
+
+        Args:
+            text (str): The whole document, including any front matter.
+            minify (bool, optional): Whether to serialize the HTML minified. Defaults to False.
+            asset_urls (Mapping[str, str], optional): The fingerprinted URL of each static file,
+                keyed by original URL. Defaults to None (URLs are written as they are).
+            image_sizes (ImageSizer, optional): Looks up the dimensions of static images, which
+                are added to the image elements along with lazy loading. Defaults to None.
+            highlighter (HighlightCache, optional): Highlights fenced code blocks that name their
+                language. Defaults to None.
+
+        Raises:
+            ValueError: If the front matter is malformed or a block cannot be converted.
+        """
+        self.minify = minify
+        self.asset_urls = asset_urls
+        # The line break marker is reserved for the parser; in the source it would bypass escaping.
+        self.metadata, body = split_front_matter(strip_line_breaks(text))
+
+        # Content files are sometimes indented as a whole; dedent so blocks are classified correctly.
+        self.source = textwrap.dedent(body)
+
+        # The context gathers link reference definitions while splitting and the outline while building.
+        self.context = RenderContext(image_sizes, highlighter)
+
+        # `markdown_to_blocks` rejects empty input, but a page made only of front matter is valid.
+        self.blocks: List[str] = markdown_to_blocks(self.source, self.context) if self.source.strip() else []
+        self.block_types: List[BlockType] = [block_to_block_type(block) for block in self.blocks]
+
+        # Build the tree once, passing the known type so each block is not classified again.
+        # `ParentNode` requires children, so a body without blocks has no tree at all.
+        children = [
+            block_to_html_node(block, block_type, self.context) for block, block_type in zip(self.blocks, self.block_types)
+        ]
+        self.node: Optional[ParentNode] = ParentNode('div', children) if children else None
+
+        self.title = self.find_title()
+        self._body: Optional[str] = None
+
+    @classmethod
+    def from_path(cls, path: str, fs: FileSystem = None) -> 'Document':
+        """
+        Reads and parses a Markdown file.
+
+        Args:
+            path (str): The Markdown file.
+            fs (FileSystem, optional): The filesystem to read from. Defaults to the real disk.
+
+        Returns:
+            Document: The parsed document.
+        """
+        if fs is None:
+            fs = DiskFileSystem()
+        return cls(fs.read_text(path))
+
+    @property
+    def body(self) -> str:
+        """The rendered HTML body, serialized on first access."""
+        if self._body is None:
+            self._body = self.node.to_html(self.minify, self.asset_urls) if self.node is not None else '<div></div>'
+        return self._body
+
+    @property
+    def outline(self) -> List[Heading]:
+        """The document's headings with their IDs, in document order."""
+        return self.context.outline
+
+    @property
+    def links(self) -> List[str]:
+        """The `href` of every link in the document, in document order."""
+        return self.context.links
+
+    @property
+    def images(self) -> List[str]:
+        """The `src` of every image in the document, in document order."""
+        return self.context.images
+
+    @property
+    def terms(self) -> Dict[str, List[int]]:
+        """The positions of each word of the document's text, for the search index."""
+        return self.context.terms
+
+    @property
+    def tags(self) -> FrozenSet[str]:
+        """The names of the elements of the body and the table of contents, for critical CSS."""
+        tags = node_tags(self.node) if self.node is not None else {'div'}
+        toc = self.context.toc_html_node()
+        if toc is not None:
+            tags |= node_tags(toc)
+        return frozenset(tags)
+
+    @property
+    def summary(self) -> str:
+        """
+        The page summary used by feeds: the `summary` front matter field, or else the first paragraph as HTML.
+        """
+        summary = self.metadata.get('summary')
+        if summary is not None:
+            return str(summary)
+
+        # The tree holds one child per block, so the paragraph's node is found by the block's index.
+        for index, block_type in enumerate(self.block_types):
+            if block_type is BlockType.PARAGRAPH:
+                return self.node.children[index].to_html(self.minify, self.asset_urls)
+        return ''
+
+    @property
+    def toc(self) -> str:
+        """The table of contents as HTML, for the `{{ TOC }}` template slot."""
+        return self.context.toc_html(minify=self.minify)
+
+    def slots(self) -> Dict[str, str]:
+        """
+        Returns the template slots this document fills besides `{{ Title }}` and `{{ Content }}`.
+
+        Returns:
+            Dict[str, str]: The slot values keyed by placeholder name.
+        """
+        # Backlinks depend on the rest of the site; the build fills them in once the link graph is known.
+        return {'TOC': self.toc, 'Backlinks': ''}
+
+    def find_title(self) -> Optional[str]:
+        """
+        Returns the text of the first level-1 heading, or the `title` front matter field.
+
+        Returns:
+            Optional[str]: The title, or None if the document has neither.
+        """
+        # The outline holds the heading's plain text, so inline Markdown such as `**bold**` or a
+        # link does not leak into the `<title>`, feeds or listings.
+        for heading in self.context.outline:
+            if heading.level == 1:
+                return heading.text.strip()
+
+        title = self.metadata.get('title')
+        return str(title) if title is not None else None
+
+def split_front_matter(text: str) -> Tuple[Dict[str, Any], str]:
+    """
+    Separates a document's front matter from its Markdown body.
+
+    Args:
+        text (str): The whole document.
+
+    Returns:
+        Tuple[Dict[str, Any], str]: The parsed front matter (empty if there is none) and the body.
+
+    Raises:
+        ValueError: If the front matter is malformed or never closed.
+    """
+    lines = text.splitlines(keepends=True)
+    header, consumed = read_front_matter_lines(lines)
+    if consumed == 0:
+        return {}, text
+    return header, ''.join(lines[consumed:])
+
+def parse_front_matter(text: str) -> Dict[str, Any]:
+    """
+    Parses only the front matter of a document that is already in memory.
+
+    Args:
+        text (str): The whole document.
+
+    Returns:
+        Dict[str, Any]: The parsed front matter, or an empty dictionary.
+
+    Raises:
+        ValueError: If the front matter is malformed or never closed.
+    """
+    # Iterating a `StringIO` yields lines lazily, so the body is never split.
+    return read_front_matter_lines(io.StringIO(text))[0]
+
+def read_metadata(path: str, fs: FileSystem = None) -> Dict[str, Any]:
+    """
+    Reads only the front matter of a Markdown file.
+
+    This is the fast path for callers that need a page's metadata, such as its date or tags, but not
+    its body: the file is read line by line and reading stops at the closing delimiter, or at the
+    first line when there is no front matter at all.
+
+    Args:
+        path (str): The Markdown file.
+        fs (FileSystem, optional): The filesystem to read from. Defaults to the real disk.
+
+    Returns:
+        Dict[str, Any]: The parsed front matter, or an empty dictionary.
+
+    Raises:
+        ValueError: If the front matter is malformed or never closed.
+    """
+    if fs is None:
+        fs = DiskFileSystem()
+
+    lines = fs.iter_lines(path)
+    try:
+        metadata, _ = read_front_matter_lines(lines)
+    finally:
+        # Close a lazy reader early so the file handle is released as soon as we stop reading.
+        close = getattr(lines, 'close', None)
+        if close is not None:
+            close()
+    return metadata
+
+def read_front_matter_lines(lines: Iterable[str]) -> Tuple[Dict[str, Any], int]:
+    """
+    Consumes front matter from the start of an iterable of lines.
+
+    Args:
+        lines (Iterable[str]): The document's lines. Only the lines up to the closing delimiter are consumed.
+
+    Returns:
+        Tuple[Dict[str, Any], int]: The parsed front matter and the number of lines it spanned,
+            delimiters included; `({}, 0)` if the document has no front matter.
+
+    Raises:
+        ValueError: If the front matter is malformed or never closed.
+    """
+    iterator = iter(lines)
+    first = next(iterator, None)
+    if first is None or first.strip() not in FRONT_MATTER_DELIMITERS:
+        return {}, 0
+
+    delimiter = first.strip()
+    header: List[str] = []
+    for line in iterator:
+        if line.strip() == delimiter:
+            # Stop here: nothing after the closing delimiter is read.
+            text = ''.join(header)
+            metadata = parse_toml(text) if delimiter == '+++' else parse_yaml_lite(text)
+            return metadata, len(header) + 2
+        header.append(line)
+
+    raise ValueError(f"Front matter opened with '{delimiter}' is never closed")
+
+def parse_toml(text: str) -> Dict[str, Any]:
+    """
+    Parses TOML front matter with the standard library's `tomllib`.
+
+    Args:
+        text (str): The front matter, without its delimiters.
+
+    Returns:
+        Dict[str, Any]: The parsed front matter.
+
+    Raises:
+        ValueError: If the TOML is invalid.
+    """
+    try:
+        return tomllib.loads(text)
+    except tomllib.TOMLDecodeError as e:
+        raise ValueError(f"Invalid TOML front matter: {e}") from e
+
+def parse_yaml_lite(text: str) -> Dict[str, Any]:
+    """
+    Parses the small subset of YAML that front matter uses in practice.
+
+    Supported are `key: value` pairs, inline lists (`tags: [a, b]`), block lists (`- item` lines
+    under an empty `key:`), quoted strings, booleans, numbers, ISO dates and `#` comments. Anything
+    more elaborate belongs in TOML front matter.
+
+    Args:
+        text (str): The front matter, without its delimiters.
+
+    Returns:
+        Dict[str, Any]: The parsed front matter.
+
+    Raises:
+        ValueError: If a line is neither a key, a list item nor a comment.
+    """
+    metadata: Dict[str, Any] = {}
+    current_key = None
+
+    for number, line in enumerate(text.splitlines(), start=1):
+        stripped = line.strip()
+        if not stripped or stripped.startswith('#'):
+            continue
+
+        # A list item extends the list of the most recent key with an empty value.
+        item = YAML_ITEM_PATTERN.match(line)
+        if item and current_key is not None and isinstance(metadata[current_key], list):
+            metadata[current_key].append(parse_yaml_scalar(item.group(1)))
+            continue
+
+        pair = YAML_KEY_PATTERN.match(line)
+        if not pair:
+            raise ValueError(f"Invalid front matter on line {number}: '{stripped}'")
+
+        current_key, value = pair.group(1), pair.group(2).strip()
+        if not value:
+            metadata[current_key] = []
+        elif value.startswith('[') and value.endswith(']'):
+            metadata[current_key] = [parse_yaml_scalar(part) for part in value[1:-1].split(',') if part.strip()]
+        else:
+            metadata[current_key] = parse_yaml_scalar(value)
+
+    return metadata
+
+def parse_yaml_scalar(value: str) -> Any:
+    """
+    Converts a YAML-lite scalar to the matching Python value.
+
+    Args:
+        value (str): The raw value, e.g. `"Quoted"`, `true`, `42` or `2024-05-01`.
+
+    Returns:
+        Any: A str, bool, int, float or `datetime.date`.
+    """
+    value = value.strip()
+
+    # Quoted values are always strings, even when they look like something else.
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'':
+        return value[1:-1]
+
+    lowered = value.lower()
+    if lowered in ('true', 'yes'):
+        return True
+    if lowered in ('false', 'no'):
+        return False
+    if DATE_PATTERN.match(value):
+        try:
+            return datetime.date.fromisoformat(value)
+        except ValueError:
+            return value
+
+    for convert in (int, float):
+        try:
+            return convert(value)
+        except ValueError:
+            pass
+    return value
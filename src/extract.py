@@ -1,5 +1,20 @@
 import re
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+
+# Patterns are compiled once at import time so that repeated calls skip the `re` module's cache lookup.
+IMAGE_PATTERN = re.compile(r"!\[.*?\]\(.*?\)")
+IMAGE_PARTS_PATTERN = re.compile(r"!\[.*?\]|\(.*?\)")
+LINK_PATTERN = re.compile(r"(?<!\!)\[\w.*?\]\(.*?\)")
+LINK_PARTS_PATTERN = re.compile(r"\[.*?\]|\(.*?\)")
+
+# A reference-style link or image: `[text][label]`, `[text][]` or `[text]`, optionally preceded by `!`.
+# The lookahead leaves inline `[text](url)` links and definitions (`[label]: url`) alone.
+REFERENCE_PATTERN = re.compile(r"(!?)\[([^\[\]]+)\](?:\[([^\[\]]*)\])?(?![(:])")
+
+# A link reference definition line: `[label]: url`, optionally with a quoted or parenthesized title.
+REFERENCE_DEFINITION_PATTERN = re.compile(
+    r"^ {0,3}\[([^\[\]]+)\]:[ \t]*<?([^\s>]+)>?(?:[ \t]+(?:\"[^\"]*\"|'[^']*'|\([^)]*\)))?[ \t]*$"
+)
 
 def extract_markdown_images(text: str) -> List[Tuple[str, str]]:
     """
@@ -19,7 +34,7 @@ def extract_markdown_images(text: str) -> List[Tuple[str, str]]:
 
     # Use regex to find all occurrences of image syntax `![alt text](url)` in the input text
     # This pattern captures any text inside the square brackets and parentheses
-    matches = re.findall(r"!\[.*?\]\(.*?\)", text)
+    matches = IMAGE_PATTERN.findall(text)
 
     # If no matches are found, return an empty list to indicate no images were detected
     if not matches:
@@ -27,7 +42,7 @@ def extract_markdown_images(text: str) -> List[Tuple[str, str]]:
 
     # For each match, split it into the alt text and URL components using regex
     # This step isolates the `![alt text]` part from the `(url)` part
-    split_matches = [re.findall(r"!\[.*?\]|\(.*?\)", match) for match in matches]
+    split_matches = [IMAGE_PARTS_PATTERN.findall(match) for match in matches]
 
     # Clean up each component by stripping unnecessary characters (`!`, `[`, `]`, `(`, `)`)
     # and return a list of tuples containing the alt text and URL
@@ -53,7 +68,7 @@ def extract_markdown_links(text: str) -> List[Tuple[str, str]]:
 
     # Use regex to find all occurrences of link syntax `[link text](url)` in the input text
     # The pattern `(?<!\!)` ensures that we do not match image syntax `![alt text](url)`
-    matches = re.findall(r"(?<!\!)\[\w.*?\]\(.*?\)", text)
+    matches = LINK_PATTERN.findall(text)
 
     # If no matches are found, return an empty list to indicate no links were detected
     if not matches:
@@ -61,7 +76,7 @@ def extract_markdown_links(text: str) -> List[Tuple[str, str]]:
     
     # For each match, split it into the link text and URL components using regex
     # This step isolates the `[link text]` part from the `(url)` part
-    split_matches = [re.findall(r"\[.*?\]|\(.*?\)", match) for match in matches]
+    split_matches = [LINK_PARTS_PATTERN.findall(match) for match in matches]
     
     # Clean up each component by stripping unnecessary characters (`[`, `]`, `(`, `)`)
     # and return a list of tuples containing the link text and URL
@@ -69,3 +84,33 @@ def extract_markdown_links(text: str) -> List[Tuple[str, str]]:
     
     return final_matches
     
+
+
+def normalize_reference_label(label: str) -> str:
+    """
+    Normalizes a link reference label so that lookups ignore case and runs of whitespace.
+
+    Args:
+        label (str): The label as written, e.g. `Boot  Dev`.
+
+    Returns:
+        str: The normalized label, e.g. `boot dev`.
+    """
+    return ' '.join(label.split()).lower()
+
+def extract_reference_definition(line: str) -> Optional[Tuple[str, str]]:
+    """
+    Parses a link reference definition line such as `[boot dev]: https://boot.dev "Boot.dev"`.
+
+    The optional title is accepted but not kept, since links are rendered without one.
+
+    Args:
+        line (str): A single line of a Markdown document.
+
+    Returns:
+        Optional[Tuple[str, str]]: The normalized label and the URL, or None if the line is not a definition.
+    """
+    match = REFERENCE_DEFINITION_PATTERN.match(line)
+    if not match:
+        return None
+    return normalize_reference_label(match.group(1)), match.group(2)
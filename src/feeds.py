@@ -0,0 +1,225 @@
+import hashlib
+import heapq
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+from xml.sax.saxutils import XMLGenerator
+
+from filesystem import DiskFileSystem, FileSystem, make_dirs
+from taxonomy import Page
+
+# The number of most recent entries each feed keeps.
+DEFAULT_FEED_SIZE = 20
+
+# The Atom namespace, declared on the root element of every feed.
+ATOM_NAMESPACE = 'http://www.w3.org/2005/Atom'
+
+class Feed:
+    """
+    An Atom feed of the most recent dated pages, for the whole site or for one section.
+
+    Attributes:
+        section (Optional[str]): The section the feed covers, or None for the whole site.
+        title (str): The feed title.
+        entries (List[Page]): The pages in the feed, newest first.
+        public_dir (str): The output directory the feed is written to.
+    """
+
+    def __init__(self, section: Optional[str], title: str, entries: List[Page], public_dir: str):
+        """
+        Initializes a `Feed`.
+
+        Args:
+            section (Optional[str]): The section the feed covers, or None for the whole site.
+            title (str): The feed title.
+            entries (List[Page]): The pages in the feed, newest first.
+            public_dir (str): The output directory the feed is written to.
+        """
+        self.section = section
+        self.title = title
+        self.entries = entries
+        self.public_dir = public_dir
+
+    @property
+    def url(self) -> str:
+        """The feed's URL, e.g. `/feed.xml` or `/blog/feed.xml`."""
+        return f'/{self.section}/feed.xml' if self.section else '/feed.xml'
+
+    @property
+    def destination(self) -> str:
+        """The path the feed is written to."""
+        return os.path.join(self.public_dir, self.url.lstrip('/'))
+
+    @property
+    def updated(self) -> str:
+        """The date of the newest entry, as an Atom timestamp."""
+        return atom_date(self.entries[0].date)
+
+    def signature(self, base_url: str) -> str:
+        """
+        Returns a hash of everything the written feed depends on.
+
+        Two builds producing the same signature write byte-identical feeds, so an unchanged feed is
+        never rewritten.
+
+        Args:
+            base_url (str): The site's absolute URL, which every link in the feed starts with.
+
+        Returns:
+            str: The hex digest.
+        """
+        data = {
+            'base_url': base_url,
+            'title': self.title,
+            'url': self.url,
+            'entries': [[page.url, page.title, page.date, page.summary] for page in self.entries],
+        }
+        return hashlib.sha256(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def write(self, stream, base_url: str) -> None:
+        """
+        Writes the feed as Atom XML.
+
+        The document is produced element by element with a streaming XML writer, which also takes
+        care of escaping, so the feed is never assembled as one string.
+
+        Args:
+            stream (BinaryIO): The binary stream to write to.
+            base_url (str): The site's absolute URL, e.g. `https://example.com`.
+        """
+        base_url = base_url.rstrip('/')
+        writer = XMLGenerator(stream, encoding='utf-8', short_empty_elements=True)
+        writer.startDocument()
+        writer.startElement('feed', {'xmlns': ATOM_NAMESPACE})
+
+        write_element(writer, 'title', self.title)
+        write_element(writer, 'id', f'{base_url}{self.url}')
+        writer.startElement('link', {'rel': 'self', 'href': f'{base_url}{self.url}'})
+        writer.endElement('link')
+        write_element(writer, 'updated', self.updated)
+
+        for page in self.entries:
+            writer.startElement('entry', {})
+            write_element(writer, 'title', page.title)
+            write_element(writer, 'id', f'{base_url}{page.url}')
+            writer.startElement('link', {'href': f'{base_url}{page.url}'})
+            writer.endElement('link')
+            write_element(writer, 'updated', atom_date(page.date))
+            if page.summary:
+                # The summary is HTML, which Atom carries escaped inside a `type="html"` element.
+                writer.startElement('summary', {'type': 'html'})
+                writer.characters(page.summary)
+                writer.endElement('summary')
+            writer.endElement('entry')
+
+        writer.endElement('feed')
+        writer.endDocument()
+
+def write_element(writer: XMLGenerator, name: str, text: str) -> None:
+    """
+    Writes an element that only contains text.
+
+    Args:
+        writer (XMLGenerator): The XML writer.
+        name (str): The element name.
+        text (str): The element's text, escaped by the writer.
+    """
+    writer.startElement(name, {})
+    writer.characters(text)
+    writer.endElement(name)
+
+def atom_date(date: str) -> str:
+    """
+    Converts a page date to the timestamp format Atom requires.
+
+    Args:
+        date (str): An ISO 8601 date, e.g. `2024-05-01`.
+
+    Returns:
+        str: The timestamp at midnight UTC, e.g. `2024-05-01T00:00:00Z`.
+    """
+    return f'{date}T00:00:00Z'
+
+def collect_feeds(pages: Iterable[Page], public_dir: str, size: int = DEFAULT_FEED_SIZE) -> List[Feed]:
+    """
+    Selects the most recent dated pages for the site feed and for each section's feed.
+
+    Each feed keeps its entries in a min-heap bounded to `size`: a page newer than the oldest entry
+    replaces it, anything older is dropped at once. Selecting from a site of `n` pages therefore
+    costs `O(n log size)` and never sorts the whole site.
+
+    Args:
+        pages (Iterable[Page]): The record of every page of the site.
+        public_dir (str): The output directory.
+        size (int, optional): The number of entries per feed. Defaults to `DEFAULT_FEED_SIZE`.
+
+    Returns:
+        List[Feed]: The site feed followed by the section feeds in name order; empty if no page is dated.
+    """
+    # The URL breaks ties between pages of the same date, so heap entries never compare `Page` objects.
+    heaps: Dict[Optional[str], List[Tuple[str, str, Page]]] = {}
+    titles: Dict[Optional[str], str] = {}
+
+    for page in pages:
+        # A section's index page (or the home page) names the feed.
+        if page.url == '/':
+            titles.setdefault(None, page.title)
+        elif page.url.count('/') == 2 and page.url.endswith('/'):
+            titles.setdefault(page.url.strip('/'), page.title)
+
+        if not page.date:
+            continue
+
+        entry = (page.date, page.url, page)
+        for section in (None, page.section) if page.section else (None,):
+            heap = heaps.setdefault(section, [])
+            if len(heap) < size:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+
+    feeds = []
+    for section in sorted(heaps, key=lambda name: (name is not None, name or '')):
+        entries = [page for _, _, page in sorted(heaps[section], key=lambda entry: entry[:2], reverse=True)]
+        title = titles.get(section, section or 'Recent pages')
+        feeds.append(Feed(section, title, entries, public_dir))
+    return feeds
+
+def generate_feeds(pages: Iterable[Page], public_dir: str, base_url: str = '', fs: FileSystem = None,
+                   previous: Dict[str, str] = None, size: int = DEFAULT_FEED_SIZE) -> Dict[str, str]:
+    """
+    Writes the site's Atom feeds from the page records the build already produced.
+
+    Args:
+        pages (Iterable[Page]): The record of every page of the site.
+        public_dir (str): The output directory.
+        base_url (str, optional): The site's absolute URL, e.g. `https://example.com`. Defaults to
+            an empty string (site-relative links).
+        fs (FileSystem, optional): The filesystem to write to. Defaults to the real disk.
+        previous (Dict[str, str], optional): The feed signatures of the previous build, keyed by
+            destination path. Feeds whose signature is unchanged are not rewritten. Defaults to None.
+        size (int, optional): The number of entries per feed. Defaults to `DEFAULT_FEED_SIZE`.
+
+    Returns:
+        Dict[str, str]: The signature of every feed, keyed by destination path.
+    """
+    if fs is None:
+        fs = DiskFileSystem()
+    if previous is None:
+        previous = {}
+
+    signatures: Dict[str, str] = {}
+    for feed in collect_feeds(pages, public_dir, size):
+        signature = feed.signature(base_url)
+        signatures[feed.destination] = signature
+
+        # Skip feeds whose entries and contents are exactly what the previous build wrote.
+        if previous.get(feed.destination) == signature and fs.exists(feed.destination):
+            continue
+
+        print(f"Generating feed {feed.url}")
+        make_dirs(os.path.dirname(feed.destination), fs)
+        with fs.open_write(feed.destination) as stream:
+            feed.write(stream, base_url)
+
+    return signatures
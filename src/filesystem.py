@@ -0,0 +1,436 @@
+import contextlib
+import io
+import os
+import posixpath
+import shutil
+import threading
+import time
+from typing import BinaryIO, Dict, Iterator, List, Optional, Set
+
+class FileSystem:
+    """
+    The abstract filesystem the build reads from and writes to.
+
+    The build only needs a small set of operations, so every backend implements the same short list
+    of methods. Subclasses must implement the abstract methods; text helpers are built on the bytes
+    methods. Missing paths raise `FileNotFoundError`, exactly like the `os` functions they replace.
+
+    Methods:
+        exists(), isdir(), isfile(), listdir(), mkdir(), read_bytes(), write_bytes(), remove(),
+        rmdir(), mtime_ns(): Abstract operations implemented by each backend.
+        read_text(), write_text(), iter_lines(), open_write(), copy(): Convenience helpers built on the
+        abstract operations.
+    """
+
+    def exists(self, path: str) -> bool:
+        """Returns True if `path` is a file or a directory."""
+        raise NotImplementedError
+
+    def isdir(self, path: str) -> bool:
+        """Returns True if `path` is a directory."""
+        raise NotImplementedError
+
+    def isfile(self, path: str) -> bool:
+        """Returns True if `path` is a regular file."""
+        raise NotImplementedError
+
+    def listdir(self, path: str) -> List[str]:
+        """Returns the names of the entries in the directory `path`."""
+        raise NotImplementedError
+
+    def mkdir(self, path: str) -> None:
+        """Creates the directory `path`."""
+        raise NotImplementedError
+
+    def read_bytes(self, path: str) -> bytes:
+        """Returns the contents of the file `path`."""
+        raise NotImplementedError
+
+    def write_bytes(self, path: str, data: bytes) -> None:
+        """Creates or replaces the file `path` with `data`."""
+        raise NotImplementedError
+
+    def remove(self, path: str) -> None:
+        """Deletes the file `path`."""
+        raise NotImplementedError
+
+    def rmdir(self, path: str) -> None:
+        """Deletes the empty directory `path`."""
+        raise NotImplementedError
+
+    def mtime_ns(self, path: str) -> int:
+        """Returns a value that changes whenever the file or directory listing at `path` changes."""
+        raise NotImplementedError
+
+    def read_text(self, path: str) -> str:
+        """
+        Returns the contents of the file `path` decoded as UTF-8.
+
+        Args:
+            path (str): The file to read.
+
+        Returns:
+            str: The decoded contents.
+        """
+        return self.read_bytes(path).decode('utf-8')
+
+    def write_text(self, path: str, text: str) -> None:
+        """
+        Creates or replaces the file `path` with `text` encoded as UTF-8.
+
+        Args:
+            path (str): The file to write.
+            text (str): The contents to write.
+        """
+        self.write_bytes(path, text.encode('utf-8'))
+
+    def iter_lines(self, path: str) -> Iterator[str]:
+        """
+        Yields the lines of the file `path` decoded as UTF-8, including their line endings.
+
+        Callers that only need the start of a file, such as the front matter reader, stop iterating
+        early; backends that can read lazily avoid reading the rest of the file.
+
+        Args:
+            path (str): The file to read.
+
+        Returns:
+            Iterator[str]: The lines of the file.
+        """
+        return iter(self.read_text(path).splitlines(keepends=True))
+
+    @contextlib.contextmanager
+    def open_write(self, path: str) -> Iterator[BinaryIO]:
+        """
+        Opens the file `path` for writing bytes, creating or replacing it.
+
+        Writers that produce output piece by piece, such as the feed and sitemap generators, write
+        to the returned stream instead of building the whole file as one string. Backends that can
+        write incrementally do so; the default collects the bytes and writes them on close.
+
+        Args:
+            path (str): The file to write.
+
+        Returns:
+            Iterator[BinaryIO]: A context manager yielding the writable binary stream.
+        """
+        buffer = io.BytesIO()
+        yield buffer
+        self.write_bytes(path, buffer.getvalue())
+
+    def copy(self, source: str, destination: str) -> None:
+        """
+        Copies the file `source` to `destination`.
+
+        Args:
+            source (str): The file to copy.
+            destination (str): The path of the copy.
+        """
+        self.write_bytes(destination, self.read_bytes(source))
+
+def make_dirs(path: str, fs: FileSystem) -> None:
+    """
+    Creates a directory and any missing parents.
+
+    Args:
+        path (str): The directory to create.
+        fs (FileSystem): The filesystem to create it in.
+    """
+    if not path or fs.isdir(path):
+        return
+    make_dirs(os.path.dirname(path), fs)
+    fs.mkdir(path)
+
+class DiskFileSystem(FileSystem):
+    """
+    The filesystem backend for real files on disk, a thin wrapper over `os` and `shutil`.
+    """
+
+    def exists(self, path: str) -> bool:
+        return os.path.exists(path)
+
+    def isdir(self, path: str) -> bool:
+        return os.path.isdir(path)
+
+    def isfile(self, path: str) -> bool:
+        return os.path.isfile(path)
+
+    def listdir(self, path: str) -> List[str]:
+        return os.listdir(path)
+
+    def mkdir(self, path: str) -> None:
+        os.mkdir(path)
+
+    def read_bytes(self, path: str) -> bytes:
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def write_bytes(self, path: str, data: bytes) -> None:
+        with open(path, 'wb') as f:
+            f.write(data)
+
+    def read_text(self, path: str) -> str:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def write_text(self, path: str, text: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def iter_lines(self, path: str) -> Iterator[str]:
+        # Read lazily so a caller that stops early never reads the rest of the file.
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from f
+
+    @contextlib.contextmanager
+    def open_write(self, path: str) -> Iterator[BinaryIO]:
+        # Stream straight to disk so large generated files are never held in memory.
+        with open(path, 'wb') as f:
+            yield f
+
+    def remove(self, path: str) -> None:
+        os.remove(path)
+
+    def rmdir(self, path: str) -> None:
+        os.rmdir(path)
+
+    def mtime_ns(self, path: str) -> int:
+        return os.stat(path).st_mtime_ns
+
+    def copy(self, source: str, destination: str) -> None:
+        # `shutil.copy` lets the OS copy the data without round-tripping it through Python.
+        shutil.copy(source, destination)
+
+class MemoryFileSystem(FileSystem):
+    """
+    A filesystem backend that keeps every file in a dictionary of path to bytes.
+
+    Paths are normalized with `posixpath.normpath`, so `./public/` and `public` name the same
+    directory. An optional `base` filesystem makes this an overlay: reads fall through to the base
+    for paths that were never written here, while writes and deletions only ever touch memory. A
+    `MemoryFileSystem(base=DiskFileSystem())` therefore builds a site from the real `content/`
+    directory without writing a single byte to disk.
+
+    Attributes:
+        files (Dict[str, bytes]): The files written to this filesystem, keyed by normalized path.
+        base (Optional[FileSystem]): The filesystem to read through to, if any.
+    """
+
+    def __init__(self, files: Dict[str, bytes] = None, base: Optional[FileSystem] = None):
+        """
+        Initializes the in-memory filesystem.
+
+        Args:
+            files (Dict[str, bytes], optional): Initial files keyed by path. Defaults to None.
+            base (Optional[FileSystem], optional): A filesystem to read through to. Defaults to None.
+        """
+        self.files: Dict[str, bytes] = {}
+        self.base = base
+        self._dirs: Set[str] = {'.', '/'}
+        self._children: Dict[str, Set[str]] = {}
+        self._removed: Set[str] = set()
+        self._mtimes: Dict[str, int] = {}
+        self._clock = 0
+        self._lock = threading.RLock()
+
+        for path, data in (files or {}).items():
+            self.write_bytes(path, data)
+
+    def normalize(self, path: str) -> str:
+        """
+        Normalizes a path so that equivalent spellings share one dictionary key.
+
+        Args:
+            path (str): The path to normalize.
+
+        Returns:
+            str: The normalized path.
+        """
+        return posixpath.normpath(path.replace(os.sep, '/'))
+
+    def in_base(self, path: str) -> bool:
+        """Returns True if the normalized `path` is visible in the base filesystem."""
+        if self.base is None:
+            return False
+
+        # A deleted ancestor hides everything beneath it in the base.
+        probe = path
+        while True:
+            if probe in self._removed:
+                return False
+            parent = posixpath.dirname(probe)
+            if parent == probe or not parent:
+                break
+            probe = parent
+        return self.base.exists(path)
+
+    def exists(self, path: str) -> bool:
+        return self.isfile(path) or self.isdir(path)
+
+    def isdir(self, path: str) -> bool:
+        path = self.normalize(path)
+        with self._lock:
+            if path in self._dirs:
+                return True
+            return self.in_base(path) and self.base.isdir(path)
+
+    def isfile(self, path: str) -> bool:
+        path = self.normalize(path)
+        with self._lock:
+            if path in self.files:
+                return True
+            return self.in_base(path) and self.base.isfile(path)
+
+    def listdir(self, path: str) -> List[str]:
+        path = self.normalize(path)
+        with self._lock:
+            if not self.isdir(path):
+                raise FileNotFoundError(f"No such directory: '{path}'")
+
+            names = set(self._children.get(path, ()))
+
+            # Merge in the base directory's entries, minus anything deleted in this overlay.
+            if self.in_base(path):
+                for name in self.base.listdir(path):
+                    if posixpath.join(path, name) not in self._removed:
+                        names.add(name)
+            return sorted(names)
+
+    def mkdir(self, path: str) -> None:
+        path = self.normalize(path)
+        with self._lock:
+            if self.exists(path):
+                raise FileExistsError(f"File exists: '{path}'")
+            parent = posixpath.dirname(path)
+            if parent and not self.isdir(parent):
+                raise FileNotFoundError(f"No such directory: '{parent}'")
+            self._dirs.add(path)
+            self._removed.discard(path)
+            self.link(path)
+            self.touch(path)
+
+    def read_bytes(self, path: str) -> bytes:
+        path = self.normalize(path)
+        with self._lock:
+            if path in self.files:
+                return self.files[path]
+            if self.in_base(path) and self.base.isfile(path):
+                return self.base.read_bytes(path)
+        raise FileNotFoundError(f"No such file: '{path}'")
+
+    def write_bytes(self, path: str, data: bytes) -> None:
+        path = self.normalize(path)
+        with self._lock:
+            # Parent directories are created implicitly, which keeps pre-seeding files convenient.
+            parent = posixpath.dirname(path)
+            while parent and parent not in self._dirs:
+                self._dirs.add(parent)
+                self._removed.discard(parent)
+                self.link(parent)
+                # An implicit directory has a modification time like one made with `mkdir`.
+                self.touch(parent)
+                parent = posixpath.dirname(parent) if posixpath.dirname(parent) != parent else ''
+
+            self.files[path] = bytes(data)
+            self._removed.discard(path)
+            self.link(path)
+            self.touch(path)
+
+    def remove(self, path: str) -> None:
+        path = self.normalize(path)
+        with self._lock:
+            if not self.isfile(path):
+                raise FileNotFoundError(f"No such file: '{path}'")
+            self.files.pop(path, None)
+            if self.base is not None:
+                self._removed.add(path)
+            self.unlink(path)
+            self.forget(path)
+
+    def rmdir(self, path: str) -> None:
+        path = self.normalize(path)
+        with self._lock:
+            if self.listdir(path):
+                raise OSError(f"Directory not empty: '{path}'")
+            self._dirs.discard(path)
+            if self.base is not None:
+                self._removed.add(path)
+            self.unlink(path)
+            self.forget(path)
+
+    def mtime_ns(self, path: str) -> int:
+        path = self.normalize(path)
+        with self._lock:
+            if path in self._mtimes:
+                return self._mtimes[path]
+            if self.in_base(path):
+                return self.base.mtime_ns(path)
+        raise FileNotFoundError(f"No such file or directory: '{path}'")
+
+    def link(self, path: str) -> None:
+        """
+        Adds `path` to its parent's set of children, keeping `listdir` independent of the file count.
+
+        Args:
+            path (str): The normalized path that was created.
+        """
+        self._children.setdefault(posixpath.dirname(path) or '.', set()).add(posixpath.basename(path))
+
+    def unlink(self, path: str) -> None:
+        """
+        Removes `path` from its parent's set of children.
+
+        Args:
+            path (str): The normalized path that was deleted.
+        """
+        self._children.get(posixpath.dirname(path) or '.', set()).discard(posixpath.basename(path))
+
+    def touch(self, path: str) -> None:
+        """
+        Records a change to `path` and to its parent directory's listing.
+
+        Args:
+            path (str): The normalized path that changed.
+        """
+        tick = self.tick()
+        self._mtimes[path] = tick
+        self._mtimes[posixpath.dirname(path) or '.'] = tick
+
+    def tick(self) -> int:
+        """
+        Returns a new modification time.
+
+        Times follow the clock, so in an overlay a file written to memory is newer than the base
+        files it was made from, as it would be on disk; but they always increase, so two writes in
+        quick succession can never share a modification time and fool a cache.
+
+        Returns:
+            int: The time in nanoseconds.
+        """
+        self._clock = max(time.time_ns(), self._clock + 1)
+        return self._clock
+
+    def forget(self, path: str) -> None:
+        """
+        Drops the modification time of a deleted path and records the change to its parent's listing.
+
+        Args:
+            path (str): The normalized path that was deleted.
+        """
+        self._mtimes.pop(path, None)
+        self._mtimes[posixpath.dirname(path) or '.'] = self.tick()
+
+    def tree(self, root: str) -> Dict[str, bytes]:
+        """
+        Returns the files written under a directory, keyed by path relative to it.
+
+        Args:
+            root (str): The directory whose files to return, e.g. `./public`.
+
+        Returns:
+            Dict[str, bytes]: A mapping such as `{'index.html': b'...', 'majesty/index.html': b'...'}`.
+        """
+        root = self.normalize(root)
+        prefix = '' if root == '.' else root.rstrip('/') + '/'
+        with self._lock:
+            return {path[len(prefix):]: data for path, data in sorted(self.files.items()) if path.startswith(prefix)}
@@ -0,0 +1,137 @@
+import os
+from typing import Dict, Mapping
+
+# Appended to a page's path, without its `.html` extension, to name the page's fragment; the
+# fragment of `/blog/post.html` is `/blog/post.fragment.json` and that of `/majesty/` is
+# `/majesty/index.fragment.json`.
+FRAGMENT_SUFFIX = '.fragment.json'
+
+# Marks the element of a page that holds its `{{ Content }}`, which the navigation script replaces.
+FRAGMENT_ROOT_ATTRIBUTE = 'data-fragment-root'
+
+# The per-page slots a template may place outside `{{ Content }}`, such as the "Linked from"
+# section after the article. The fragment carries their HTML too, and the navigation script
+# replaces the contents of the element marked with their name.
+FRAGMENT_SLOTS = ('TOC', 'Backlinks')
+FRAGMENT_SLOT_ATTRIBUTE = 'data-fragment-slot'
+
+# Where the navigation script is published. It is the same for every page, so it is written once
+# and referenced with a deferred `<script src>`, which browsers cache, instead of being inlined.
+NAVIGATION_SCRIPT_URL = '/fragment-navigation.js'
+
+# The client half of fragment navigation. Same-origin clicks on links to pages fetch the target's
+# fragment and swap it into the element marked `data-fragment-root`, updating the title and the
+# history; anything it cannot handle, such as a listing page without a fragment, falls back to a
+# normal navigation. Links to pages end in `/` or `.html`, or have no extension at all, such as
+# `/majesty`, which may name a directory's index page or a page served without its extension.
+NAVIGATION_SCRIPT = '''(function () {
+  var root = document.querySelector('[data-fragment-root]');
+  if (!root || !window.fetch || !history.pushState) return;
+  var current = location.pathname;
+  function fragmentUrls(path) {
+    if (path.slice(-1) === '/') return [path + 'index.fragment.json'];
+    if (/\\.html$/.test(path)) return [path.replace(/\\.html$/, '.fragment.json')];
+    return [path + '/index.fragment.json', path + '.fragment.json'];
+  }
+  function fetchFragment(urls) {
+    return fetch(urls[0], {credentials: 'same-origin'}).then(function (response) {
+      if (response.ok) return response.json();
+      if (urls.length > 1) return fetchFragment(urls.slice(1));
+      throw new Error(response.status);
+    });
+  }
+  function load(url, push) {
+    fetchFragment(fragmentUrls(url.pathname)).then(function (fragment) {
+      var holder = document.createElement('template');
+      holder.innerHTML = fragment.html;
+      var next = holder.content.firstElementChild;
+      next.setAttribute('data-fragment-root', '');
+      root.replaceWith(next);
+      root = next;
+      current = url.pathname;
+      var slots = fragment.slots || {};
+      Array.prototype.forEach.call(document.querySelectorAll('[data-fragment-slot]'), function (slot) {
+        slot.innerHTML = slots[slot.getAttribute('data-fragment-slot')] || '';
+      });
+      document.title = fragment.title;
+      if (push) history.pushState(null, '', url.href);
+      var target = url.hash && document.getElementById(decodeURIComponent(url.hash.slice(1)));
+      if (target) target.scrollIntoView(); else if (push) window.scrollTo(0, 0);
+    }).catch(function () { location.href = url.href; });
+  }
+  document.addEventListener('click', function (event) {
+    if (event.defaultPrevented || event.button !== 0 || event.metaKey || event.ctrlKey || event.shiftKey || event.altKey) return;
+    var link = event.target.closest && event.target.closest('a[href]');
+    if (!link || link.target || link.hasAttribute('download')) return;
+    var url = new URL(link.href, location.href);
+    if (url.origin !== location.origin || url.pathname === current || !/\\/([^\\/.]*|[^\\/]*\\.html)$/.test(url.pathname)) return;
+    event.preventDefault();
+    load(url, true);
+  });
+  window.addEventListener('popstate', function () {
+    if (location.pathname !== current) load(new URL(location.href), false);
+  });
+})();'''
+
+def fragment_path(destination: str) -> str:
+    """
+    Returns where the fragment of a generated page is written.
+
+    Args:
+        destination (str): The path of the generated HTML file, e.g. `public/blog/post.html`.
+
+    Returns:
+        str: The fragment's path, e.g. `public/blog/post.fragment.json`.
+    """
+    stem, _ = os.path.splitext(destination)
+    return stem + FRAGMENT_SUFFIX
+
+def mark_fragment_root(content: str) -> str:
+    """
+    Marks the root element of a rendered page body as the one the navigation script replaces.
+
+    Args:
+        content (str): The rendered body, a `<div>` element.
+
+    Returns:
+        str: The body with the `data-fragment-root` attribute on its root element.
+    """
+    return f'<div {FRAGMENT_ROOT_ATTRIBUTE}{content[4:]}' if content.startswith('<div') else content
+
+def mark_fragment_slots(slots: Dict[str, str]) -> Dict[str, str]:
+    """
+    Wraps the per-page slots outside the content in elements the navigation script can find.
+
+    The wrappers are there even when a slot is empty on this page, since the next page may fill it.
+
+    Args:
+        slots (Dict[str, str]): The template slots of a page.
+
+    Returns:
+        Dict[str, str]: A copy of the slots with each of `FRAGMENT_SLOTS` wrapped in a `<div>`.
+    """
+    return {
+        name: f'<div {FRAGMENT_SLOT_ATTRIBUTE}="{name}">{value}</div>' if name in FRAGMENT_SLOTS else value
+        for name, value in slots.items()
+    }
+
+def inject_navigation_script(html: str, asset_urls: Mapping[str, str] = None) -> str:
+    """
+    Adds the deferred `<script>` tag loading the navigation script to a page.
+
+    Args:
+        html (str): The complete HTML page.
+        asset_urls (Mapping[str, str], optional): The fingerprinted URL of each static file,
+            including the script. Defaults to None.
+
+    Returns:
+        str: The page with the tag before its `</head>`, else before its `</body>`, else appended.
+    """
+    url = asset_urls.get(NAVIGATION_SCRIPT_URL, NAVIGATION_SCRIPT_URL) if asset_urls else NAVIGATION_SCRIPT_URL
+    tag = f'<script src="{url}" defer></script>'
+    index = html.find('</head>')
+    if index == -1:
+        index = html.rfind('</body>')
+    if index == -1:
+        return html + tag
+    return html[:index] + tag + html[index:]
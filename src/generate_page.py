@@ -1,8 +1,24 @@
 import os
 import re
-import textwrap
+from typing import Any, Dict, FrozenSet, List, Mapping, NamedTuple, Optional, Tuple, Union
 
-from markdown_to_html_node import markdown_to_html_node
+from assets import AssetPipeline
+from build_cache import BuildCache
+from css import STYLESHEETS_SLOT, StyleInliner
+from document import Document
+from filesystem import DiskFileSystem, FileSystem
+from fragments import inject_navigation_script, mark_fragment_root, mark_fragment_slots
+from highlight import HighlightCache
+from htmlnode import ParentNode, escape_text
+from image_size import ImageSizer
+from link_graph import BACKLINKS_TAGS, LinkGraph, backlinks_html, internal_links
+from manifest import BuildManifest
+from outputs import OutputTargets, PageOutput
+from taxonomy import Page
+from template import Template
+
+# Matches the first level-1 heading (`# heading`) of a document, capturing its text.
+TITLE_PATTERN = re.compile(r'^# (.*?)$', re.MULTILINE)
 
 def extract_title(markdown: str) -> str:
     """
@@ -22,7 +38,7 @@ def extract_title(markdown: str) -> str:
     """
     # Search for the first match of a level-1 heading (`# heading`) in the markdown document.
     # The text after the `#` is captured in a group for extraction.
-    title = re.match(r'^# (.*?)$', markdown, re.MULTILINE)
+    title = TITLE_PATTERN.match(markdown)
 
     # If a title is not found, raise an exception to notify the user that the document lacks an H1 heading.
     if not title:
@@ -31,84 +47,323 @@ def extract_title(markdown: str) -> str:
     # Return the captured group, which contains the heading text without the `#`.
     return title.group(1)
     
-def generate_page(from_path: str, template_path: str, destination_path: str) -> None:
+class RenderedMarkdown(NamedTuple):
+    """
+    Everything the build takes from one parse of a Markdown document.
+
+    Attributes:
+        html (str): The rendered HTML body.
+        title (str): The page title.
+        slots (Dict[str, str]): The remaining template slots, such as the `TOC`.
+        links (List[str]): The `href` of every link in the body, for the link graph.
+        images (List[str]): The `src` of every image in the body, for the link checker.
+        summary (str): The page summary, for feeds.
+        terms (Dict[str, List[int]]): The positions of each word of the body, for the search index.
+        tags (FrozenSet[str]): The names of the elements of the body, for critical CSS.
+        metadata (Dict[str, Any]): The parsed front matter, for listings and feeds.
+        node (Optional[ParentNode]): The HTML tree of the body, for output targets serialized
+            with other options; None for an empty body.
+    """
+    html: str
+    title: str
+    slots: Dict[str, str]
+    links: List[str]
+    images: List[str]
+    summary: str
+    terms: Dict[str, List[int]]
+    tags: FrozenSet[str]
+    metadata: Dict[str, Any]
+    node: Optional[ParentNode]
+
+def render_markdown(markdown_contents: str, minify: bool = False, asset_urls: Mapping[str, str] = None,
+                    image_sizes: ImageSizer = None, highlighter: HighlightCache = None) -> RenderedMarkdown:
+    """
+    Renders the body of a Markdown document and extracts its title and everything else the build needs.
+
+    Front matter at the top of the document is parsed and stripped from the body.
+
+    Args:
+        markdown_contents (str): The Markdown document to render.
+        minify (bool, optional): Whether to serialize the HTML minified. Defaults to False.
+        asset_urls (Mapping[str, str], optional): The fingerprinted URL of each static file, keyed
+            by original URL, which `src` and `href` values are replaced with. Defaults to None.
+        image_sizes (ImageSizer, optional): Looks up the dimensions of static images, which are
+            added to the image elements along with lazy loading. Defaults to None.
+        highlighter (HighlightCache, optional): Highlights fenced code blocks that name their
+            language. Defaults to None.
+
+    Returns:
+        RenderedMarkdown: The rendered body, the title, the template slots, the links and images, 
+            the summary and the words to index.
+
+    Raises:
+        Exception: If the Markdown document does not contain a level-1 heading.
+    """
+    # Parse the document once: the blocks, the HTML tree and the title all come from the same pass.
+    document = Document(markdown_contents, minify, asset_urls, image_sizes, highlighter)
+
+    # A valid Markdown file should have a top-level heading (or a front matter title) as the title.
+    if document.title is None:
+        raise Exception("Markdown does not contain a title / H1 heading")
+
+    # Return the serialized HTML tree, ready for templating, along with the title, the other slots,
+    # the links the build's link graph is assembled from, the summary feeds are built from, the
+    # words the search index is built from, the elements critical CSS is selected for, the front
+    # matter listings and feeds are built from and the tree every other output target is produced from.
+    return RenderedMarkdown(document.body, document.title, document.slots(), document.links, document.images,
+                            document.summary, document.terms, document.tags, document.metadata, document.node)
+
+def render_page(markdown_contents: str, template_contents: str) -> str:
+    """
+    Renders a Markdown document into a complete HTML page using the contents of a template.
+
+    This is the pure, in-memory part of `generate_page`: it performs no file I/O, which lets the 
+    development server render pages on demand without writing anything to disk.
+
+    Args:
+        markdown_contents (str): The Markdown document to render.
+        template_contents (str): The HTML template containing `{{ Title }}` and `{{ Content }}` placeholders.
+
+    Returns:
+        str: The complete HTML page.
+
+    Raises:
+        Exception: If the Markdown document does not contain a level-1 heading.
+    """
+    rendered = render_markdown(markdown_contents)
+    return fill_template(template_contents, rendered.title, rendered.html, rendered.slots)
+
+def fill_template(template: Union[str, Template], title: str, content: str, slots: Dict[str, str] = None,
+                  minify: bool = False) -> str:
+    """
+    Replaces the `{{ Title }}` and `{{ Content }}` placeholders in a template, plus any extra slots.
+
+    Args:
+        template (Union[str, Template]): The HTML template, either as text or already compiled.
+        title (str): The page title, as plain text; it is escaped here.
+        content (str): The rendered HTML body of the page.
+        slots (Dict[str, str], optional): Values for further placeholders, such as `{{ TOC }}`. 
+            Defaults to None.
+        minify (bool, optional): Whether to minify template text while compiling it. Ignored for
+            an already compiled `Template`. Defaults to False.
+
+    Returns:
+        str: The complete HTML page.
+    """
+    # Compile plain template text on the fly; callers rendering many pages pass a compiled `Template`.
+    if isinstance(template, str):
+        template = Template(template, minify)
+
+    # Fill the placeholders with the extracted title and generated HTML content.
+    # This ensures the generated page has the correct title and content embedded in the provided HTML template.
+    # The title is plain text taken from the Markdown, while the other slots already hold HTML.
+    return template.render({**(slots or {}), 'Title': escape_text(title), 'Content': content})
+
+def render_variant(minify: bool = False, assets: AssetPipeline = None, images: ImageSizer = None,
+                   highlighter: HighlightCache = None) -> str:
+    """
+    Names the options a page body is rendered with, so the cache keeps one rendering per combination.
+
+    Args:
+        minify (bool, optional): Whether the body is minified. Defaults to False.
+        assets (AssetPipeline, optional): The asset pipeline whose URLs the body links to. Defaults to None.
+        images (ImageSizer, optional): The image dimensions the body's images are sized with. Defaults to None.
+        highlighter (HighlightCache, optional): The highlighter the body's code is highlighted with.
+            Defaults to None.
+
+    Returns:
+        str: A string that differs whenever the rendered body would.
+    """
+    return (f"{'minify' if minify else ''}:{assets.signature() if assets is not None else ''}"
+            f":{images.signature() if images is not None else ''}"
+            f":{highlighter.signature() if highlighter is not None else ''}")
+
+def generate_page(from_path: str, template_path: str, destination_path: str, cache: BuildCache = None,
+                  fs: FileSystem = None, url: str = None, backlinks: List[List[str]] = None,
+                  minify: bool = False, styles: StyleInliner = None, assets: AssetPipeline = None,
+                  images: ImageSizer = None, targets: OutputTargets = None,
+                  highlighter: HighlightCache = None) -> Optional[Page]:
     """
     Generates an HTML page from a Markdown file using a specified HTML template.
 
     This function reads a Markdown file, converts its contents to HTML, 
     and uses a provided HTML template to generate a complete HTML page. 
     The template must contain placeholders `{{ Title }}` and `{{ Content }}` 
-    which will be replaced with the extracted title and converted HTML content.
+    which will be replaced with the extracted title and converted HTML content. 
+    An optional `{{ TOC }}` placeholder receives the page's table of contents, and an optional 
+    `{{ Backlinks }}` placeholder the pages linking to this one.
 
     Args:
         from_path (str): The path to the Markdown file to be converted.
         template_path (str): The path to the HTML template file containing placeholders.
         destination_path (str): The path where the generated HTML page will be saved.
+        cache (BuildCache, optional): A cache of compiled templates and rendered bodies shared 
+            between builds. Defaults to None (everything is read and rendered from scratch).
+        fs (FileSystem, optional): The filesystem to read from and write to. Defaults to the real disk.
+        url (str, optional): The URL the page is published at, recorded in the returned `Page`. 
+            Defaults to None (the destination path is used).
+        backlinks (List[List[str]], optional): The `[url, title]` pairs of the pages linking to this
+            one, as returned by `LinkGraph.backlinks`. Defaults to None (no "Linked from" section).
+        minify (bool, optional): Whether to write the page minified. Defaults to False.
+        styles (StyleInliner, optional): Inlines the CSS rules the page needs into its `<head>`.
+            Defaults to None (the template's stylesheet links are kept as they are).
+        assets (AssetPipeline, optional): Points the page's images, links and template asset URLs
+            at the fingerprinted static files. Defaults to None.
+        images (ImageSizer, optional): Adds the dimensions of static images and lazy loading to
+            the page's images. Defaults to None.
+        targets (OutputTargets, optional): The further outputs to produce from the page's parse,
+            such as a print variant or a content fragment; with a fragment target the page also
+            carries the navigation script. Defaults to None (only the page is written).
+        highlighter (HighlightCache, optional): Highlights the page's fenced code blocks that name
+            their language. Defaults to None.
 
     Returns:
-        None
+        Optional[Page]: The record of the written page, or None if an error was reported instead.
     """
+    # Default to the real disk so existing callers keep working unchanged.
+    if fs is None:
+        fs = DiskFileSystem()
+
     print(f"Generating page from {from_path} to {destination_path} using {template_path}")
 
     try:
         # Read the Markdown file contents. Reading the entire file at once as the Markdown file is expected to be small.
-        with open(from_path, 'r', encoding='utf-8') as md_file:
-            markdown_contents = md_file.read()
-        
-        # Read the HTML template file contents. Template should contain placeholders for title and content.
-        with open(template_path, 'r', encoding='utf-8') as template_file:
-            template_contents = template_file.read()
+        markdown_contents = fs.read_text(from_path)
+
+        # Read the HTML template. Template should contain placeholders for title and content.
+        # A shared cache keeps the compiled template and only rereads it when the file changes.
+        if cache is not None:
+            template = cache.template(template_path, fs, minify)
+        else:
+            template = Template(fs.read_text(template_path), minify)
 
     except FileNotFoundError as e:
         print(f"Error: {e}")  # Log the specific file that was not found.
-        return
+        return None
     except IOError as e:
         print(f"Error reading file: {e}")  # Log general input/output errors for better debugging.
-        return
-
-    # Convert Markdown content to an HTML node object for easier manipulation and conversion.
-    html_node = markdown_to_html_node(textwrap.dedent(markdown_contents))
-
-    # Generate an HTML string from the HTML node object. This allows for further templating.
-    html_string = html_node.to_html()
+        return None
 
-    # Extract the title from the Markdown contents. A valid Markdown file should have a top-level heading as the title.
+    # Render the full page. A valid Markdown file should have a top-level heading as the title.
+    # With a cache, byte-identical Markdown is only parsed once across builds, and byte-identical
+    # files within a build, such as translated stubs or mirrored version directories, share one
+    # rendering: only the splicing into the template below happens per page.
     try:
-        title = extract_title(markdown_contents)
+        asset_urls = assets.urls if assets is not None else None
+        if cache is not None:
+            rendered = cache.render(markdown_contents,
+                                    lambda text: render_markdown(text, minify, asset_urls, images, highlighter),
+                                    render_variant(minify, assets, images, highlighter))
+        else:
+            rendered = render_markdown(markdown_contents, minify, asset_urls, images, highlighter)
     except Exception as e:
-        print(f"Error extracting title: {e}")  # Inform the user if the title extraction fails.
-        return
+        print(f"Error rendering page: {e}")  # Inform the user if parsing or title extraction fails.
+        return None
+
+    # The cached slots are shared between pages with the same source, so fill in a copy.
+    slots = {**rendered.slots, 'Backlinks': backlinks_html(backlinks or [], minify)}
+
+    # The critical CSS depends on the elements the page is made of, including the "Linked from" section.
+    if styles is not None:
+        tags = rendered.tags | BACKLINKS_TAGS if backlinks else rendered.tags
+        template, slots[STYLESHEETS_SLOT] = styles.apply(template, tags, asset_urls)
+    if assets is not None:
+        template = assets.compile(template)
+
+    # With fragments, the content and the per-page slots around it are marked so the navigation
+    # script knows which elements to swap. Other targets get the slots unmarked.
+    fragments = targets is not None and targets.fragments
+    content = mark_fragment_root(rendered.html) if fragments else rendered.html
+    full_html = fill_template(template, rendered.title, content, mark_fragment_slots(slots) if fragments else slots)
+    if fragments:
+        full_html = inject_navigation_script(full_html, asset_urls)
 
-    # Replace the placeholders in the template with the extracted title and generated HTML content.
-    # This ensures the generated page has the correct title and content embedded in the provided HTML template.
-    full_html = template_contents.replace('{{ Title }}', title).replace('{{ Content }}', html_string)
-    
     # Write the complete HTML to the destination file. This completes the page generation process.
     try:
-        with open(destination_path, 'w', encoding='utf-8') as f:
-            f.write(full_html)
+        fs.write_text(destination_path, full_html)
     except IOError as e:
         print(f"Error writing to file: {e}")  # Log errors encountered during file writing to inform the user.
+        return None
+
+    # Record only links to this site, resolved against the page's URL, for the link graph.
+    url = url or destination_path
+    # `Page` copies the front matter, so pages sharing a rendering do not share it.
+    page = Page(from_path, destination_path, url, rendered.title, rendered.metadata, internal_links(url, rendered.links),
+                backlinks, rendered.summary, internal_links(url, rendered.images))
 
-def generate_page_recursive(dir_path_content: str, template_path: str, dest_dir_path: str) -> None:
+    # Every other target is produced from the same tree and slots in this same pass; a target
+    # serialized with the page's options reuses the page's body, so nothing is rendered twice.
+    if targets:
+        output = PageOutput(destination_path, rendered.title, page.metadata, rendered.node, rendered.html, slots,
+                            minify, fs, cache if cache is not None else BuildCache(), assets)
+        try:
+            page.outputs = targets.write(output)
+        except IOError as e:
+            print(f"Error writing to file: {e}")
+            return None
+
+    # The words are only needed by this build's search index, so they are not kept in the manifest.
+    page.postings = rendered.terms
+    return page
+
+def collect_page(from_path: str, destination_path: str, url: str, cache: BuildCache, fs: FileSystem,
+                 minify: bool = False, assets: AssetPipeline = None, images: ImageSizer = None,
+                 highlighter: HighlightCache = None) -> Optional[Page]:
     """
-    Recursively generates HTML pages from Markdown files within a directory and its subdirectories.
+    Parses a page for its title and links without writing anything.
 
-    This function traverses a given directory, converting each Markdown file it finds into an HTML file 
-    using a specified HTML template. It replicates the directory structure in the destination path and 
-    saves the generated HTML files accordingly.
+    The rendering is stored in the cache with the options `generate_page` uses, so writing the
+    page afterwards does not parse it again.
+
+    Args:
+        from_path (str): The path to the Markdown file.
+        destination_path (str): The path the page will be written to.
+        url (str): The URL the page is published at.
+        cache (BuildCache): The cache the rendering is kept in.
+        fs (FileSystem): The filesystem to read from.
+        minify (bool, optional): Whether the page will be written minified. Defaults to False.
+        assets (AssetPipeline, optional): Points the page at the fingerprinted static files. Defaults to None.
+        images (ImageSizer, optional): Sizes the page's images and loads them lazily. Defaults to None.
+        highlighter (HighlightCache, optional): Highlights fenced code blocks. Defaults to None.
+
+    Returns:
+        Optional[Page]: The record of the page without backlinks, or None if it cannot be read or rendered.
+    """
+    try:
+        markdown_contents = fs.read_text(from_path)
+        asset_urls = assets.urls if assets is not None else None
+        rendered = cache.render(markdown_contents,
+                                lambda text: render_markdown(text, minify, asset_urls, images, highlighter),
+                                render_variant(minify, assets, images, highlighter))
+    except Exception:
+        # `generate_page` tries again and reports the error along with the page it belongs to.
+        return None
+
+    return Page(from_path, destination_path, url, rendered.title, rendered.metadata, internal_links(url, rendered.links),
+                None, rendered.summary, internal_links(url, rendered.images))
+
+def find_sources(dir_path_content: str, dest_dir_path: str, cache: BuildCache, fs: FileSystem,
+                 url_prefix: str = '/') -> List[Tuple[str, str, str]]:
+    """
+    Recursively lists the Markdown files within a directory and its subdirectories.
+
+    The directory structure is replicated in the destination directory as it is traversed.
 
     Args:
         dir_path_content (str): The path to the directory containing the Markdown content.
-        template_path (str): The path to the HTML template file used for generating HTML pages.
-        dest_dir_path (str): The path to the destination directory where the generated HTML files will be saved.
+        dest_dir_path (str): The path to the destination directory.
+        cache (BuildCache): The cache directory listings are read through.
+        fs (FileSystem): The filesystem to read from and create directories in.
+        url_prefix (str, optional): The URL of `dest_dir_path`. Defaults to `/`.
 
     Returns:
-        None
+        List[Tuple[str, str, str]]: The source path, destination path and URL of each page.
     """
+    sources: List[Tuple[str, str, str]] = []
+
     # Get the list of files and directories in the current content directory.
     # This is necessary to know what items to process and convert.
-    contents = os.listdir(dir_path_content)
+    contents = cache.listdir(dir_path_content, fs)
 
     # Iterate over each item in the current directory to handle both files and subdirectories.
     for content in contents:
@@ -120,23 +375,155 @@ def generate_page_recursive(dir_path_content: str, template_path: str, dest_dir_
         dest_path = os.path.join(dest_dir_path, content)
 
         # Check if the current item is a directory to handle it recursively.
-        if os.path.isdir(src_path):
+        if fs.isdir(src_path):
 
             # Ensure the destination directory exists to maintain the same structure as the source.
-            if not os.path.exists(dest_path):
-                os.mkdir(dest_path)  # Create the destination directory if it doesn't exist.
+            if not fs.exists(dest_path):
+                fs.mkdir(dest_path)  # Create the destination directory if it doesn't exist.
 
             # Recursively call the function to handle the contents of the subdirectory.
-            # This allows processing of nested directories, ensuring all Markdown files are converted.
-            generate_page_recursive(src_path, template_path, dest_path)
+            # This allows processing of nested directories, ensuring all Markdown files are found.
+            sources.extend(find_sources(src_path, dest_path, cache, fs, f'{url_prefix}{content}/'))
 
-        # If the current item is a Markdown file, convert it to HTML.
-        elif os.path.isfile(src_path) and src_path.endswith('.md'):
+        # If the current item is a Markdown file, it becomes an HTML page.
+        elif fs.isfile(src_path) and src_path.endswith('.md'):
 
             # Replace the '.md' extension with '.html' to generate the correct output file type.
             # This ensures the converted HTML file is saved with an appropriate name.
             dest_path = dest_path.replace('.md', '.html')
 
-            # Call the function to generate the HTML page using the provided Markdown and template paths.
-            # This performs the actual conversion and templating for the current Markdown file.
-            generate_page(src_path, template_path, dest_path)
\ No newline at end of file
+            # `index.md` is served as its directory's URL; every other page keeps its file name.
+            url = url_prefix if content == 'index.md' else f'{url_prefix}{content[:-3]}.html'
+            sources.append((src_path, dest_path, url))
+
+    return sources
+
+def generate_page_recursive(dir_path_content: str, template_path: str, dest_dir_path: str, cache: BuildCache = None,
+                            fs: FileSystem = None, manifest: BuildManifest = None, url_prefix: str = '/',
+                            minify: bool = False, styles: StyleInliner = None,
+                            assets: AssetPipeline = None, images: ImageSizer = None,
+                            targets: OutputTargets = None, highlighter: HighlightCache = None) -> List[Page]:
+    """
+    Recursively generates HTML pages from Markdown files within a directory and its subdirectories.
+
+    This function traverses a given directory, converting each Markdown file it finds into an HTML file 
+    using a specified HTML template. It replicates the directory structure in the destination path and 
+    saves the generated HTML files accordingly.
+
+    Every page to generate is parsed for its links before any is written, so each page is written
+    once, with the "Linked from" section the whole tree gives it. Pages are rendered through a cache
+    keyed by the hash of their source, so that parse is reused when the page is written, and
+    byte-identical files anywhere in the tree are parsed and serialized once and the result is
+    fanned out to each of their destinations.
+
+    Args:
+        dir_path_content (str): The path to the directory containing the Markdown content.
+        template_path (str): The path to the HTML template file used for generating HTML pages.
+        dest_dir_path (str): The path to the destination directory where the generated HTML files will be saved.
+        cache (BuildCache, optional): A cache shared between builds. Defaults to None (a cache for
+            this tree alone is used).
+        fs (FileSystem, optional): The filesystem to read from and write to. Defaults to the real disk.
+        manifest (BuildManifest, optional): The previous build's manifest. When given, pages whose 
+            source is unchanged and whose output still exists are not regenerated, and every page is 
+            recorded in the manifest. Defaults to None (every page is generated).
+        url_prefix (str, optional): The URL of `dest_dir_path`. Defaults to `/`.
+        minify (bool, optional): Whether to write the pages minified. Defaults to False.
+        styles (StyleInliner, optional): Inlines the CSS rules each page needs. Defaults to None.
+        assets (AssetPipeline, optional): Points pages at the fingerprinted static files. Defaults to None.
+        images (ImageSizer, optional): Sizes the pages' images and loads them lazily. Defaults to None.
+        targets (OutputTargets, optional): The further outputs to produce for each page. Defaults to None.
+        highlighter (HighlightCache, optional): Highlights fenced code blocks. Defaults to None.
+
+    Returns:
+        List[Page]: The record of every page in the directory tree, whether generated or reused.
+    """
+    if fs is None:
+        fs = DiskFileSystem()
+
+    # One cache covers the whole tree, so duplicates in different directories are found too.
+    if cache is None:
+        cache = BuildCache()
+
+    # In an incremental build, reuse the previous record of a page whose source did not change;
+    # every other page is only parsed for now. A page that cannot be parsed is still generated
+    # below, which reports the error.
+    entries: List[Tuple[str, str, str, Optional[int], Optional[Page], bool]] = []
+    for src_path, dest_path, url in find_sources(dir_path_content, dest_dir_path, cache, fs, url_prefix):
+        mtime = fs.mtime_ns(src_path) if manifest is not None else None
+        page = manifest.fresh_page(src_path, mtime, fs) if manifest is not None else None
+        fresh = page is not None
+        if not fresh:
+            page = collect_page(src_path, dest_path, url, cache, fs, minify, assets, images, highlighter)
+        entries.append((src_path, dest_path, url, mtime, page, fresh))
+
+    # The links of every page are known now, so each page is written with its final backlinks.
+    graph = LinkGraph(page for *_, page, _ in entries if page is not None)
+
+    # Keep a record of every page in this directory and below; listings and other site-wide outputs
+    # are built from these records without another pass over the content.
+    generated: List[Page] = []
+    for src_path, dest_path, url, mtime, page, fresh in entries:
+        if not fresh:
+            # This performs the actual conversion and templating, from the parse kept in the cache.
+            backlinks = graph.backlinks(url) if page is not None else None
+            page = generate_page(src_path, template_path, dest_path, cache, fs, url, backlinks, minify, styles,
+                                 assets, images, targets, highlighter)
+
+        if page is not None:
+            generated.append(page)
+            if manifest is not None:
+                manifest.record_page(mtime, page)
+
+    return generated
+
+def update_backlinks(pages: List[Page], template_path: str, cache: BuildCache = None,
+                     fs: FileSystem = None, minify: bool = False, styles: StyleInliner = None,
+                     assets: AssetPipeline = None, images: ImageSizer = None, targets: OutputTargets = None,
+                     highlighter: HighlightCache = None) -> List[str]:
+    """
+    Rewrites the pages whose "Linked from" section no longer matches the site's link graph.
+
+    `generate_page_recursive` writes the pages it generates with their final backlinks, but the
+    pages an incremental build reused keep the section of the previous build. Only those whose
+    inbound links actually changed, because a page linking to them was edited, added or removed,
+    are generated again.
+
+    Args:
+        pages (List[Page]): The record of every page of the site, as returned by 
+            `generate_page_recursive`. Updated pages have their `backlinks` replaced in place.
+        template_path (str): The path to the HTML template file.
+        cache (BuildCache, optional): A cache shared between builds. Defaults to None (a cache for
+            this call alone is used, so pages sharing a source are rendered once).
+        fs (FileSystem, optional): The filesystem to read from and write to. Defaults to the real disk.
+        minify (bool, optional): Whether to write the pages minified. Defaults to False.
+        styles (StyleInliner, optional): Inlines the CSS rules each page needs. Defaults to None.
+        assets (AssetPipeline, optional): Points pages at the fingerprinted static files. Defaults to None.
+        images (ImageSizer, optional): Sizes the pages' images and loads them lazily. Defaults to None.
+        targets (OutputTargets, optional): The further outputs to produce for each page. Defaults to None.
+        highlighter (HighlightCache, optional): Highlights fenced code blocks. Defaults to None.
+
+    Returns:
+        List[str]: The destination paths of the pages that were rewritten.
+    """
+    if fs is None:
+        fs = DiskFileSystem()
+    if cache is None:
+        cache = BuildCache()
+
+    graph = LinkGraph(pages)
+
+    updated: List[str] = []
+    for page in pages:
+        backlinks = graph.backlinks(page.url)
+        if backlinks == page.backlinks:
+            continue
+
+        rewritten = generate_page(page.source, template_path, page.destination, cache, fs, page.url, backlinks,
+                                  minify, styles, assets, images, targets, highlighter)
+        if rewritten is not None:
+            # The manifest holds this same record, so it remembers what the page now contains.
+            page.backlinks = backlinks
+            page.outputs = rewritten.outputs
+            updated.append(page.destination)
+
+    return updated
@@ -0,0 +1,240 @@
+import hashlib
+import html
+import json
+import os
+import re
+from typing import Dict, Optional
+
+from filesystem import DiskFileSystem, FileSystem, make_dirs
+
+# Pygments is optional: without it the built-in lexers highlight the most common languages.
+try:
+    import pygments
+    from pygments.formatters import HtmlFormatter
+    from pygments.lexers import get_lexer_by_name
+    from pygments.util import ClassNotFound
+except ImportError:
+    pygments = None
+
+# Bumped whenever the built-in lexers change what they produce, which invalidates cached output.
+BUILTIN_VERSION = 1
+
+# Where incremental builds keep highlighted code between builds, next to the build manifest.
+HIGHLIGHT_CACHE_FILE = 'highlight.json'
+
+# Bumped whenever the stored layout changes.
+HIGHLIGHT_CACHE_VERSION = 1
+
+# The names a fence may use for each built-in lexer.
+LANGUAGE_ALIASES = {
+    'python': 'python', 'py': 'python', 'python3': 'python',
+    'javascript': 'javascript', 'js': 'javascript',
+    'json': 'json',
+    'bash': 'shell', 'sh': 'shell', 'shell': 'shell', 'console': 'shell',
+    'css': 'css',
+}
+
+# One pattern per built-in language. Each named group is a token type, named after the short CSS
+# class Pygments uses for it, so a Pygments stylesheet colours either highlighter's output.
+BUILTIN_LEXERS: Dict[str, re.Pattern] = {
+    'python': re.compile(
+        r'(?P<c>#[^\n]*)'
+        r'|(?P<s>(?:\b[rRbBuUfF]{1,2})?(?:"""[\s\S]*?"""|\'\'\'[\s\S]*?\'\'\'|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'))'
+        r'|(?P<nd>@[\w.]+)'
+        r'|(?<=\bdef )(?P<nf>\w+)'
+        r'|(?<=\bclass )(?P<nc>\w+)'
+        r'|(?P<k>\b(?:False|None|True|and|as|assert|async|await|break|class|continue|def|del|elif|else|except'
+        r'|finally|for|from|global|if|import|in|is|lambda|match|case|nonlocal|not|or|pass|raise|return|try|while'
+        r'|with|yield)\b)'
+        r'|(?P<nb>\b(?:abs|all|any|bool|dict|enumerate|float|int|isinstance|len|list|map|max|min|open|print'
+        r'|range|repr|set|sorted|str|sum|super|tuple|type|zip)\b)'
+        r'|(?P<m>\b(?:0[xX][\da-fA-F_]+|0[oO][0-7_]+|0[bB][01_]+|\d[\d_]*(?:\.\d*)?(?:[eE][+-]?\d+)?j?)\b)'
+    ),
+    'javascript': re.compile(
+        r'(?P<c>//[^\n]*|/\*[\s\S]*?\*/)'
+        r'|(?P<s>"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|`(?:\\.|[^`\\])*`)'
+        r'|(?<=\bfunction )(?P<nf>[\w$]+)'
+        r'|(?<=\bclass )(?P<nc>[\w$]+)'
+        r'|(?P<k>\b(?:async|await|break|case|catch|class|const|continue|default|delete|do|else|export|extends'
+        r'|finally|for|function|if|import|in|instanceof|let|new|of|return|static|switch|this|throw|try|typeof'
+        r'|var|void|while|yield)\b)'
+        r'|(?P<kc>\b(?:true|false|null|undefined|NaN|Infinity)\b)'
+        r'|(?P<m>\b(?:0[xX][\da-fA-F]+|\d+(?:\.\d*)?(?:[eE][+-]?\d+)?n?)\b)'
+    ),
+    'json': re.compile(
+        r'(?P<nt>"(?:\\.|[^"\\\n])*"(?=\s*:))'
+        r'|(?P<s2>"(?:\\.|[^"\\\n])*")'
+        r'|(?P<kc>\b(?:true|false|null)\b)'
+        r'|(?P<m>-?\b\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b)'
+    ),
+    'shell': re.compile(
+        r'(?P<c>(?<![\w$])#[^\n]*)'
+        r'|(?P<s2>"(?:\\.|[^"\\])*")'
+        r'|(?P<s1>\'[^\']*\')'
+        r'|(?P<nv>\$(?:\{[^}\n]*\}|\w+|[@*#?$!0-9]))'
+        r'|(?P<k>\b(?:case|do|done|elif|else|esac|export|fi|for|function|if|in|local|return|then|until|while)\b)'
+        r'|(?P<gp>^\$ )'
+    ),
+    'css': re.compile(
+        r'(?P<c>/\*[\s\S]*?\*/)'
+        r'|(?P<s>"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\')'
+        r'|(?P<k>@[\w-]+)'
+        r'|(?P<m>#[\da-fA-F]{3,8}\b|-?\b\d+(?:\.\d+)?(?:%|[a-zA-Z]+)?)'
+        r'|(?P<nt>[\w-]+(?=\s*:[^{};]*;))'
+    ),
+}
+
+class Highlighter:
+    """
+    The interface of a syntax highlighter for fenced code blocks.
+
+    Subclasses turn code into HTML for the inside of a `<code>` element, tokens wrapped in
+    `<span>` elements classed by token type, and name a version that changes whenever their output
+    may change, since highlighted code is cached across builds under that version.
+
+    Attributes:
+        version (str): Identifies the highlighter and everything its output depends on.
+    """
+
+    version = ''
+
+    def highlight(self, code: str, language: str) -> Optional[str]:
+        """
+        Highlights a piece of code.
+
+        Args:
+            code (str): The code, without its fences.
+            language (str): The language named on the opening fence, e.g. `python`.
+
+        Returns:
+            Optional[str]: The escaped, highlighted HTML, or None if the language is not supported.
+        """
+        raise NotImplementedError
+
+class BuiltinHighlighter(Highlighter):
+    """A pure-Python highlighter for Python, JavaScript, JSON, shell and CSS, with one regex per language."""
+
+    version = f'builtin-{BUILTIN_VERSION}'
+
+    def highlight(self, code: str, language: str) -> Optional[str]:
+        pattern = BUILTIN_LEXERS.get(LANGUAGE_ALIASES.get(language.lower(), ''))
+        if pattern is None:
+            return None
+
+        parts = []
+        position = 0
+        for match in pattern.finditer(code):
+            parts.append(html.escape(code[position:match.start()], quote=False))
+            parts.append(f'<span class="{match.lastgroup}">{html.escape(match.group(), quote=False)}</span>')
+            position = match.end()
+        parts.append(html.escape(code[position:], quote=False))
+        return ''.join(parts)
+
+class PygmentsHighlighter(Highlighter):
+    """Highlights every language Pygments has a lexer for."""
+
+    def __init__(self):
+        """Initializes the highlighter with the formatter shared by every code block."""
+        self.version = f'pygments-{pygments.__version__}'
+        self.formatter = HtmlFormatter(nowrap=True)
+
+    def highlight(self, code: str, language: str) -> Optional[str]:
+        try:
+            lexer = get_lexer_by_name(language)
+        except ClassNotFound:
+            return None
+        # Pygments ends its output with a newline the fence did not contain.
+        return pygments.highlight(code, lexer, self.formatter).rstrip('\n')
+
+def default_highlighter() -> Highlighter:
+    """Returns the Pygments highlighter if Pygments is installed, and the built-in one otherwise."""
+    return PygmentsHighlighter() if pygments is not None else BuiltinHighlighter()
+
+class HighlightCache:
+    """
+    Highlights code blocks through a cache keyed by language, code and highlighter version.
+
+    Highlighting is usually the most expensive part of rendering a page with code, and the same
+    blocks render again whenever their page changes, so incremental builds keep the cache on disk.
+
+    Attributes:
+        highlighter (Highlighter): The highlighter producing the HTML.
+        fs (FileSystem): The filesystem the cache is stored on.
+        entries (Dict[str, Optional[str]]): The highlighted HTML keyed by `key`; None for a
+            language the highlighter does not support.
+    """
+
+    def __init__(self, highlighter: Highlighter = None, fs: FileSystem = None):
+        """
+        Initializes an empty cache.
+
+        Args:
+            highlighter (Highlighter, optional): The highlighter to use. Defaults to
+                `default_highlighter()`.
+            fs (FileSystem, optional): The filesystem the cache is stored on. Defaults to the real disk.
+        """
+        self.highlighter = highlighter if highlighter is not None else default_highlighter()
+        self.fs = fs if fs is not None else DiskFileSystem()
+        self.entries: Dict[str, Optional[str]] = {}
+
+    @classmethod
+    def load(cls, path: str, highlighter: Highlighter = None, fs: FileSystem = None) -> 'HighlightCache':
+        """
+        Reads a cache stored by `save`, starting empty if it is missing, unreadable or was written
+        by another highlighter version.
+
+        Args:
+            path (str): Where the cache is stored.
+            highlighter (Highlighter, optional): The highlighter to use. Defaults to `default_highlighter()`.
+            fs (FileSystem, optional): The filesystem the cache is stored on. Defaults to the real disk.
+
+        Returns:
+            HighlightCache: The cache.
+        """
+        cache = cls(highlighter, fs)
+        try:
+            data = json.loads(cache.fs.read_text(path))
+        except (OSError, ValueError):
+            return cache
+
+        # Entries of another highlighter version can never be hit again, so they are dropped.
+        if (isinstance(data, dict) and data.get('version') == HIGHLIGHT_CACHE_VERSION
+                and data.get('highlighter') == cache.highlighter.version):
+            cache.entries = dict(data['entries'])
+        return cache
+
+    def save(self, path: str) -> None:
+        """
+        Writes the cache, creating its directory if needed.
+
+        Args:
+            path (str): Where to store the cache.
+        """
+        make_dirs(os.path.dirname(path), self.fs)
+        data = {'version': HIGHLIGHT_CACHE_VERSION, 'highlighter': self.highlighter.version, 'entries': self.entries}
+        self.fs.write_text(path, json.dumps(data, separators=(',', ':'), ensure_ascii=False))
+
+    def key(self, code: str, language: str) -> str:
+        """Returns the cache key of a code block: a hash of its language, its code and the highlighter version."""
+        digest = hashlib.sha256(code.encode('utf-8')).hexdigest()
+        return f'{language}:{digest}:{self.highlighter.version}'
+
+    def highlight(self, code: str, language: str) -> Optional[str]:
+        """
+        Highlights a piece of code, or returns the HTML it was highlighted to before.
+
+        Args:
+            code (str): The code, without its fences.
+            language (str): The language named on the opening fence.
+
+        Returns:
+            Optional[str]: The highlighted HTML, or None if the language is not supported.
+        """
+        key = self.key(code, language)
+        if key not in self.entries:
+            self.entries[key] = self.highlighter.highlight(code, language)
+        return self.entries[key]
+
+    def signature(self) -> str:
+        """Returns the highlighter version, which changes whenever highlighted code may change."""
+        return self.highlighter.version
@@ -1,5 +1,95 @@
+import re
+from typing import Mapping, Set
+
 from enums import TextType
 
+# Elements without content or end tag; minified output leaves out the `</img>` the full output writes.
+VOID_ELEMENTS = frozenset({'area', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'})
+
+# Elements whose end tag HTML lets a parser infer from the next sibling or the end of the parent.
+# Only elements this generator places among block siblings are listed, so leaving the tag out is safe.
+OPTIONAL_END_TAGS = frozenset({'li', 'p', 'dt', 'dd', 'tr', 'td', 'th'})
+
+# Elements whose text is rendered verbatim, so minifying must not touch their whitespace.
+PRESERVE_WHITESPACE = frozenset({'pre', 'code', 'textarea', 'script', 'style'})
+
+# Attributes holding a URL that the asset pipeline may point at a fingerprinted file.
+URL_ATTRIBUTES = frozenset({'src', 'href'})
+
+# Attribute values made only of these characters may be written without quotes.
+UNQUOTED_VALUE_PATTERN = re.compile(r'^[^\s"\'=<>`]+$')
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# Stands for a `<br>` line break inside text, such as between the lines of a list item. It is a
+# Unicode noncharacter, reserved for internal use, and `strip_line_breaks` removes it from source
+# text, so only the parser produces it; escaping turns it into the tag while every real `<` in the
+# text is escaped.
+LINE_BREAK = '\ufdd0'
+
+# Line breaks inside list items are followed by the source newline.
+BREAK_PATTERN = re.compile(f' ?{LINE_BREAK} ?')
+
+def strip_line_breaks(text: str) -> str:
+    """
+    Removes every `LINE_BREAK` from source text, which would otherwise be written as a raw `<br>` tag.
+
+    Args:
+        text (str): Markdown source, including any front matter.
+
+    Returns:
+        str: The text without `LINE_BREAK`s.
+    """
+    return text.replace(LINE_BREAK, '') if LINE_BREAK in text else text
+
+def minify_text(text: str) -> str:
+    """
+    Collapses the insignificant whitespace of rendered text.
+
+    Runs of whitespace render as a single space, so they are collapsed rather than removed; the
+    space around a line break is dropped entirely since the line ends there anyway.
+
+    Args:
+        text (str): Unescaped text, possibly containing `LINE_BREAK`s.
+
+    Returns:
+        str: The text with every run of whitespace collapsed.
+    """
+    return BREAK_PATTERN.sub(LINE_BREAK, WHITESPACE_PATTERN.sub(' ', text))
+
+def escape_text(text: str) -> str:
+    """
+    Escapes text for use as element content, writing each `LINE_BREAK` as a `<br>` tag.
+
+    Most text contains no special character at all, and checking for each with `in` is far cheaper
+    than building a new string, so such text is returned as it is. Otherwise chained `str.replace`
+    calls are used: on CPython they beat both `html.escape` and `str.translate`, whose
+    multi-character replacements take a slow path (see `bench_escape.py`).
+
+    Args:
+        text (str): The unescaped text.
+
+    Returns:
+        str: The text with `&`, `<` and `>` replaced by character references.
+    """
+    if '&' in text or '<' in text or '>' in text or LINE_BREAK in text:
+        return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace(LINE_BREAK, '<br>')
+    return text
+
+def escape_attribute(value: str) -> str:
+    """
+    Escapes an attribute value for use inside double quotes, with the same fast path as `escape_text`.
+
+    Args:
+        value (str): The unescaped value.
+
+    Returns:
+        str: The value with `&`, `"`, `<` and `>` replaced by character references.
+    """
+    if '&' in value or '"' in value or '<' in value or '>' in value:
+        return value.replace('&', '&amp;').replace('"', '&quot;').replace('<', '&lt;').replace('>', '&gt;')
+    return value
+
 class HTMLNode:
     """
     A base class for representing an HTML node.
@@ -16,7 +106,7 @@ class HTMLNode:
         props (dict): A dictionary of attributes (properties) for the HTML tag (e.g., `{'class': 'my-class'}`).
 
     Methods:
-        to_html(): Abstract method that should be implemented by subclasses to return the HTML representation of the node.
+        to_html(minify, asset_urls): Abstract method that should be implemented by subclasses to return the HTML representation of the node.
         props_to_html(): Returns a string representation of the HTML node's properties.
         __repr__(): Returns a string representation of the `HTMLNode` object for debugging purposes.
     """
@@ -36,26 +126,53 @@ class HTMLNode:
         self.children = children if children is not None else []  # Initialize as empty list if None
         self.props = props if props is not None else {}  # Initialize as empty dict if None
 
-    def to_html(self):
+    def to_html(self, minify: bool = False, asset_urls: Mapping[str, str] = None):
         """
         Abstract method to be implemented by subclasses to define HTML rendering.
 
+        Args:
+            minify (bool, optional): Whether to leave out insignificant whitespace, optional end
+                tags and unneeded attribute quotes. Defaults to False.
+            asset_urls (Mapping[str, str], optional): Replacement URLs for `src` and `href`
+                values, keyed by original URL, such as the fingerprinted name of each static
+                file. Defaults to None (URLs are written as they are).
+
         Raises:
             NotImplementedError: If the subclass does not implement this method.
         """
         raise NotImplementedError
 
-    def props_to_html(self) -> str:
+    def props_to_html(self, minify: bool = False, asset_urls: Mapping[str, str] = None) -> str:
         """
         Converts the dictionary of properties (attributes) to a string suitable for an HTML tag.
 
+        Values are escaped, so a URL or alt text containing `&` or `"` cannot end the attribute early.
+
+        Args:
+            minify (bool, optional): Whether to write values without quotes where HTML allows it,
+                and empty values as the bare attribute name. Defaults to False.
+            asset_urls (Mapping[str, str], optional): Replacement values for `src` and `href`
+                attributes, keyed by original URL. Defaults to None.
+
         Returns:
             str: A string representation of the HTML node's properties (e.g., ' class="my-class" id="my-id"').
         """
         properties = []
         for k, v in self.props.items():
-            properties.append(f' {k}="{v}"')
-        
+            # The node keeps its original URL; only the serialized page points at the renamed file.
+            if asset_urls and k in URL_ATTRIBUTES:
+                v = asset_urls.get(v, v)
+            v = escape_attribute(v)
+
+            if not minify:
+                properties.append(f' {k}="{v}"')
+            elif v == '':
+                properties.append(f' {k}')  # `alt` means the same as `alt=""`.
+            elif UNQUOTED_VALUE_PATTERN.match(v):
+                properties.append(f' {k}={v}')
+            else:
+                properties.append(f' {k}="{v}"')
+
         return "".join(properties)
 
     def __repr__(self) -> str:
@@ -82,7 +199,7 @@ class LeafNode(HTMLNode):
         props (dict, optional): A dictionary of attributes (properties) for the HTML tag (e.g., `{'class': 'my-class'}`).
 
     Methods:
-        to_html(): Returns the HTML string representation of the leaf node.
+        to_html(minify, asset_urls): Returns the HTML string representation of the leaf node.
         __repr__(): Returns a string representation of the `LeafNode` object for debugging purposes.
     """
 
@@ -107,26 +224,41 @@ class LeafNode(HTMLNode):
         # Initialize the parent `HTMLNode` with no children since this is a leaf node.
         super().__init__(tag=tag, value=value, props=props)
 
-    def to_html(self) -> str:
+    def to_html(self, minify: bool = False, asset_urls: Mapping[str, str] = None) -> str:
         """
         Generates the HTML string representation of the leaf node.
 
         If the node has a tag and properties, the properties are included in the opening tag.
-        If the node does not have a tag, only the value is returned.
+        If the node does not have a tag, only the value is returned. The value is escaped either way.
+
+        Args:
+            minify (bool, optional): Whether to collapse whitespace (except in `<pre>`, `<code>` and
+                similar elements), leave out optional and void end tags and unneeded attribute
+                quotes. Defaults to False.
+            asset_urls (Mapping[str, str], optional): Replacement URLs for `src` and `href`
+                values, keyed by original URL. Defaults to None.
 
         Returns:
             str: The HTML string representation of the leaf node.
         """
         # Return only the value if no tag is specified. This handles cases like text nodes.
         if not self.tag:
-            return self.value
+            return escape_text(minify_text(self.value) if minify else self.value)
+
+        # Minifying happens here, while serializing, rather than as a pass over the finished page.
+        if minify:
+            value = escape_text(self.value if self.tag in PRESERVE_WHITESPACE else minify_text(self.value))
+            start = f"<{self.tag}{self.props_to_html(True, asset_urls)}>"
+            if self.tag in VOID_ELEMENTS or self.tag in OPTIONAL_END_TAGS:
+                return start + value
+            return f"{start}{value}</{self.tag}>"
         
         # Return the HTML without properties if no properties are specified.
         if not self.props:
-            return f"<{self.tag}>{self.value}</{self.tag}>"
+            return f"<{self.tag}>{escape_text(self.value)}</{self.tag}>"
         
         # Return the full HTML with properties if properties are specified.
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+        return f"<{self.tag}{self.props_to_html(asset_urls=asset_urls)}>{escape_text(self.value)}</{self.tag}>"
 
     def __repr__(self) -> str:
         """
@@ -136,6 +268,30 @@ class LeafNode(HTMLNode):
             str: A string representation showing the tag, value, and props.
         """
         return f"LeafNode({self.tag}, {self.value}, {self.children}, {self.props})"
+
+class RawNode(LeafNode):
+    """
+    A tagless leaf holding markup that is written as it is, such as highlighted code.
+
+    Every other leaf escapes its value, so only HTML the generator produced itself, and has already
+    escaped, may go into a `RawNode`.
+    """
+
+    def __init__(self, html: str):
+        """
+        Initializes a `RawNode`.
+
+        Args:
+            html (str): The markup, with any text in it already escaped.
+        """
+        super().__init__(None, html)
+
+    def to_html(self, minify: bool = False, asset_urls: Mapping[str, str] = None) -> str:
+        """Returns the markup unchanged; raw markup is only used where whitespace is significant."""
+        return self.value
+
+    def __repr__(self) -> str:
+        return f"RawNode({self.value})"
     
 class ParentNode(HTMLNode):
     """
@@ -152,7 +308,7 @@ class ParentNode(HTMLNode):
         props (dict, optional): A dictionary of attributes (properties) for the HTML tag (e.g., `{'class': 'my-class'}`).
 
     Methods:
-        to_html(): Returns the HTML string representation of the parent node, including its children.
+        to_html(minify, asset_urls): Returns the HTML string representation of the parent node, including its children.
         __repr__(): Returns a string representation of the `ParentNode` object for debugging purposes.
     """
 
@@ -185,25 +341,35 @@ class ParentNode(HTMLNode):
         # Using `super()` allows leveraging the base class functionality while adding specific logic for `ParentNode`.
         super().__init__(tag=tag, children=children, props=props)
 
-    def to_html(self) -> str:
+    def to_html(self, minify: bool = False, asset_urls: Mapping[str, str] = None) -> str:
         """
         Generates the HTML string representation of the parent node, including its child nodes.
 
         This method recursively calls `to_html` on each child node to generate the complete HTML content.
 
+        Args:
+            minify (bool, optional): Whether to minify this node and its children, as `LeafNode.to_html`
+                does. The children of a `<pre>` element are always written verbatim. Defaults to False.
+            asset_urls (Mapping[str, str], optional): Replacement URLs for the `src` and `href`
+                values of this node and its children, keyed by original URL. Defaults to None.
+
         Returns:
             str: The HTML string representation of the parent node and its children.
         """
         # Begin the HTML representation with the opening tag.
         # If there are properties, they are included within the tag using `props_to_html`.
-        html_string = [f"<{self.tag}{self.props_to_html()}>" if self.props else f"<{self.tag}>"]
+        html_string = [f"<{self.tag}{self.props_to_html(minify, asset_urls)}>" if self.props else f"<{self.tag}>"]
+
+        # Whitespace inside `<pre>` is content, so its whole subtree is serialized as is.
+        minify_children = minify and self.tag not in PRESERVE_WHITESPACE
 
         # Recursively generate HTML for each child node to maintain the nested structure.
         for child in self.children:
-            html_string.append(child.to_html())  # Recursion allows generating HTML for arbitrarily nested structures.
+            html_string.append(child.to_html(minify_children, asset_urls))  # Recursion allows generating HTML for arbitrarily nested structures.
 
-        # Close the HTML tag to ensure well-formed HTML output.
-        html_string.append(f"</{self.tag}>")
+        # Close the HTML tag to ensure well-formed HTML output, unless minifying and HTML lets it be inferred.
+        if not (minify and self.tag in OPTIONAL_END_TAGS):
+            html_string.append(f"</{self.tag}>")
         return ''.join(html_string)
 
     def __repr__(self) -> str:
@@ -269,5 +435,21 @@ def text_node_to_html_node(text_node):
             # Catch-all for any unexpected types; should not be reached if validation works.
             raise ValueError(f"Unexpected type encountered. Accepted types: {accepted_types}")
 
-        
-        
\ No newline at end of file
+def node_tags(node: HTMLNode) -> Set[str]:
+    """
+    Collects the names of the elements in an HTML tree, e.g. to decide which CSS rules it needs.
+
+    Args:
+        node (HTMLNode): The root of the tree.
+
+    Returns:
+        Set[str]: The tag of every node in the tree; text nodes have none.
+    """
+    tags: Set[str] = set()
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.tag:
+            tags.add(current.tag)
+        stack.extend(current.children)
+    return tags
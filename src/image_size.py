@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+import struct
+import urllib.parse
+from typing import Dict, List, Optional, Tuple
+
+from filesystem import DiskFileSystem, FileSystem, make_dirs
+
+# The formats whose dimensions can be read from their header.
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+
+# Where incremental builds keep the dimensions between builds, next to the build manifest.
+IMAGE_SIZES_FILE = 'image-sizes.json'
+
+# Bumped whenever the stored layout changes.
+IMAGE_SIZES_VERSION = 1
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+GIF_SIGNATURES = (b'GIF87a', b'GIF89a')
+
+# JPEG start-of-frame markers, which carry the dimensions; 0xC4, 0xC8 and 0xCC share the range
+# but are other segments.
+JPEG_FRAME_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+# JPEG markers that stand alone, without a length field.
+JPEG_STANDALONE_MARKERS = frozenset(range(0xD0, 0xDA)) | {0x01}
+
+def png_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """Reads the dimensions from a PNG's `IHDR` chunk, which always comes first."""
+    if len(data) < 24 or data[12:16] != b'IHDR':
+        return None
+    return struct.unpack('>II', data[16:24])
+
+def gif_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """Reads the dimensions from a GIF's logical screen descriptor."""
+    if len(data) < 10:
+        return None
+    return struct.unpack('<HH', data[6:10])
+
+def jpeg_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """Walks a JPEG's segments up to the first start-of-frame segment and reads its dimensions."""
+    i = 2
+    while i + 1 < len(data):
+        if data[i] != 0xFF:
+            return None
+        # Any number of 0xFF fill bytes may precede a marker.
+        while i + 1 < len(data) and data[i + 1] == 0xFF:
+            i += 1
+        marker = data[i + 1]
+        if marker in JPEG_STANDALONE_MARKERS:
+            i += 2
+            continue
+        if i + 4 > len(data):
+            return None
+        length = struct.unpack('>H', data[i + 2:i + 4])[0]
+        if marker in JPEG_FRAME_MARKERS:
+            if i + 9 > len(data):
+                return None
+            height, width = struct.unpack('>HH', data[i + 5:i + 9])
+            return width, height
+        i += 2 + length
+    return None
+
+def webp_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """Reads the dimensions from the first chunk of a WebP file, in any of its three encodings."""
+    chunk = data[12:16]
+    if chunk == b'VP8 ' and len(data) >= 30 and data[23:26] == b'\x9d\x01\x2a':
+        width, height = struct.unpack('<HH', data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L' and len(data) >= 25 and data[20] == 0x2F:
+        bits = int.from_bytes(data[21:25], 'little')
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8X' and len(data) >= 30:
+        return int.from_bytes(data[24:27], 'little') + 1, int.from_bytes(data[27:30], 'little') + 1
+    return None
+
+def image_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """
+    Reads the intrinsic dimensions of a PNG, JPEG, GIF or WebP image from its header.
+
+    Args:
+        data (bytes): The image file.
+
+    Returns:
+        Optional[Tuple[int, int]]: The width and height in pixels, or None if the format is not
+            recognized or the header is truncated. The EXIF orientation of a JPEG is not applied.
+    """
+    if data.startswith(PNG_SIGNATURE):
+        return png_size(data)
+    if data.startswith(GIF_SIGNATURES):
+        return gif_size(data)
+    if data.startswith(b'\xff\xd8'):
+        return jpeg_size(data)
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return webp_size(data)
+    return None
+
+class ImageSizer:
+    """
+    Looks up the dimensions of the site's static images by URL.
+
+    Dimensions are cached by the hash of the image's contents, and each file's hash by its
+    modification time, so across incremental builds an unchanged image is not even read again.
+
+    Attributes:
+        static_dir (str): The directory of static assets images are looked up in.
+        fs (FileSystem): The filesystem to read from.
+        files (Dict[str, List]): The `[mtime_ns, content hash]` of each image read, keyed by path.
+        sizes (Dict[str, Optional[List[int]]]): The `[width, height]` of each image, keyed by
+            content hash; None for a file whose format was not recognized.
+    """
+
+    def __init__(self, static_dir: str, fs: FileSystem = None):
+        """
+        Initializes an empty cache.
+
+        Args:
+            static_dir (str): The directory of static assets.
+            fs (FileSystem, optional): The filesystem to read from. Defaults to the real disk.
+        """
+        self.static_dir = static_dir
+        self.fs = fs if fs is not None else DiskFileSystem()
+        self.files: Dict[str, List] = {}
+        self.sizes: Dict[str, Optional[List[int]]] = {}
+        self._signature: Optional[str] = None
+
+    @classmethod
+    def load(cls, path: str, static_dir: str, fs: FileSystem = None) -> 'ImageSizer':
+        """
+        Reads a cache stored by `save`, starting empty if it is missing or unreadable.
+
+        Args:
+            path (str): Where the cache is stored.
+            static_dir (str): The directory of static assets.
+            fs (FileSystem, optional): The filesystem to read from. Defaults to the real disk.
+
+        Returns:
+            ImageSizer: The cache.
+        """
+        sizer = cls(static_dir, fs)
+        try:
+            data = json.loads(sizer.fs.read_text(path))
+        except (OSError, ValueError):
+            return sizer
+
+        if isinstance(data, dict) and data.get('version') == IMAGE_SIZES_VERSION:
+            sizer.files = dict(data['files'])
+            sizer.sizes = dict(data['sizes'])
+        return sizer
+
+    def save(self, path: str) -> None:
+        """
+        Writes the cache, creating its directory if needed.
+
+        Args:
+            path (str): Where to store the cache.
+        """
+        make_dirs(os.path.dirname(path), self.fs)
+        data = {'version': IMAGE_SIZES_VERSION, 'files': self.files, 'sizes': self.sizes}
+        self.fs.write_text(path, json.dumps(data, separators=(',', ':')))
+
+    def path(self, url: str) -> Optional[str]:
+        """
+        Returns the static file a site-absolute image URL refers to.
+
+        Args:
+            url (str): The image URL, e.g. `/images/rivendell.png`.
+
+        Returns:
+            Optional[str]: The path below the static directory, or None for external and relative URLs.
+        """
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme or parts.netloc or not parts.path.startswith('/'):
+            return None
+        return os.path.join(self.static_dir, urllib.parse.unquote(parts.path).lstrip('/'))
+
+    def size(self, url: str) -> Optional[Tuple[int, int]]:
+        """
+        Returns the dimensions of a static image.
+
+        Args:
+            url (str): The image URL, e.g. `/images/rivendell.png`.
+
+        Returns:
+            Optional[Tuple[int, int]]: The width and height in pixels, or None if the URL is not a
+                static image of a recognized format.
+        """
+        path = self.path(url)
+        if path is None or not path.lower().endswith(IMAGE_EXTENSIONS) or not self.fs.isfile(path):
+            return None
+
+        mtime = self.fs.mtime_ns(path)
+        entry = self.files.get(path)
+        if entry is not None and entry[0] == mtime and entry[1] in self.sizes:
+            digest = entry[1]
+        else:
+            data = self.fs.read_bytes(path)
+            digest = hashlib.sha256(data).hexdigest()
+            self.files[path] = [mtime, digest]
+            if digest not in self.sizes:
+                size = image_size(data)
+                self.sizes[digest] = list(size) if size is not None else None
+
+        size = self.sizes[digest]
+        return tuple(size) if size is not None else None
+
+    def signature(self) -> str:
+        """
+        Returns a hash of the dimensions of every static image, which changes whenever a page's
+        `width` and `height` attributes may change.
+
+        Returns:
+            str: The SHA-256 over each image's URL and dimensions.
+        """
+        if self._signature is not None:
+            return self._signature
+
+        digest = hashlib.sha256()
+        stack = [(self.static_dir, '/')]
+        while stack:
+            dir_path, url_prefix = stack.pop()
+            for name in sorted(self.fs.listdir(dir_path)):
+                path = os.path.join(dir_path, name)
+                if self.fs.isdir(path):
+                    stack.append((path, f'{url_prefix}{name}/'))
+                elif name.lower().endswith(IMAGE_EXTENSIONS):
+                    digest.update(f'{url_prefix}{name}\0{self.size(url_prefix + name)}\0'.encode('utf-8'))
+
+        self._signature = digest.hexdigest()
+        return self._signature
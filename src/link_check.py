@@ -0,0 +1,193 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Mapping, Optional, Set
+
+from extract import extract_markdown_images, extract_markdown_links, extract_reference_definition
+from filesystem import DiskFileSystem, FileSystem
+from link_graph import resolve_link
+from taxonomy import Page
+
+# Locating broken links reads their source files; below this many pages a pool is not worth starting.
+PARALLEL_THRESHOLD = 8
+
+class BrokenLink:
+    """
+    A link or image on a page whose target the build did not produce.
+
+    Attributes:
+        source (str): The Markdown source of the page.
+        line (Optional[int]): The line of the source the link is on, or None if it was not found.
+        target (str): The URL the link points to, resolved against the page's URL.
+        kind (str): `link` or `image`.
+    """
+
+    def __init__(self, source: str, line: Optional[int], target: str, kind: str):
+        """
+        Initializes a `BrokenLink`.
+
+        Args:
+            source (str): The Markdown source of the page.
+            line (Optional[int]): The line of the source the link is on.
+            target (str): The resolved URL.
+            kind (str): `link` or `image`.
+        """
+        self.source = source
+        self.line = line
+        self.target = target
+        self.kind = kind
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, BrokenLink) and vars(self) == vars(other)
+
+    def __repr__(self) -> str:
+        return f"BrokenLink({self.source!r}, {self.line!r}, {self.target!r}, {self.kind!r})"
+
+    def __str__(self) -> str:
+        location = f'{self.source}:{self.line}' if self.line is not None else self.source
+        return f'{location}: broken {self.kind} to {self.target}'
+
+class LinkCheckError(Exception):
+    """
+    Raised after a build whose pages link to outputs that do not exist.
+
+    Attributes:
+        broken (List[BrokenLink]): Every broken link, in source order.
+    """
+
+    def __init__(self, broken: List[BrokenLink]):
+        """
+        Initializes a `LinkCheckError`.
+
+        Args:
+            broken (List[BrokenLink]): Every broken link.
+        """
+        self.broken = broken
+        super().__init__(f"{len(broken)} broken link(s)")
+
+def output_urls(public_dir: str, fs: FileSystem = None) -> Set[str]:
+    """
+    Collects the URL of every file in the output directory into a set.
+
+    The output directory holds every generated page and every file copied from `static/`, so a
+    link target exists exactly when its URL is in this set. A directory's `index.html` is also
+    reachable as the directory itself, with or without the trailing slash.
+
+    Args:
+        public_dir (str): The output directory.
+        fs (FileSystem, optional): The filesystem to walk. Defaults to the real disk.
+
+    Returns:
+        Set[str]: The URLs, e.g. `/index.css`, `/majesty/index.html`, `/majesty/` and `/majesty`.
+    """
+    if fs is None:
+        fs = DiskFileSystem()
+
+    urls: Set[str] = set()
+    stack = [(public_dir, '/')]
+    while stack:
+        dir_path, url_prefix = stack.pop()
+        for name in fs.listdir(dir_path):
+            path = os.path.join(dir_path, name)
+            if fs.isdir(path):
+                stack.append((path, f'{url_prefix}{name}/'))
+                continue
+            urls.add(f'{url_prefix}{name}')
+            if name == 'index.html':
+                urls.add(url_prefix)
+                urls.add(url_prefix.rstrip('/') or '/')
+    return urls
+
+def find_broken(pages: Iterable[Page], urls: Set[str], aliases: Mapping[str, str] = None) -> Dict[str, List[BrokenLink]]:
+    """
+    Checks every link and image target of every page against the set of output URLs.
+
+    Each target costs one set lookup, so checking the whole site is linear in its number of links.
+
+    Args:
+        pages (Iterable[Page]): The record of every page of the site.
+        urls (Set[str]): The URLs the build produced, as returned by `output_urls`.
+        aliases (Mapping[str, str], optional): The URL each target is actually published at, when
+            it differs, such as the fingerprinted name of a static file. Defaults to None.
+
+    Returns:
+        Dict[str, List[BrokenLink]]: The broken links of each page with any, keyed by source path;
+            their lines are not located yet.
+    """
+    aliases = aliases or {}
+    broken: Dict[str, List[BrokenLink]] = {}
+    for page in pages:
+        for kind, targets in (('link', page.links), ('image', page.images)):
+            for target in targets:
+                if aliases.get(target, target) not in urls:
+                    broken.setdefault(page.source, []).append(BrokenLink(page.source, None, target, kind))
+    return broken
+
+def locate_lines(page: Page, broken: List[BrokenLink], fs: FileSystem) -> List[BrokenLink]:
+    """
+    Finds the source line of each broken link of a page.
+
+    Page records only keep resolved targets, so the source is scanned line by line for inline
+    links, images and reference definitions resolving to the same URL. This only happens for the
+    few pages that have broken links.
+
+    Args:
+        page (Page): The page.
+        broken (List[BrokenLink]): The page's broken links.
+        fs (FileSystem): The filesystem to read the source from.
+
+    Returns:
+        List[BrokenLink]: The same broken links, with their `line` set where it was found.
+    """
+    pending = {(link.kind, link.target): link for link in broken}
+    try:
+        lines = fs.read_text(page.source).splitlines()
+    except OSError:
+        return broken
+
+    for number, line in enumerate(lines, start=1):
+        candidates = [('image', url) for _, url in extract_markdown_images(line)]
+        candidates += [('link', url) for _, url in extract_markdown_links(line)]
+        definition = extract_reference_definition(line)
+        if definition is not None:
+            # A definition may be used by links and images alike.
+            candidates += [('link', definition[1]), ('image', definition[1])]
+
+        for kind, href in candidates:
+            link = pending.get((kind, resolve_link(page.url, href)))
+            if link is not None and link.line is None:
+                link.line = number
+
+    return broken
+
+def check_links(pages: List[Page], public_dir: str, fs: FileSystem = None, workers: int = None,
+                aliases: Mapping[str, str] = None) -> List[BrokenLink]:
+    """
+    Validates every internal link and image of the site against the files the build produced.
+
+    Args:
+        pages (List[Page]): The record of every page of the site.
+        public_dir (str): The output directory.
+        fs (FileSystem, optional): The filesystem the site was built in. Defaults to the real disk.
+        workers (int, optional): The number of threads locating broken links in their sources.
+            Defaults to None (chosen by `ThreadPoolExecutor`).
+        aliases (Mapping[str, str], optional): The URL each target is actually published at, when
+            it differs from the URL in the source. Defaults to None.
+
+    Returns:
+        List[BrokenLink]: Every broken link, sorted by source and line.
+    """
+    if fs is None:
+        fs = DiskFileSystem()
+
+    broken = find_broken(pages, output_urls(public_dir, fs), aliases)
+    affected = [page for page in pages if page.source in broken]
+
+    # Reading the sources is I/O bound, so threads overlap it well enough for large sites.
+    if len(affected) >= PARALLEL_THRESHOLD:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            located = list(executor.map(lambda page: locate_lines(page, broken[page.source], fs), affected))
+    else:
+        located = [locate_lines(page, broken[page.source], fs) for page in affected]
+
+    results = [link for links in located for link in links]
+    return sorted(results, key=lambda link: (link.source, link.line or 0, link.target))
@@ -0,0 +1,117 @@
+import urllib.parse
+from typing import Dict, Iterable, List, Optional, Set
+
+from htmlnode import LeafNode, ParentNode
+from taxonomy import Page
+
+# The elements of the "Linked from" section, for the critical CSS of pages that have one.
+BACKLINKS_TAGS = frozenset({'nav', 'h2', 'ul', 'li', 'a'})
+
+def resolve_link(page_url: str, href: str) -> Optional[str]:
+    """
+    Resolves a link found on a page to the URL of the page it points to on the same site.
+
+    Relative links are resolved against the page's URL, `index.html` is dropped so a directory and
+    its index are the same node, and an extensionless path is treated as a directory.
+
+    Args:
+        page_url (str): The URL of the page the link appears on, e.g. `/blog/post.html`.
+        href (str): The link's `href`, e.g. `../majesty/index.html#history`.
+
+    Returns:
+        Optional[str]: The target URL, e.g. `/majesty/`, or None for external links, other schemes
+            such as `mailto:`, and links to a fragment of the same page.
+    """
+    parts = urllib.parse.urlsplit(href)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+
+    path = urllib.parse.urljoin(page_url, parts.path)
+    if path.endswith('/index.html'):
+        path = path[:-len('index.html')]
+    elif not path.endswith('/') and '.' not in path.rsplit('/', 1)[-1]:
+        path += '/'
+    return path
+
+def internal_links(page_url: str, hrefs: Iterable[str]) -> List[str]:
+    """
+    Returns the distinct internal link targets of a page, in the order they first appear.
+
+    Args:
+        page_url (str): The URL of the page the links appear on.
+        hrefs (Iterable[str]): The `href` of every link on the page.
+
+    Returns:
+        List[str]: The target URLs, without external links or links back to the page itself.
+    """
+    targets: Dict[str, None] = {}
+    for href in hrefs:
+        target = resolve_link(page_url, href)
+        if target is not None and target != page_url:
+            targets[target] = None
+    return list(targets)
+
+class LinkGraph:
+    """
+    The site's internal links, as edges from the page a link appears on to the page it points to.
+
+    The graph is assembled from the `links` each `Page` record carries, which are gathered while
+    the page is parsed, so it never needs another pass over the generated HTML. Because page
+    records are kept in the build manifest, the graph persists between incremental builds too.
+
+    Attributes:
+        pages (Dict[str, Page]): Every page in the graph, keyed by URL.
+        inbound (Dict[str, Set[str]]): The URLs of the pages linking to each page, keyed by URL.
+    """
+
+    def __init__(self, pages: Iterable[Page] = ()):
+        """
+        Builds the graph of a set of pages.
+
+        Args:
+            pages (Iterable[Page], optional): The site's page records. Defaults to no pages.
+        """
+        self.pages: Dict[str, Page] = {}
+        self.inbound: Dict[str, Set[str]] = {}
+        for page in pages:
+            self.pages[page.url] = page
+
+        # Links to static files, listings or missing pages are not edges between pages.
+        for page in self.pages.values():
+            for target in page.links:
+                if target in self.pages:
+                    self.inbound.setdefault(target, set()).add(page.url)
+
+    def backlinks(self, url: str) -> List[List[str]]:
+        """
+        Returns the pages that link to a page.
+
+        Args:
+            url (str): The URL of the linked page.
+
+        Returns:
+            List[List[str]]: A `[url, title]` pair for each linking page, sorted by title. The pair
+                is a list rather than a tuple so it compares equal after a round trip through JSON.
+        """
+        sources = (self.pages[source] for source in self.inbound.get(url, ()))
+        return sorted(([page.url, page.title] for page in sources), key=lambda pair: (pair[1].lower(), pair[0]))
+
+def backlinks_html(backlinks: List[List[str]], minify: bool = False) -> str:
+    """
+    Renders the "Linked from" section for the `{{ Backlinks }}` template slot.
+
+    Args:
+        backlinks (List[List[str]]): The linking pages, as returned by `LinkGraph.backlinks`.
+        minify (bool, optional): Whether to serialize the section minified. Defaults to False.
+
+    Returns:
+        str: A `<nav>` element listing the linking pages, or an empty string if there are none.
+    """
+    if not backlinks:
+        return ''
+
+    items = [ParentNode('li', [LeafNode('a', title, {'href': url})]) for url, title in backlinks]
+    return ParentNode('nav', [
+        LeafNode('h2', 'Linked from'),
+        ParentNode('ul', items),
+    ], {'class': 'backlinks'}).to_html(minify)
@@ -0,0 +1,294 @@
+import difflib
+import json
+import os
+import queue
+import threading
+from typing import Dict, List, Optional
+
+# The client half of live reload. It subscribes to the development server's event stream and
+# applies block-level patches to the element marked `data-live-root`, swaps stylesheets in place
+# when only CSS changed, and falls back to a full reload when it cannot apply a patch safely.
+LIVE_RELOAD_SCRIPT = '''(function () {
+  var root = document.querySelector('[data-live-root]');
+  var events = new EventSource('/__live__?page=' + encodeURIComponent(location.pathname));
+  events.addEventListener('patch', function (event) {
+    var patch = JSON.parse(event.data);
+    var version = root && root.getAttribute('data-live-version');
+    if (version === String(patch.to)) return;
+    if (version !== String(patch.from)) { location.reload(); return; }
+    for (var i = patch.ops.length - 1; i >= 0; i--) {
+      var op = patch.ops[i];
+      for (var r = 0; r < op.remove; r++) root.removeChild(root.children[op.start]);
+      var holder = document.createElement('template');
+      holder.innerHTML = op.insert.join('');
+      root.insertBefore(holder.content, root.children[op.start] || null);
+    }
+    root.setAttribute('data-live-version', patch.to);
+    document.title = patch.title;
+  });
+  events.addEventListener('css', function (event) {
+    var path = JSON.parse(event.data).path;
+    document.querySelectorAll('link[rel="stylesheet"]').forEach(function (link) {
+      var url = new URL(link.href);
+      if (url.pathname !== path) return;
+      url.searchParams.set('live', Date.now());
+      link.href = url.href;
+    });
+  });
+  events.addEventListener('reload', function () { location.reload(); });
+})();'''
+
+def diff_blocks(old_blocks: List[str], new_blocks: List[str]) -> List[dict]:
+    """
+    Computes the block-level edits that turn one rendered page body into another.
+
+    Each edit removes `remove` blocks starting at index `start` of the old list and inserts the
+    `insert` blocks in their place. Indices refer to the old list, so the client applies the
+    edits from last to first.
+
+    Args:
+        old_blocks (List[str]): The serialized top-level blocks the browser currently shows.
+        new_blocks (List[str]): The serialized top-level blocks of the new render.
+
+    Returns:
+        List[dict]: The edits, in ascending order of `start`. Empty if nothing changed.
+    """
+    # `autojunk` is meant for long text sequences; with blocks it would hide repeated paragraphs.
+    matcher = difflib.SequenceMatcher(None, old_blocks, new_blocks, autojunk=False)
+
+    # Only the non-equal opcodes need to be sent; unchanged blocks stay in the DOM untouched.
+    return [
+        {'start': i1, 'remove': i2 - i1, 'insert': new_blocks[j1:j2]}
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != 'equal'
+    ]
+
+def inject_script(html: str, script: str) -> str:
+    """
+    Inserts an inline script just before the closing `</body>` tag of a page.
+
+    Args:
+        html (str): The complete HTML page.
+        script (str): The JavaScript source to inject.
+
+    Returns:
+        str: The page with the script injected, or appended if the page has no `</body>`.
+    """
+    tag = f'<script>{script}</script>'
+    index = html.rfind('</body>')
+    if index == -1:
+        return html + tag
+    return html[:index] + tag + html[index:]
+
+def format_event(event: str, data: dict) -> bytes:
+    """
+    Formats a Server-Sent Event.
+
+    Args:
+        event (str): The event name.
+        data (dict): The payload, sent as a single line of JSON.
+
+    Returns:
+        bytes: The encoded event, terminated by a blank line.
+    """
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'.encode('utf-8')
+
+class LiveReloadHub:
+    """
+    Watches the sources of open pages and pushes changes to their browsers.
+
+    For every page with at least one subscriber the hub keeps the last block list it sent. A
+    polling thread re-renders changed pages through the page cache, diffs the new block list
+    against the old one and pushes only the changed blocks. Template changes force a reload, and
+    changes limited to stylesheets in the static directory are pushed as stylesheet swaps.
+
+    Attributes:
+        page_cache: The development server's `PageCache`.
+        static_dir (str): The directory of static assets.
+        interval (float): The polling interval in seconds.
+    """
+
+    def __init__(self, page_cache, static_dir: str, interval: float = 0.5):
+        """
+        Initializes the hub.
+
+        Args:
+            page_cache: The development server's `PageCache`, rendering in live mode.
+            static_dir (str): The directory of static assets.
+            interval (float, optional): The polling interval in seconds. Defaults to 0.5.
+        """
+        self.page_cache = page_cache
+        self.static_dir = static_dir
+        self.interval = interval
+        self._subscribers: Dict[str, List[queue.Queue]] = {}
+        self._snapshots: Dict[str, object] = {}
+        self._template_mtime = self.template_mtime()
+        self._static_mtimes = self.scan_static()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, source_path: str) -> queue.Queue:
+        """
+        Registers a browser that shows the page rendered from `source_path`.
+
+        Args:
+            source_path (str): The Markdown source of the open page.
+
+        Returns:
+            queue.Queue: The queue that receives encoded events for this browser.
+        """
+        events: queue.Queue = queue.Queue()
+        with self._lock:
+            self._subscribers.setdefault(source_path, []).append(events)
+
+            # The first subscriber defines the baseline the browser is showing.
+            if source_path not in self._snapshots:
+                try:
+                    self._snapshots[source_path] = self.page_cache.get(source_path)
+                except Exception:
+                    pass
+        return events
+
+    def unsubscribe(self, source_path: str, events: queue.Queue) -> None:
+        """
+        Removes a browser's queue, forgetting the page's snapshot when nobody is watching it.
+
+        Args:
+            source_path (str): The Markdown source of the page.
+            events (queue.Queue): The queue returned by `subscribe`.
+        """
+        with self._lock:
+            subscribers = self._subscribers.get(source_path, [])
+            if events in subscribers:
+                subscribers.remove(events)
+            if not subscribers:
+                self._subscribers.pop(source_path, None)
+                self._snapshots.pop(source_path, None)
+
+    def start(self) -> None:
+        """Starts the polling thread."""
+        self._thread = threading.Thread(target=self.run, name='live-reload', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops the polling thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def run(self) -> None:
+        """Polls for changes until `stop` is called."""
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def poll(self) -> None:
+        """
+        Checks the template, the static files and every watched source once, pushing any changes.
+        """
+        # A template change affects every page's surroundings; there is nothing smaller to patch.
+        template_mtime = self.template_mtime()
+        if template_mtime != self._template_mtime:
+            self._template_mtime = template_mtime
+            with self._lock:
+                self._snapshots.clear()
+            self.broadcast(format_event('reload', {}))
+            return
+
+        # Compare the static tree against the previous scan.
+        static_mtimes = self.scan_static()
+        changed = {path for path in static_mtimes.keys() | self._static_mtimes.keys()
+                   if static_mtimes.get(path) != self._static_mtimes.get(path)}
+        self._static_mtimes = static_mtimes
+        if changed:
+            # Stylesheets can be swapped in place; anything else (images, scripts) needs a reload.
+            if all(path.endswith('.css') and path in static_mtimes for path in changed):
+                for path in sorted(changed):
+                    self.broadcast(format_event('css', {'path': path}))
+            else:
+                self.broadcast(format_event('reload', {}))
+
+        with self._lock:
+            watched = list(self._subscribers)
+
+        for source_path in watched:
+            self.push_changes(source_path)
+
+    def push_changes(self, source_path: str) -> None:
+        """
+        Re-renders a watched page if its source changed and pushes the changed blocks.
+
+        Args:
+            source_path (str): The Markdown source of the page.
+        """
+        try:
+            page = self.page_cache.get(source_path)
+        except Exception:
+            # Broken Markdown mid-edit or a deleted file: keep the last good page on screen.
+            return
+
+        with self._lock:
+            previous = self._snapshots.get(source_path)
+            self._snapshots[source_path] = page
+            subscribers = list(self._subscribers.get(source_path, []))
+
+        if previous is None or previous is page:
+            return
+
+        # Slots such as the table of contents live outside the patched body, so reload the page instead.
+        if previous.slots != page.slots:
+            for events in subscribers:
+                events.put(format_event('reload', {}))
+            return
+
+        patch = {
+            'from': previous.version,
+            'to': page.version,
+            'title': page.title,
+            'ops': diff_blocks(previous.blocks, page.blocks),
+        }
+        event = format_event('patch', patch)
+        for events in subscribers:
+            events.put(event)
+
+    def broadcast(self, event: bytes) -> None:
+        """
+        Sends an encoded event to every subscriber.
+
+        Args:
+            event (bytes): The encoded event.
+        """
+        with self._lock:
+            subscribers = [events for queues in self._subscribers.values() for events in queues]
+        for events in subscribers:
+            events.put(event)
+
+    def template_mtime(self) -> int:
+        """
+        Returns the template's `mtime_ns`, or -1 if it cannot be read.
+
+        Returns:
+            int: The modification time.
+        """
+        try:
+            return os.stat(self.page_cache.template_path).st_mtime_ns
+        except OSError:
+            return -1
+
+    def scan_static(self) -> Dict[str, int]:
+        """
+        Collects the modification times of every static file, keyed by URL path.
+
+        Returns:
+            Dict[str, int]: A mapping such as `{'/index.css': 1726000000000000000}`.
+        """
+        mtimes = {}
+        for dir_path, _, file_names in os.walk(self.static_dir):
+            for file_name in file_names:
+                path = os.path.join(dir_path, file_name)
+                url_path = '/' + os.path.relpath(path, self.static_dir).replace(os.sep, '/')
+                try:
+                    mtimes[url_path] = os.stat(path).st_mtime_ns
+                except OSError:
+                    continue
+        return mtimes
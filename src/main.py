@@ -1,9 +1,29 @@
+import argparse
+import hashlib
 import os
-import shutil
+from typing import Dict, List
 
-from generate_page import generate_page_recursive
+from assets import AssetPipeline
+from build_cache import BuildCache
+from build_client import DEFAULT_SOCKET_PATH
+from css import StyleInliner
+from dev_server import serve_dev
+from feeds import generate_feeds
+from filesystem import DiskFileSystem, FileSystem, MemoryFileSystem
+from fragments import NAVIGATION_SCRIPT, NAVIGATION_SCRIPT_URL
+from generate_page import generate_page_recursive, update_backlinks
+from highlight import HIGHLIGHT_CACHE_FILE, HighlightCache
+from link_check import LinkCheckError, check_links
+from precompress import PrecompressingFileSystem, Precompressor, remove_siblings
+from manifest import DEFAULT_MANIFEST_PATH, BuildManifest
+from outputs import PRINT_PATTERN, FragmentTarget, OutputTargets, TemplateTarget, TreeTarget
+from image_size import IMAGE_SIZES_FILE, ImageSizer
+from search_index import SEARCH_INDEX_FILE, SearchIndex, generate_search_index
+from serve import serve
+from sitemap import generate_sitemaps
+from taxonomy import TaxonomyIndex, generate_listings
 
-def copy_all_contents(source: str, destination: str) -> None:
+def copy_all_contents(source: str, destination: str, fs: FileSystem = None) -> None:
     """
     Copies all files and directories from a source path to a destination path.
 
@@ -14,29 +34,33 @@ def copy_all_contents(source: str, destination: str) -> None:
     Args:
         source (str): The relative or absolute path of the file(s) or directory(s) to be copied.
         destination (str): The relative or absolute path of the destination directory.
+        fs (FileSystem, optional): The filesystem to copy within. Defaults to the real disk.
 
     Returns:
         None
     """
+    # Default to the real disk so existing callers keep working unchanged.
+    if fs is None:
+        fs = DiskFileSystem()
 
     # Ensure the source path exists; if it does not, raise an error to prevent unnecessary operations
-    if not os.path.exists(source):
+    if not fs.exists(source):
         raise ValueError('Source path does not exist. Please check the path and try again.')
     
     # If the destination path does not exist, create it to ensure it can receive copied contents
-    if not os.path.exists(destination):
-        os.mkdir(destination)
+    if not fs.exists(destination):
+        fs.mkdir(destination)
         # Start copying files and directories after creating the destination
-        copy_files(source, destination)
+        copy_files(source, destination, fs)
 
     # If the destination path exists, clear its contents to avoid mixing old and new files
     else:
-        remove_destination_dir_contents(destination)  # Remove existing contents to prevent conflicts
-        copy_files(source, destination)  # Copy contents from source to destination
+        remove_destination_dir_contents(destination, fs)  # Remove existing contents to prevent conflicts
+        copy_files(source, destination, fs)  # Copy contents from source to destination
     
     print('Copy completed')
 
-def copy_files(source: str, destination: str) -> None:
+def copy_files(source: str, destination: str, fs: FileSystem = None) -> None:
     """
     This function recursively searches through the source path for files to copy.
 
@@ -46,13 +70,16 @@ def copy_files(source: str, destination: str) -> None:
     Args:
         source (str): The relative path for the source directory or file.
         destination (str): The relative path for the destination directory.
+        fs (FileSystem, optional): The filesystem to copy within. Defaults to the real disk.
 
     Returns:
         None.
     """
+    if fs is None:
+        fs = DiskFileSystem()
 
     # Retrieve all contents from the source path to determine what needs to be copied
-    contents = os.listdir(source)
+    contents = fs.listdir(source)
 
     # Loop through each item in the source to process both files and directories
     for content in contents:
@@ -61,23 +88,96 @@ def copy_files(source: str, destination: str) -> None:
         dest_path = os.path.join(destination, content)
 
         # Check if the current item is a directory to handle it differently from files
-        if os.path.isdir(src_path):
+        if fs.isdir(src_path):
             # Ensure the corresponding directory exists in the destination to mirror the source structure
-            if not os.path.exists(dest_path):
-                os.mkdir(dest_path)
+            if not fs.exists(dest_path):
+                fs.mkdir(dest_path)
             
             # Recursively copy the contents of the directory to handle nested files and directories
-            copy_files(src_path, dest_path)
+            copy_files(src_path, dest_path, fs)
 
         # If the current item is a file, copy it directly to the destination path
-        elif os.path.isfile(src_path):
-            shutil.copy(src_path, dest_path)
+        elif fs.isfile(src_path):
+            fs.copy(src_path, dest_path)
 
         # Raise an error for unexpected content types to avoid undefined behavior or data corruption
         else:
             raise ValueError(f"The path '{src_path}' is neither a file nor a directory.")
             
-def remove_destination_dir_contents(destination_dir: str) -> None:   
+def copy_changed_files(source: str, destination: str, fs: FileSystem = None) -> None:
+    """
+    Recursively copies the files of a source directory that are missing or out of date in the destination.
+
+    Used by incremental builds instead of `copy_all_contents`, which empties the destination first.
+
+    Args:
+        source (str): The relative path for the source directory.
+        destination (str): The relative path for the destination directory.
+        fs (FileSystem, optional): The filesystem to copy within. Defaults to the real disk.
+
+    Returns:
+        None.
+    """
+    if fs is None:
+        fs = DiskFileSystem()
+
+    if not fs.exists(destination):
+        fs.mkdir(destination)
+
+    for content in fs.listdir(source):
+        src_path = os.path.join(source, content)
+        dest_path = os.path.join(destination, content)
+
+        if fs.isdir(src_path):
+            copy_changed_files(src_path, dest_path, fs)
+
+        # A copy is newer than its source, so an older destination means the source changed since.
+        elif not fs.isfile(dest_path) or fs.mtime_ns(dest_path) < fs.mtime_ns(src_path):
+            fs.copy(src_path, dest_path)
+
+def static_outputs(source: str, destination: str, fs: FileSystem) -> Dict[str, str]:
+    """
+    Lists the copies of a source directory's files in the destination, for the build manifest.
+
+    Args:
+        source (str): The relative path for the source directory.
+        destination (str): The relative path for the destination directory.
+        fs (FileSystem): The filesystem to list.
+
+    Returns:
+        Dict[str, str]: The `mtime_ns` of each source file, keyed by the path of its copy.
+    """
+    outputs: Dict[str, str] = {}
+    for content in fs.listdir(source):
+        src_path = os.path.join(source, content)
+        dest_path = os.path.join(destination, content)
+        if fs.isdir(src_path):
+            outputs.update(static_outputs(src_path, dest_path, fs))
+        else:
+            outputs[dest_path] = str(fs.mtime_ns(src_path))
+    return outputs
+
+def publish_generated(files: Dict[str, bytes], destination: str, fs: FileSystem) -> Dict[str, str]:
+    """
+    Writes files the build produces rather than copies, such as the navigation script, unless they are up to date.
+
+    Args:
+        files (Dict[str, bytes]): The contents of each file, keyed by URL.
+        destination (str): The relative path for the destination directory.
+        fs (FileSystem): The filesystem to write to.
+
+    Returns:
+        Dict[str, str]: The SHA-256 of each file, keyed by destination path, for the build manifest.
+    """
+    outputs: Dict[str, str] = {}
+    for url, data in files.items():
+        dest_path = os.path.join(destination, url.lstrip('/'))
+        if not fs.isfile(dest_path) or fs.read_bytes(dest_path) != data:
+            fs.write_bytes(dest_path, data)
+        outputs[dest_path] = hashlib.sha256(data).hexdigest()
+    return outputs
+
+def remove_destination_dir_contents(destination_dir: str, fs: FileSystem = None) -> None:   
     """
     Recursively deletes all files and directories within a specified directory.
 
@@ -88,28 +188,31 @@ def remove_destination_dir_contents(destination_dir: str) -> None:
     Args:
         destination_dir (str): The relative or absolute path to the directory from which to 
         remove all contents.
+        fs (FileSystem, optional): The filesystem to delete from. Defaults to the real disk.
 
     Returns:
         None
     """
+    if fs is None:
+        fs = DiskFileSystem()
 
     # List all contents in the destination directory to determine what needs to be removed
-    contents = os.listdir(destination_dir)
+    contents = fs.listdir(destination_dir)
     
     # Iterate over each item to handle both files and directories
     for content in contents:
         # Construct the full path to ensure accurate removal
         path = os.path.join(destination_dir, content)
 
-        if os.path.isdir(path):
+        if fs.isdir(path):
             # Recursively remove contents of the directory to ensure no files are left behind
-            remove_destination_dir_contents(path)
+            remove_destination_dir_contents(path, fs)
             # After all contents are removed, remove the empty directory itself
-            os.rmdir(path)
+            fs.rmdir(path)
 
-        elif os.path.isfile(path):
+        elif fs.isfile(path):
             # Directly remove the file as it's a leaf node in the directory tree
-            os.remove(path)
+            fs.remove(path)
 
         # Handle unexpected cases to avoid undefined behavior
         else:
@@ -117,22 +220,353 @@ def remove_destination_dir_contents(destination_dir: str) -> None:
     
         
 
-def main() -> None:
+def build_site(static_dir: str = './static', content_dir: str = './content/', template_path: str = './template.html',
+               public_dir: str = './public/', cache: BuildCache = None, fs: FileSystem = None, incremental: bool = False,
+               manifest_path: str = DEFAULT_MANIFEST_PATH, base_url: str = '', check: bool = False,
+               precompress: bool = False, minify: bool = False, critical_css: bool = False,
+               fingerprint: bool = False, image_sizes: bool = True, fragments: bool = False,
+               highlight: bool = True, print_template: str = None, node_trees: bool = False,
+               targets: OutputTargets = None) -> List[str]:
     """
-    Main function to execute the static site generation process.
+    Builds the whole site: copies the static files, generates every page, the taxonomy listings, the
+    feeds, the sitemap and the search index.
+
+    A full build empties the output directory first. An incremental build keeps it, and uses the 
+    manifest written by the previous incremental build to skip pages whose source did not change 
+    and listing pages whose members did not change, and to delete outputs that are gone. Either way, 
+    a page's "Linked from" section is only rewritten when the pages linking to it change.
+
+    Args:
+        static_dir (str, optional): The directory of static assets. Defaults to `./static`.
+        content_dir (str, optional): The directory of Markdown content. Defaults to `./content/`.
+        template_path (str, optional): The HTML template. Defaults to `./template.html`.
+        public_dir (str, optional): The output directory. Defaults to `./public/`.
+        cache (BuildCache, optional): A cache shared between builds, as kept by the build daemon. 
+            Defaults to None (a cache for this build alone is used).
+        fs (FileSystem, optional): The filesystem to build in. Defaults to the real disk.
+        incremental (bool, optional): Whether to build incrementally. Defaults to False.
+        manifest_path (str, optional): Where incremental builds keep their manifest. 
+            Defaults to `DEFAULT_MANIFEST_PATH`.
+        base_url (str, optional): The site's absolute URL, which feed and sitemap links start with.
+            Defaults to an empty string (site-relative links).
+        check (bool, optional): Whether to check every internal link and image once the site is
+            written. Defaults to False.
+        precompress (bool, optional): Whether to write `.gz` (and `.br`) siblings of the text 
+            outputs. Defaults to False.
+        minify (bool, optional): Whether to write pages and listings without insignificant
+            whitespace, optional end tags and unneeded attribute quotes, and stylesheets minified.
+            Defaults to False.
+        critical_css (bool, optional): Whether to inline the CSS rules each page needs into its
+            `<head>` and load the minified stylesheets without blocking rendering. Defaults to False.
+        fingerprint (bool, optional): Whether to publish static files under content-hashed names,
+            point pages at them, and write the asset manifest and a `_headers` file marking them
+            immutable. Defaults to False.
+        image_sizes (bool, optional): Whether to give images the `width` and `height` read from
+            their files, and to load every image but the first on a page lazily. Defaults to True.
+        fragments (bool, optional): Whether to write each page's title and content as a
+            `.fragment.json` file next to it, and publish the script, loaded by every page, that
+            navigates between pages by swapping fragments. Defaults to False.
+        highlight (bool, optional): Whether to syntax highlight fenced code blocks that name their
+            language, with Pygments if it is installed and the built-in lexers otherwise. Defaults to True.
+        print_template (str, optional): A template to also fill with each page, written as a
+            `.print.html` file next to it. Defaults to None (no print variant).
+        node_trees (bool, optional): Whether to write each page's title, front matter and HTML
+            tree as a `.tree.json` file next to it, for downstream indexing. Defaults to False.
+        targets (OutputTargets, optional): Further outputs to produce for every page, to which
+            the ones the options above ask for are added. Defaults to None.
 
-    This function copies all static files to the public directory and then generates HTML pages 
-    for each markdown file found in the content directory using a specified template.
+    Returns:
+        List[str]: The destination paths of every content page.
+
+    Raises:
+        LinkCheckError: If `check` is set and a page links to a file the build did not produce.
     """
+    if fs is None:
+        fs = DiskFileSystem()
+
+    # Pages are parsed for their links before they are written; a cache keeps that from parsing them twice.
+    if cache is None:
+        cache = BuildCache()
+
+    # An incremental build keeps the previous output, along with what the manifest says it contains.
+    keep_output = incremental and fs.isdir(public_dir)
+    if keep_output:
+        manifest = BuildManifest.load(manifest_path, fs)
+    else:
+        manifest = BuildManifest(manifest_path) if incremental else None
 
-    # Ensure the 'public' directory is synchronized with 'static' contents 
-    # to provide the latest static resources (e.g., CSS, JavaScript, images).
-    copy_all_contents('./static', './public')
+    # Every output written from here on is compressed in the background while the build goes on.
+    precompressor = None
+    if precompress:
+        previous = manifest.previous_outputs('compressed') if manifest is not None else None
+        precompressor = Precompressor(fs, previous)
+        fs = PrecompressingFileSystem(fs, public_dir, precompressor)
+
+    # Stylesheets are parsed once, then minified and, with critical CSS, inlined per page.
+    stylesheets = StyleInliner(static_dir, fs, cache) if minify or critical_css else None
+    styles = stylesheets if critical_css else None
+
+    # Every extra output of a page is produced from the page's single parse, in the same pass.
+    targets = OutputTargets(list(targets or []))
+    if print_template is not None:
+        targets.register(TemplateTarget('print', PRINT_PATTERN, print_template))
+    if fragments:
+        targets.register(FragmentTarget())
+    if node_trees:
+        targets.register(TreeTarget())
+
+    # Pages with fragments load the navigation script, published once like a static file.
+    generated = {NAVIGATION_SCRIPT_URL: NAVIGATION_SCRIPT.encode('utf-8')} if targets.fragments else {}
+
+    outputs = {}
+    assets = None
+    if fingerprint:
+        # Static files are published under content-hashed names instead of being copied as they are.
+        if not fs.exists(public_dir):
+            fs.mkdir(public_dir)
+        elif not keep_output:
+            remove_destination_dir_contents(public_dir, fs)
+        assets = AssetPipeline(static_dir, public_dir, fs)
+        overrides = None
+        if stylesheets is not None:
+            overrides = {url: stylesheet.minified.encode('utf-8') for url, stylesheet in stylesheets.stylesheets.items()}
+        outputs['assets'] = assets.publish(overrides, generated)
+    else:
+        if keep_output:
+            # Keep the previous output and only bring changed static files up to date.
+            copy_changed_files(static_dir, public_dir, fs)
+        else:
+            # Ensure the 'public' directory is synchronized with 'static' contents 
+            # to provide the latest static resources (e.g., CSS, JavaScript, images).
+            copy_all_contents(static_dir, public_dir, fs)
+        if stylesheets is not None:
+            stylesheets.write_minified(public_dir)
+        # Recorded so copies are removed once they are published under other names, e.g. fingerprinted.
+        outputs['static'] = static_outputs(static_dir, public_dir, fs)
+        outputs['static'].update(publish_generated(generated, public_dir, fs))
+
+    # Image dimensions are read from file headers; incremental builds remember them by content hash.
+    images_path = os.path.join(os.path.dirname(manifest_path), IMAGE_SIZES_FILE)
+    images = None
+    if image_sizes:
+        images = ImageSizer.load(images_path, static_dir, fs) if manifest is not None else ImageSizer(static_dir, fs)
+
+    # Highlighted code is cached by language, code and highlighter version; incremental builds keep it on disk.
+    highlight_path = os.path.join(os.path.dirname(manifest_path), HIGHLIGHT_CACHE_FILE)
+    highlighter = None
+    if highlight:
+        highlighter = HighlightCache.load(highlight_path, fs=fs) if manifest is not None else HighlightCache(fs=fs)
+
+    if manifest is not None:
+        # Switching minification on or off changes every page, just like editing the template,
+        # and so does any change to the stylesheets whose rules are inlined, to the name of an asset or
+        # to the dimensions of an image, to the highlighter or to the output targets, including the
+        # templates they fill and whether pages carry the navigation script.
+        render_options = {}
+        if minify:
+            render_options['minify'] = True
+        if styles is not None:
+            render_options['css'] = styles.signature()
+        if assets is not None:
+            render_options['assets'] = assets.signature()
+        if images is not None:
+            render_options['images'] = images.signature()
+        if targets:
+            render_options['targets'] = targets.signature(fs)
+        if highlighter is not None:
+            render_options['highlight'] = highlighter.signature()
+        manifest.check_template(fs.mtime_ns(template_path), render_options)
 
     # Generate HTML pages for each markdown file in 'content' to 'public' 
     # using the specified template, ensuring each page follows a consistent layout.
-    generate_page_recursive('./content/', './template.html', './public/')
+    pages = generate_page_recursive(content_dir, template_path, public_dir, cache, fs, manifest, minify=minify,
+                                    styles=styles, assets=assets, images=images,
+                                    targets=targets, highlighter=highlighter)
+
+    # Pages reused from the previous build may be linked from other pages now; fix their "Linked from" sections.
+    update_backlinks(pages, template_path, cache, fs, minify, styles, assets, images, targets, highlighter)
+
+    # Pages reused from the previous build kept the outputs written alongside them.
+    if targets:
+        previous = manifest.previous_outputs('targets') if manifest is not None else {}
+        outputs['targets'] = {}
+        for page in pages:
+            for target in targets:
+                path = target.destination(page.destination)
+                outputs['targets'][path] = page.outputs.get(path) or previous.get(path, '')
+
+    # Index the pages by taxonomy term and write the listing pages, skipping unchanged ones.
+    previous = manifest.previous_outputs('listings') if manifest is not None else None
+    outputs['listings'] = generate_listings(TaxonomyIndex(pages), template_path, public_dir, cache, fs, previous,
+                                            minify=minify, styles=styles, assets=assets)
+
+    # Feeds are built from the same page records, and only rewritten when their entries change.
+    previous = manifest.previous_outputs('feeds') if manifest is not None else None
+    outputs['feeds'] = generate_feeds(pages, public_dir, base_url, fs, previous)
+
+    # The sitemap's `lastmod` dates are the source modification times the manifest records.
+    if manifest is not None:
+        mtimes = {page.source: manifest.recorded_mtime(page.source) for page in pages}
+    else:
+        mtimes = {page.source: fs.mtime_ns(page.source) for page in pages}
+    previous = manifest.previous_outputs('sitemaps') if manifest is not None else None
+    outputs['sitemaps'] = generate_sitemaps(pages, public_dir, base_url, fs, mtimes, previous)
+
+    # Incremental builds keep the full search index next to the manifest and only replace the
+    # postings of the pages they rendered.
+    search_path = os.path.join(os.path.dirname(manifest_path), SEARCH_INDEX_FILE)
+    search = SearchIndex.load(search_path, fs) if manifest is not None else SearchIndex()
+    previous = manifest.previous_outputs('search') if manifest is not None else None
+    outputs['search'] = generate_search_index(pages, public_dir, search, cache, fs, previous)
+
+    # Wait for the compression that is still running once everything has been written.
+    if precompressor is not None:
+        # Outputs an incremental build kept have no siblings yet the first time it precompresses.
+        if keep_output and 'compressed' not in manifest.outputs:
+            precompressor.compress_existing(public_dir)
+        outputs['compressed'] = precompressor.finish()
+
+    if manifest is not None:
+        # Remove what the previous build wrote but this one no longer produces, e.g. deleted pages.
+        for path in manifest.finish(outputs):
+            if fs.isfile(path):
+                fs.remove(path)
+            remove_siblings(path, fs)
+        manifest.save(fs)
+        search.save(search_path, fs)
+        if images is not None:
+            images.save(images_path)
+        if highlighter is not None:
+            highlighter.save(highlight_path)
+
+    # Check the links last, against everything this build left in the output directory.
+    if check:
+        broken = check_links(pages, public_dir, fs, aliases=assets.urls if assets is not None else None)
+        for link in broken:
+            print(link)
+        count = sum(len(page.links) + len(page.images) for page in pages)
+        print(f"Checked {count} links and images: {len(broken)} broken")
+        if broken:
+            raise LinkCheckError(broken)
+
+    return [page.destination for page in pages]
+
+def build_to_memory(static_dir: str = './static', content_dir: str = './content/', template_path: str = './template.html',
+                    base: FileSystem = None) -> Dict[str, bytes]:
+    """
+    Builds the whole site in memory and returns the output files without writing anything to disk.
+
+    Sources are read through `base` (the real disk by default) and every output lands in a 
+    `MemoryFileSystem`, which makes this suitable for tests, previews and piping the site into 
+    other tools.
+
+    Args:
+        static_dir (str, optional): The directory of static assets. Defaults to `./static`.
+        content_dir (str, optional): The directory of Markdown content. Defaults to `./content/`.
+        template_path (str, optional): The HTML template. Defaults to `./template.html`.
+        base (FileSystem, optional): Where the sources are read from. Defaults to the real disk.
+
+    Returns:
+        Dict[str, bytes]: The built site keyed by path relative to the output root, 
+        e.g. `{'index.html': b'...', 'images/rivendell.png': b'...'}`.
+    """
+    # Any existing `./public` on disk is only hidden by the overlay, never touched.
+    fs = MemoryFileSystem(base=base if base is not None else DiskFileSystem())
+    build_site(static_dir, content_dir, template_path, './public/', fs=fs)
+    return fs.tree('./public')
+
+def main(argv: list = None) -> None:
+    """
+    Main function to execute the static site generator from the command line.
+
+    With no arguments (or the `build` command) this copies all static files to the public directory 
+    and then generates HTML pages for each markdown file found in the content directory using a 
+    specified template. The `serve` command starts the threaded preview server for the built site, 
+    the `dev` command renders pages on demand without building anything, and the `daemon` command 
+    runs the persistent build daemon used by `build_client.py`.
+
+    Args:
+        argv (list, optional): The command-line arguments to parse. Defaults to `sys.argv[1:]`.
+    """
+    parser = argparse.ArgumentParser(description='Generate a static site from Markdown content.')
+    subparsers = parser.add_subparsers(dest='command')
+
+    # `build` is also the default when no command is given, so `python3 src/main.py` keeps working.
+    build_parser = subparsers.add_parser('build', help='build the site into ./public')
+    build_parser.add_argument('--incremental', action='store_true',
+                              help='keep ./public and only regenerate what changed since the last incremental build')
+    build_parser.add_argument('--check', action='store_true',
+                              help='fail the build if a page links to a page or image that does not exist')
+    build_parser.add_argument('--precompress', action='store_true',
+                              help='write .gz (and .br, if brotli is installed) copies of text outputs')
+    build_parser.add_argument('--minify', action='store_true',
+                              help='write pages without insignificant whitespace, optional end tags and attribute quotes, '
+                                   'and minify stylesheets')
+    build_parser.add_argument('--critical-css', action='store_true',
+                              help='inline the CSS rules each page needs and load stylesheets without blocking rendering')
+    build_parser.add_argument('--fingerprint', action='store_true',
+                              help='publish static files under content-hashed names that can be cached forever')
+    build_parser.add_argument('--no-image-sizes', dest='image_sizes', action='store_false',
+                              help='do not add image dimensions and lazy loading to images')
+    build_parser.add_argument('--fragments', action='store_true',
+                              help='write a content fragment next to each page and navigate between pages by swapping them')
+    build_parser.add_argument('--print-template', metavar='PATH',
+                              help='also fill this template with each page and write it as a .print.html file')
+    build_parser.add_argument('--node-trees', action='store_true',
+                              help="write each page's HTML tree as a .tree.json file for downstream indexing")
+    build_parser.add_argument('--no-highlight', dest='highlight', action='store_false',
+                              help='do not syntax highlight fenced code blocks')
+    build_parser.add_argument('--base-url', default='',
+                              help='absolute URL of the site, used for links in feeds and the sitemap (default: site-relative links)')
+
+    serve_parser = subparsers.add_parser('serve', help='serve a built site with the preview server')
+    serve_parser.add_argument('--directory', default='./public', help='directory to serve (default: ./public)')
+    serve_parser.add_argument('--host', default='', help='interface to bind to (default: all interfaces)')
+    serve_parser.add_argument('--port', type=int, default=8888, help='port to listen on (default: 8888)')
+
+    dev_parser = subparsers.add_parser('dev', help='render pages on demand without building the site')
+    dev_parser.add_argument('--content', default='./content', help='directory of Markdown sources (default: ./content)')
+    dev_parser.add_argument('--template', default='./template.html', help='HTML template (default: ./template.html)')
+    dev_parser.add_argument('--static', default='./static', help='directory of static assets (default: ./static)')
+    dev_parser.add_argument('--host', default='', help='interface to bind to (default: all interfaces)')
+    dev_parser.add_argument('--port', type=int, default=8888, help='port to listen on (default: 8888)')
+    dev_parser.add_argument('--no-live-reload', dest='live_reload', action='store_false',
+                            help='do not push changes to open browsers')
+    dev_parser.add_argument('--no-image-sizes', dest='image_sizes', action='store_false',
+                            help='do not add image dimensions and lazy loading to images')
+    dev_parser.add_argument('--no-highlight', dest='highlight', action='store_false',
+                            help='do not syntax highlight fenced code blocks')
+
+    daemon_parser = subparsers.add_parser('daemon', help='run the build daemon that keeps caches warm between builds')
+    daemon_parser.add_argument('--socket', default=DEFAULT_SOCKET_PATH, help=f'Unix socket path (default: {DEFAULT_SOCKET_PATH})')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        serve(args.directory, args.host, args.port)
+        return
+
+    if args.command == 'dev':
+        serve_dev(args.content, args.template, args.static, args.host, args.port, args.live_reload, args.highlight,
+                  args.image_sizes)
+        return
+
+    if args.command == 'daemon':
+        # Imported here because the daemon itself imports `build_site` from this module.
+        from build_daemon import run_daemon
+        run_daemon(args.socket)
+        return
 
+    # Without a command there are no `build` options, so fall back to a full build.
+    try:
+        build_site(incremental=getattr(args, 'incremental', False), base_url=getattr(args, 'base_url', ''),
+                   check=getattr(args, 'check', False), precompress=getattr(args, 'precompress', False),
+                   minify=getattr(args, 'minify', False), critical_css=getattr(args, 'critical_css', False),
+                   fingerprint=getattr(args, 'fingerprint', False), image_sizes=getattr(args, 'image_sizes', True),
+                   fragments=getattr(args, 'fragments', False), highlight=getattr(args, 'highlight', True),
+                   print_template=getattr(args, 'print_template', None), node_trees=getattr(args, 'node_trees', False))
+    except LinkCheckError as e:
+        parser.exit(1, f"Error: {e}\n")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,214 @@
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from filesystem import DiskFileSystem, FileSystem, make_dirs
+from taxonomy import Page
+
+# Incremental builds remember what they produced next to the project, outside the output directory.
+DEFAULT_MANIFEST_PATH = './.cache/build-manifest.json'
+
+# The kinds of generated outputs whose contents embed the template, e.g. listing pages, as opposed
+# to XML outputs such as feeds and sitemaps.
+TEMPLATED_OUTPUTS = ('listings',)
+
+# Bumped whenever the manifest layout changes, so an old manifest is discarded rather than misread.
+MANIFEST_VERSION = 6
+
+class BuildManifest:
+    """
+    What the previous build produced, used by incremental builds to skip unchanged work.
+
+    For each Markdown source the manifest records the modification time it was rendered at and its
+    `Page` record; for each other generated output, such as a listing page, a feed or a sitemap, it
+    records a signature of its contents. Every page and templated output is considered stale when
+    the template or the options pages are rendered with change, since they all embed them.
+
+    Attributes:
+        path (str): Where the manifest is stored.
+        template_mtime (Optional[int]): The template's `mtime_ns` when the manifest was written.
+        render_options (Dict[str, Any]): The options the pages were rendered with, e.g. `minify`.
+        pages (Dict[str, Tuple[int, Page]]): The source `mtime_ns` and page record, keyed by source path.
+        outputs (Dict[str, Dict[str, str]]): The signatures of the generated outputs, keyed by kind
+            (e.g. `listings`, `feeds` or `compressed`) and then by destination path.
+        template_changed (bool): Whether the template or the render options changed since the
+            manifest was written.
+    """
+
+    def __init__(self, path: str = DEFAULT_MANIFEST_PATH):
+        """
+        Initializes an empty manifest.
+
+        Args:
+            path (str, optional): Where the manifest is stored. Defaults to `DEFAULT_MANIFEST_PATH`.
+        """
+        self.path = path
+        self.template_mtime: Optional[int] = None
+        self.render_options: Dict[str, Any] = {}
+        self.pages: Dict[str, Tuple[int, Page]] = {}
+        self.outputs: Dict[str, Dict[str, str]] = {}
+        self.template_changed = False
+        self._recorded: Dict[str, Tuple[int, Page]] = {}
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_MANIFEST_PATH, fs: FileSystem = None) -> 'BuildManifest':
+        """
+        Reads a manifest, returning an empty one if it is missing, unreadable or from another version.
+
+        Args:
+            path (str, optional): Where the manifest is stored. Defaults to `DEFAULT_MANIFEST_PATH`.
+            fs (FileSystem, optional): The filesystem to read from. Defaults to the real disk.
+
+        Returns:
+            BuildManifest: The manifest.
+        """
+        if fs is None:
+            fs = DiskFileSystem()
+
+        manifest = cls(path)
+        try:
+            data = json.loads(fs.read_text(path))
+        except (OSError, ValueError):
+            return manifest
+
+        # A manifest we cannot trust only costs a full rebuild, so discard it rather than fail.
+        if not isinstance(data, dict) or data.get('version') != MANIFEST_VERSION:
+            return manifest
+
+        manifest.template_mtime = data.get('template_mtime')
+        manifest.render_options = data.get('render_options', {})
+        manifest.pages = {
+            source: (entry['mtime'], Page.from_dict(entry['page'])) for source, entry in data.get('pages', {}).items()
+        }
+        manifest.outputs = {kind: dict(signatures) for kind, signatures in data.get('outputs', {}).items()}
+        return manifest
+
+    def save(self, fs: FileSystem = None) -> None:
+        """
+        Writes the manifest, creating its directory if needed.
+
+        Args:
+            fs (FileSystem, optional): The filesystem to write to. Defaults to the real disk.
+        """
+        if fs is None:
+            fs = DiskFileSystem()
+
+        make_dirs(os.path.dirname(self.path), fs)
+
+        data = {
+            'version': MANIFEST_VERSION,
+            'template_mtime': self.template_mtime,
+            'render_options': self.render_options,
+            'pages': {
+                source: {'mtime': mtime, 'page': page.to_dict()} for source, (mtime, page) in sorted(self.pages.items())
+            },
+            'outputs': {kind: dict(sorted(signatures.items())) for kind, signatures in sorted(self.outputs.items())},
+        }
+        fs.write_text(self.path, json.dumps(data, indent=1))
+
+    def check_template(self, template_mtime: int, render_options: Dict[str, Any] = None) -> None:
+        """
+        Records the template's current modification time and the render options, noting whether
+        either changed.
+
+        Args:
+            template_mtime (int): The template's current `mtime_ns`.
+            render_options (Dict[str, Any], optional): The options pages are rendered with, e.g.
+                `{'minify': True}`. Defaults to None (no options).
+        """
+        render_options = render_options or {}
+        self.template_changed = self.template_mtime != template_mtime or self.render_options != render_options
+        self.template_mtime = template_mtime
+        self.render_options = render_options
+
+    def fresh_page(self, source: str, mtime: int, fs: FileSystem) -> Optional[Page]:
+        """
+        Returns the recorded page for a source if its output is still up to date.
+
+        Args:
+            source (str): The Markdown source.
+            mtime (int): The source's current `mtime_ns`.
+            fs (FileSystem): The filesystem the output was written to.
+
+        Returns:
+            Optional[Page]: The page record, or None if the source must be rendered again.
+        """
+        entry = self.pages.get(source)
+        if self.template_changed or entry is None or entry[0] != mtime or not fs.exists(entry[1].destination):
+            return None
+        return entry[1]
+
+    def previous_backlinks(self, source: str) -> List[List[str]]:
+        """
+        Returns the "Linked from" entries a source's page was last written with.
+
+        They are the best guess for the page's backlinks before the rest of the site has been
+        rendered, so a page whose inbound links did not change is written only once.
+
+        Args:
+            source (str): The Markdown source.
+
+        Returns:
+            List[List[str]]: The `[url, title]` pairs, or an empty list for a new page.
+        """
+        entry = self.pages.get(source)
+        return entry[1].backlinks if entry is not None else []
+
+    def previous_outputs(self, kind: str) -> Dict[str, str]:
+        """
+        Returns the signatures of one kind of output from the previous build that are still valid.
+
+        Args:
+            kind (str): The kind of output, e.g. `listings` or `feeds`.
+
+        Returns:
+            Dict[str, str]: The signatures keyed by destination path; empty for a templated kind if
+                the template changed.
+        """
+        if self.template_changed and kind in TEMPLATED_OUTPUTS:
+            return {}
+        return self.outputs.get(kind, {})
+
+    def record_page(self, mtime: int, page: Page) -> None:
+        """
+        Records a page produced by the current build, whether it was rendered or reused.
+
+        Args:
+            mtime (int): The source's `mtime_ns`.
+            page (Page): The page record.
+        """
+        self._recorded[page.source] = (mtime, page)
+
+    def recorded_mtime(self, source: str) -> Optional[int]:
+        """
+        Returns the modification time a source was recorded with by the current build.
+
+        Args:
+            source (str): The Markdown source.
+
+        Returns:
+            Optional[int]: The source's `mtime_ns`, or None if the current build did not record it.
+        """
+        entry = self._recorded.get(source)
+        return entry[0] if entry is not None else None
+
+    def finish(self, outputs: Dict[str, Dict[str, str]]) -> List[str]:
+        """
+        Replaces the previous build's records with the current build's.
+
+        Args:
+            outputs (Dict[str, Dict[str, str]]): The signatures of the current build's generated
+                outputs, keyed by kind and then by destination path.
+
+        Returns:
+            List[str]: The destination paths the previous build produced and the current one did
+                not, e.g. pages whose source was deleted; the caller removes them.
+        """
+        current = {page.destination for _, page in self._recorded.values()}
+        current.update(*outputs.values())
+        previous = {page.destination for _, page in self.pages.values()}
+        previous.update(*self.outputs.values())
+
+        self.pages, self._recorded = self._recorded, {}
+        self.outputs = {kind: dict(signatures) for kind, signatures in outputs.items()}
+        return sorted(previous - current)
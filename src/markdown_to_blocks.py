@@ -1,9 +1,18 @@
 import re
 from typing import List
 
+from context import RenderContext
 from enums import BlockType
+from extract import extract_reference_definition
 
-def markdown_to_blocks(markdown: str) -> List[str]:
+# Patterns are compiled once at import time so that classifying a block performs no per-call setup.
+HEADING_PATTERN = re.compile(r'^#{1,6}')
+QUOTE_PATTERN = re.compile(r'^>')
+UNORDERED_ITEM_PATTERN = re.compile(r'^\* |^- ')
+ORDERED_ITEM_PATTERN = re.compile(r'^(\d+)\. ')
+NESTED_LINE_PATTERN = re.compile(r'^ {4}')
+
+def markdown_to_blocks(markdown: str, context: RenderContext = None) -> List[str]:
     """
     Splits a markdown document into individual blocks of text.
 
@@ -11,8 +20,15 @@ def markdown_to_blocks(markdown: str) -> List[str]:
     on double newline characters ('\n\n'). It trims any extra whitespace around each block 
     and returns a list of these cleaned blocks.
 
+    With a `context`, link reference definitions (`[label]: url`) at the start of a block are 
+    collected into the context's reference index while splitting and left out of the result, so 
+    references can later be resolved without scanning the document again. A block made up
+    entirely of definitions is left out altogether.
+
     Args:
         markdown (str): A markdown document as a non-empty string.
+        context (RenderContext, optional): The document's context to collect definitions into. 
+            Defaults to None (definitions are kept as ordinary blocks).
 
     Returns:
         list: A list of strings, where each string is a cleaned block of text from the markdown.
@@ -42,12 +58,43 @@ def markdown_to_blocks(markdown: str) -> List[str]:
         
         # Strip leading and trailing whitespace from each block to clean the text.
         # This helps maintain consistency and removes unnecessary spaces.
-        block_strings.append(block.strip())
+        block = block.strip()
+
+        # Collect link reference definitions instead of rendering them.
+        # Only blocks that start with `[` can be definitions, which keeps the check cheap for the rest.
+        if context is not None and block.startswith('['):
+            block = collect_reference_definitions(block, context)
+            if not block:
+                continue
+
+        block_strings.append(block)
 
     # Return the list of cleaned and processed blocks.
     return block_strings
 
 
+def collect_reference_definitions(block: str, context: RenderContext) -> str:
+    """
+    Adds the link reference definitions at the start of a block to the context.
+
+    As in CommonMark, definitions may open a paragraph without a blank line after them, but a
+    definition cannot interrupt a paragraph, so only the leading lines are considered.
+
+    Args:
+        block (str): A stripped block of text.
+        context (RenderContext): The document's context.
+
+    Returns:
+        str: The rest of the block after its definitions; empty if it consisted only of definitions.
+    """
+    lines = block.split('\n')
+    for i, line in enumerate(lines):
+        definition = extract_reference_definition(line)
+        if definition is None:
+            return '\n'.join(lines[i:]).strip()
+        context.define_reference(*definition)
+    return ''
+
 def block_to_block_type(block: str) -> BlockType:
     """
     Determines the type of a given markdown block.
@@ -120,13 +167,9 @@ def check_heading_block(block: str) -> BlockType:
     headings = (BlockType.H1, BlockType.H2, BlockType.H3,
                 BlockType.H4, BlockType.H5, BlockType.H6)
     
-    # The '#' character is used in markdown to denote headings; the number of '#' characters 
-    # indicates the level of the heading.
-    heading_char = '#'
-    
     # Use a regular expression to match lines starting with 1 to 6 '#' characters.
-    # The match helps identify if a block starts with a valid heading and determines its level.
-    match = re.match(fr'^({heading_char}){{1,6}}', block)
+    # The '#' character denotes headings and the number of them indicates the level of the heading.
+    match = HEADING_PATTERN.match(block)
     
     # If no match is found, return None to indicate that the block is not a heading.
     # This ensures that only valid headings are processed.
@@ -199,7 +242,7 @@ def check_quote_block(block: str) -> BlockType:
     """
     # Check if the block starts with the '>' character, indicating a potential quote block.
     # If the first line doesn't start with '>', it's not a quote block, so return None.
-    if not re.match(r'^>', block):
+    if not QUOTE_PATTERN.match(block):
         return None
     
     # Split the block into lines to verify that all lines within the block are properly formatted as quotes.
@@ -212,7 +255,7 @@ def check_quote_block(block: str) -> BlockType:
 
         # Raise an error if any line does not start with the '>' character.
         # This strict validation ensures that the entire block conforms to the quote block format.
-        if not re.match(r'^>', line):
+        if not QUOTE_PATTERN.match(line):
             raise ValueError('All lines within a quote block must start with >')
     
     # If all lines pass the check, the block is confirmed as a quote block.
@@ -240,7 +283,7 @@ def check_unordered_list_block(block: str) -> BlockType:
     """
     # Check if the first line starts with a valid unordered list marker (`* ` or `- `).
     # If the first line doesn't match, it's not an unordered list block, so return None.
-    if not re.match(r'^\* |^- ', block):
+    if not UNORDERED_ITEM_PATTERN.match(block):
         return None
     
     # Split the block into lines to validate each line individually.
@@ -252,12 +295,12 @@ def check_unordered_list_block(block: str) -> BlockType:
 
         # Allow lines that start with four spaces for nested list items.
         # This ensures that nested unordered lists are correctly identified.
-        if re.match(r'^ {4}', line):
+        if NESTED_LINE_PATTERN.match(line):
             continue
         
         # Check that each line starts with a valid unordered list marker.
         # If not, raise an error to indicate improper formatting.
-        if not re.match(r'^\* |^- ', line):
+        if not UNORDERED_ITEM_PATTERN.match(line):
             raise ValueError('Every line in an unordered list must start with * or - followed by a space')
     
     # If all lines are correctly formatted, the block is confirmed as an unordered list.
@@ -286,7 +329,8 @@ def check_ordered_list_block(block: str) -> BlockType:
     """
     # Check if the first line starts with '1. ', the standard start for ordered lists in markdown.
     # If the first line doesn't match, it's not an ordered list block, so return None.
-    if not re.match(r'^1\. ', block):
+    first = ORDERED_ITEM_PATTERN.match(block)
+    if not first or first.group(1) != '1':
         return None
     
     # Split the block into lines to validate each line individually.
@@ -301,12 +345,13 @@ def check_ordered_list_block(block: str) -> BlockType:
     for line in lines:
         # Allow lines that start with four spaces for nested list items.
         # This ensures that nested ordered lists are correctly identified.
-        if re.match(r'^ {4}', line):
+        if NESTED_LINE_PATTERN.match(line):
             continue
         
         # Check that each line starts with the correct number followed by '. '.
         # If not, raise an error to indicate improper formatting.
-        if not re.match(fr'^{n}\. ', line):
+        item = ORDERED_ITEM_PATTERN.match(line)
+        if not item or int(item.group(1)) != n:
             raise ValueError('Ordered lists must start at 1 and increment by 1, followed by a .')
         
         # Increment the expected number for the next line to ensure sequential ordering.
@@ -1,12 +1,27 @@
 import re
 from typing import List
 
-from enums import BlockType
-from htmlnode import LeafNode, ParentNode, text_node_to_html_node
+from context import RenderContext
+from enums import BlockType, TextType
+from htmlnode import LINE_BREAK, LeafNode, ParentNode, RawNode, strip_line_breaks, text_node_to_html_node
 from markdown_to_blocks import block_to_block_type, markdown_to_blocks 
 from text_to_textnodes import text_to_textnodes
+from textnode import TextNode
 
-def markdown_to_html_node(markdown: str) -> ParentNode:
+# Patterns are compiled once at import time so that converting a block performs no per-call setup.
+# Block markup to strip: heading hashes, quote markers, list markers and code fences.
+BLOCK_MARKUP_PATTERN = re.compile(r'^((#){0,6} |> ?|\* |\- |\d+\. |```)|```$', re.MULTILINE)
+
+# Newlines that start a new list item, i.e. that are not followed by a tab or an indented continuation.
+LIST_ITEM_SPLIT_PATTERN = re.compile(r'\n(?![\t ]| {4})')
+
+# Indentation marking a continuation line or a nested list item.
+NESTED_INDENT_PATTERN = re.compile(r'\n\t| {3,4}')
+
+# The language named on a code fence's opening line, left at the start of the block once the fence is stripped.
+CODE_LANGUAGE_PATTERN = re.compile(r'^([\w+#.-]+)[ \t]*(?=\n)')
+
+def markdown_to_html_node(markdown: str, context: RenderContext = None) -> ParentNode:
     """
     Converts a Markdown document into a tree of HTML nodes.
 
@@ -15,8 +30,13 @@ def markdown_to_html_node(markdown: str) -> ParentNode:
     HTML node structure. It returns a `ParentNode` representing a `<div>` element containing all 
     the HTML nodes created from the Markdown blocks.
 
+    Headings receive unique slug IDs while they are built, and the heading outline is collected in 
+    `context` during the same pass, so a table of contents needs no second traversal.
+
     Args:
         markdown (str): A string containing the Markdown content to be converted.
+        context (RenderContext, optional): The per-document state to collect into. Defaults to None 
+            (a fresh context is used).
 
     Returns:
         ParentNode: A `ParentNode` object representing a `<div>` containing the HTML nodes.
@@ -24,71 +44,116 @@ def markdown_to_html_node(markdown: str) -> ParentNode:
     Raises:
         ValueError: If a block type is not recognized or valid.
     """
+    # Heading IDs must be unique within the document and references may be defined after their use,
+    # so all blocks share one context.
+    if context is None:
+        context = RenderContext()
+
     # Split the markdown into blocks to process each block separately.
     # This step is crucial because each block represents a distinct HTML element (e.g., paragraph, list).
-    blocks = markdown_to_blocks(markdown)
+    # Link reference definitions are collected into the context along the way.
+    # The line break marker is reserved for the parser; in the source it would bypass escaping.
+    blocks = markdown_to_blocks(strip_line_breaks(markdown), context)
 
-    # Initialize an empty list to store the HTML nodes created from the Markdown blocks.
-    # This will eventually be the children of the root `<div>` node.
-    html_nodes = []
+    # Convert each block to its HTML node; the block type decides which tag wraps its content.
+    html_nodes = [block_to_html_node(block, context=context) for block in blocks]
 
-    # Define the character used for headings in Markdown.
-    # This helps to clean up the heading syntax when converting to HTML.
-    heading_char = '#'
+    # Wrap all HTML nodes in a root `<div>` element to provide a container for all converted content.
+    return ParentNode('div', html_nodes)
 
-    # Iterate over each block to determine its type and convert it to the corresponding HTML node.
-    for block in blocks:
+def block_to_html_node(block: str, block_type: BlockType = None, context: RenderContext = None) -> ParentNode:
+    """
+    Converts a single Markdown block into its HTML node.
 
-        # Determine the type of the block (e.g., heading, code, list) using `block_to_block_type`.
-        # Knowing the block type is essential to know how to convert it to an HTML node.
-        block_type = block_to_block_type(block)        
+    Callers that have already classified the block, such as `Document`, pass its type so it is not
+    determined twice.
 
-        # Clean up the block content by removing Markdown-specific syntax (e.g., `#` for headings, `>` for quotes).
-        # This is necessary to isolate the text content that will be placed inside HTML tags.
-        new_block = re.sub(fr'^(({heading_char}){{0,6}} |> ?|\* |\- |\d+\. |```)|```$', '', block, flags=re.MULTILINE)
+    Args:
+        block (str): A block of text as returned by `markdown_to_blocks`.
+        block_type (BlockType, optional): The block's type. Defaults to None (determined here).
+        context (RenderContext, optional): The document's context, which assigns heading IDs and 
+            records the outline. Defaults to None (a context for this block alone).
 
-        # Convert the cleaned block text into a list of `LeafNode` children.
-        # This step breaks down the text content into smaller HTML components (e.g., spans, links).
-        children = text_to_leafnode_children(new_block)
-        
-        # Match the determined block type and create the corresponding HTML node.
-        # Each case handles a specific type of Markdown block, converting it to its HTML equivalent.
-        match block_type:
-            case BlockType.H1:
-                html_nodes.append(ParentNode(BlockType.H1.value, children))  # Heading 1 (`<h1>`)
-            case BlockType.H2:
-                html_nodes.append(ParentNode(BlockType.H2.value, children))  # Heading 2 (`<h2>`)
-            case BlockType.H3:
-                html_nodes.append(ParentNode(BlockType.H3.value, children))  # Heading 3 (`<h3>`)
-            case BlockType.H4:
-                html_nodes.append(ParentNode(BlockType.H4.value, children))  # Heading 4 (`<h4>`)
-            case BlockType.H5:
-                html_nodes.append(ParentNode(BlockType.H5.value, children))  # Heading 5 (`<h5>`)
-            case BlockType.H6:
-                html_nodes.append(ParentNode(BlockType.H6.value, children))  # Heading 6 (`<h6>`)
-            case BlockType.CODE:
-                # Code blocks are wrapped in a `<pre>` tag to maintain formatting, with a nested `<code>` tag.
-                html_nodes.append(ParentNode('pre', [ParentNode(BlockType.CODE.value, children)]))
-            case BlockType.QUOTE:
-                # Quote blocks are represented with a `<blockquote>` tag.
-                html_nodes.append(ParentNode(BlockType.QUOTE.value, children))
-            case BlockType.LIST_UNORDERED:
-                # Unordered lists (`<ul>`) are converted by processing list items into `LeafNode` children.
-                html_nodes.append(ParentNode(BlockType.LIST_UNORDERED.value, list_to_leafnode_children(new_block)))
-            case BlockType.LIST_ORDERED:
-                # Ordered lists (`<ol>`) are similarly converted, ensuring correct HTML list formatting.
-                html_nodes.append(ParentNode(BlockType.LIST_ORDERED.value, list_to_leafnode_children(new_block)))
-            case BlockType.PARAGRAPH:
-                # Paragraphs are represented with a `<p>` tag containing text or inline elements.
-                html_nodes.append(ParentNode(BlockType.PARAGRAPH.value, children))
-            case _:
-                # Raise an error if the block type is not recognized or is invalid.
-                raise ValueError("BlockType not valid. Must be a value from the BlockType class under enums.py")
+    Returns:
+        ParentNode: The HTML node for the block, e.g. a `<p>`, `<h2>` or `<pre>`.
 
-    # Wrap all HTML nodes in a root `<div>` element to provide a container for all converted content.
-    return ParentNode('div', html_nodes)
+    Raises:
+        ValueError: If the block type is not recognized or valid.
+    """
+    # Determine the type of the block (e.g., heading, code, list) using `block_to_block_type`.
+    # Knowing the block type is essential to know how to convert it to an HTML node.
+    if block_type is None:
+        block_type = block_to_block_type(block)
+
+    if context is None:
+        context = RenderContext()
+
+    # Clean up the block content by removing Markdown-specific syntax (e.g., `#` for headings, `>` for quotes).
+    # This is necessary to isolate the text content that will be placed inside HTML tags.
+    new_block = BLOCK_MARKUP_PATTERN.sub('', block)
+
+    # Match the determined block type and create the corresponding HTML node.
+    # Each case handles a specific type of Markdown block, converting it to its HTML equivalent.
+    match block_type:
+        case BlockType.H1 | BlockType.H2 | BlockType.H3 | BlockType.H4 | BlockType.H5 | BlockType.H6:
+            # Headings (`<h1>` to `<h6>`) use the block type's value as their tag.
+            # The plain text of the inline nodes names the heading in the outline and derives its ID.
+            text_nodes = text_to_textnodes(new_block, context)
+            heading_id = context.add_heading(int(block_type.value[1]), ''.join(node.text or '' for node in text_nodes))
+            children = [text_node_to_html_node(node) for node in text_nodes]
+            for child in children:
+                context.decorate_image(child)
+            return ParentNode(block_type.value, children, {'id': heading_id})
+        case BlockType.CODE:
+            # Code blocks are wrapped in a `<pre>` tag to maintain formatting, with a nested `<code>` tag.
+            return ParentNode('pre', [code_to_html_node(new_block, context)])
+        case BlockType.QUOTE:
+            # Quote blocks are represented with a `<blockquote>` tag.
+            return ParentNode(BlockType.QUOTE.value, text_to_leafnode_children(new_block, context))
+        case BlockType.LIST_UNORDERED:
+            # Unordered lists (`<ul>`) are converted by processing list items into `LeafNode` children.
+            return ParentNode(BlockType.LIST_UNORDERED.value, list_to_leafnode_children(new_block, context))
+        case BlockType.LIST_ORDERED:
+            # Ordered lists (`<ol>`) are similarly converted, ensuring correct HTML list formatting.
+            return ParentNode(BlockType.LIST_ORDERED.value, list_to_leafnode_children(new_block, context))
+        case BlockType.PARAGRAPH:
+            # Paragraphs are represented with a `<p>` tag containing text or inline elements.
+            return ParentNode(BlockType.PARAGRAPH.value, text_to_leafnode_children(new_block, context))
+        case _:
+            # Raise an error if the block type is not recognized or is invalid.
+            raise ValueError("BlockType not valid. Must be a value from the BlockType class under enums.py")
+
+def code_to_html_node(block: str, context: RenderContext) -> ParentNode:
+    """
+    Converts the contents of a fenced code block into its `<code>` element.
+
+    A language named on the opening fence, as in ```` ```python ````, becomes a `language-*` class
+    and, if the context has a highlighter that supports it, selects the lexer the code is highlighted
+    with. Other code blocks keep their text as it is.
 
-def text_to_leafnode_children(block: str) -> List[LeafNode]:
+    Args:
+        block (str): The block without its fences, starting with the language if there is one.
+        context (RenderContext): The document's context, holding the highlighter.
+
+    Returns:
+        ParentNode: The `<code>` element.
+    """
+    match = CODE_LANGUAGE_PATTERN.match(block)
+    if match is None:
+        return ParentNode(BlockType.CODE.value, text_to_leafnode_children(block, context))
+
+    language, code = match.group(1), block[match.end():]
+    props = {'class': f'language-{language}'}
+    highlighted = context.highlighter.highlight(code.strip('\n'), language) if context.highlighter is not None else None
+    if highlighted is None:
+        return ParentNode(BlockType.CODE.value, text_to_leafnode_children(code, context), props)
+
+    # The highlighted HTML is already escaped, so it goes into the tree as a raw node written as it
+    # is; its words are still indexed for search, like those of any other code block.
+    context.record_terms([TextNode(code, TextType.TEXT)])
+    return ParentNode(BlockType.CODE.value, [RawNode(highlighted)], props)
+
+def text_to_leafnode_children(block: str, context: RenderContext = None) -> List[LeafNode]:
     """
     Converts a block of text into a list of `LeafNode` children.
 
@@ -99,6 +164,8 @@ def text_to_leafnode_children(block: str) -> List[LeafNode]:
 
     Args:
         block (str): A string representing a block of text in a markdown document.
+        context (RenderContext, optional): The document's context, used to resolve reference-style 
+            links. Defaults to None.
 
     Returns:
         list: A list of `LeafNode` objects representing the HTML elements of the block's content.
@@ -109,7 +176,7 @@ def text_to_leafnode_children(block: str) -> List[LeafNode]:
 
     # Convert the block of text into `TextNode` objects using the `text_to_textnodes` function.
     # This step is essential to break down the text into smaller logical units like words, phrases, or inline elements.
-    text_nodes = text_to_textnodes(block)
+    text_nodes = text_to_textnodes(block, context)
 
     # Iterate over each `TextNode` to convert them to `LeafNode` HTML elements.
     # This conversion ensures that each logical unit of text is appropriately wrapped in the correct HTML tag.
@@ -117,11 +184,15 @@ def text_to_leafnode_children(block: str) -> List[LeafNode]:
         # Convert the `TextNode` to a `LeafNode` using `text_node_to_html_node`.
         # This step converts each logical unit into its corresponding HTML representation.
         leaf_nodes.append(text_node_to_html_node(node))
+
+        # Images get their dimensions and loading hints while the document's image count is known.
+        if context is not None:
+            context.decorate_image(leaf_nodes[-1])
         
     # Return the list of `LeafNode` objects representing the HTML elements of the block's content.
     return leaf_nodes
 
-def list_to_leafnode_children(block: str) -> List[LeafNode]:
+def list_to_leafnode_children(block: str, context: RenderContext = None) -> List[LeafNode]:
     """
     Converts a markdown list block into a list of `LeafNode` children.
 
@@ -131,6 +202,8 @@ def list_to_leafnode_children(block: str) -> List[LeafNode]:
 
     Args:
         block (str): A string representing a block of text in a markdown document that is formatted as a list.
+        context (RenderContext, optional): The document's context, used to resolve reference-style 
+            links. Defaults to None.
 
     Returns:
         List[LeafNode]: A list of `LeafNode` objects where each represents an HTML `<li>` element.
@@ -142,23 +215,24 @@ def list_to_leafnode_children(block: str) -> List[LeafNode]:
     # Split the block into lines, avoiding lines that are indented (to handle nested lists).
     # The regex `\n(?![\t ]| {4})` splits at newlines that are not followed by tabs, spaces, or indentation.
     # This helps differentiate between actual new list items and indented continuations or nested lists.
-    lines = re.split(r'\n(?![\t ]| {4})', block)
+    lines = LIST_ITEM_SPLIT_PATTERN.split(block)
 
     # Remove additional leading whitespace or tabs that indicate nested list items.
     # This cleanup step is essential to standardize the input for further processing.
-    processed_lines = [re.sub(r'\n\t| {3,4}', '', line) for line in lines]
+    processed_lines = [NESTED_INDENT_PATTERN.sub('', line) for line in lines]
 
     # Iterate over each processed line to convert them to `LeafNode` HTML elements.
     # This step ensures that each list item is appropriately represented as a `<li>` in HTML.
     for line in processed_lines:
 
-        # Replace any remaining newline characters within a line with HTML `<br>` for line breaks.
-        # This conversion is necessary to maintain formatting within a single list item.
-        line = line.replace('\n', '<br>\n')
+        # Mark any remaining newline characters within a line as `<br>` line breaks.
+        # This conversion is necessary to maintain formatting within a single list item; the marker
+        # becomes the tag while serializing, whereas a literal `<br>` in the text would be escaped.
+        line = line.replace('\n', LINE_BREAK + '\n')
 
         # Convert the cleaned line text into a list of `LeafNode` children using `text_to_leafnode_children`.
         # This breaks down each list item into smaller HTML components like text spans, links, etc.
-        children = text_to_leafnode_children(line)
+        children = text_to_leafnode_children(line, context)
 
         # Iterate over the children to ensure they are properly wrapped in `<li>` tags.
         # This is required for HTML list items to be correctly formatted.
@@ -0,0 +1,324 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Union
+
+from assets import AssetPipeline
+from build_cache import BuildCache
+from filesystem import FileSystem
+from fragments import FRAGMENT_SLOTS, FRAGMENT_SUFFIX
+from htmlnode import LINE_BREAK, HTMLNode, ParentNode, RawNode
+
+# Where each built-in target writes, relative to the page's path without its `.html` extension;
+# the print variant of `/blog/post.html` is `/blog/post.print.html`.
+PRINT_PATTERN = '{stem}.print.html'
+FRAGMENT_PATTERN = '{stem}' + FRAGMENT_SUFFIX
+TREE_PATTERN = '{stem}.tree.json'
+
+class PageOutput:
+    """
+    The single parse of a page that every output target is produced from.
+
+    Attributes:
+        destination (str): The path of the generated HTML page.
+        title (str): The page title.
+        metadata (Dict[str, Any]): The page's front matter.
+        node (Optional[ParentNode]): The page body's HTML tree, or None for an empty body.
+        slots (Dict[str, str]): The template slots the page was filled with, such as the `TOC`.
+        minify (bool): Whether the page itself is serialized minified.
+        asset_urls (Optional[Mapping[str, str]]): The fingerprinted URL of each static file.
+        fs (FileSystem): The filesystem to write to.
+        cache (BuildCache): The cache templates are compiled through.
+        assets (Optional[AssetPipeline]): Points templates at the fingerprinted static files.
+    """
+
+    def __init__(self, destination: str, title: str, metadata: Dict[str, Any], node: Optional[ParentNode],
+                 content: str, slots: Dict[str, str], minify: bool, fs: FileSystem, cache: BuildCache,
+                 assets: AssetPipeline = None):
+        """
+        Initializes a `PageOutput`.
+
+        Args:
+            destination (str): The path of the generated HTML page.
+            title (str): The page title.
+            metadata (Dict[str, Any]): The page's front matter.
+            node (Optional[ParentNode]): The page body's HTML tree.
+            content (str): The body as the page serialized it, reused by targets with the same options.
+            slots (Dict[str, str]): The template slots the page was filled with.
+            minify (bool): Whether `content` is minified.
+            fs (FileSystem): The filesystem to write to.
+            cache (BuildCache): The cache templates are compiled through.
+            assets (AssetPipeline, optional): Points templates at the fingerprinted static files.
+                Defaults to None.
+        """
+        self.destination = destination
+        self.title = title
+        self.metadata = metadata
+        self.node = node
+        self.slots = slots
+        self.minify = minify
+        self.asset_urls = assets.urls if assets is not None else None
+        self.fs = fs
+        self.cache = cache
+        self.assets = assets
+        self._content: Dict[bool, str] = {minify: content}
+
+    def content(self, minify: Optional[bool] = None) -> str:
+        """
+        Returns the body serialized with a target's options, serializing the tree at most once per option.
+
+        Args:
+            minify (Optional[bool], optional): Whether to minify; None for the page's own setting.
+                Defaults to None.
+
+        Returns:
+            str: The serialized body.
+        """
+        minify = self.minify if minify is None else minify
+        if minify not in self._content:
+            self._content[minify] = self.node.to_html(minify, self.asset_urls) if self.node is not None else '<div></div>'
+        return self._content[minify]
+
+class OutputTarget:
+    """
+    The interface of an output produced for every page alongside the page itself.
+
+    Subclasses turn the page's single parse into the text of one more file. Every target is written
+    from the same tree in the same pass as the page, so adding a target never parses a page again.
+
+    Attributes:
+        name (str): Identifies the target in the registry and on the command line.
+        pattern (str): Where the output is written; `{stem}` is the page's path without `.html`.
+        minify (Optional[bool]): Whether the body is serialized minified; None to follow the page.
+    """
+
+    def __init__(self, name: str, pattern: str, minify: Optional[bool] = None):
+        """
+        Initializes an `OutputTarget`.
+
+        Args:
+            name (str): The target's name.
+            pattern (str): The destination pattern, e.g. `{stem}.print.html`.
+            minify (Optional[bool], optional): Whether to serialize the body minified. Defaults to
+                None (as the page is).
+        """
+        self.name = name
+        self.pattern = pattern
+        self.minify = minify
+
+    def destination(self, page_destination: str) -> str:
+        """
+        Returns where the target's output for a page is written.
+
+        Args:
+            page_destination (str): The path of the generated HTML page, e.g. `public/blog/post.html`.
+
+        Returns:
+            str: The output's path, e.g. `public/blog/post.print.html`.
+        """
+        stem, _ = os.path.splitext(page_destination)
+        return self.pattern.format(stem=stem)
+
+    def signature(self, fs: FileSystem) -> str:
+        """Returns a description of everything the target's outputs depend on besides the pages."""
+        return f'{type(self).__name__}:{self.pattern}:{self.minify}'
+
+    def render(self, page: PageOutput) -> str:
+        """
+        Produces the target's output for a page.
+
+        Args:
+            page (PageOutput): The page's parse.
+
+        Returns:
+            str: The contents of the output file.
+        """
+        raise NotImplementedError
+
+class TemplateTarget(OutputTarget):
+    """
+    Fills another template with the page, e.g. a print-friendly variant without navigation or scripts.
+
+    Attributes:
+        template_path (str): The path of the template.
+    """
+
+    def __init__(self, name: str, pattern: str, template_path: str, minify: Optional[bool] = None):
+        """
+        Initializes a `TemplateTarget`.
+
+        Args:
+            name (str): The target's name.
+            pattern (str): The destination pattern.
+            template_path (str): The template, with the same placeholders as the page template.
+            minify (Optional[bool], optional): Whether to serialize the body and the template
+                minified. Defaults to None (as the page is).
+        """
+        super().__init__(name, pattern, minify)
+        self.template_path = template_path
+
+    def signature(self, fs: FileSystem) -> str:
+        # Editing the template changes every output, just like editing the page template.
+        return f'{super().signature(fs)}:{self.template_path}:{fs.mtime_ns(self.template_path)}'
+
+    def render(self, page: PageOutput) -> str:
+        # Imported here because `generate_page` itself imports this module.
+        from generate_page import fill_template
+
+        minify = page.minify if self.minify is None else self.minify
+        template = page.cache.template(self.template_path, page.fs, minify)
+        if page.assets is not None:
+            template = page.assets.compile(template)
+        return fill_template(template, page.title, page.content(self.minify), page.slots)
+
+class FragmentTarget(OutputTarget):
+    """
+    Writes the page's title, body and the per-page slots around it as JSON, for the navigation
+    script to swap into the page.
+    """
+
+    def __init__(self, name: str = 'fragment', pattern: str = FRAGMENT_PATTERN):
+        # The fragment must hold exactly the body put into the page, so it always follows the page.
+        super().__init__(name, pattern)
+
+    def signature(self, fs: FileSystem) -> str:
+        # Pages mark the slots the fragment carries, so changing them rewrites every page.
+        return f'{super().signature(fs)}:{",".join(FRAGMENT_SLOTS)}'
+
+    def render(self, page: PageOutput) -> str:
+        slots = {name: page.slots.get(name, '') for name in FRAGMENT_SLOTS}
+        data = {'title': page.title, 'html': page.content(), 'slots': slots}
+        return json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+
+class TreeTarget(OutputTarget):
+    """Writes the page's title, front matter and HTML tree as JSON, for downstream indexing."""
+
+    def __init__(self, name: str = 'tree', pattern: str = TREE_PATTERN):
+        super().__init__(name, pattern)
+
+    def render(self, page: PageOutput) -> str:
+        tree = node_to_json(page.node, page.asset_urls) if page.node is not None else None
+        data = {'title': page.title, 'metadata': page.metadata, 'tree': tree}
+        return json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+
+def text_to_json(text: str) -> List[Union[str, Dict[str, Any]]]:
+    """
+    Splits the text of a leaf at its line breaks, which become `br` elements.
+
+    Args:
+        text (str): Unescaped text, possibly containing `LINE_BREAK`s.
+
+    Returns:
+        List[Union[str, Dict[str, Any]]]: The pieces of text, with a `{"tag": "br"}` between each.
+    """
+    pieces: List[Union[str, Dict[str, Any]]] = []
+    for i, piece in enumerate(text.split(LINE_BREAK)):
+        if i:
+            pieces.append({'tag': 'br'})
+        if piece:
+            pieces.append(piece)
+    return pieces
+
+def node_to_json(node: HTMLNode, asset_urls: Mapping[str, str] = None) -> Union[str, Dict[str, Any]]:
+    """
+    Converts an HTML tree to plain data: an element becomes `{"tag", "props", "children"}` and
+    text becomes a string, unescaped.
+
+    Attributes are left out when there are none, and `src` and `href` point at the published files,
+    as in the serialized page. Highlighted code, which is kept as markup, becomes `{"html": ...}`.
+
+    Args:
+        node (HTMLNode): The root of the tree.
+        asset_urls (Mapping[str, str], optional): The fingerprinted URL of each static file.
+            Defaults to None.
+
+    Returns:
+        Union[str, Dict[str, Any]]: The node as JSON-serializable data.
+    """
+    if isinstance(node, RawNode):
+        return {'html': node.value}
+    if node.tag is None:
+        pieces = text_to_json(node.value)
+        return pieces[0] if len(pieces) == 1 and isinstance(pieces[0], str) else {'children': pieces}
+
+    data: Dict[str, Any] = {'tag': node.tag}
+    if node.props:
+        data['props'] = {k: asset_urls.get(v, v) if asset_urls and k in ('src', 'href') else v
+                         for k, v in node.props.items()}
+    if node.children:
+        data['children'] = [node_to_json(child, asset_urls) for child in node.children]
+    elif node.value:
+        data['children'] = text_to_json(node.value)
+    return data
+
+class OutputTargets:
+    """
+    The registry of output targets produced for every page.
+
+    The page itself is always written from the page template; each registered target adds one file
+    per page, produced from the same parse in the same pass.
+
+    Attributes:
+        targets (Dict[str, OutputTarget]): The registered targets, keyed by name, in registration order.
+    """
+
+    def __init__(self, targets: List[OutputTarget] = None):
+        """
+        Initializes a registry.
+
+        Args:
+            targets (List[OutputTarget], optional): The targets to register. Defaults to none.
+        """
+        self.targets: Dict[str, OutputTarget] = {}
+        for target in targets or []:
+            self.register(target)
+
+    def register(self, target: OutputTarget) -> None:
+        """
+        Registers a target.
+
+        Args:
+            target (OutputTarget): The target.
+
+        Raises:
+            ValueError: If a target with the same name or destination pattern is already
+                registered, or the pattern would overwrite the page itself.
+        """
+        if target.name in self.targets:
+            raise ValueError(f"An output target named '{target.name}' is already registered")
+        if target.pattern == '{stem}.html' or any(t.pattern == target.pattern for t in self.targets.values()):
+            raise ValueError(f"Output target '{target.name}' would overwrite another output: {target.pattern}")
+        self.targets[target.name] = target
+
+    def __iter__(self) -> Iterator[OutputTarget]:
+        return iter(self.targets.values())
+
+    def __len__(self) -> int:
+        return len(self.targets)
+
+    @property
+    def fragments(self) -> bool:
+        """Whether content fragments are written, so pages carry the navigation script."""
+        return any(isinstance(target, FragmentTarget) for target in self)
+
+    def signature(self, fs: FileSystem) -> Dict[str, str]:
+        """Returns the signature of every target, keyed by name, for the build manifest's render options."""
+        return {target.name: target.signature(fs) for target in self}
+
+    def write(self, page: PageOutput) -> Dict[str, str]:
+        """
+        Writes every target's output for a page.
+
+        Args:
+            page (PageOutput): The page's parse.
+
+        Returns:
+            Dict[str, str]: The SHA-256 of each output, keyed by destination path, for the build manifest.
+        """
+        written: Dict[str, str] = {}
+        for target in self:
+            path = target.destination(page.destination)
+            data = target.render(page).encode('utf-8')
+            page.fs.write_bytes(path, data)
+            written[path] = hashlib.sha256(data).hexdigest()
+        return written
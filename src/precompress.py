@@ -0,0 +1,267 @@
+import contextlib
+import gzip
+import hashlib
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, Dict, Iterator, List, Optional, Set
+
+from filesystem import FileSystem
+
+# Brotli is optional: without it only `.gz` siblings are written.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# The text formats worth compressing; images and fonts are already compressed.
+COMPRESSIBLE_EXTENSIONS = ('.html', '.css', '.js', '.svg', '.json')
+
+# Below this size the compressed file saves less than the extra request headers cost.
+MIN_COMPRESS_SIZE = 1024
+
+def compressed_siblings(path: str) -> List[str]:
+    """
+    Returns the paths of the precompressed copies a file may have.
+
+    Args:
+        path (str): The original file, e.g. `public/index.html`.
+
+    Returns:
+        List[str]: The `.gz` path, plus the `.br` path when brotli is available.
+    """
+    return [path + '.gz', path + '.br'] if brotli is not None else [path + '.gz']
+
+class Precompressor:
+    """
+    Writes `.gz` (and `.br`) siblings of output files from a background thread pool.
+
+    Files are submitted as soon as they are written, so compression overlaps with rendering the
+    rest of the site; `finish` waits for the outstanding work. Each sibling is recorded with the
+    hash of the content it was compressed from, and a file whose content hash is unchanged since
+    the previous build is not compressed again. A file rewritten below the size threshold loses
+    the siblings of its old contents.
+
+    Attributes:
+        fs (FileSystem): The filesystem the siblings are written to.
+        previous (Dict[str, str]): The content hash of each sibling the previous build wrote, keyed by sibling path.
+        min_size (int): Files smaller than this many bytes are not compressed.
+    """
+
+    def __init__(self, fs: FileSystem, previous: Dict[str, str] = None, workers: int = None,
+                 min_size: int = MIN_COMPRESS_SIZE):
+        """
+        Initializes a `Precompressor` and its thread pool.
+
+        Args:
+            fs (FileSystem): The filesystem the siblings are written to.
+            previous (Dict[str, str], optional): The sibling hashes of the previous build. Defaults to None.
+            workers (int, optional): The number of compression threads. Defaults to None (chosen by
+                `ThreadPoolExecutor`). `zlib` and brotli release the GIL while compressing.
+            min_size (int, optional): The size threshold. Defaults to `MIN_COMPRESS_SIZE`.
+        """
+        self.fs = fs
+        self.previous = previous or {}
+        self.min_size = min_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='precompress')
+        self._futures: List[Future] = []
+        self._hashes: Dict[str, str] = {}
+        self._latest: Dict[str, bytes] = {}
+        self._written: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def wants(self, path: str) -> bool:
+        """Returns True if `path` is a format worth compressing."""
+        return path.endswith(COMPRESSIBLE_EXTENSIONS)
+
+    def submit(self, path: str, data: bytes) -> None:
+        """
+        Schedules the siblings of a file that was just written.
+
+        Args:
+            path (str): The written file.
+            data (bytes): Its contents.
+        """
+        if not self.wants(path):
+            return
+        # A file written twice must end up with the siblings of its last contents even if the
+        # first compression finishes later.
+        with self._lock:
+            self._written.add(path)
+            self._latest[path] = data
+            if len(data) < self.min_size:
+                # Siblings left from larger contents would be served instead of the new file.
+                for sibling in compressed_siblings(path):
+                    self._hashes.pop(sibling, None)
+                remove_siblings(path, self.fs)
+                return
+        self._futures.append(self._executor.submit(self.compress, path, data))
+
+    def compress(self, path: str, data: bytes) -> None:
+        """
+        Writes the siblings of a file, unless they already hold its current contents.
+
+        Args:
+            path (str): The original file.
+            data (bytes): Its contents.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        for sibling in compressed_siblings(path):
+            with self._lock:
+                if self._latest.get(path) is not data:
+                    return
+                self._hashes[sibling] = digest
+            if self.previous.get(sibling) == digest and self.fs.exists(sibling):
+                continue
+
+            # A fixed `mtime` keeps the gzip header, and so the output, identical across builds.
+            if sibling.endswith('.gz'):
+                compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            else:
+                compressed = brotli.compress(data, quality=11)
+
+            # Writing under the lock keeps a superseded compression from overwriting a newer one.
+            with self._lock:
+                if self._latest.get(path) is not data:
+                    return
+                self.fs.write_bytes(sibling, compressed)
+
+    def compress_existing(self, directory: str) -> None:
+        """
+        Submits the files below a directory that this build did not write and that have no siblings yet.
+
+        An incremental build only writes what changed, so the first build with precompression
+        calls this to compress the outputs it kept, such as unchanged search shards.
+
+        Args:
+            directory (str): The output directory.
+        """
+        for name in self.fs.listdir(directory):
+            path = os.path.join(directory, name)
+            if self.fs.isdir(path):
+                self.compress_existing(path)
+            elif self.wants(path) and path not in self._written:
+                if not all(self.fs.exists(sibling) for sibling in compressed_siblings(path)):
+                    self.submit(path, self.fs.read_bytes(path))
+
+    def finish(self) -> Dict[str, str]:
+        """
+        Waits for all submitted work and shuts the pool down.
+
+        Siblings of files this build did not write, such as pages an incremental build skipped,
+        are still valid as long as the original exists, so they are carried over. Those of files
+        this build rewrote hold the old contents unless they were just compressed again.
+
+        Returns:
+            Dict[str, str]: The content hash of every sibling, keyed by sibling path.
+
+        Raises:
+            Exception: The first error raised while compressing, if any.
+        """
+        try:
+            for future in self._futures:
+                future.result()
+        finally:
+            self._executor.shutdown()
+
+        hashes = {
+            sibling: digest for sibling, digest in self.previous.items()
+            if os.path.splitext(sibling)[0] not in self._written
+            and self.fs.exists(sibling) and self.fs.exists(os.path.splitext(sibling)[0])
+        }
+        hashes.update(self._hashes)
+        return hashes
+
+class PrecompressingFileSystem(FileSystem):
+    """
+    A filesystem wrapper that hands every file written below the output directory to a `Precompressor`.
+
+    Wrapping the filesystem lets the existing build stages, which only know how to write files,
+    feed the compressor as they go without being changed.
+
+    Attributes:
+        inner (FileSystem): The filesystem every operation is delegated to.
+        public_dir (str): Only files written below this directory are compressed.
+        precompressor (Precompressor): The compressor written files are submitted to.
+    """
+
+    def __init__(self, inner: FileSystem, public_dir: str, precompressor: Precompressor):
+        """
+        Initializes the wrapper.
+
+        Args:
+            inner (FileSystem): The filesystem to delegate to.
+            public_dir (str): The output directory.
+            precompressor (Precompressor): The compressor to submit written files to.
+        """
+        self.inner = inner
+        self.public_dir = os.path.normpath(public_dir)
+        self.precompressor = precompressor
+
+    def compresses(self, path: str) -> bool:
+        """Returns True if a file written to `path` is submitted for compression."""
+        inside = os.path.normpath(path).startswith(self.public_dir + os.sep)
+        return inside and self.precompressor.wants(path)
+
+    def exists(self, path: str) -> bool:
+        return self.inner.exists(path)
+
+    def isdir(self, path: str) -> bool:
+        return self.inner.isdir(path)
+
+    def isfile(self, path: str) -> bool:
+        return self.inner.isfile(path)
+
+    def listdir(self, path: str) -> List[str]:
+        return self.inner.listdir(path)
+
+    def mkdir(self, path: str) -> None:
+        self.inner.mkdir(path)
+
+    def read_bytes(self, path: str) -> bytes:
+        return self.inner.read_bytes(path)
+
+    def write_bytes(self, path: str, data: bytes) -> None:
+        self.inner.write_bytes(path, data)
+        if self.compresses(path):
+            self.precompressor.submit(path, data)
+
+    def remove(self, path: str) -> None:
+        self.inner.remove(path)
+
+    def rmdir(self, path: str) -> None:
+        self.inner.rmdir(path)
+
+    def mtime_ns(self, path: str) -> int:
+        return self.inner.mtime_ns(path)
+
+    def iter_lines(self, path: str) -> Iterator[str]:
+        return self.inner.iter_lines(path)
+
+    @contextlib.contextmanager
+    def open_write(self, path: str) -> Iterator[BinaryIO]:
+        # Compressible files are collected so their contents can be submitted; others keep streaming.
+        if self.compresses(path):
+            with super().open_write(path) as stream:
+                yield stream
+        else:
+            with self.inner.open_write(path) as stream:
+                yield stream
+
+    def copy(self, source: str, destination: str) -> None:
+        if self.compresses(destination):
+            self.write_bytes(destination, self.inner.read_bytes(source))
+        else:
+            self.inner.copy(source, destination)
+
+def remove_siblings(path: str, fs: FileSystem) -> None:
+    """
+    Removes the precompressed copies of a file that is being removed.
+
+    Args:
+        path (str): The original file.
+        fs (FileSystem): The filesystem to remove from.
+    """
+    for sibling in (path + '.gz', path + '.br'):
+        if fs.isfile(sibling):
+            fs.remove(sibling)
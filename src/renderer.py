@@ -0,0 +1,233 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional, TextIO
+
+from markdown_to_html_node import markdown_to_html_node
+
+def render_markdown_to_html(markdown: str) -> str:
+    """
+    Renders a Markdown string to HTML with the function API.
+
+    This is a module-level function so that worker processes can unpickle it by name.
+
+    Args:
+        markdown (str): The Markdown document.
+
+    Returns:
+        str: The rendered HTML.
+    """
+    return markdown_to_html_node(markdown).to_html()
+
+class Renderer:
+    """
+    A reusable Markdown renderer for high-volume callers.
+
+    `markdown_to_html_node(md).to_html()` keeps no state between calls. A `Renderer` owns its
+    configuration, a bounded cache of recent results and, when parallel batches are used, a pool of
+    worker processes that stays alive between batches. The parsing patterns themselves are compiled
+    once at import time by the parser modules, so no per-call setup remains.
+
+    Attributes:
+        cache_size (int): The maximum number of rendered documents kept; 0 disables the cache.
+        workers (Optional[int]): The number of worker processes for parallel batches; None lets
+            `ProcessPoolExecutor` pick one per CPU.
+        chunk_size (int): The number of documents sent to a worker at a time.
+        hits (int): The number of renders answered from the cache.
+        misses (int): The number of renders that had to parse Markdown.
+
+    Methods:
+        render(): Renders a single document.
+        render_many(): Renders a batch of documents, optionally in parallel.
+        render_to(): Renders a document straight into a writable text stream.
+        close(): Shuts down the worker pool.
+    """
+
+    def __init__(self, cache_size: int = 1024, workers: Optional[int] = None, chunk_size: int = 64):
+        """
+        Initializes a `Renderer`.
+
+        Args:
+            cache_size (int, optional): The maximum number of rendered documents to keep. Defaults to 1024.
+            workers (Optional[int], optional): The number of worker processes for parallel batches.
+                Defaults to None (one per CPU).
+            chunk_size (int, optional): The number of documents sent to a worker at a time. Defaults to 64.
+
+        Raises:
+            ValueError: If `cache_size` is negative or `chunk_size` is not positive.
+        """
+        if cache_size < 0:
+            raise ValueError("cache_size must be zero or a positive integer")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer")
+
+        self.cache_size = cache_size
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.hits = 0
+        self.misses = 0
+        self._cache: 'OrderedDict[str, str]' = OrderedDict()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> 'Renderer':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def render(self, markdown: str) -> str:
+        """
+        Renders a Markdown document to HTML.
+
+        Args:
+            markdown (str): The Markdown document.
+
+        Returns:
+            str: The rendered HTML, identical to `markdown_to_html_node(markdown).to_html()`.
+        """
+        key = self.key(markdown)
+        cached = self.lookup(key)
+        if cached is not None:
+            return cached
+
+        html = render_markdown_to_html(markdown)
+        self.store(key, html)
+        return html
+
+    def render_many(self, documents: Iterable[str], parallel: bool = False) -> List[str]:
+        """
+        Renders a batch of Markdown documents.
+
+        Documents already in the cache and duplicates within the batch are rendered only once. The
+        remaining unique documents are rendered in this process, or spread over the worker pool in
+        chunks when `parallel` is True.
+
+        Args:
+            documents (Iterable[str]): The Markdown documents.
+            parallel (bool, optional): Whether to render in worker processes. Defaults to False.
+
+        Returns:
+            List[str]: The rendered HTML for each document, in input order.
+        """
+        documents = list(documents)
+        keys = [self.key(markdown) for markdown in documents]
+
+        # Resolve cache hits first and collect each distinct miss once.
+        results = {}
+        pending = {}
+        for key, markdown in zip(keys, documents):
+            if key in results or key in pending:
+                continue
+            cached = self.lookup(key)
+            if cached is not None:
+                results[key] = cached
+            else:
+                pending[key] = markdown
+
+        if pending:
+            pending_keys = list(pending)
+            sources = [pending[key] for key in pending_keys]
+
+            # Small batches are not worth the inter-process round trip.
+            if parallel and len(sources) > self.chunk_size:
+                rendered = list(self.pool().map(render_markdown_to_html, sources, chunksize=self.chunk_size))
+            else:
+                rendered = [render_markdown_to_html(markdown) for markdown in sources]
+
+            for key, html in zip(pending_keys, rendered):
+                results[key] = html
+                self.store(key, html)
+
+        return [results[key] for key in keys]
+
+    def render_to(self, markdown: str, stream: TextIO) -> int:
+        """
+        Renders a Markdown document and writes the HTML to a text stream.
+
+        Args:
+            markdown (str): The Markdown document.
+            stream (TextIO): A writable text stream, such as an open file or `sys.stdout`.
+
+        Returns:
+            int: The number of characters written.
+        """
+        html = self.render(markdown)
+        stream.write(html)
+        return len(html)
+
+    def close(self) -> None:
+        """Shuts down the worker pool, if one was started."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+    def pool(self) -> ProcessPoolExecutor:
+        """
+        Returns the worker pool, starting it on first use.
+
+        Returns:
+            ProcessPoolExecutor: The pool used for parallel batches.
+        """
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def key(self, markdown: str) -> str:
+        """
+        Returns the cache key for a document.
+
+        Hashing keeps the cache's memory proportional to the number of entries rather than to the
+        size of the documents used as keys.
+
+        Args:
+            markdown (str): The Markdown document.
+
+        Returns:
+            str: The hex digest identifying the document.
+        """
+        return hashlib.blake2b(markdown.encode('utf-8'), digest_size=16).hexdigest()
+
+    def lookup(self, key: str) -> Optional[str]:
+        """
+        Returns the cached HTML for a key, or None on a miss.
+
+        Args:
+            key (str): The document key.
+
+        Returns:
+            Optional[str]: The cached HTML.
+        """
+        if not self.cache_size:
+            self.misses += 1
+            return None
+
+        with self._lock:
+            html = self._cache.get(key)
+            if html is None:
+                self.misses += 1
+                return None
+
+            # Mark the entry as recently used so it survives eviction.
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return html
+
+    def store(self, key: str, html: str) -> None:
+        """
+        Adds a rendered document to the cache, evicting the least recently used entries.
+
+        Args:
+            key (str): The document key.
+            html (str): The rendered HTML.
+        """
+        if not self.cache_size:
+            return
+
+        with self._lock:
+            self._cache[key] = html
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
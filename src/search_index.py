@@ -0,0 +1,387 @@
+import hashlib
+import json
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Set
+
+from build_cache import BuildCache
+from filesystem import DiskFileSystem, FileSystem, make_dirs
+from generate_page import render_markdown
+from taxonomy import Page
+
+# The output directory of the search index, below the site's public directory.
+SEARCH_DIR = 'search'
+
+# Terms are partitioned into shards by their first characters, so a query for `majesty` only
+# downloads `search/ma.json`. Longer prefixes only pay off on large sites, so the prefix grows with
+# the index, up to this many characters; the manifest tells the browser the current length.
+MAX_PREFIX_LENGTH = 2
+
+# The number of terms a shard should hold on average before prefixes get one character longer. A
+# small site's whole index is smaller than the overhead of a request per prefix, so it is one shard.
+MIN_SHARD_TERMS = 500
+
+# The name of the only shard of an index whose prefix length is 0.
+SINGLE_SHARD = 'all'
+
+# Prefixes that are safe to use as file names as they are; any other prefix is hex-encoded.
+SAFE_PREFIX_PATTERN = re.compile(r'^[a-z0-9_]+$')
+
+# Where incremental builds keep the full index between builds, next to the build manifest.
+SEARCH_INDEX_FILE = 'search-index.json'
+
+# Bumped whenever the stored index or the emitted shards change layout.
+SEARCH_INDEX_VERSION = 1
+
+def shard_name(term: str, prefix_length: int = MAX_PREFIX_LENGTH) -> str:
+    """
+    Returns the name of the shard a term is stored in.
+
+    Args:
+        term (str): A lowercase term, e.g. `majesty`.
+        prefix_length (int, optional): The number of leading characters shards are keyed by.
+            Defaults to `MAX_PREFIX_LENGTH`.
+
+    Returns:
+        str: The term's prefix, e.g. `ma`; prefixes with other characters than lowercase ASCII
+            letters, digits and underscores become `x` followed by their UTF-8 bytes in hex. With
+            a prefix length of 0 every term is in `SINGLE_SHARD`.
+    """
+    if prefix_length == 0:
+        return SINGLE_SHARD
+    prefix = term[:prefix_length]
+    return prefix if SAFE_PREFIX_PATTERN.match(prefix) else 'x' + prefix.encode('utf-8').hex()
+
+def choose_prefix_length(terms: Iterable[str]) -> int:
+    """
+    Returns the longest prefix length whose shards hold `MIN_SHARD_TERMS` terms on average.
+
+    Args:
+        terms (Iterable[str]): Every term of the index.
+
+    Returns:
+        int: The prefix length, from 0 (a single shard) to `MAX_PREFIX_LENGTH`.
+    """
+    terms = list(terms)
+    for length in range(MAX_PREFIX_LENGTH, 0, -1):
+        if len(terms) >= MIN_SHARD_TERMS * len({term[:length] for term in terms}):
+            return length
+    return 0
+
+def encode_postings(postings: Dict[int, List[int]]) -> List[List[int]]:
+    """
+    Delta-encodes the postings of one term.
+
+    Page IDs are sorted and stored as the difference to the previous ID, and each page's positions
+    as the difference to the previous position, so most numbers in the shard are small.
+
+    Args:
+        postings (Dict[int, List[int]]): The ascending positions of the term, keyed by page ID.
+
+    Returns:
+        List[List[int]]: One `[id_delta, first_position, position_delta, ...]` list per page.
+    """
+    encoded = []
+    previous_id = 0
+    for page_id in sorted(postings):
+        positions = postings[page_id]
+        entry = [page_id - previous_id, positions[0]]
+        entry.extend(current - previous for previous, current in zip(positions, positions[1:]))
+        encoded.append(entry)
+        previous_id = page_id
+    return encoded
+
+def decode_postings(encoded: List[List[int]]) -> Dict[int, List[int]]:
+    """
+    Reverses `encode_postings`, as the browser does after loading a shard.
+
+    Args:
+        encoded (List[List[int]]): The delta-encoded postings of one term.
+
+    Returns:
+        Dict[int, List[int]]: The positions of the term, keyed by page ID.
+    """
+    postings: Dict[int, List[int]] = {}
+    page_id = 0
+    for entry in encoded:
+        page_id += entry[0]
+        positions = [entry[1]]
+        for delta in entry[2:]:
+            positions.append(positions[-1] + delta)
+        postings[page_id] = positions
+    return postings
+
+class SearchIndex:
+    """
+    An inverted index from each term of the site to the pages and positions it occurs at.
+
+    The index is updated page by page: a page rendered by the current build has its old postings
+    removed and its new ones added, and every other page's postings are left alone. Only the shards
+    holding terms of changed pages need to be written again.
+
+    Attributes:
+        ids (Dict[str, int]): The page ID of each indexed page, keyed by URL.
+        titles (Dict[int, str]): The title of each indexed page, keyed by page ID.
+        postings (Dict[str, Dict[int, List[int]]]): The positions of each term, keyed by term and page ID.
+        forward (Dict[int, List[str]]): The terms of each page, keyed by page ID, used to remove a
+            page's postings without scanning every term.
+        next_id (int): The ID the next new page receives; IDs are never reused.
+        prefix_length (int): The number of leading characters the shards are keyed by.
+    """
+
+    def __init__(self):
+        """Initializes an empty index."""
+        self.ids: Dict[str, int] = {}
+        self.titles: Dict[int, str] = {}
+        self.postings: Dict[str, Dict[int, List[int]]] = {}
+        self.forward: Dict[int, List[str]] = {}
+        self.next_id = 1
+        self.prefix_length = MAX_PREFIX_LENGTH
+
+    @classmethod
+    def load(cls, path: str, fs: FileSystem = None) -> 'SearchIndex':
+        """
+        Reads an index stored by `save`, returning an empty one if it is missing or unreadable.
+
+        Args:
+            path (str): Where the index is stored.
+            fs (FileSystem, optional): The filesystem to read from. Defaults to the real disk.
+
+        Returns:
+            SearchIndex: The index.
+        """
+        if fs is None:
+            fs = DiskFileSystem()
+
+        index = cls()
+        try:
+            data = json.loads(fs.read_text(path))
+        except (OSError, ValueError):
+            return index
+
+        # Like the build manifest, an index we cannot trust only costs re-indexing the site.
+        if not isinstance(data, dict) or data.get('version') != SEARCH_INDEX_VERSION:
+            return index
+
+        index.ids = dict(data['ids'])
+        index.titles = {int(page_id): title for page_id, title in data['titles'].items()}
+        index.postings = {
+            term: {int(page_id): positions for page_id, positions in postings.items()}
+            for term, postings in data['postings'].items()
+        }
+        index.forward = {int(page_id): terms for page_id, terms in data['forward'].items()}
+        index.next_id = data['next_id']
+        index.prefix_length = data.get('prefix_length', MAX_PREFIX_LENGTH)
+        return index
+
+    def save(self, path: str, fs: FileSystem = None) -> None:
+        """
+        Writes the index, creating its directory if needed.
+
+        Args:
+            path (str): Where to store the index.
+            fs (FileSystem, optional): The filesystem to write to. Defaults to the real disk.
+        """
+        if fs is None:
+            fs = DiskFileSystem()
+
+        make_dirs(os.path.dirname(path), fs)
+        data = {
+            'version': SEARCH_INDEX_VERSION,
+            'ids': self.ids,
+            'titles': self.titles,
+            'postings': self.postings,
+            'forward': self.forward,
+            'next_id': self.next_id,
+            'prefix_length': self.prefix_length,
+        }
+        fs.write_text(path, json.dumps(data, separators=(',', ':')))
+
+    def remove(self, page_id: int) -> Set[str]:
+        """
+        Removes a page's postings.
+
+        Args:
+            page_id (int): The page's ID.
+
+        Returns:
+            Set[str]: The names of the shards that changed.
+        """
+        changed = set()
+        for term in self.forward.pop(page_id, []):
+            postings = self.postings[term]
+            del postings[page_id]
+            if not postings:
+                del self.postings[term]
+            changed.add(shard_name(term, self.prefix_length))
+        return changed
+
+    def update(self, pages: Iterable[Page]) -> Set[str]:
+        """
+        Brings the index up to date with the current build's pages.
+
+        Pages that are gone are removed, and pages rendered by this build (those whose `postings`
+        are set) have their postings replaced. Reused pages keep the postings they already have.
+
+        Args:
+            pages (Iterable[Page]): The record of every page of the site.
+
+        Returns:
+            Set[str]: The names of the shards whose contents changed.
+        """
+        pages = list(pages)
+        changed: Set[str] = set()
+
+        current = {page.url for page in pages}
+        for url in [url for url in self.ids if url not in current]:
+            page_id = self.ids.pop(url)
+            self.titles.pop(page_id, None)
+            changed |= self.remove(page_id)
+
+        for page in pages:
+            page_id = self.ids.get(page.url)
+            if page_id is None:
+                page_id = self.ids[page.url] = self.next_id
+                self.next_id += 1
+            self.titles[page_id] = page.title
+
+            if page.postings is None:
+                continue
+
+            # Only the terms the page gained or lost, or whose positions moved, touch a shard.
+            previous = {term: self.postings[term][page_id] for term in self.forward.get(page_id, [])}
+            for term in previous.keys() ^ page.postings.keys():
+                changed.add(shard_name(term, self.prefix_length))
+            for term in previous.keys() & page.postings.keys():
+                if previous[term] != page.postings[term]:
+                    changed.add(shard_name(term, self.prefix_length))
+
+            self.remove(page_id)
+            for term, positions in page.postings.items():
+                self.postings.setdefault(term, {})[page_id] = positions
+            self.forward[page_id] = sorted(page.postings)
+
+        return changed
+
+    def shards(self, names: Optional[Set[str]] = None) -> Dict[str, Dict[str, List[List[int]]]]:
+        """
+        Groups the encoded postings into shards.
+
+        Args:
+            names (Optional[Set[str]], optional): The shards to build. Defaults to None (all of them).
+
+        Returns:
+            Dict[str, Dict[str, List[List[int]]]]: The encoded postings of each term, keyed by shard
+                name and then by term.
+        """
+        shards: Dict[str, Dict[str, List[List[int]]]] = {}
+        for term in sorted(self.postings):
+            name = shard_name(term, self.prefix_length)
+            if names is None or name in names:
+                shards.setdefault(name, {})[term] = encode_postings(self.postings[term])
+        return shards
+
+    def shard_names(self) -> Set[str]:
+        """Returns the name of every shard that holds at least one term."""
+        return {shard_name(term, self.prefix_length) for term in self.postings}
+
+    def reshard(self) -> bool:
+        """
+        Adapts the prefix length to the number of terms, see `choose_prefix_length`.
+
+        Returns:
+            bool: Whether the prefix length changed, in which case every shard must be written again.
+        """
+        length = choose_prefix_length(self.postings)
+        changed = length != self.prefix_length
+        self.prefix_length = length
+        return changed
+
+    def manifest(self) -> Dict[str, object]:
+        """
+        Returns the small document the browser loads first: how terms map to shards, which shards
+        exist, and the URL and title of each page ID.
+
+        Returns:
+            Dict[str, object]: The JSON-serializable manifest.
+        """
+        urls = {page_id: url for url, page_id in self.ids.items()}
+        return {
+            'version': SEARCH_INDEX_VERSION,
+            'prefix_length': self.prefix_length,
+            'shards': sorted(self.shard_names()),
+            'pages': {str(page_id): [urls[page_id], self.titles[page_id]] for page_id in sorted(urls)},
+        }
+
+def generate_search_index(pages: List[Page], public_dir: str, index: SearchIndex = None, cache: BuildCache = None,
+                          fs: FileSystem = None, previous: Dict[str, str] = None) -> Dict[str, str]:
+    """
+    Updates the search index with the current build's pages and writes the shards that changed.
+
+    The words of each page were collected from its `TextNode` stream while it rendered, so no page
+    is parsed again here. The exception is a page the index has never seen whose record was
+    reused, e.g. after the stored index was deleted; it is rendered once, through the cache.
+
+    Args:
+        pages (List[Page]): The record of every page of the site.
+        public_dir (str): The output directory.
+        index (SearchIndex, optional): The index of the previous build. Defaults to None (a new index).
+        cache (BuildCache, optional): A cache shared between builds. Defaults to None.
+        fs (FileSystem, optional): The filesystem to read from and write to. Defaults to the real disk.
+        previous (Dict[str, str], optional): The search file signatures of the previous build,
+            keyed by destination path. Defaults to None.
+
+    Returns:
+        Dict[str, str]: The signature of every search file, keyed by destination path.
+    """
+    if fs is None:
+        fs = DiskFileSystem()
+    if index is None:
+        index = SearchIndex()
+    if previous is None:
+        previous = {}
+
+    for page in pages:
+        if page.postings is None and page.url not in index.ids:
+            markdown_contents = fs.read_text(page.source)
+            if cache is not None:
+                rendered = cache.render(markdown_contents, render_markdown)
+            else:
+                rendered = render_markdown(markdown_contents)
+            page.postings = rendered.terms
+
+    changed = index.update(pages)
+    if index.reshard():
+        changed = index.shard_names()
+    search_dir = os.path.join(public_dir, SEARCH_DIR)
+    make_dirs(search_dir, fs)
+
+    signatures: Dict[str, str] = {}
+
+    # Shards untouched by this build keep the signature they were written with.
+    for name in index.shard_names() - changed:
+        destination = os.path.join(search_dir, f'{name}.json')
+        if destination in previous and fs.exists(destination):
+            signatures[destination] = previous[destination]
+        else:
+            changed.add(name)
+
+    outputs = {f'{name}.json': shard for name, shard in index.shards(changed).items()}
+    outputs['index.json'] = index.manifest()
+
+    written = 0
+    for file_name, data in sorted(outputs.items()):
+        destination = os.path.join(search_dir, file_name)
+        text = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+        signature = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        signatures[destination] = signature
+
+        if previous.get(destination) == signature and fs.exists(destination):
+            continue
+
+        fs.write_text(destination, text)
+        written += 1
+
+    # A large site has hundreds of shards, so the build reports them in one line rather than one each.
+    print(f"Search index {search_dir}: {written} written, {len(signatures) - written} unchanged")
+    return signatures
@@ -0,0 +1,489 @@
+import email.utils
+import gzip
+import hashlib
+import mimetypes
+import os
+import posixpath
+import threading
+import urllib.parse
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+# Content types worth compressing. Images such as PNG and JPEG are already compressed,
+# so gzipping them again only wastes CPU on both ends of the connection.
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'application/xml', 'image/svg+xml')
+
+# Files smaller than this are sent as-is because the gzip header overhead outweighs any savings.
+GZIP_MIN_SIZE = 256
+
+class StaticFile:
+    """
+    Represents a single output file held in the preview server's in-memory index.
+
+    The body, the gzip variant and the validators (ETag and Last-Modified) are all computed once
+    when the file is loaded, so answering a request is only a dictionary lookup and a socket write.
+
+    Attributes:
+        body (bytes): The raw contents of the file.
+        gzip_body (Optional[bytes]): The gzip-compressed contents, or None if the file is not worth compressing.
+        content_type (str): The MIME type sent in the `Content-Type` header.
+        etag (str): A strong entity tag derived from a hash of the file contents.
+        gzip_etag (str): The entity tag of the gzip representation, which must differ from `etag`.
+        last_modified (str): The modification time formatted as an HTTP date.
+        mtime (int): The modification time in whole seconds, used for `If-Modified-Since` comparisons.
+        stat_key (tuple): The `(mtime_ns, size)` pair used to detect that the file changed on disk.
+    """
+
+    def __init__(self, body: bytes, content_type: str, mtime_ns: int):
+        """
+        Initializes a `StaticFile` and precomputes its validators and compressed variant.
+
+        Args:
+            body (bytes): The raw contents of the file.
+            content_type (str): The MIME type of the file.
+            mtime_ns (int): The modification time of the file in nanoseconds.
+        """
+        self.body = body
+        self.content_type = content_type
+
+        # Hash the contents rather than the modification time so that a rebuild producing
+        # identical output keeps the same ETag and browsers can keep their cached copies.
+        digest = hashlib.sha1(body).hexdigest()
+        self.etag = f'"{digest}"'
+        self.gzip_etag = f'"{digest}-gz"'
+
+        self.mtime = mtime_ns // 1_000_000_000
+        self.last_modified = email.utils.formatdate(self.mtime, usegmt=True)
+        self.stat_key = (mtime_ns, len(body))
+
+        # Precompress once at load time at maximum level; the cost is paid once per file, not per request.
+        self.gzip_body = None
+        if len(body) >= GZIP_MIN_SIZE and content_type.startswith(COMPRESSIBLE_TYPES):
+            compressed = gzip.compress(body, compresslevel=9, mtime=0)
+
+            # Only keep the compressed variant when it is actually smaller than the original.
+            if len(compressed) < len(body):
+                self.gzip_body = compressed
+
+class FileIndex:
+    """
+    An in-memory index of the files under a directory, keyed by URL path.
+
+    Entries are loaded lazily on first request and revalidated with a single `os.stat` call on
+    every lookup, so a rebuild of the output directory is picked up without restarting the server.
+    The index is shared between request threads and guarded by a lock.
+
+    Attributes:
+        root (str): The directory being served.
+    """
+
+    def __init__(self, root: str):
+        """
+        Initializes the index for the given directory.
+
+        Args:
+            root (str): The directory whose files will be served.
+        """
+        self.root = os.path.abspath(root)
+        self._entries: Dict[str, StaticFile] = {}
+        self._lock = threading.Lock()
+
+    def preload(self) -> int:
+        """
+        Walks the served directory and loads every file into the index.
+
+        Returns:
+            int: The number of files loaded.
+        """
+        count = 0
+        for dir_path, _, file_names in os.walk(self.root):
+            for file_name in file_names:
+                rel_path = os.path.relpath(os.path.join(dir_path, file_name), self.root)
+                if self.get('/' + rel_path.replace(os.sep, '/')) is not None:
+                    count += 1
+        return count
+
+    def get(self, url_path: str) -> Optional[StaticFile]:
+        """
+        Returns the indexed file for a URL path, loading or reloading it from disk if needed.
+
+        Args:
+            url_path (str): A normalized URL path such as `/images/rivendell.png`.
+
+        Returns:
+            Optional[StaticFile]: The file, or None if no regular file exists at that path.
+        """
+        fs_path = self.to_fs_path(url_path)
+        try:
+            stat = os.stat(fs_path)
+        except OSError:
+            # The file is gone (or never existed); forget any stale entry.
+            with self._lock:
+                self._entries.pop(url_path, None)
+            return None
+
+        # Directories are resolved by the caller through their `index.html`.
+        if not os.path.isfile(fs_path):
+            return None
+
+        # Serve the cached entry when the file has not changed since it was loaded.
+        with self._lock:
+            entry = self._entries.get(url_path)
+        if entry is not None and entry.stat_key == (stat.st_mtime_ns, stat.st_size):
+            return entry
+
+        # Load (or reload) the file outside of the lock so slow reads do not block other threads.
+        with open(fs_path, 'rb') as f:
+            body = f.read()
+        content_type = mimetypes.guess_type(fs_path)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type in ('application/javascript', 'application/json'):
+            content_type += '; charset=utf-8'
+        entry = StaticFile(body, content_type, stat.st_mtime_ns)
+
+        with self._lock:
+            self._entries[url_path] = entry
+        return entry
+
+    def is_dir(self, url_path: str) -> bool:
+        """
+        Checks whether a URL path maps to a directory under the served root.
+
+        Args:
+            url_path (str): A normalized URL path.
+
+        Returns:
+            bool: True if the path is a directory.
+        """
+        return os.path.isdir(self.to_fs_path(url_path))
+
+    def to_fs_path(self, url_path: str) -> str:
+        """
+        Maps a normalized URL path to a filesystem path under the served root.
+
+        Args:
+            url_path (str): A normalized URL path that starts with `/`.
+
+        Returns:
+            str: The corresponding filesystem path.
+        """
+        return os.path.join(self.root, *url_path.split('/')[1:])
+
+def normalize_url_path(raw_path: str) -> Optional[str]:
+    """
+    Normalizes a request path, stripping the query string and resolving `.` and `..` segments.
+
+    Args:
+        raw_path (str): The path from the HTTP request line.
+
+    Returns:
+        Optional[str]: The normalized path starting with `/`, or None if it escapes the served root.
+    """
+    # Drop the query string and fragment; the preview server only serves files.
+    path = urllib.parse.unquote(urllib.parse.urlsplit(raw_path).path)
+
+    # Keep track of a trailing slash because `normpath` removes it but it decides directory handling.
+    trailing_slash = path.endswith('/')
+    normalized = posixpath.normpath('/' + path.lstrip('/'))
+
+    # `normpath` keeps a leading `//` and refuses to go above `/`, but reject anything odd explicitly.
+    if '\x00' in normalized or not normalized.startswith('/') or normalized.startswith('//'):
+        return None
+
+    if trailing_slash and normalized != '/':
+        normalized += '/'
+    return normalized
+
+def parse_range(header: str, length: int) -> Optional[Tuple[int, int]]:
+    """
+    Parses a single-range `Range` header into an inclusive byte range.
+
+    Multiple ranges are not supported; callers treat a None result for a multi-range request as
+    "ignore the header", which RFC 9110 explicitly allows.
+
+    Args:
+        header (str): The value of the `Range` header, e.g. `bytes=0-1023`.
+        length (int): The total length of the representation.
+
+    Returns:
+        Optional[Tuple[int, int]]: The inclusive `(start, end)` byte positions, `(-1, -1)` if the
+        range is syntactically valid but unsatisfiable, or None if the header should be ignored.
+    """
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+
+    start_text, sep, end_text = spec.strip().partition('-')
+    if not sep:
+        return None
+
+    try:
+        if not start_text:
+            # Suffix range (`bytes=-500`): the last N bytes of the file.
+            suffix = int(end_text)
+            if suffix <= 0:
+                return (-1, -1)
+            return (max(length - suffix, 0), length - 1)
+
+        start = int(start_text)
+        end = int(end_text) if end_text else length - 1
+    except ValueError:
+        return None
+
+    if start >= length:
+        return (-1, -1)
+    if start > end:
+        return None
+    return (start, min(end, length - 1))
+
+def accepts_gzip(header: str) -> bool:
+    """
+    Checks whether an `Accept-Encoding` header allows a gzip response.
+
+    Args:
+        header (str): The value of the `Accept-Encoding` header.
+
+    Returns:
+        bool: True if gzip is listed and not explicitly refused with `q=0`.
+    """
+    for coding in header.split(','):
+        name, _, params = coding.strip().partition(';')
+        if name.strip().lower() not in ('gzip', '*'):
+            continue
+
+        # A quality value of zero means the client refuses this coding.
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+class PreviewRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves files from the preview server's `FileIndex`.
+
+    The handler speaks HTTP/1.1 so browsers can reuse connections, answers conditional requests
+    with `304 Not Modified`, honours single byte ranges, sends the precomputed gzip variant when
+    the client accepts it, and serves `index.html` for directory URLs.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    # Close idle keep-alive connections eventually so they do not pin worker threads forever.
+    timeout = 30
+
+    def do_GET(self) -> None:
+        """Handles a GET request by sending headers and the body."""
+        self.send_file(include_body=True)
+
+    def do_HEAD(self) -> None:
+        """Handles a HEAD request by sending only the headers."""
+        self.send_file(include_body=False)
+
+    def resolve(self) -> Tuple[Optional[StaticFile], Optional[str]]:
+        """
+        Resolves the request path to a file or a redirect target.
+
+        Returns:
+            Tuple[Optional[StaticFile], Optional[str]]: The file to serve (or None) and, for directory
+            URLs missing their trailing slash, the location to redirect to (or None).
+        """
+        file_index: FileIndex = self.server.file_index
+        url_path = normalize_url_path(self.path)
+        if url_path is None:
+            return None, None
+
+        # Directory URLs are served through their `index.html`.
+        if url_path.endswith('/'):
+            return file_index.get(url_path + 'index.html'), None
+
+        entry = file_index.get(url_path)
+        if entry is not None:
+            return entry, None
+
+        # Redirect `/majesty` to `/majesty/` so relative links inside the page resolve correctly.
+        if file_index.is_dir(url_path):
+            query = urllib.parse.urlsplit(self.path).query
+            return None, url_path + '/' + (f'?{query}' if query else '')
+
+        return None, None
+
+    def send_file(self, include_body: bool) -> None:
+        """
+        Sends the response for the current request.
+
+        Args:
+            include_body (bool): Whether to write the response body (False for HEAD requests).
+        """
+        entry, redirect = self.resolve()
+
+        if redirect is not None:
+            self.send_response(HTTPStatus.MOVED_PERMANENTLY)
+            self.send_header('Location', redirect)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        if entry is None:
+            self.send_error(HTTPStatus.NOT_FOUND, 'File not found')
+            return
+
+        use_gzip = entry.gzip_body is not None and accepts_gzip(self.headers.get('Accept-Encoding', ''))
+        etag = entry.gzip_etag if use_gzip else entry.etag
+
+        # Conditional requests: `If-None-Match` takes precedence over `If-Modified-Since`.
+        if self.is_not_modified(entry):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_common_headers(entry, etag)
+            self.end_headers()
+            return
+
+        # Range requests are answered from the identity representation only.
+        range_header = self.headers.get('Range')
+        if range_header and self.range_applies(entry):
+            byte_range = parse_range(range_header, len(entry.body))
+            if byte_range == (-1, -1):
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header('Content-Range', f'bytes */{len(entry.body)}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            if byte_range is not None:
+                start, end = byte_range
+                self.send_response(HTTPStatus.PARTIAL_CONTENT)
+                self.send_common_headers(entry, entry.etag)
+                self.send_header('Content-Type', entry.content_type)
+                self.send_header('Content-Range', f'bytes {start}-{end}/{len(entry.body)}')
+                self.send_header('Content-Length', str(end - start + 1))
+                self.end_headers()
+                if include_body:
+                    self.wfile.write(memoryview(entry.body)[start:end + 1])
+                return
+
+        body = entry.gzip_body if use_gzip else entry.body
+        self.send_response(HTTPStatus.OK)
+        self.send_common_headers(entry, etag)
+        self.send_header('Content-Type', entry.content_type)
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if include_body:
+            self.wfile.write(body)
+
+    def send_common_headers(self, entry: StaticFile, etag: str) -> None:
+        """
+        Sends the validator and caching headers shared by 200, 206 and 304 responses.
+
+        Args:
+            entry (StaticFile): The file being served.
+            etag (str): The entity tag of the selected representation.
+        """
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', entry.last_modified)
+        self.send_header('Accept-Ranges', 'bytes')
+
+        # Previews change constantly, so let browsers cache but always revalidate (cheap thanks to 304s).
+        self.send_header('Cache-Control', 'no-cache')
+        if entry.gzip_body is not None:
+            self.send_header('Vary', 'Accept-Encoding')
+
+    def is_not_modified(self, entry: StaticFile) -> bool:
+        """
+        Evaluates `If-None-Match` and `If-Modified-Since` against the file.
+
+        Args:
+            entry (StaticFile): The file being served.
+
+        Returns:
+            bool: True if the client's cached copy is still valid and a 304 should be sent.
+        """
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            if if_none_match.strip() == '*':
+                return True
+
+            # Weak comparison: strip `W/` prefixes and accept either representation's tag.
+            tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+            return entry.etag in tags or entry.gzip_etag in tags
+
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since is not None:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return entry.mtime <= since
+
+        return False
+
+    def range_applies(self, entry: StaticFile) -> bool:
+        """
+        Evaluates `If-Range`: a range is only honoured if the client's validator still matches.
+
+        Args:
+            entry (StaticFile): The file being served.
+
+        Returns:
+            bool: True if the `Range` header should be honoured.
+        """
+        if_range = self.headers.get('If-Range')
+        if if_range is None:
+            return True
+        if if_range.startswith('"'):
+            return if_range.strip() == entry.etag
+        return if_range.strip() == entry.last_modified
+
+class PreviewServer(ThreadingHTTPServer):
+    """
+    A threaded HTTP server that owns the shared `FileIndex`.
+
+    Each connection is handled in its own daemon thread, so a slow or keep-alive connection in one
+    browser tab never blocks requests from another.
+
+    Attributes:
+        file_index (FileIndex): The index of files being served.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], root: str, handler_class: type = PreviewRequestHandler):
+        """
+        Initializes the server and its file index.
+
+        Args:
+            address (Tuple[str, int]): The `(host, port)` pair to bind to.
+            root (str): The directory to serve.
+            handler_class (type, optional): The request handler class. Defaults to `PreviewRequestHandler`.
+        """
+        self.file_index = FileIndex(root)
+        super().__init__(address, handler_class)
+
+def serve(directory: str = './public', host: str = '', port: int = 8888) -> None:
+    """
+    Serves a built site until interrupted.
+
+    Args:
+        directory (str, optional): The directory to serve. Defaults to `./public`.
+        host (str, optional): The interface to bind to; the empty string binds every interface,
+            matching `python -m http.server`. Defaults to ''.
+        port (int, optional): The port to listen on. Defaults to 8888.
+
+    Returns:
+        None
+    """
+    if not os.path.isdir(directory):
+        raise ValueError(f"Directory '{directory}' does not exist. Build the site before serving it.")
+
+    with PreviewServer((host, port), directory) as server:
+        # Warm the index up front so the first page view does not pay for reading and compressing files.
+        count = server.file_index.preload()
+        print(f"Serving {count} files from {directory} at http://{host or 'localhost'}:{server.server_address[1]}/")
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print('Server stopped')
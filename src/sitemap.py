@@ -0,0 +1,254 @@
+import datetime
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+from xml.sax.saxutils import XMLGenerator
+
+from filesystem import DiskFileSystem, FileSystem
+from taxonomy import Page
+
+# The sitemap protocol allows at most 50,000 URLs per file; larger sites are split into shards.
+SITEMAP_SHARD_SIZE = 50000
+
+# The sitemap namespace, declared on the root element of every sitemap and sitemap index.
+SITEMAP_NAMESPACE = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+def lastmod_date(mtime_ns: int) -> str:
+    """
+    Converts a source's modification time to a sitemap `lastmod` date.
+
+    Args:
+        mtime_ns (int): The source's `mtime_ns`.
+
+    Returns:
+        str: The UTC date, e.g. `2024-05-01`.
+    """
+    return datetime.datetime.fromtimestamp(mtime_ns / 1e9, tz=datetime.timezone.utc).date().isoformat()
+
+class SitemapShard:
+    """
+    One sitemap file, holding a contiguous range of the site's URLs.
+
+    Attributes:
+        number (int): The shard's position, starting at 1.
+        entries (List[Tuple[str, Optional[str]]]): The URL and `lastmod` date of each page in the shard.
+        public_dir (str): The output directory the shard is written to.
+        sharded (bool): Whether the site needs more than one shard, in which case the shards are
+            numbered and `sitemap.xml` becomes the index.
+    """
+
+    def __init__(self, number: int, entries: List[Tuple[str, Optional[str]]], public_dir: str, sharded: bool):
+        """
+        Initializes a `SitemapShard`.
+
+        Args:
+            number (int): The shard's position, starting at 1.
+            entries (List[Tuple[str, Optional[str]]]): The URL and `lastmod` date of each page.
+            public_dir (str): The output directory.
+            sharded (bool): Whether the site needs more than one shard.
+        """
+        self.number = number
+        self.entries = entries
+        self.public_dir = public_dir
+        self.sharded = sharded
+
+    @property
+    def url(self) -> str:
+        """The shard's URL, e.g. `/sitemap.xml` or `/sitemap-2.xml`."""
+        return f'/sitemap-{self.number}.xml' if self.sharded else '/sitemap.xml'
+
+    @property
+    def destination(self) -> str:
+        """The path the shard is written to."""
+        return os.path.join(self.public_dir, self.url.lstrip('/'))
+
+    @property
+    def lastmod(self) -> Optional[str]:
+        """The newest `lastmod` of the shard's pages, for the sitemap index."""
+        return max((lastmod for _, lastmod in self.entries if lastmod), default=None)
+
+    def signature(self, base_url: str) -> str:
+        """
+        Returns a hash of everything the written shard depends on.
+
+        Args:
+            base_url (str): The site's absolute URL.
+
+        Returns:
+            str: The hex digest.
+        """
+        data = {'base_url': base_url, 'url': self.url, 'entries': self.entries}
+        return hashlib.sha256(json.dumps(data).encode('utf-8')).hexdigest()
+
+    def write(self, stream, base_url: str) -> None:
+        """
+        Writes the shard as a sitemap `urlset`, one element at a time.
+
+        Args:
+            stream (BinaryIO): The binary stream to write to.
+            base_url (str): The site's absolute URL, e.g. `https://example.com`.
+        """
+        base_url = base_url.rstrip('/')
+        writer = XMLGenerator(stream, encoding='utf-8')
+        writer.startDocument()
+        writer.startElement('urlset', {'xmlns': SITEMAP_NAMESPACE})
+        for url, lastmod in self.entries:
+            write_location(writer, 'url', f'{base_url}{url}', lastmod)
+        writer.endElement('urlset')
+        writer.endDocument()
+
+class SitemapIndex:
+    """
+    The `sitemap.xml` of a site too large for one sitemap, listing every shard.
+
+    Attributes:
+        shards (List[SitemapShard]): The shards, in order.
+        public_dir (str): The output directory the index is written to.
+    """
+
+    def __init__(self, shards: List[SitemapShard], public_dir: str):
+        """
+        Initializes a `SitemapIndex`.
+
+        Args:
+            shards (List[SitemapShard]): The shards, in order.
+            public_dir (str): The output directory.
+        """
+        self.shards = shards
+        self.public_dir = public_dir
+
+    @property
+    def url(self) -> str:
+        """The index's URL, which takes the place of the single sitemap."""
+        return '/sitemap.xml'
+
+    @property
+    def destination(self) -> str:
+        """The path the index is written to."""
+        return os.path.join(self.public_dir, self.url.lstrip('/'))
+
+    def signature(self, base_url: str) -> str:
+        """
+        Returns a hash of everything the written index depends on.
+
+        Args:
+            base_url (str): The site's absolute URL.
+
+        Returns:
+            str: The hex digest.
+        """
+        data = {'base_url': base_url, 'shards': [[shard.url, shard.lastmod] for shard in self.shards]}
+        return hashlib.sha256(json.dumps(data).encode('utf-8')).hexdigest()
+
+    def write(self, stream, base_url: str) -> None:
+        """
+        Writes the index as a `sitemapindex`.
+
+        Args:
+            stream (BinaryIO): The binary stream to write to.
+            base_url (str): The site's absolute URL, e.g. `https://example.com`.
+        """
+        base_url = base_url.rstrip('/')
+        writer = XMLGenerator(stream, encoding='utf-8')
+        writer.startDocument()
+        writer.startElement('sitemapindex', {'xmlns': SITEMAP_NAMESPACE})
+        for shard in self.shards:
+            write_location(writer, 'sitemap', f'{base_url}{shard.url}', shard.lastmod)
+        writer.endElement('sitemapindex')
+        writer.endDocument()
+
+def write_location(writer: XMLGenerator, name: str, location: str, lastmod: Optional[str]) -> None:
+    """
+    Writes a `<url>` or `<sitemap>` element with its `<loc>` and optional `<lastmod>`.
+
+    Args:
+        writer (XMLGenerator): The XML writer.
+        name (str): The element name.
+        location (str): The absolute URL.
+        lastmod (Optional[str]): The last modification date, or None to leave it out.
+    """
+    writer.startElement(name, {})
+    writer.startElement('loc', {})
+    writer.characters(location)
+    writer.endElement('loc')
+    if lastmod:
+        writer.startElement('lastmod', {})
+        writer.characters(lastmod)
+        writer.endElement('lastmod')
+    writer.endElement(name)
+
+def split_sitemap(pages: Iterable[Page], public_dir: str, mtimes: Dict[str, int] = None,
+                  shard_size: int = SITEMAP_SHARD_SIZE) -> List[SitemapShard]:
+    """
+    Splits the site's pages into sitemap shards.
+
+    Pages are ordered by URL so every build assigns a page to the same shard, and a change to one
+    page only changes the shard that holds it.
+
+    Args:
+        pages (Iterable[Page]): The record of every page of the site.
+        public_dir (str): The output directory.
+        mtimes (Dict[str, int], optional): The `mtime_ns` of each source, as recorded in the build
+            manifest. Pages without one have no `lastmod`. Defaults to None.
+        shard_size (int, optional): The maximum number of URLs per shard. Defaults to `SITEMAP_SHARD_SIZE`.
+
+    Returns:
+        List[SitemapShard]: The shards, in order; empty if the site has no pages.
+    """
+    mtimes = mtimes or {}
+    entries = sorted(
+        (page.url, lastmod_date(mtimes[page.source]) if page.source in mtimes else None) for page in pages
+    )
+
+    sharded = len(entries) > shard_size
+    return [
+        SitemapShard(number, entries[start:start + shard_size], public_dir, sharded)
+        for number, start in enumerate(range(0, len(entries), shard_size), start=1)
+    ]
+
+def generate_sitemaps(pages: Iterable[Page], public_dir: str, base_url: str = '', fs: FileSystem = None,
+                      mtimes: Dict[str, int] = None, previous: Dict[str, str] = None,
+                      shard_size: int = SITEMAP_SHARD_SIZE) -> Dict[str, str]:
+    """
+    Writes `sitemap.xml`, split into shards with an index when the site has too many pages.
+
+    Each file is streamed to disk element by element. Shards whose signature matches the previous
+    build's are not rewritten, so an incremental build only rewrites the shards holding changed URLs.
+
+    Args:
+        pages (Iterable[Page]): The record of every page of the site.
+        public_dir (str): The output directory.
+        base_url (str, optional): The site's absolute URL. Defaults to an empty string.
+        fs (FileSystem, optional): The filesystem to write to. Defaults to the real disk.
+        mtimes (Dict[str, int], optional): The `mtime_ns` of each source. Defaults to None.
+        previous (Dict[str, str], optional): The sitemap signatures of the previous build, keyed by
+            destination path. Defaults to None.
+        shard_size (int, optional): The maximum number of URLs per shard. Defaults to `SITEMAP_SHARD_SIZE`.
+
+    Returns:
+        Dict[str, str]: The signature of every sitemap file, keyed by destination path.
+    """
+    if fs is None:
+        fs = DiskFileSystem()
+    if previous is None:
+        previous = {}
+
+    shards = split_sitemap(pages, public_dir, mtimes, shard_size)
+    outputs = list(shards)
+    if len(shards) > 1:
+        outputs.append(SitemapIndex(shards, public_dir))
+
+    signatures: Dict[str, str] = {}
+    for output in outputs:
+        signature = output.signature(base_url)
+        signatures[output.destination] = signature
+
+        if previous.get(output.destination) == signature and fs.exists(output.destination):
+            continue
+
+        print(f"Generating sitemap {output.url}")
+        with fs.open_write(output.destination) as stream:
+            output.write(stream, base_url)
+
+    return signatures
@@ -1,7 +1,7 @@
-from typing import List
+from typing import Dict, List
 
 from enums import TextType
-from extract import extract_markdown_images, extract_markdown_links
+from extract import REFERENCE_PATTERN, extract_markdown_images, extract_markdown_links, normalize_reference_label
 from textnode import TextNode
 
 def split_nodes_delimiter(old_nodes: List[TextNode], delimiter: str) -> List[TextNode]:
@@ -216,4 +216,63 @@ def split_nodes_image(old_nodes: List[TextNode]) -> List[TextNode]:
             new_nodes.append(TextNode(current_text, TextType.TEXT))
 
     # Return the list of newly created `TextNode` objects with appropriate types.
-    return new_nodes
\ No newline at end of file
+    return new_nodes
+
+def split_nodes_reference(old_nodes: List[TextNode], references: Dict[str, str]) -> List[TextNode]:
+    """
+    Splits a list of `TextNode` objects on reference-style links and images, resolving them against
+    the document's link reference definitions.
+
+    Full (`[text][label]`), collapsed (`[text][]`) and shortcut (`[text]`) references are supported, 
+    and `!` in front of any of them makes an image. Each node's text is scanned once, and every 
+    label is resolved with a single dictionary lookup, so the cost stays linear no matter how many 
+    definitions a document has. References to undefined labels are left as plain text.
+
+    Args:
+        old_nodes (List[TextNode]): A list of `TextNode` objects to be processed.
+        references (Dict[str, str]): The URLs of the document's definitions, keyed by normalized label.
+
+    Returns:
+        List[TextNode]: A list of new `TextNode` objects in which resolved references are 
+                        `TextType.LINK` or `TextType.IMAGE` nodes.
+    """
+    # Without definitions nothing can resolve, so skip the scan entirely.
+    if not references:
+        return old_nodes
+
+    new_nodes: List[TextNode] = []
+
+    for node in old_nodes:
+
+        # Only plain text can contain references; bold, italic and code spans are kept as they are.
+        # A text without an opening bracket cannot contain one either.
+        if node.text_type != TextType.TEXT or not node.text or '[' not in node.text:
+            new_nodes.append(node)
+            continue
+
+        # `start` marks the beginning of the text not yet copied into a node.
+        start = 0
+        for match in REFERENCE_PATTERN.finditer(node.text):
+            bang, text, label = match.groups()
+
+            # Collapsed and shortcut references use the link text as their label.
+            url = references.get(normalize_reference_label(label or text))
+            if url is None:
+                continue
+
+            # Keep the text before the reference as plain text.
+            if match.start() > start:
+                new_nodes.append(TextNode(node.text[start:match.start()], TextType.TEXT))
+
+            # Images keep their alt text as the node text, so the later link and image passes keep them.
+            if bang:
+                new_nodes.append(TextNode(text, TextType.IMAGE, url, text))
+            else:
+                new_nodes.append(TextNode(text, TextType.LINK, url))
+            start = match.end()
+
+        # Add whatever follows the last resolved reference, or the whole text if none resolved.
+        if start < len(node.text):
+            new_nodes.append(TextNode(node.text[start:], TextType.TEXT) if start else node)
+
+    return new_nodes
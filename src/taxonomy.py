@@ -0,0 +1,454 @@
+import datetime
+import hashlib
+import json
+import math
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+from assets import AssetPipeline
+from build_cache import BuildCache
+from context import slugify
+from css import STYLESHEETS_SLOT, StyleInliner
+from filesystem import DiskFileSystem, FileSystem, make_dirs
+from htmlnode import LeafNode, ParentNode, escape_text, node_tags
+from template import Template
+
+# The number of pages listed on each listing page.
+DEFAULT_PAGE_SIZE = 10
+
+def json_safe(value: Any) -> Any:
+    """
+    Converts front matter values into values that round-trip through JSON.
+
+    Args:
+        value (Any): A parsed front matter value.
+
+    Returns:
+        Any: The value, with dates and times converted to ISO 8601 strings.
+    """
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {str(k): json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_safe(v) for v in value]
+    return value
+
+class Page:
+    """
+    The record of a generated page that listings, feeds and other site-wide outputs are built from.
+
+    Pages are recorded while `generate_page_recursive` renders them, so building the site-wide
+    outputs never needs a second pass over the content directory.
+
+    Attributes:
+        source (str): The path of the Markdown source.
+        destination (str): The path of the generated HTML file.
+        url (str): The page's URL, e.g. `/blog/post.html` or `/majesty/`.
+        title (str): The page title.
+        metadata (Dict[str, Any]): The page's front matter, with dates as ISO 8601 strings.
+        links (List[str]): The URLs of the other pages and files on the site that the page links to.
+        backlinks (List[List[str]]): The `[url, title]` pairs the page's "Linked from" section was
+            written with, so the build can tell when the section is out of date.
+        summary (str): The page summary as HTML, for feeds.
+        images (List[str]): The URLs of the images on this site that the page shows.
+        postings (Optional[Dict[str, List[int]]]): The positions of each word of the page, set when
+            the page was rendered by the current build and None when its record was reused. Not persisted.
+        outputs (Dict[str, str]): The signatures of the output targets the current build wrote for
+            the page, keyed by destination path; empty when its record was reused. Not persisted.
+    """
+
+    def __init__(self, source: str, destination: str, url: str, title: str, metadata: Dict[str, Any] = None,
+                 links: List[str] = None, backlinks: List[List[str]] = None, summary: str = '',
+                 images: List[str] = None):
+        """
+        Initializes a `Page`.
+
+        Args:
+            source (str): The path of the Markdown source.
+            destination (str): The path of the generated HTML file.
+            url (str): The page's URL.
+            title (str): The page title.
+            metadata (Dict[str, Any], optional): The page's front matter. Defaults to None.
+            links (List[str], optional): The internal URLs the page links to. Defaults to None.
+            backlinks (List[List[str]], optional): The linking pages the page was written with.
+                Defaults to None.
+            summary (str, optional): The page summary as HTML. Defaults to an empty string.
+            images (List[str], optional): The internal URLs of the page's images. Defaults to None.
+        """
+        self.source = source
+        self.destination = destination
+        self.url = url
+        self.title = title
+        self.metadata = json_safe(metadata or {})
+        self.links = list(links or [])
+        self.backlinks = [list(pair) for pair in backlinks or []]
+        self.summary = summary
+        self.images = list(images or [])
+        self.postings: Optional[Dict[str, List[int]]] = None
+        self.outputs: Dict[str, str] = {}
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Page) and self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"Page({self.url!r}, {self.title!r})"
+
+    @property
+    def date(self) -> Optional[str]:
+        """The page's `date` front matter field as an ISO 8601 string, or None."""
+        date = self.metadata.get('date')
+        return str(date)[:10] if date else None
+
+    @property
+    def section(self) -> Optional[str]:
+        """The top-level content directory the page belongs to, or None for pages at the root."""
+        parts = self.url.strip('/').split('/')
+        return parts[0] if len(parts) > 1 else None
+
+    def terms(self) -> Dict[str, List[str]]:
+        """
+        Returns the taxonomy terms this page is listed under.
+
+        Pages are listed under each of their `tags`, under the year of their `date` in the archive,
+        and, when dated, under their section; undated sections such as documentation keep their
+        hand-written structure.
+
+        Returns:
+            Dict[str, List[str]]: The terms keyed by taxonomy name.
+        """
+        terms: Dict[str, List[str]] = {}
+
+        tags = self.metadata.get('tags') or []
+        if isinstance(tags, str):
+            tags = [tags]
+        if tags:
+            terms['tags'] = [str(tag) for tag in tags]
+
+        if self.date:
+            terms['archive'] = [self.date[:4]]
+            if self.section:
+                terms['section'] = [self.section]
+        return terms
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the page as a JSON-serializable dictionary."""
+        return {
+            'source': self.source,
+            'destination': self.destination,
+            'url': self.url,
+            'title': self.title,
+            'metadata': self.metadata,
+            'links': self.links,
+            'backlinks': self.backlinks,
+            'summary': self.summary,
+            'images': self.images,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Page':
+        """
+        Recreates a page from `to_dict`'s output.
+
+        Args:
+            data (Dict[str, Any]): The dictionary to read.
+
+        Returns:
+            Page: The page.
+        """
+        return cls(data['source'], data['destination'], data['url'], data['title'], data.get('metadata'),
+                   data.get('links'), data.get('backlinks'), data.get('summary', ''), data.get('images'))
+
+class TaxonomyIndex:
+    """
+    An in-memory index from taxonomy term to the pages listed under it.
+
+    The index is filled from the page records gathered during the build, so finding every page with
+    a given tag is a dictionary lookup rather than a scan of the whole site.
+
+    Methods:
+        add(): Indexes a page under each of its terms.
+        taxonomies(): Returns the names of the taxonomies that have at least one term.
+        terms(): Returns the terms of a taxonomy.
+        pages(): Returns the pages listed under a term, newest first.
+    """
+
+    def __init__(self, pages: Iterable[Page] = ()):
+        """
+        Initializes the index.
+
+        Args:
+            pages (Iterable[Page], optional): The pages to index. Defaults to none.
+        """
+        self._index: Dict[str, Dict[str, Dict[str, Page]]] = {}
+        self._urls: Dict[str, Page] = {}
+        for page in pages:
+            self.add(page)
+
+    def add(self, page: Page) -> None:
+        """
+        Indexes a page under each of its terms.
+
+        Args:
+            page (Page): The page to index.
+        """
+        self._urls[page.url] = page
+        for taxonomy, terms in page.terms().items():
+            for term in terms:
+                self._index.setdefault(taxonomy, {}).setdefault(term, {})[page.url] = page
+
+    def has_url(self, url: str) -> bool:
+        """Returns True if a content page is published at `url`."""
+        return url in self._urls
+
+    def taxonomies(self) -> List[str]:
+        """Returns the names of the taxonomies that have at least one term."""
+        return sorted(self._index)
+
+    def terms(self, taxonomy: str) -> List[str]:
+        """Returns the terms of `taxonomy`, sorted."""
+        return sorted(self._index.get(taxonomy, {}))
+
+    def pages(self, taxonomy: str, term: str) -> List[Page]:
+        """
+        Returns the pages listed under a term.
+
+        Args:
+            taxonomy (str): The taxonomy, e.g. `tags`.
+            term (str): The term, e.g. `elves`.
+
+        Returns:
+            List[Page]: The pages, newest first; undated pages last, by title.
+        """
+        pages = list(self._index.get(taxonomy, {}).get(term, {}).values())
+        pages.sort(key=lambda page: page.title)
+        pages.sort(key=lambda page: page.date or '', reverse=True)
+        return pages
+
+class Listing:
+    """
+    One page of a paginated listing, such as the second page of everything tagged `elves`.
+
+    Attributes:
+        taxonomy (str): The taxonomy the listing belongs to.
+        term (str): The term being listed.
+        number (int): The 1-based page number.
+        count (int): The total number of pages in this listing.
+        pages (List[Page]): The pages shown on this page of the listing.
+        slug (str): The term's URL segment.
+        url (str): The listing page's URL.
+        destination (str): The path of the generated HTML file.
+    """
+
+    def __init__(self, taxonomy: str, term: str, number: int, count: int, pages: List[Page], public_dir: str,
+                 slug: str = None):
+        """
+        Initializes a `Listing`.
+
+        Args:
+            taxonomy (str): The taxonomy the listing belongs to.
+            term (str): The term being listed.
+            number (int): The 1-based page number.
+            count (int): The total number of pages in this listing.
+            pages (List[Page]): The pages shown on this page of the listing.
+            public_dir (str): The output directory.
+            slug (str, optional): The term's URL segment. Defaults to `term_slug(term)`.
+        """
+        self.taxonomy = taxonomy
+        self.term = term
+        self.number = number
+        self.count = count
+        self.pages = pages
+        self.slug = slug or term_slug(term)
+        self.url = listing_url(taxonomy, term, number, self.slug)
+        self.destination = os.path.join(public_dir, *self.url.strip('/').split('/'), 'index.html')
+
+    @property
+    def title(self) -> str:
+        """The listing page's title, e.g. `Tagged: elves (page 2 of 3)`."""
+        label = {'tags': 'Tagged', 'archive': 'Archive', 'section': 'Section'}.get(self.taxonomy, self.taxonomy.title())
+        title = f'{label}: {self.term}'
+        return f'{title} (page {self.number} of {self.count})' if self.count > 1 else title
+
+    def signature(self) -> str:
+        """
+        Returns a hash of everything the listing page shows.
+
+        Two builds produce the same listing page exactly when their signatures match, so an
+        incremental build regenerates a listing only when its membership, the order of its members
+        or their titles and dates changed.
+
+        Returns:
+            str: The hex digest.
+        """
+        shown = [self.title, self.number, self.count] + [[page.url, page.title, page.date] for page in self.pages]
+        return hashlib.sha256(json.dumps(shown).encode('utf-8')).hexdigest()
+
+    def to_html_node(self) -> ParentNode:
+        """
+        Builds the listing's body.
+
+        Returns:
+            ParentNode: A `<div>` with the heading, the list of pages and the pagination links.
+        """
+        items = []
+        for page in self.pages:
+            children = [LeafNode('a', page.title, {'href': page.url})]
+            if page.date:
+                children.append(LeafNode(None, ' '))
+                children.append(LeafNode('time', page.date, {'datetime': page.date}))
+            items.append(ParentNode('li', children))
+
+        children = [LeafNode('h1', self.title)]
+        if items:
+            children.append(ParentNode('ul', items))
+
+        # Newer pages come first, so "previous" points towards page 1.
+        links = []
+        if self.number > 1:
+            links.append(LeafNode('a', 'Newer', {'href': listing_url(self.taxonomy, self.term, self.number - 1, self.slug), 'rel': 'prev'}))
+        if self.number < self.count:
+            links.append(LeafNode('a', 'Older', {'href': listing_url(self.taxonomy, self.term, self.number + 1, self.slug), 'rel': 'next'}))
+        if links:
+            children.append(ParentNode('nav', links))
+
+        return ParentNode('div', children)
+
+def term_slug(term: str) -> str:
+    """
+    Returns the URL segment of a taxonomy term.
+
+    A term without any Latin letter or digit, such as `日本`, has an empty slug, so it falls back to
+    a short hash of the term, just as headings without a slug fall back to `section`; the hash
+    keeps the URL stable across builds and distinct from every other such term.
+
+    Args:
+        term (str): The term, e.g. `Middle Earth`.
+
+    Returns:
+        str: The slug, e.g. `middle-earth`, or `term-` and eight hex digits.
+    """
+    return slugify(term) or 'term-' + hashlib.sha256(term.encode('utf-8')).hexdigest()[:8]
+
+def listing_url(taxonomy: str, term: str, number: int = 1, slug: str = None) -> str:
+    """
+    Returns the URL of a listing page.
+
+    Tags and archives live under `/tags/` and `/archive/`; a section's listing is the section's
+    own index, e.g. `/blog/`. Pages after the first get a `page/N/` suffix.
+
+    Args:
+        taxonomy (str): The taxonomy, e.g. `tags`.
+        term (str): The term, e.g. `Middle Earth`.
+        number (int, optional): The 1-based page number. Defaults to 1.
+        slug (str, optional): The term's URL segment, as assigned by `paginate`. Defaults to
+            `term_slug(term)`.
+
+    Returns:
+        str: The URL, e.g. `/tags/middle-earth/page/2/`.
+    """
+    prefix = '/' if taxonomy == 'section' else f'/{taxonomy}/'
+    url = f'{prefix}{slug or term_slug(term)}/'
+    return url if number == 1 else f'{url}page/{number}/'
+
+def paginate(index: TaxonomyIndex, public_dir: str, page_size: int = DEFAULT_PAGE_SIZE) -> List[Listing]:
+    """
+    Splits every term in the index into listing pages.
+
+    Args:
+        index (TaxonomyIndex): The index to list.
+        public_dir (str): The output directory.
+        page_size (int, optional): The number of pages per listing page. Defaults to `DEFAULT_PAGE_SIZE`.
+
+    Returns:
+        List[Listing]: Every listing page of every term.
+    """
+    listings: List[Listing] = []
+    for taxonomy in index.taxonomies():
+        # Different terms can share a slug, e.g. `C++` and `C`, and would overwrite each other's
+        # listing. Terms are sorted, so the first keeps the plain slug and the others get the hash
+        # of the term appended, which stays the same from one build to the next.
+        owners: Dict[str, str] = {}
+        for term in index.terms(taxonomy):
+            slug = term_slug(term)
+            if slug in owners:
+                print(f"Listing slug '{slug}' of {taxonomy} '{term}' is already used by '{owners[slug]}'")
+                slug = f"{slug}-{hashlib.sha256(term.encode('utf-8')).hexdigest()[:8]}"
+            owners[slug] = term
+
+            # A section that has its own `index.md` keeps it; it is not replaced by a listing.
+            if taxonomy == 'section' and index.has_url(listing_url(taxonomy, term, slug=slug)):
+                continue
+
+            pages = index.pages(taxonomy, term)
+            count = max(1, math.ceil(len(pages) / page_size))
+            for number in range(1, count + 1):
+                chunk = pages[(number - 1) * page_size:number * page_size]
+                listings.append(Listing(taxonomy, term, number, count, chunk, public_dir, slug))
+    return listings
+
+def generate_listings(index: TaxonomyIndex, template_path: str, public_dir: str, cache: BuildCache = None,
+                      fs: FileSystem = None, previous: Dict[str, str] = None,
+                      page_size: int = DEFAULT_PAGE_SIZE, minify: bool = False,
+                      styles: StyleInliner = None, assets: AssetPipeline = None) -> Dict[str, str]:
+    """
+    Writes the listing pages of every taxonomy term.
+
+    With `previous` signatures from the last build, a listing page is only rewritten when its
+    signature changed or its file is missing; every other listing page is left untouched.
+
+    Args:
+        index (TaxonomyIndex): The index of the site's pages.
+        template_path (str): The HTML template.
+        public_dir (str): The output directory.
+        cache (BuildCache, optional): A cache shared between builds. Defaults to None.
+        fs (FileSystem, optional): The filesystem to write to. Defaults to the real disk.
+        previous (Dict[str, str], optional): The signatures of the last build's listing pages,
+            keyed by destination path. Defaults to None (everything is written).
+        page_size (int, optional): The number of pages per listing page. Defaults to `DEFAULT_PAGE_SIZE`.
+        minify (bool, optional): Whether to write the listing pages minified. Defaults to False.
+        styles (StyleInliner, optional): Inlines the CSS rules each listing page needs. Defaults to None.
+        assets (AssetPipeline, optional): Points the template's asset URLs at the fingerprinted
+            static files. Defaults to None.
+
+    Returns:
+        Dict[str, str]: The signature of every current listing page, keyed by destination path.
+    """
+    if fs is None:
+        fs = DiskFileSystem()
+    previous = previous or {}
+
+    listings = paginate(index, public_dir, page_size)
+    if not listings:
+        return {}
+
+    if cache is not None:
+        template = cache.template(template_path, fs, minify)
+    else:
+        template = Template(fs.read_text(template_path), minify)
+
+    signatures: Dict[str, str] = {}
+    for listing in listings:
+        signature = listing.signature()
+        signatures[listing.destination] = signature
+
+        # Skip listings whose contents are exactly what the previous build wrote.
+        if previous.get(listing.destination) == signature and fs.exists(listing.destination):
+            continue
+
+        print(f"Generating listing {listing.url}")
+        make_dirs(os.path.dirname(listing.destination), fs)
+        node = listing.to_html_node()
+        # Listings have no headings to outline and are not part of the link graph, so page-only
+        # slots are filled with nothing. Terms come from front matter, so the title is escaped like
+        # a page's, while the content is already escaped HTML.
+        slots = {'Title': escape_text(listing.title), 'Content': node.to_html(minify), 'TOC': '', 'Backlinks': ''}
+        listing_template = template
+        asset_urls = assets.urls if assets is not None else None
+        if styles is not None:
+            listing_template, slots[STYLESHEETS_SLOT] = styles.apply(template, node_tags(node), asset_urls)
+        if assets is not None:
+            listing_template = assets.compile(listing_template)
+        fs.write_text(listing.destination, listing_template.render(slots))
+
+    return signatures
@@ -0,0 +1,102 @@
+import re
+from typing import Dict, List
+
+# Placeholders look like `{{ Title }}`; the name is captured so the template can be compiled once.
+PLACEHOLDER_PATTERN = re.compile(r'\{\{ (\w+) \}\}')
+
+# A block whose contents a minified template keeps byte for byte, whitespace between two tags
+# (e.g. the indentation between `</header>` and `<main>`), or any other run of whitespace.
+MARKUP_WHITESPACE_PATTERN = re.compile(
+    r'(?P<preserved><(pre|textarea|script|style)\b.*?</\2\s*>)|(?P<between>(?<=>)\s+(?=<))|\s+',
+    re.DOTALL | re.IGNORECASE,
+)
+
+def minify_whitespace(match: re.Match) -> str:
+    """Replaces one match of `MARKUP_WHITESPACE_PATTERN`."""
+    if match.group('preserved') is not None:
+        return match.group('preserved')
+    return '' if match.group('between') is not None else ' '
+
+def minify_markup(text: str) -> str:
+    """
+    Collapses the insignificant whitespace of a piece of template markup.
+
+    Whitespace between two tags is removed and any other run of whitespace becomes a single space.
+    The contents of `<pre>`, `<textarea>`, `<script>` and `<style>` elements are left untouched.
+
+    Args:
+        text (str): Literal template text, between two placeholders.
+
+    Returns:
+        str: The minified text.
+    """
+    return MARKUP_WHITESPACE_PATTERN.sub(minify_whitespace, text)
+
+class Template:
+    """
+    An HTML template compiled into literal segments and named placeholders.
+
+    Compiling splits the template once, so rendering a page is a single join over the segments
+    instead of one full-string `replace` per placeholder. Placeholders without a value are left in
+    the output unchanged, matching the behaviour of plain string replacement.
+
+    A minified template has the whitespace of its literal segments collapsed once, when it is
+    compiled, so rendering costs nothing extra. Whitespace next to a placeholder is only collapsed,
+    never removed, since the value may be inline text.
+
+    Attributes:
+        source (str): The original template text.
+        minify (bool): Whether the literal segments were minified.
+        segments (List[str]): Literal text at even indices and placeholder names at odd indices.
+    """
+
+    def __init__(self, source: str, minify: bool = False):
+        """
+        Compiles a template.
+
+        Args:
+            source (str): The template text containing `{{ Name }}` placeholders.
+            minify (bool, optional): Whether to collapse the insignificant whitespace of the
+                literal text. Defaults to False.
+        """
+        self.source = source
+        self.minify = minify
+
+        # `re.split` with a capturing group alternates literal text and captured placeholder names.
+        self.segments: List[str] = PLACEHOLDER_PATTERN.split(source)
+
+        if minify:
+            for i in range(0, len(self.segments), 2):
+                self.segments[i] = minify_markup(self.segments[i])
+            # Only the whitespace around the whole document can be dropped outright.
+            self.segments[0] = self.segments[0].lstrip()
+            self.segments[-1] = self.segments[-1].rstrip()
+
+    @property
+    def placeholders(self) -> List[str]:
+        """
+        Lists the placeholder names used by the template, in order of appearance.
+
+        Returns:
+            List[str]: The placeholder names, e.g. `['Title', 'Content']`.
+        """
+        return self.segments[1::2]
+
+    def render(self, slots: Dict[str, str]) -> str:
+        """
+        Fills the placeholders with the given values.
+
+        Args:
+            slots (Dict[str, str]): The placeholder values keyed by name, e.g. `{'Title': 'Home'}`.
+
+        Returns:
+            str: The rendered text.
+        """
+        parts = self.segments[:]
+
+        # Only odd indices are placeholders; unknown names are written back verbatim.
+        for i in range(1, len(parts), 2):
+            name = parts[i]
+            parts[i] = slots[name] if name in slots else f'{{{{ {name} }}}}'
+
+        return ''.join(parts)
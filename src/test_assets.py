@@ -0,0 +1,129 @@
+import io
+import json
+import unittest
+from contextlib import redirect_stdout
+
+from assets import AssetPipeline, fingerprinted_name
+from css import rewrite_css_urls
+from filesystem import MemoryFileSystem
+from htmlnode import LeafNode
+from main import build_site
+from template import Template
+
+class TestAssets(unittest.TestCase):
+
+    def setUp(self):
+        """Create an in-memory static directory with an image referenced by the stylesheet."""
+        self.fs = MemoryFileSystem({
+            'static/index.css': b'body { background: url("images/bg.png"); }',
+            'static/images/bg.png': b'png',
+            'static/robots.txt': b'User-agent: *',
+        })
+        self.pipeline = AssetPipeline('static', 'public', self.fs)
+
+    def test_fingerprinted_name(self):
+        """Test that the hash goes before the extension."""
+        self.assertEqual(fingerprinted_name('index.css', '0123456789abcdef'), 'index.0123456789.css')
+
+    def test_publish(self):
+        """Test that assets are written under hashed names and well-known files keep theirs."""
+        with redirect_stdout(io.StringIO()):
+            self.pipeline.publish()
+
+        tree = self.fs.tree('public')
+        image = self.pipeline.urls['/images/bg.png']
+        self.assertIn(image.lstrip('/'), tree)
+        self.assertIn('robots.txt', tree)
+        self.assertNotIn('/robots.txt', self.pipeline.urls)
+
+        # The stylesheet is hashed after its reference was rewritten.
+        stylesheet = tree[self.pipeline.urls['/index.css'].lstrip('/')]
+        self.assertEqual(stylesheet, f'body {{ background: url("{image}"); }}'.encode())
+        self.assertEqual(json.loads(tree['asset-manifest.json']), self.pipeline.urls)
+        self.assertIn(f'{image}\n  Cache-Control: public, max-age=31536000, immutable\n', tree['_headers'].decode())
+
+    def test_rewrite_css_urls(self):
+        """Test that relative and absolute references are resolved against the stylesheet."""
+        urls = {'/images/bg.png': '/images/bg.1.png'}
+        self.assertEqual(rewrite_css_urls("a{b:url(../images/bg.png)}", '/css/site.css', urls), 'a{b:url(/images/bg.1.png)}')
+        self.assertEqual(rewrite_css_urls("a{b:url('/x.png')}", '/site.css', urls), "a{b:url('/x.png')}")
+
+    def test_serialization_rewrites_props(self):
+        """Test that image and link URLs are replaced while serializing, without changing the node."""
+        node = LeafNode('img', '', {'src': '/images/bg.png', 'alt': '/images/bg.png'})
+        urls = {'/images/bg.png': '/images/bg.1.png'}
+        self.assertEqual(node.to_html(asset_urls=urls), '<img src="/images/bg.1.png" alt="/images/bg.png"></img>')
+        self.assertEqual(node.props['src'], '/images/bg.png')
+
+    def test_template_urls(self):
+        """Test that compiled templates link to the fingerprinted files."""
+        self.pipeline.urls = {'/index.css': '/index.1.css'}
+        template = Template('<link href="/index.css" rel="stylesheet"><a href="/about">{{ Content }}</a>')
+        self.assertEqual(self.pipeline.compile(template).render({'Content': 'x'}),
+                         '<link href="/index.1.css" rel="stylesheet"><a href="/about">x</a>')
+
+class TestAssetsBuild(unittest.TestCase):
+
+    def setUp(self):
+        """Create an in-memory site whose page shows a static image."""
+        self.fs = MemoryFileSystem({
+            'static/index.css': b'img { width: 100%; }',
+            'static/images/tolkien.png': b'png',
+            'content/index.md': b'# Home\n\n![Tolkien](/images/tolkien.png)',
+            'template.html': b'<link href="/index.css" rel="stylesheet">{{ Content }}',
+        })
+
+    def build(self, fingerprint: bool = True) -> str:
+        """Runs a checked incremental build with fingerprinting and returns what it printed."""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            build_site('static', 'content', 'template.html', 'public', fs=self.fs, incremental=True,
+                       manifest_path='.cache/manifest.json', check=True, fingerprint=fingerprint)
+        return output.getvalue()
+
+    def test_pages_link_to_fingerprinted_assets(self):
+        """Test that pages reference the hashed files and the link check accepts them."""
+        self.assertIn('0 broken', self.build())
+        urls = json.loads(self.fs.read_text('public/asset-manifest.json'))
+        page = self.fs.read_text('public/index.html')
+        self.assertIn(f'<img src="{urls["/images/tolkien.png"]}"', page)
+        self.assertIn(f'<link href="{urls["/index.css"]}"', page)
+
+    def test_changed_asset_replaces_old_file(self):
+        """Test that an edited asset gets a new name, pages follow it and the old file is removed."""
+        self.build()
+        old = json.loads(self.fs.read_text('public/asset-manifest.json'))['/images/tolkien.png']
+
+        self.fs.write_bytes('static/images/tolkien.png', b'new png')
+        output = self.build()
+        new = json.loads(self.fs.read_text('public/asset-manifest.json'))['/images/tolkien.png']
+
+        self.assertNotEqual(old, new)
+        self.assertIn('Generating page from content/index.md', output)
+        self.assertIn(new, self.fs.read_text('public/index.html'))
+        self.assertNotIn(old.lstrip('/'), self.fs.tree('public'))
+
+    def test_fingerprinting_removes_plain_copies(self):
+        """Test that turning fingerprinting on or off removes the copies published under the other names."""
+        self.build(fingerprint=False)
+        self.assertIn('images/tolkien.png', self.fs.tree('public'))
+        self.build()
+        tree = self.fs.tree('public')
+        self.assertNotIn('index.css', tree)
+        self.assertNotIn('images/tolkien.png', tree)
+
+        urls = json.loads(self.fs.read_text('public/asset-manifest.json'))
+        self.build(fingerprint=False)
+        tree = self.fs.tree('public')
+        self.assertIn('index.css', tree)
+        self.assertNotIn(urls['/index.css'].lstrip('/'), tree)
+
+    def test_deleted_static_file_removed(self):
+        """Test that a static file deleted from the source is removed from the output."""
+        self.build(fingerprint=False)
+        self.fs.remove('static/index.css')
+        self.build(fingerprint=False)
+        self.assertNotIn('index.css', self.fs.tree('public'))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import io
+import os
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+
+from build_client import build_message, main as client_main, send_request
+from build_daemon import BuildDaemon
+from test_image_size import png
+
+class TestBuildDaemon(unittest.TestCase):
+
+    def setUp(self):
+        """Create a small site and start a daemon on a temporary socket."""
+        self.test_dir = tempfile.TemporaryDirectory()
+        root = self.test_dir.name
+
+        self.static = os.path.join(root, 'static')
+        self.content = os.path.join(root, 'content')
+        self.public = os.path.join(root, 'public')
+        self.template = os.path.join(root, 'template.html')
+        os.mkdir(self.static)
+        os.mkdir(self.content)
+
+        with open(os.path.join(self.static, 'index.css'), 'w') as f:
+            f.write('body {}')
+        with open(os.path.join(self.content, 'index.md'), 'w') as f:
+            f.write('# Home\n\nWelcome.')
+        with open(self.template, 'w') as f:
+            f.write('<title>{{ Title }}</title>{{ Content }}')
+
+        self.socket_path = os.path.join(root, 'daemon.sock')
+        self.daemon = BuildDaemon(self.socket_path)
+        self.thread = threading.Thread(target=self.daemon.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        """Stop the daemon and clean up temporary files."""
+        self.daemon.shutdown()
+        self.daemon.server_close()
+        self.test_dir.cleanup()
+
+    def build_request(self):
+        """Helper returning a build request for the temporary site."""
+        return {'command': 'build', 'static': self.static, 'content': self.content,
+                'template': self.template, 'public': self.public}
+
+    def test_build_reuses_cache(self):
+        """Test that a second build is served from the daemon's warm render cache."""
+        with redirect_stdout(io.StringIO()):
+            first = send_request(self.build_request(), self.socket_path)
+            second = send_request(self.build_request(), self.socket_path)
+        self.assertTrue(first['ok'])
+        self.assertEqual(second['pages'], 1)
+        self.assertTrue(os.path.exists(os.path.join(self.public, 'index.html')))
+
+        status = send_request({'command': 'status'}, self.socket_path)
+        self.assertEqual(status['builds'], 2)
+        # Each build looks the page up for its links and again to write it; only the first lookup parses.
+        self.assertEqual(status['cache']['misses'], 1)
+        self.assertEqual(status['cache']['hits'], 3)
+
+    def test_build_options_forwarded(self):
+        """Test that a build request takes the same options as `main.py build`."""
+        request = {**self.build_request(), 'minify': True, 'fragments': True, 'highlight': False,
+                   'manifest_path': os.path.join(self.test_dir.name, 'manifest.json'), 'incremental': True}
+        with redirect_stdout(io.StringIO()):
+            self.assertTrue(send_request(request, self.socket_path)['ok'])
+        self.assertTrue(os.path.exists(os.path.join(self.public, 'index.fragment.json')))
+        self.assertTrue(os.path.exists(os.path.join(self.test_dir.name, 'manifest.json')))
+        with open(os.path.join(self.public, 'index.html')) as f:
+            self.assertIn('<h1 id=home>Home</h1><p>Welcome.</div>', f.read())
+
+    def test_build_message(self):
+        """Test that the client turns `build` options into a request with absolute paths."""
+        message = build_message(['--minify', '--no-highlight', '--public', 'out', '--print-template', 'print.html'])
+        self.assertEqual(message['public'], os.path.abspath('out'))
+        self.assertEqual(message['content'], os.path.abspath('content'))
+        self.assertEqual(message['print_template'], os.path.abspath('print.html'))
+        self.assertEqual(message['manifest_path'], os.path.abspath('.cache/build-manifest.json'))
+        self.assertTrue(message['minify'])
+        self.assertFalse(message['highlight'])
+        with self.assertRaises(ValueError):
+            build_message(['--verbose'])
+
+    def test_render(self):
+        """Test rendering a single file with and without a template."""
+        path = os.path.join(self.content, 'index.md')
+        response = send_request({'command': 'render', 'path': path}, self.socket_path)
+        self.assertEqual(response['html'], '<div><h1 id="home">Home</h1><p>Welcome.</p></div>')
+
+        response = send_request({'command': 'render', 'path': path, 'template': self.template}, self.socket_path)
+        self.assertEqual(response['html'], '<title>Home</title><div><h1 id="home">Home</h1><p>Welcome.</p></div>')
+
+        response = send_request({'command': 'render', 'path': path + '.missing'}, self.socket_path)
+        self.assertFalse(response['ok'])
+
+    def test_render_matches_build(self):
+        """Test that a render highlights code and sizes images as a build does, and shares its cache entry."""
+        with open(os.path.join(self.static, 'dot.png'), 'wb') as f:
+            f.write(png(3, 2))
+        path = os.path.join(self.content, 'index.md')
+        with open(path, 'w') as f:
+            f.write('# Home\n\n![Dot](/dot.png)\n\n```python\nx = 1\n```')
+
+        with redirect_stdout(io.StringIO()):
+            send_request(self.build_request(), self.socket_path)
+        response = send_request({'command': 'render', 'path': path, 'static': self.static}, self.socket_path)
+        with open(os.path.join(self.public, 'index.html')) as f:
+            self.assertEqual(f.read(), f"<title>Home</title>{response['html']}")
+        self.assertIn('width="3" height="2"', response['html'])
+
+        status = send_request({'command': 'status'}, self.socket_path)
+        self.assertEqual(status['cache']['misses'], 1)
+
+    def test_client_falls_back_in_process(self):
+        """Test that the client renders in-process when no daemon is listening."""
+        output = io.StringIO()
+        missing_socket = os.path.join(self.test_dir.name, 'missing.sock')
+        with redirect_stdout(output):
+            status = client_main(['--socket', missing_socket, 'render', os.path.join(self.content, 'index.md')])
+        self.assertEqual(status, 0)
+        self.assertIn('<h1 id="home">Home</h1>', output.getvalue())
+
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(client_main(['--socket', missing_socket, 'status']), 1)
+
+if __name__ == "__main__":
+    unittest.main()
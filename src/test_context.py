@@ -0,0 +1,55 @@
+import unittest
+
+from context import Heading, RenderContext, slugify
+from document import Document
+from generate_page import render_page
+from markdown_to_html_node import markdown_to_html_node
+
+class TestRenderContext(unittest.TestCase):
+
+    def test_slugify(self):
+        """Test that text is reduced to lowercase words joined by hyphens."""
+        self.assertEqual(slugify('Hello, *World*!'), 'hello-world')
+        self.assertEqual(slugify('  Über  '), 'ber')
+
+    def test_unique_ids(self):
+        """Test that repeated headings get numbered IDs, even when a heading already uses the suffix."""
+        context = RenderContext()
+        ids = [context.unique_id(text) for text in ('Usage', 'Usage', 'Usage 1', 'Usage', '???')]
+        self.assertEqual(ids, ['usage', 'usage-1', 'usage-1-1', 'usage-2', 'section'])
+
+    def test_heading_ids_and_outline(self):
+        """Test that headings get IDs and are outlined while the tree is built."""
+        context = RenderContext()
+        html = markdown_to_html_node("# Title\n\n## Install **now**\n\nText.\n\n## Install now", context).to_html()
+        self.assertEqual(
+            html,
+            '<div><h1 id="title">Title</h1><h2 id="install-now">Install <b>now</b></h2>'
+            '<p>Text.</p><h2 id="install-now-1">Install now</h2></div>',
+        )
+        self.assertEqual(context.outline, [
+            Heading(1, 'Title', 'title'),
+            Heading(2, 'Install now', 'install-now'),
+            Heading(2, 'Install now', 'install-now-1'),
+        ])
+
+    def test_toc_nesting(self):
+        """Test that the table of contents nests deeper headings under their parent."""
+        document = Document("# Title\n\n## A\n\n### A.1\n\n#### A.1.a\n\n## B")
+        self.assertEqual(
+            document.toc,
+            '<ul><li><a href="#a">A</a><ul><li><a href="#a-1">A.1</a><ul><li><a href="#a-1-a">A.1.a</a></li></ul>'
+            '</li></ul></li><li><a href="#b">B</a></li></ul>',
+        )
+
+    def test_toc_empty(self):
+        """Test that a page without subheadings has an empty table of contents."""
+        self.assertEqual(Document('# Title\n\nText.').toc, '')
+
+    def test_toc_slot(self):
+        """Test that the table of contents fills the `{{ TOC }}` template slot."""
+        page = render_page('# Title\n\n## Part', '<nav>{{ TOC }}</nav>{{ Content }}')
+        self.assertTrue(page.startswith('<nav><ul><li><a href="#part">Part</a></li></ul></nav>'))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+
+from css import Stylesheet, StyleInliner, minify_css, parse_rules, selector_tags
+from filesystem import MemoryFileSystem
+from main import build_site
+from template import Template
+
+STYLESHEET = '''
+/* Layout */
+body { margin : 0; font-family: "Segoe  UI", sans-serif; }
+h1, h2 { color: #58a6ff; }
+pre code { padding: 0; }
+a:hover { text-decoration: underline; }
+.backlinks { border-top: 1px solid; }
+@media (max-width: 600px) {
+    img { max-width: 100%; }
+    p { margin: 0; }
+}
+'''
+
+class TestCss(unittest.TestCase):
+
+    def test_minify(self):
+        """Test that comments and whitespace are removed but strings are kept."""
+        self.assertEqual(
+            minify_css('a /* x */ , b > c { content: "a  b" ; margin: 0 ; }'),
+            'a,b>c{content:"a  b";margin:0}',
+        )
+
+    def test_parse_rules(self):
+        """Test that conditional at-rules are parsed into their inner rules."""
+        rules = parse_rules(minify_css('@import url(x.css); a { b: c } @media print { p { d: e } }'))
+        self.assertEqual([rule.prelude for rule in rules], ['@import url(x.css);', 'a', '@media print'])
+        self.assertEqual(rules[2].children[0].body, 'd:e')
+
+    def test_selector_tags(self):
+        """Test that only type selectors outside arguments are required."""
+        self.assertEqual(selector_tags('pre code'), {'pre', 'code'})
+        self.assertEqual(selector_tags(':not(pre)>code.inline[data-x="a b"]:hover'), {'code'})
+        self.assertEqual(selector_tags('.backlinks'), set())
+
+    def test_critical(self):
+        """Test that only the rules and selectors matching the page's elements are kept."""
+        stylesheet = Stylesheet(STYLESHEET)
+        self.assertEqual(
+            stylesheet.critical({'body', 'h1', 'p', 'a'}),
+            'body{margin :0;font-family:"Segoe  UI",sans-serif}h1{color:#58a6ff}a:hover{text-decoration:underline}'
+            '.backlinks{border-top:1px solid}@media (max-width:600px){p{margin:0}}',
+        )
+
+    def test_template_links_replaced(self):
+        """Test that local stylesheet links become the slot and other links are kept."""
+        fs = MemoryFileSystem({'static/index.css': STYLESHEET.encode()})
+        styles = StyleInliner('static', fs)
+        template = Template('<head><link href="/index.css" rel="stylesheet"><link rel="icon" href="/x.ico">'
+                            '</head><body>{{ Content }}</body>')
+
+        compiled, html = styles.apply(template, {'p'})
+        self.assertEqual(compiled.placeholders, ['Stylesheets', 'Content'])
+        self.assertTrue(html.startswith('<style>body{'))
+        self.assertIn('<link rel="preload" href="/index.css" as="style"', html)
+        self.assertIs(styles.apply(template, {'p'})[0], compiled)
+
+class TestCssBuild(unittest.TestCase):
+
+    def setUp(self):
+        """Create an in-memory site with one stylesheet."""
+        self.fs = MemoryFileSystem({
+            'static/index.css': STYLESHEET.encode(),
+            'content/index.md': b'# Home\n\n```\ncode\n```',
+            'template.html': b'<head><link href="/index.css" rel="stylesheet"></head>{{ Content }}',
+        })
+
+    def build(self) -> str:
+        """Runs an incremental build with critical CSS and returns what it printed."""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            build_site('static', 'content', 'template.html', 'public', fs=self.fs, incremental=True,
+                       manifest_path='.cache/manifest.json', critical_css=True)
+        return output.getvalue()
+
+    def test_pages_inline_critical_css(self):
+        """Test that pages carry their critical rules and the stylesheet is minified."""
+        self.build()
+        page = self.fs.read_text('public/index.html')
+        self.assertIn('pre code{padding:0}', page)
+        self.assertNotIn('img{', page)
+        self.assertEqual(self.fs.read_text('public/index.css'), minify_css(STYLESHEET))
+
+    def test_stylesheet_change_rebuilds_pages(self):
+        """Test that editing the stylesheet regenerates the pages that inline it."""
+        self.build()
+        self.assertNotIn('Generating page', self.build())
+
+        self.fs.write_text('static/index.css', STYLESHEET + 'pre { color: red; }')
+        output = self.build()
+        self.assertIn('Generating page from content/index.md', output)
+        self.assertIn('pre{color:red}', self.fs.read_text('public/index.html'))
+
+if __name__ == "__main__":
+    unittest.main()
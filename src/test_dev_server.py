@@ -0,0 +1,127 @@
+import http.client
+import io
+import os
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+
+from dev_server import DevRequestHandler, DevServer, RouteIndex
+from main import build_site
+from test_image_size import png
+
+class QuietHandler(DevRequestHandler):
+    """Request handler that keeps the per-request access log out of the test output."""
+
+    def log_message(self, format, *args):
+        pass
+
+class TestDevServer(unittest.TestCase):
+
+    def setUp(self):
+        """Create a small content tree, template and static directory and start a dev server."""
+        self.test_dir = tempfile.TemporaryDirectory()
+        root = self.test_dir.name
+
+        self.content_dir = os.path.join(root, 'content')
+        self.static_dir = os.path.join(root, 'static')
+        os.makedirs(os.path.join(self.content_dir, 'majesty'))
+        os.makedirs(self.static_dir)
+
+        self.write(os.path.join(self.content_dir, 'index.md'), '# Home\n\nWelcome home.')
+        self.write(os.path.join(self.content_dir, 'majesty', 'index.md'), '# Majesty\n\nA post.')
+        self.write(os.path.join(self.content_dir, 'broken.md'), 'No heading here.')
+        self.write(os.path.join(self.static_dir, 'index.css'), 'body { color: red; }')
+
+        self.template_path = os.path.join(root, 'template.html')
+        self.write(self.template_path, '<title>{{ Title }}</title>{{ Content }}')
+
+        self.server = DevServer(('127.0.0.1', 0), self.content_dir, self.template_path, self.static_dir, QuietHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        """Stop the server and clean up temporary files."""
+        self.server.shutdown()
+        self.server.server_close()
+        self.test_dir.cleanup()
+
+    def write(self, path, text, mtime=None):
+        """Helper that writes a file and optionally pins its modification time."""
+        with open(path, 'w') as f:
+            f.write(text)
+        if mtime is not None:
+            os.utime(path, ns=(mtime, mtime))
+
+    def request(self, path):
+        """Helper that performs a GET request and returns the response and its body."""
+        connection = http.client.HTTPConnection('127.0.0.1', self.server.server_address[1])
+        connection.request('GET', path)
+        response = connection.getresponse()
+        body = response.read()
+        connection.close()
+        return response, body
+
+    def test_renders_on_demand(self):
+        """Test that pages are rendered from Markdown and static files are served alongside them."""
+        response, body = self.request('/majesty/')
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, b'<title>Majesty</title><div><h1 id="majesty">Majesty</h1><p>A post.</p></div>')
+
+        _, body = self.request('/index.html')
+        self.assertIn(b'<h1 id="home">Home</h1>', body)
+
+        _, body = self.request('/index.css')
+        self.assertEqual(body, b'body { color: red; }')
+
+        response, _ = self.request('/majesty')
+        self.assertEqual(response.status, 301)
+
+        # Nothing is ever written next to the sources.
+        self.assertFalse(os.path.exists(os.path.join(self.test_dir.name, 'public')))
+
+    def test_cache_invalidation(self):
+        """Test that cached pages are reused until the source or the template changes."""
+        source = os.path.join(self.content_dir, 'index.md')
+        first = self.server.page_cache.get(source)
+        self.assertIs(self.server.page_cache.get(source), first)
+
+        self.write(source, '# Home\n\nEdited.', mtime=os.stat(source).st_mtime_ns + 1_000_000_000)
+        second = self.server.page_cache.get(source)
+        self.assertIn(b'Edited.', second.file.body)
+
+        self.write(self.template_path, '<h2>{{ Title }}</h2>{{ Content }}', mtime=os.stat(self.template_path).st_mtime_ns + 1_000_000_000)
+        self.assertTrue(self.server.page_cache.get(source).file.body.startswith(b'<h2>Home</h2>'))
+
+    def test_matches_build(self):
+        """Test that the preview highlights code and sizes images exactly like a build."""
+        with open(os.path.join(self.static_dir, 'map.png'), 'wb') as f:
+            f.write(png(64, 32))
+        self.write(os.path.join(self.content_dir, 'code.md'),
+                   '# Code\n\n![Map](/map.png)\n\n```python\nreturn None\n```')
+
+        _, body = self.request('/code.html')
+        self.assertIn(b'<span class="k">return</span>', body)
+        self.assertIn(b'width="64" height="32"', body)
+
+        public = os.path.join(self.test_dir.name, 'public')
+        with redirect_stdout(io.StringIO()):
+            build_site(self.static_dir, self.content_dir, self.template_path, public)
+        with open(os.path.join(public, 'code.html'), 'rb') as f:
+            self.assertEqual(body, f.read())
+
+    def test_render_error(self):
+        """Test that a page that cannot be rendered produces a 500 response."""
+        response, _ = self.request('/broken.html')
+        self.assertEqual(response.status, 500)
+
+    def test_route_index(self):
+        """Test the URL to source mapping."""
+        routes = RouteIndex(self.content_dir)
+        self.assertEqual(routes.resolve('/'), os.path.join(self.content_dir, 'index.md'))
+        self.assertEqual(routes.resolve('/majesty/'), os.path.join(self.content_dir, 'majesty', 'index.md'))
+        self.assertIsNone(routes.resolve('/nope/'))
+        self.assertIsNone(routes.resolve('/index.css'))
+
+if __name__ == "__main__":
+    unittest.main()
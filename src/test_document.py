@@ -0,0 +1,105 @@
+import datetime
+import os
+import tempfile
+import unittest
+
+from document import Document, parse_yaml_lite, read_metadata, split_front_matter
+from enums import BlockType
+from filesystem import MemoryFileSystem
+from markdown_to_html_node import markdown_to_html_node
+
+class TestDocument(unittest.TestCase):
+
+    def test_single_parse(self):
+        """Test that the blocks, title and body all come from one parse."""
+        document = Document("# Hello *world*\n\nA paragraph.\n\n* one\n* two")
+        self.assertEqual(document.title, 'Hello world')
+        self.assertEqual(document.block_types, [BlockType.H1, BlockType.PARAGRAPH, BlockType.LIST_UNORDERED])
+        self.assertEqual(document.body, markdown_to_html_node(document.source).to_html())
+
+    def test_title_from_later_heading(self):
+        """Test that the title comes from the first H1 block, even if it is not the first block."""
+        document = Document("## Intro\n\n# Real title\n\n# Second")
+        self.assertEqual(document.title, 'Real title')
+
+    def test_title_plain_text(self):
+        """Test that the title is the heading's text without its inline Markdown."""
+        document = Document("# The **Fellowship** of [the Ring](/ring.html)\n\nText")
+        self.assertEqual(document.title, 'The Fellowship of the Ring')
+
+    def test_line_break_marker_in_front_matter(self):
+        """Test that the internal line break marker is removed from front matter values too."""
+        document = Document("---\ntitle: A\ufdd0B\n---\nText")
+        self.assertEqual(document.title, 'AB')
+
+    def test_yaml_front_matter(self):
+        """Test that YAML-lite front matter is parsed and stripped from the body."""
+        document = Document(
+            "---\ntitle: \"Ignored: H1 wins\"\ndate: 2024-05-01\ndraft: false\ntags: [elves, rings]\n"
+            "authors:\n  - Tolkien\n  - Tolkien, Christopher\n---\n# Page\n\nText."
+        )
+        self.assertEqual(document.metadata, {
+            'title': 'Ignored: H1 wins',
+            'date': datetime.date(2024, 5, 1),
+            'draft': False,
+            'tags': ['elves', 'rings'],
+            'authors': ['Tolkien', 'Tolkien, Christopher'],
+        })
+        self.assertEqual(document.title, 'Page')
+        self.assertEqual(document.body, '<div><h1 id="page">Page</h1><p>Text.</p></div>')
+
+    def test_toml_front_matter(self):
+        """Test that TOML front matter is parsed with tomllib and supplies a fallback title."""
+        document = Document('+++\ntitle = "From TOML"\nweight = 3\n+++\nNo heading here.')
+        self.assertEqual(document.metadata, {'title': 'From TOML', 'weight': 3})
+        self.assertEqual(document.title, 'From TOML')
+
+    def test_front_matter_only(self):
+        """Test that a document with only front matter has no blocks."""
+        document = Document('---\ntitle: Empty\n---\n')
+        self.assertEqual(document.blocks, [])
+        self.assertEqual(document.body, '<div></div>')
+
+    def test_invalid_front_matter(self):
+        """Test that unclosed or malformed front matter is reported."""
+        with self.assertRaises(ValueError):
+            split_front_matter('---\ntitle: x\n# Heading')
+        with self.assertRaises(ValueError):
+            parse_yaml_lite('just some text')
+        with self.assertRaises(ValueError):
+            Document('+++\ntitle = \n+++\n# Heading')
+
+    def test_no_front_matter(self):
+        """Test that a document without front matter is left untouched."""
+        self.assertEqual(split_front_matter('# Title\n\nBody'), ({}, '# Title\n\nBody'))
+
+    def test_read_metadata_on_disk(self):
+        """Test that the metadata fast path reads a file from disk."""
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, 'page.md')
+            with open(path, 'w') as f:
+                f.write('---\ntags: [a]\n---\n# Title\n\n' + 'x' * 10000)
+            self.assertEqual(read_metadata(path), {'tags': ['a']})
+
+    def test_read_metadata_stops_after_front_matter(self):
+        """Test that the fast path does not read past the closing delimiter."""
+        consumed = []
+
+        class TrackingFileSystem(MemoryFileSystem):
+            def iter_lines(self, path):
+                for line in super().iter_lines(path):
+                    consumed.append(line)
+                    yield line
+
+        fs = TrackingFileSystem({'page.md': b'---\ndate: 2024-01-02\n---\n# Title\n\nBody'})
+        self.assertEqual(read_metadata('page.md', fs), {'date': datetime.date(2024, 1, 2)})
+        self.assertEqual(len(consumed), 3)
+
+        # Without front matter only the first line is read.
+        consumed.clear()
+        fs.write_text('plain.md', '# Title\n\nBody')
+        self.assertEqual(read_metadata('plain.md', fs), {})
+        self.assertEqual(len(consumed), 1)
+
+if __name__ == "__main__":
+    unittest.main()
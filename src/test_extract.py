@@ -1,6 +1,6 @@
 import unittest
 
-from extract import extract_markdown_images, extract_markdown_links
+from extract import extract_markdown_images, extract_markdown_links, extract_reference_definition
 
 class TestExtract(unittest.TestCase):
 
@@ -24,5 +24,12 @@ class TestExtract(unittest.TestCase):
         # Use assertEqual to check if the extracted URLs match the expected output
         self.assertEqual(extract_markdown_links(input_text), expected_output)
 
+    def test_reference_definition(self):
+        """Test parsing link reference definition lines."""
+        self.assertEqual(extract_reference_definition('[Boot  Dev]: https://www.boot.dev'), ('boot dev', 'https://www.boot.dev'))
+        self.assertEqual(extract_reference_definition('   [a]: <./a.html> "Title"'), ('a', './a.html'))
+        self.assertIsNone(extract_reference_definition('[a] is not a definition'))
+        self.assertIsNone(extract_reference_definition('[a]: url trailing words'))
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,102 @@
+import io
+import unittest
+import xml.etree.ElementTree as ElementTree
+from contextlib import redirect_stdout
+
+from feeds import ATOM_NAMESPACE, collect_feeds
+from filesystem import MemoryFileSystem
+from main import build_site
+from taxonomy import Page
+
+def make_post(name: str, date: str, summary: str = '') -> Page:
+    """Creates the record of a dated blog post."""
+    return Page(f'content/blog/{name}.md', f'public/blog/{name}.html', f'/blog/{name}.html', name.title(),
+                {'date': date}, summary=summary)
+
+class TestFeeds(unittest.TestCase):
+
+    def test_top_entries_newest_first(self):
+        """Test that each feed keeps only its most recent entries, newest first."""
+        posts = [make_post(f'post{day}', f'2024-01-{day:02}') for day in (5, 1, 9, 3, 7)]
+        feeds = collect_feeds(posts, 'public', size=3)
+
+        self.assertEqual([feed.url for feed in feeds], ['/feed.xml', '/blog/feed.xml'])
+        self.assertEqual([page.url for page in feeds[0].entries],
+                         ['/blog/post9.html', '/blog/post7.html', '/blog/post5.html'])
+        self.assertEqual(feeds[0].updated, '2024-01-09T00:00:00Z')
+
+    def test_undated_pages_excluded(self):
+        """Test that a site without dated pages has no feeds."""
+        self.assertEqual(collect_feeds([Page('content/index.md', 'public/index.html', '/', 'Home')], 'public'), [])
+
+    def test_atom_output(self):
+        """Test that the feed is well-formed Atom with absolute links and escaped HTML summaries."""
+        feed = collect_feeds([make_post('one', '2024-01-01', '<p>Fish & chips</p>')], 'public')[0]
+        stream = io.BytesIO()
+        feed.write(stream, 'https://example.com/')
+
+        root = ElementTree.fromstring(stream.getvalue())
+        entry = root.find(f'{{{ATOM_NAMESPACE}}}entry')
+        self.assertEqual(entry.find(f'{{{ATOM_NAMESPACE}}}id').text, 'https://example.com/blog/one.html')
+        self.assertEqual(entry.find(f'{{{ATOM_NAMESPACE}}}summary').text, '<p>Fish & chips</p>')
+        self.assertIn(b'&lt;p&gt;Fish &amp; chips&lt;/p&gt;', stream.getvalue())
+
+    def test_signature_tracks_contents(self):
+        """Test that the signature changes with an entry's summary but not with unrelated pages."""
+        post = make_post('one', '2024-01-01', '<p>First</p>')
+        before = collect_feeds([post], 'public')[0].signature('')
+
+        undated = Page('content/about.md', 'public/about.html', '/about.html', 'About')
+        self.assertEqual(collect_feeds([post, undated], 'public')[0].signature(''), before)
+
+        post.summary = '<p>Changed</p>'
+        self.assertNotEqual(collect_feeds([post], 'public')[0].signature(''), before)
+
+class TestFeedBuild(unittest.TestCase):
+
+    def setUp(self):
+        """Create an in-memory site with dated posts."""
+        self.fs = MemoryFileSystem({
+            'static/index.css': b'body {}',
+            'content/index.md': b'# Home',
+            'content/blog/one.md': b'---\ndate: 2024-01-01\n---\n# One\n\nThe first post.',
+            'content/blog/two.md': b'---\ndate: 2024-02-01\nsummary: Second\n---\n# Two',
+            'template.html': b'<title>{{ Title }}</title>{{ Content }}',
+        })
+
+    def build(self) -> str:
+        """Runs an incremental build and returns what it printed."""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            build_site('static', 'content', 'template.html', 'public', fs=self.fs, incremental=True,
+                       manifest_path='.cache/manifest.json', base_url='https://example.com')
+        return output.getvalue()
+
+    def test_feeds_written(self):
+        """Test that the site and section feeds are written with the page summaries."""
+        self.build()
+        tree = self.fs.tree('public')
+        self.assertIn(b'<title>Home</title>', tree['feed.xml'])
+        self.assertIn(b'&lt;p&gt;The first post.&lt;/p&gt;', tree['blog/feed.xml'])
+        self.assertIn(b'<summary type="html">Second</summary>', tree['blog/feed.xml'])
+
+    def test_feeds_rewritten_only_on_change(self):
+        """Test that feeds are skipped when nothing changed and rewritten when an entry changes."""
+        self.build()
+        self.assertNotIn('Generating feed', self.build())
+
+        self.fs.write_text('content/blog/one.md', '---\ndate: 2024-01-01\n---\n# One\n\nEdited.')
+        output = self.build()
+        self.assertIn('Generating feed /feed.xml', output)
+        self.assertIn('Generating feed /blog/feed.xml', output)
+
+    def test_deleted_feed_removed(self):
+        """Test that a feed is removed once no page is dated."""
+        self.build()
+        self.fs.remove('content/blog/one.md')
+        self.fs.remove('content/blog/two.md')
+        self.build()
+        self.assertNotIn('feed.xml', self.fs.tree('public'))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from filesystem import DiskFileSystem, MemoryFileSystem, make_dirs
+from main import build_site, build_to_memory
+
+def site_files(tree: dict) -> dict:
+    """Leaves out the sitemap and search index, which the site-wide output tests cover."""
+    return {path: data for path, data in tree.items() if path != 'sitemap.xml' and not path.startswith('search/')}
+
+class TestFileSystem(unittest.TestCase):
+
+    def test_memory_operations(self):
+        """Test basic file and directory operations on the in-memory backend."""
+        fs = MemoryFileSystem({'site/a.txt': b'a'})
+        self.assertTrue(fs.isdir('./site/'))
+        self.assertTrue(fs.isfile('site/a.txt'))
+        self.assertEqual(fs.listdir('site'), ['a.txt'])
+
+        fs.mkdir('site/sub')
+        fs.write_text('site/sub/b.txt', 'b')
+        fs.copy('site/a.txt', 'site/sub/c.txt')
+        self.assertEqual(fs.listdir('site/sub'), ['b.txt', 'c.txt'])
+        self.assertEqual(fs.tree('site'), {'a.txt': b'a', 'sub/b.txt': b'b', 'sub/c.txt': b'a'})
+
+        with self.assertRaises(OSError):
+            fs.rmdir('site/sub')
+        with self.assertRaises(FileNotFoundError):
+            fs.read_bytes('site/missing.txt')
+
+        # Every change produces a new modification time for the file and its directory.
+        before = fs.mtime_ns('site/sub')
+        fs.remove('site/sub/b.txt')
+        self.assertGreater(fs.mtime_ns('site/sub'), before)
+
+        # A deleted path has no modification time, just like on disk.
+        with self.assertRaises(FileNotFoundError):
+            fs.mtime_ns('site/sub/b.txt')
+        fs.remove('site/sub/c.txt')
+        fs.rmdir('site/sub')
+        with self.assertRaises(FileNotFoundError):
+            fs.mtime_ns('site/sub')
+
+    def test_make_dirs(self):
+        """Test that missing parents are created and existing directories are left alone."""
+        fs = MemoryFileSystem({'site/a.txt': b'a'})
+        make_dirs('site/x/y', fs)
+        make_dirs('site/x/y', fs)
+        self.assertTrue(fs.isdir('site/x/y'))
+        self.assertEqual(fs.listdir('site'), ['a.txt', 'x'])
+
+    def test_overlay(self):
+        """Test that an overlay reads through to its base but never writes to it."""
+        with tempfile.TemporaryDirectory() as root:
+            with open(os.path.join(root, 'on-disk.txt'), 'w') as f:
+                f.write('disk')
+
+            fs = MemoryFileSystem(base=DiskFileSystem())
+            self.assertEqual(fs.read_text(os.path.join(root, 'on-disk.txt')), 'disk')
+
+            fs.write_text(os.path.join(root, 'in-memory.txt'), 'memory')
+            fs.remove(os.path.join(root, 'on-disk.txt'))
+            self.assertEqual(fs.listdir(root), ['in-memory.txt'])
+
+            # The disk is untouched.
+            self.assertEqual(os.listdir(root), ['on-disk.txt'])
+
+            # A copy made in memory is newer than its source on disk, so it is not copied again.
+            source = os.path.join(root, 'source.txt')
+            with open(source, 'w') as f:
+                f.write('source')
+            fs.copy(source, os.path.join(root, 'copy.txt'))
+            self.assertGreater(fs.mtime_ns(os.path.join(root, 'copy.txt')), fs.mtime_ns(source))
+
+    def test_build_in_memory(self):
+        """Test building a whole site from in-memory sources into a dictionary."""
+        fs = MemoryFileSystem({
+            'static/index.css': b'body {}',
+            'content/index.md': b'# Home\n\nWelcome.',
+            'content/blog/post.md': b'# Post\n\nHello.',
+            'template.html': b'<title>{{ Title }}</title>{{ Content }}',
+        })
+        with redirect_stdout(io.StringIO()):
+            pages = build_site('static', 'content', 'template.html', 'public', fs=fs)
+
+        self.assertEqual(sorted(pages), ['public/blog/post.html', 'public/index.html'])
+        tree = fs.tree('public')
+        self.assertIn(b'<loc>/blog/post.html</loc>', tree.pop('sitemap.xml'))
+        self.assertIn(b'"hello":[[', tree['search/all.json'])
+        self.assertEqual(site_files(tree), {
+            'blog/post.html': b'<title>Post</title><div><h1 id="post">Post</h1><p>Hello.</p></div>',
+            'index.css': b'body {}',
+            'index.html': b'<title>Home</title><div><h1 id="home">Home</h1><p>Welcome.</p></div>',
+        })
+
+    def test_build_to_memory_from_disk(self):
+        """Test that `build_to_memory` reads real sources and writes nothing to disk."""
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(os.path.join(root, 'static'))
+            os.makedirs(os.path.join(root, 'content'))
+            with open(os.path.join(root, 'content', 'index.md'), 'w') as f:
+                f.write('# Home')
+            with open(os.path.join(root, 'template.html'), 'w') as f:
+                f.write('{{ Content }}')
+
+            public_existed = os.path.exists('./public')
+            with redirect_stdout(io.StringIO()):
+                files = build_to_memory(os.path.join(root, 'static'), os.path.join(root, 'content'),
+                                        os.path.join(root, 'template.html'))
+            self.assertIn(b'<loc>/</loc>', files['sitemap.xml'])
+            self.assertEqual(site_files(files), {'index.html': b'<div><h1 id="home">Home</h1></div>'})
+            self.assertEqual(os.path.exists('./public'), public_existed)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import io
+import json
+import unittest
+from contextlib import redirect_stdout
+
+from filesystem import MemoryFileSystem
+from fragments import NAVIGATION_SCRIPT, fragment_path, inject_navigation_script, mark_fragment_root
+from main import build_site
+
+class TestFragments(unittest.TestCase):
+
+    def test_fragment_path(self):
+        self.assertEqual(fragment_path('public/blog/post.html'), 'public/blog/post.fragment.json')
+        self.assertEqual(fragment_path('public/majesty/index.html'), 'public/majesty/index.fragment.json')
+
+    def test_mark_fragment_root(self):
+        self.assertEqual(mark_fragment_root('<div><p>x</p></div>'), '<div data-fragment-root><p>x</p></div>')
+
+class TestFragmentsBuild(unittest.TestCase):
+
+    def setUp(self):
+        """Create an in-memory site with two pages."""
+        self.fs = MemoryFileSystem({
+            'static/index.css': b'',
+            'content/index.md': b'# Home\n\n[About](/about.html)',
+            'content/about.md': b'# About\n\nHello',
+            'template.html': b'<title>{{ Title }}</title><body><main>{{ Content }}</main>{{ Backlinks }}</body>',
+        })
+
+    def build(self, **kwargs) -> str:
+        """Runs an incremental build with fragments and returns what it printed."""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            build_site('static', 'content', 'template.html', 'public', fs=self.fs, incremental=True,
+                       manifest_path='.cache/manifest.json', **kwargs)
+        return output.getvalue()
+
+    def test_fragment_matches_page(self):
+        """Test that the fragment holds the page's title and exactly the body put into the page."""
+        self.build(fragments=True)
+        fragment = json.loads(self.fs.read_text('public/about.fragment.json'))
+        page = self.fs.read_text('public/about.html')
+
+        self.assertEqual(fragment['title'], 'About')
+        self.assertEqual(fragment['html'], '<div><h1 id="about">About</h1><p>Hello</p></div>')
+        self.assertIn('<main><div data-fragment-root><h1 id="about">About</h1><p>Hello</p></div></main>', page)
+
+    def test_navigation_script_published_once(self):
+        """Test that pages reference the navigation script, which is written once and fingerprinted with the assets."""
+        self.build(fragments=True)
+        self.assertEqual(self.fs.read_text('public/fragment-navigation.js'), NAVIGATION_SCRIPT)
+        self.assertTrue(self.fs.read_text('public/about.html').endswith(
+            '<script src="/fragment-navigation.js" defer></script></body>'))
+
+        self.build(fragments=True, fingerprint=True)
+        url = json.loads(self.fs.read_text('public/asset-manifest.json'))['/fragment-navigation.js']
+        self.assertIn(f'<script src="{url}" defer></script>', self.fs.read_text('public/about.html'))
+        self.assertNotIn('fragment-navigation.js', self.fs.tree('public'))
+        self.assertEqual(self.fs.read_text('public' + url), NAVIGATION_SCRIPT)
+
+    def test_inject_navigation_script(self):
+        """Test that the deferred script goes into the `<head>` when there is one."""
+        tag = '<script src="/fragment-navigation.js" defer></script>'
+        self.assertEqual(inject_navigation_script('<head></head><body></body>'), f'<head>{tag}</head><body></body>')
+        self.assertEqual(inject_navigation_script('<p>x</p>'), f'<p>x</p>{tag}')
+
+    def test_fragment_carries_backlinks(self):
+        """Test that the "Linked from" section outside the content is in the fragment and marked in the page."""
+        self.build(fragments=True)
+        fragment = json.loads(self.fs.read_text('public/about.fragment.json'))
+        self.assertIn('<a href="/">Home</a>', fragment['slots']['Backlinks'])
+        self.assertIn(f'<div data-fragment-slot="Backlinks">{fragment["slots"]["Backlinks"]}</div>',
+                      self.fs.read_text('public/about.html'))
+
+        # A page without backlinks still has the element, so navigating to it empties the section.
+        self.assertEqual(json.loads(self.fs.read_text('public/index.fragment.json'))['slots']['Backlinks'], '')
+        self.assertIn('<div data-fragment-slot="Backlinks"></div>', self.fs.read_text('public/index.html'))
+
+    def test_deleted_page_removes_fragment(self):
+        """Test that a fragment is removed with its page and switching fragments off removes them all."""
+        self.build(fragments=True)
+        self.fs.remove('content/about.md')
+        self.build(fragments=True)
+        self.assertNotIn('about.fragment.json', self.fs.tree('public'))
+
+        self.build()
+        self.assertNotIn('index.fragment.json', self.fs.tree('public'))
+        self.assertNotIn('fragment-navigation.js', self.fs.tree('public'))
+        self.assertNotIn('<script', self.fs.read_text('public/index.html'))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,12 @@
+import io
 import os
 import tempfile
 import unittest
+from contextlib import redirect_stdout
 
-from generate_page import extract_title, generate_page
+from build_cache import BuildCache
+from filesystem import MemoryFileSystem
+from generate_page import extract_title, fill_template, generate_page, generate_page_recursive
 
 class TestGeneratePage(unittest.TestCase):
 
@@ -51,8 +55,35 @@ class TestGeneratePage(unittest.TestCase):
         with open(self.output_file_path, 'r') as f:
             output_content = f.read()
         
-        expected_content = "<html><head><title>This is a test title</title></head><body><div><h1>This is a test title</h1><p>This is a test content paragraph.</p></div></body></html>"
+        expected_content = "<html><head><title>This is a test title</title></head><body><div><h1 id=\"this-is-a-test-title\">This is a test title</h1><p>This is a test content paragraph.</p></div></body></html>"
         self.assertEqual(output_content.strip(), expected_content)
 
+    def test_fill_template_escapes_title(self):
+        """Test that the plain-text title is escaped while the content is inserted as HTML."""
+        html = fill_template('<title>{{ Title }}</title>{{ Content }}', 'Fish & <Chips>', '<p>x</p>')
+        self.assertEqual(html, '<title>Fish &amp; &lt;Chips&gt;</title><p>x</p>')
+
+    def test_identical_sources_rendered_once(self):
+        """Test that byte-identical files share one rendering but each gets its own page record."""
+        stub = b'---\ntags: [stub]\n---\n# Coming soon\n\nSee [intro](intro.html).'
+        fs = MemoryFileSystem({
+            'content/en/soon.md': stub,
+            'content/fr/soon.md': stub,
+            'content/v1/soon.md': stub,
+            'template.html': b'<title>{{ Title }}</title>{{ Content }}',
+        })
+        fs.mkdir('public')
+        cache = BuildCache()
+        with redirect_stdout(io.StringIO()):
+            pages = generate_page_recursive('content', 'template.html', 'public', cache, fs)
+
+        self.assertEqual(cache.stats()['misses'], 1)
+        self.assertEqual(sorted(page.links[0] for page in pages), ['/en/intro.html', '/fr/intro.html', '/v1/intro.html'])
+        self.assertEqual(fs.read_text('public/fr/soon.html'), fs.read_text('public/en/soon.html'))
+
+        # Each page owns its front matter, even though the rendering is shared.
+        pages[0].metadata['tags'].append('changed')
+        self.assertEqual(pages[1].metadata['tags'], ['stub'])
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,89 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+
+from context import RenderContext
+from filesystem import MemoryFileSystem
+from highlight import BuiltinHighlighter, HighlightCache, Highlighter, PygmentsHighlighter, pygments
+from main import build_site
+from markdown_to_html_node import markdown_to_html_node
+
+class CountingHighlighter(Highlighter):
+    """A highlighter that upper-cases code and counts its calls."""
+
+    version = 'counting-1'
+
+    def __init__(self):
+        self.calls = 0
+
+    def highlight(self, code, language):
+        self.calls += 1
+        return code.upper() if language == 'shout' else None
+
+class TestBuiltinHighlighter(unittest.TestCase):
+
+    def test_python(self):
+        """Test that tokens are classed like Pygments and text is escaped."""
+        self.assertEqual(
+            BuiltinHighlighter().highlight('def f():\n    return "<a>"  # x', 'py'),
+            '<span class="k">def</span> <span class="nf">f</span>():\n    <span class="k">return</span> '
+            '<span class="s">"&lt;a&gt;"</span>  <span class="c"># x</span>',
+        )
+
+    def test_json(self):
+        self.assertEqual(
+            BuiltinHighlighter().highlight('{"a": [1, true]}', 'json'),
+            '{<span class="nt">"a"</span>: [<span class="m">1</span>, <span class="kc">true</span>]}',
+        )
+
+    def test_unknown_language(self):
+        self.assertIsNone(BuiltinHighlighter().highlight('fn main() {}', 'rust'))
+
+    @unittest.skipIf(pygments is None, 'Pygments is not installed')
+    def test_pygments(self):
+        html = PygmentsHighlighter().highlight('x = 1', 'python')
+        self.assertIn('<span class="mi">1</span>', html)
+        self.assertFalse(html.endswith('\n'))
+
+class TestHighlightCache(unittest.TestCase):
+
+    def test_code_block(self):
+        """Test that a fence's language becomes a class and selects the lexer."""
+        context = RenderContext(highlighter=HighlightCache(CountingHighlighter()))
+        html = markdown_to_html_node('```shout\nhello\n```\n\n```text\n<b>\n```', context).to_html()
+        self.assertEqual(html, '<div><pre><code class="language-shout">HELLO</code></pre>'
+                               '<pre><code class="language-text">\n&lt;b&gt;\n</code></pre></div>')
+        self.assertEqual(context.terms, {'hello': [0], 'b': [1]})
+
+    def test_cached_across_builds(self):
+        """Test that stored entries are reused by the same highlighter version only."""
+        fs = MemoryFileSystem()
+        highlighter = CountingHighlighter()
+        cache = HighlightCache(highlighter, fs)
+        cache.highlight('hello', 'shout')
+        cache.highlight('hello', 'shout')
+        cache.save('.cache/highlight.json')
+        self.assertEqual(highlighter.calls, 1)
+
+        loaded = HighlightCache.load('.cache/highlight.json', highlighter, fs)
+        self.assertEqual(loaded.highlight('hello', 'shout'), 'HELLO')
+        self.assertEqual(highlighter.calls, 1)
+
+        highlighter.version = 'counting-2'
+        self.assertEqual(HighlightCache.load('.cache/highlight.json', highlighter, fs).entries, {})
+
+    def test_build_highlights_code(self):
+        """Test that built pages contain highlighted code and the cache is kept for the next build."""
+        fs = MemoryFileSystem({
+            'static/index.css': b'',
+            'content/index.md': b'# Home\n\n```json\n{"a": 1}\n```',
+            'template.html': b'{{ Content }}',
+        })
+        with redirect_stdout(io.StringIO()):
+            build_site('static', 'content', 'template.html', 'public', fs=fs, incremental=True,
+                       manifest_path='.cache/manifest.json')
+        self.assertIn('<code class="language-json">', fs.read_text('public/index.html'))
+        self.assertIn('"highlighter"', fs.read_text('.cache/highlight.json'))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,7 @@
 import unittest
 
 from enums import TextType
-from htmlnode import HTMLNode, LeafNode, ParentNode, text_node_to_html_node
+from htmlnode import LINE_BREAK, HTMLNode, LeafNode, ParentNode, RawNode, text_node_to_html_node
 from textnode import TextNode
 
 
@@ -112,6 +112,46 @@ class TestHTMLNode(unittest.TestCase):
         text_node = TextNode("", TextType.IMAGE, "/static/img.1", "this is an image text node")
         node = text_node_to_html_node(text_node)
         self.assertEqual(node.to_html(), '<img src="/static/img.1" alt="this is an image text node"></img>')
-        
+
+    def test_minify_attributes_and_void_tags(self):
+        """Test that minified attributes drop unneeded quotes and void elements their end tag."""
+        node = LeafNode('img', '', {'src': '/images/tolkien.png', 'alt': 'J. R. R. Tolkien', 'title': ''})
+        self.assertEqual(node.to_html(minify=True), '<img src=/images/tolkien.png alt="J. R. R. Tolkien" title>')
+
+    def test_minify_whitespace_and_optional_end_tags(self):
+        """Test that minifying collapses whitespace, drops `</li>` and `</p>`, and leaves code alone."""
+        node = ParentNode('div', [
+            ParentNode('ul', [LeafNode('li', f'one{LINE_BREAK}\n  two'), LeafNode('li', 'three')]),
+            ParentNode('p', [LeafNode(None, 'Run\n  '), LeafNode('code', 'a  =  1'), LeafNode(None, ' now')]),
+            ParentNode('pre', [LeafNode('code', 'def f():\n    return 1\n')]),
+        ])
+        self.assertEqual(
+            node.to_html(minify=True),
+            '<div><ul><li>one<br>two<li>three</ul><p>Run <code>a  =  1</code> now'
+            '<pre><code>def f():\n    return 1\n</code></pre></div>',
+        )
+        self.assertIn('</li>', node.to_html())
+
+    def test_escaping(self):
+        """Test that text and attribute values are escaped and raw nodes are written as they are."""
+        node = ParentNode('p', [
+            LeafNode(None, 'if a < b && c > d'),
+            LeafNode('a', '"quoted"', {'href': '/search?q=a&lang="en"', 'title': '<script>'}),
+            LeafNode(None, f'one{LINE_BREAK}two'),
+            RawNode('<span class="k">def</span>'),
+        ])
+        self.assertEqual(
+            node.to_html(),
+            '<p>if a &lt; b &amp;&amp; c &gt; d'
+            '<a href="/search?q=a&amp;lang=&quot;en&quot;" title="&lt;script&gt;">"quoted"</a>'
+            'one<br>two<span class="k">def</span></p>',
+        )
+        self.assertIn('href="/search?q=a&amp;lang=&quot;en&quot;"', node.to_html(minify=True))
+
+    def test_escaping_fast_path(self):
+        """Test that text without special characters is returned as the same object."""
+        text = 'plain text'
+        self.assertIs(LeafNode(None, text).to_html(), text)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
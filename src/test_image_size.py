@@ -0,0 +1,90 @@
+import io
+import struct
+import unittest
+from contextlib import redirect_stdout
+
+from filesystem import MemoryFileSystem
+from generate_page import render_markdown
+from image_size import ImageSizer, image_size
+from main import build_site
+
+def png(width: int, height: int) -> bytes:
+    """Returns the header of a PNG image of the given size."""
+    return b'\x89PNG\r\n\x1a\n' + struct.pack('>I', 13) + b'IHDR' + struct.pack('>II', width, height) + b'\x08\x06\x00\x00\x00'
+
+class TestImageSize(unittest.TestCase):
+
+    def test_png(self):
+        self.assertEqual(image_size(png(640, 480)), (640, 480))
+
+    def test_gif(self):
+        self.assertEqual(image_size(b'GIF89a' + struct.pack('<HH', 32, 16) + b'\x00'), (32, 16))
+
+    def test_jpeg(self):
+        """Test that segments before the start-of-frame segment are skipped."""
+        app0 = b'\xff\xe0' + struct.pack('>H', 16) + b'JFIF\x00' + b'\x00' * 9
+        sof0 = b'\xff\xc0' + struct.pack('>HBHH', 17, 8, 600, 800) + b'\x03'
+        self.assertEqual(image_size(b'\xff\xd8' + app0 + sof0), (800, 600))
+
+    def test_webp(self):
+        """Test the lossy, lossless and extended encodings."""
+        riff = lambda chunk: b'RIFF' + b'\x00' * 4 + b'WEBP' + chunk
+        lossy = riff(b'VP8 ' + b'\x00' * 7 + b'\x9d\x01\x2a' + struct.pack('<HH', 400, 300))
+        bits = (400 - 1) | ((300 - 1) << 14)
+        lossless = riff(b'VP8L' + b'\x00' * 4 + b'\x2f' + bits.to_bytes(4, 'little'))
+        extended = riff(b'VP8X' + b'\x00' * 8 + (400 - 1).to_bytes(3, 'little') + (300 - 1).to_bytes(3, 'little'))
+        for data in (lossy, lossless, extended):
+            self.assertEqual(image_size(data), (400, 300))
+
+    def test_unknown_or_truncated(self):
+        self.assertIsNone(image_size(b'<svg></svg>'))
+        self.assertIsNone(image_size(png(1, 1)[:20]))
+
+    def test_cached_by_hash(self):
+        """Test that copies of an image share one entry and a saved cache is reused."""
+        fs = MemoryFileSystem({'static/a.png': png(2, 3), 'static/b.png': png(2, 3)})
+        sizer = ImageSizer('static', fs)
+        self.assertEqual(sizer.size('/a.png?v=1'), (2, 3))
+        self.assertEqual(sizer.size('/b.png'), (2, 3))
+        self.assertIsNone(sizer.size('https://example.com/a.png'))
+        self.assertEqual(len(sizer.sizes), 1)
+
+        sizer.save('.cache/image-sizes.json')
+        loaded = ImageSizer.load('.cache/image-sizes.json', 'static', fs)
+        self.assertEqual(loaded.sizes, sizer.sizes)
+        self.assertEqual(loaded.size('/a.png'), (2, 3))
+
+class TestImageAttributes(unittest.TestCase):
+
+    def test_first_image_eager(self):
+        """Test that known images are sized and every image after the first is lazy."""
+        fs = MemoryFileSystem({'static/a.png': png(640, 480)})
+        html = render_markdown('# Title\n\n![A](/a.png)\n\n![B](/a.png) ![C](/missing.png)', image_sizes=ImageSizer('static', fs)).html
+        self.assertIn('<img src="/a.png" alt="A" width="640" height="480"></img>', html)
+        self.assertIn('<img src="/a.png" alt="B" width="640" height="480" loading="lazy" decoding="async"></img>', html)
+        self.assertIn('<img src="/missing.png" alt="C" loading="lazy" decoding="async"></img>', html)
+
+    def test_resized_image_rebuilds_page(self):
+        """Test that an incremental build regenerates the pages when an image's dimensions change."""
+        fs = MemoryFileSystem({
+            'static/a.png': png(640, 480),
+            'content/index.md': b'# Home\n\n![A](/a.png)',
+            'template.html': b'{{ Content }}',
+        })
+
+        def build() -> str:
+            output = io.StringIO()
+            with redirect_stdout(output):
+                build_site('static', 'content', 'template.html', 'public', fs=fs, incremental=True,
+                           manifest_path='.cache/manifest.json')
+            return output.getvalue()
+
+        build()
+        self.assertNotIn('Generating page', build())
+
+        fs.write_bytes('static/a.png', png(320, 240))
+        self.assertIn('Generating page from content/index.md', build())
+        self.assertIn('width="320" height="240"', fs.read_text('public/index.html'))
+
+if __name__ == "__main__":
+    unittest.main()
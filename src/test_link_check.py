@@ -0,0 +1,67 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+
+from filesystem import MemoryFileSystem
+from link_check import BrokenLink, LinkCheckError, check_links, output_urls
+from main import build_site
+from taxonomy import Page
+
+class TestLinkCheck(unittest.TestCase):
+
+    def setUp(self):
+        """Create an in-memory site with one broken link and one missing image."""
+        self.fs = MemoryFileSystem({
+            'static/index.css': b'body {}',
+            'static/images/tolkien.png': b'png',
+            'content/index.md': b'# Home\n\n[Majesty](/majesty/) and ![Tolkien](/images/tolkien.png)\n\n'
+                                b'![Rivendell](/images/rivendell.png)',
+            'content/majesty/index.md': b'# Majesty\n\nBack [home](../index.html) or [lost][].\n\n'
+                                        b'[lost]: /lost.html',
+            'template.html': b'{{ Content }}',
+        })
+
+    def build(self, **kwargs) -> str:
+        """Runs a checked build and returns what it printed."""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            build_site('static', 'content', 'template.html', 'public', fs=self.fs, check=True, **kwargs)
+        return output.getvalue()
+
+    def test_output_urls(self):
+        """Test that directories with an index page are reachable with and without a trailing slash."""
+        fs = MemoryFileSystem({'public/index.html': b'', 'public/blog/index.html': b'', 'public/a.css': b''})
+        self.assertEqual(output_urls('public', fs),
+                         {'/', '/index.html', '/a.css', '/blog/', '/blog', '/blog/index.html'})
+
+    def test_broken_links_reported_with_lines(self):
+        """Test that missing pages and images are reported with their source file and line."""
+        with self.assertRaises(LinkCheckError) as raised:
+            self.build()
+
+        self.assertEqual(raised.exception.broken, [
+            BrokenLink('content/index.md', 5, '/images/rivendell.png', 'image'),
+            BrokenLink('content/majesty/index.md', 5, '/lost.html', 'link'),
+        ])
+        self.assertEqual(str(raised.exception.broken[0]),
+                         'content/index.md:5: broken image to /images/rivendell.png')
+
+    def test_clean_site_passes(self):
+        """Test that a site without broken links builds normally."""
+        self.fs.write_bytes('static/images/rivendell.png', b'png')
+        self.fs.write_text('content/majesty/index.md', '# Majesty\n\nBack [home](../index.html).')
+        self.assertIn('Checked 4 links and images: 0 broken', self.build())
+
+    def test_parallel_matches_serial(self):
+        """Test that locating lines in a thread pool gives the same report."""
+        fs = MemoryFileSystem({f'content/{n}.md': f'# {n}\n\n[gone](/gone{n}.html)'.encode() for n in range(12)})
+        fs.write_bytes('public/index.html', b'')
+        pages = [Page(f'content/{n}.md', f'public/{n}.html', f'/{n}.html', str(n), links=[f'/gone{n}.html'])
+                 for n in range(12)]
+
+        broken = check_links(pages, 'public', fs, workers=4)
+        self.assertEqual(len(broken), 12)
+        self.assertTrue(all(link.line == 3 for link in broken))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+
+from document import Document
+from filesystem import MemoryFileSystem
+from link_graph import LinkGraph, backlinks_html, internal_links, resolve_link
+from main import build_site
+from taxonomy import Page
+
+class TestLinkGraph(unittest.TestCase):
+
+    def test_resolve_link(self):
+        """Test that relative and absolute links resolve to page URLs and external links are dropped."""
+        self.assertEqual(resolve_link('/blog/post.html', 'other.html'), '/blog/other.html')
+        self.assertEqual(resolve_link('/blog/post.html', '../majesty/index.html#history'), '/majesty/')
+        self.assertEqual(resolve_link('/blog/', '/majesty'), '/majesty/')
+        self.assertEqual(resolve_link('/blog/', '/index.css'), '/index.css')
+        self.assertIsNone(resolve_link('/blog/', 'https://www.boot.dev'))
+        self.assertIsNone(resolve_link('/blog/', 'mailto:frodo@shire.me'))
+        self.assertIsNone(resolve_link('/blog/', '#history'))
+
+    def test_document_links(self):
+        """Test that inline and reference links are recorded while the document is parsed."""
+        document = Document("# Home\n\nSee [one](/blog/one.html) and [two][].\n\n[two]: /blog/two.html\n\n"
+                            "- [Boot.dev](https://www.boot.dev) and [one again](/blog/one.html)")
+        self.assertEqual(document.links, ['/blog/one.html', '/blog/two.html', 'https://www.boot.dev', '/blog/one.html'])
+        self.assertEqual(internal_links('/', document.links), ['/blog/one.html', '/blog/two.html'])
+
+    def test_backlinks(self):
+        """Test that backlinks only count links between known pages, sorted by title."""
+        pages = [
+            Page('content/index.md', 'public/index.html', '/', 'Home', links=['/b.html', '/missing.html']),
+            Page('content/a.md', 'public/a.html', '/a.html', 'Zebra', links=['/b.html']),
+            Page('content/b.md', 'public/b.html', '/b.html', 'Bee', links=['/']),
+        ]
+        graph = LinkGraph(pages)
+        self.assertEqual(graph.backlinks('/b.html'), [['/', 'Home'], ['/a.html', 'Zebra']])
+        self.assertEqual(graph.backlinks('/'), [['/b.html', 'Bee']])
+        self.assertEqual(graph.backlinks('/a.html'), [])
+        self.assertNotIn('/missing.html', graph.inbound)
+
+    def test_backlinks_html(self):
+        """Test the rendered "Linked from" section."""
+        self.assertEqual(backlinks_html([]), '')
+        self.assertEqual(
+            backlinks_html([['/', 'Home']]),
+            '<nav class="backlinks"><h2>Linked from</h2><ul><li><a href="/">Home</a></li></ul></nav>',
+        )
+
+class TestBacklinkBuild(unittest.TestCase):
+
+    def setUp(self):
+        """Create an in-memory site where the home page links to both posts."""
+        self.fs = MemoryFileSystem({
+            'static/index.css': b'body {}',
+            'content/index.md': b'# Home\n\nRead [one](/blog/one.html) and [two](blog/two.html).',
+            'content/blog/one.md': b'# One',
+            'content/blog/two.md': b'# Two\n\nBack [home](../index.html).',
+            'template.html': b'<title>{{ Title }}</title>{{ Content }}{{ Backlinks }}',
+        })
+
+    def build(self) -> str:
+        """Runs an incremental build and returns what it printed."""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            build_site('static', 'content', 'template.html', 'public', fs=self.fs, incremental=True,
+                       manifest_path='.cache/manifest.json')
+        return output.getvalue()
+
+    def test_backlinks_written(self):
+        """Test that each page lists the pages linking to it."""
+        self.build()
+        tree = self.fs.tree('public')
+        self.assertIn(b'<li><a href="/">Home</a></li>', tree['blog/one.html'])
+        self.assertIn(b'<li><a href="/blog/two.html">Two</a></li>', tree['index.html'])
+
+    def test_pages_generated_once(self):
+        """Test that a full build writes each page once, already with its backlinks."""
+        output = self.build()
+        self.assertEqual(output.count('content/index.md'), 1)
+        self.assertEqual(output.count('content/blog/one.md'), 1)
+
+    def test_unrelated_change_keeps_backlinks(self):
+        """Test that editing a page without changing its links only regenerates that page."""
+        self.build()
+        self.fs.write_text('content/blog/one.md', '# One\n\nMore text.')
+        output = self.build()
+
+        self.assertIn('content/blog/one.md', output)
+        self.assertNotIn('content/index.md', output)
+        self.assertNotIn('content/blog/two.md', output)
+
+    def test_removed_link_updates_only_target(self):
+        """Test that removing a link regenerates the page that lost a backlink and nothing else."""
+        self.build()
+        self.fs.write_text('content/index.md', '# Home\n\nRead [two](blog/two.html).')
+        output = self.build()
+
+        self.assertIn('content/index.md', output)
+        self.assertIn('content/blog/one.md', output)
+        self.assertNotIn('content/blog/two.md', output)
+        self.assertNotIn(b'Linked from', self.fs.tree('public')['blog/one.html'])
+
+    def test_renamed_title_updates_linked_pages(self):
+        """Test that retitling a page rewrites the "Linked from" sections that name it."""
+        self.build()
+        self.fs.write_text('content/blog/two.md', '# Second\n\nBack [home](../index.html).')
+        output = self.build()
+
+        self.assertIn('content/index.md', output)
+        self.assertNotIn('content/blog/one.md', output)
+        self.assertIn(b'<a href="/blog/two.html">Second</a>', self.fs.tree('public')['index.html'])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import json
+import os
+import tempfile
+import unittest
+
+from dev_server import PageCache
+from live_reload import LiveReloadHub, diff_blocks, inject_script
+
+class TestLiveReload(unittest.TestCase):
+
+    def setUp(self):
+        """Create a page, a template and a static directory for a live mode page cache."""
+        self.test_dir = tempfile.TemporaryDirectory()
+        root = self.test_dir.name
+
+        self.source = os.path.join(root, 'index.md')
+        self.template = os.path.join(root, 'template.html')
+        self.static_dir = os.path.join(root, 'static')
+        os.mkdir(self.static_dir)
+
+        self.write(self.source, '# Title\n\nFirst paragraph.\n\nSecond paragraph.')
+        self.write(self.template, '<html><body>{{ Content }}</body></html>')
+        self.write(os.path.join(self.static_dir, 'index.css'), 'body {}')
+
+        self.cache = PageCache(self.template, live=True)
+        self.hub = LiveReloadHub(self.cache, self.static_dir)
+
+    def tearDown(self):
+        """Clean up temporary files."""
+        self.test_dir.cleanup()
+
+    def write(self, path, text):
+        """Helper that writes a file and bumps its modification time so changes are always visible."""
+        mtime = os.stat(path).st_mtime_ns + 1_000_000_000 if os.path.exists(path) else None
+        with open(path, 'w') as f:
+            f.write(text)
+        if mtime is not None:
+            os.utime(path, ns=(mtime, mtime))
+
+    def events(self, queue):
+        """Helper that drains a subscriber queue into `(event, data)` pairs."""
+        drained = []
+        while not queue.empty():
+            event, data = queue.get().decode().strip().split('\n')
+            drained.append((event.removeprefix('event: '), json.loads(data.removeprefix('data: '))))
+        return drained
+
+    def test_diff_blocks(self):
+        """Test that only changed blocks are reported."""
+        self.assertEqual(diff_blocks(['a', 'b', 'c'], ['a', 'b', 'c']), [])
+        self.assertEqual(diff_blocks(['a', 'b', 'c'], ['a', 'x', 'c']), [{'start': 1, 'remove': 1, 'insert': ['x']}])
+        self.assertEqual(diff_blocks(['a', 'c'], ['a', 'b', 'c']), [{'start': 1, 'remove': 0, 'insert': ['b']}])
+        self.assertEqual(diff_blocks(['a', 'b'], ['b']), [{'start': 0, 'remove': 1, 'insert': []}])
+
+    def test_live_page(self):
+        """Test that live pages carry their version and the injected client script."""
+        page = self.cache.get(self.source)
+        self.assertIn(f'data-live-version="{page.version}"'.encode(), page.file.body)
+        self.assertIn(b'<script>', page.file.body)
+        self.assertEqual(inject_script('<p></p>', 'x'), '<p></p><script>x</script>')
+
+    def test_patch_pushed(self):
+        """Test that editing one paragraph pushes a single-block patch to subscribers."""
+        events = self.hub.subscribe(self.source)
+        before = self.cache.get(self.source)
+
+        self.write(self.source, '# Title\n\nFirst paragraph.\n\nEdited paragraph.')
+        self.hub.poll()
+
+        [(event, patch)] = self.events(events)
+        self.assertEqual(event, 'patch')
+        self.assertEqual(patch['from'], before.version)
+        self.assertEqual(patch['ops'], [{'start': 2, 'remove': 1, 'insert': ['<p>Edited paragraph.</p>']}])
+
+        # Nothing changed since the last poll, so nothing is pushed.
+        self.hub.poll()
+        self.assertEqual(self.events(events), [])
+
+    def test_css_and_template_changes(self):
+        """Test that stylesheet edits are swapped in place and template edits force a reload."""
+        events = self.hub.subscribe(self.source)
+
+        self.write(os.path.join(self.static_dir, 'index.css'), 'body { color: red; }')
+        self.hub.poll()
+        self.assertEqual(self.events(events), [('css', {'path': '/index.css'})])
+
+        self.write(self.template, '<html><body><main>{{ Content }}</main></body></html>')
+        self.hub.poll()
+        self.assertEqual(self.events(events), [('reload', {})])
+
+if __name__ == "__main__":
+    unittest.main()
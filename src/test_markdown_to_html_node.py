@@ -51,8 +51,8 @@ class TestMDtoHTMLNode(unittest.TestCase):
         # Expected HTML structure for the given Markdown input
         expected_html = (
             "<div>"
-            "<h1>This is the heading</h1>"
-            "<h3>Here is a big heading</h3>"
+            "<h1 id=\"this-is-the-heading\">This is the heading</h1>"
+            "<h3 id=\"here-is-a-big-heading\">Here is a big heading</h3>"
             "<p>This is a paragraph of text. It has some <b>bold</b> and <i>italic</i> words inside of it.</p>"
             "<pre><code> def my_function():\n"
             "    x = 0\n"
@@ -77,5 +77,42 @@ class TestMDtoHTMLNode(unittest.TestCase):
         # Assert that the normalized generated HTML matches the normalized expected HTML
         self.assertEqual(normalized_generated_html, normalized_expected_html)
 
+    def test_reference_links(self):
+        """Test that reference definitions are collected and resolved, even when defined after use."""
+        markdown = "Read [the docs][docs] and [Boot Dev].\n\n[docs]: https://docs.example.com\n[boot dev]: <https://www.boot.dev> \"Boot\""
+        self.assertEqual(
+            markdown_to_html_node(markdown).to_html(),
+            '<div><p>Read <a href="https://docs.example.com">the docs</a> and <a href="https://www.boot.dev">Boot Dev</a>.</p></div>',
+        )
+
+    def test_reference_definitions_opening_paragraph(self):
+        """Test that definitions directly followed by paragraph text are collected and the rest rendered."""
+        self.assertEqual(
+            markdown_to_html_node('[a]: /x\n[b]: /y\nSee [it][a] and [b].').to_html(),
+            '<div><p>See <a href="/x">it</a> and <a href="/y">b</a>.</p></div>',
+        )
+
+        # Only leading lines are definitions; one after paragraph text stays text.
+        self.assertEqual(
+            markdown_to_html_node('See [it][a].\n[a]: /x').to_html(),
+            '<div><p>See [it][a].\n[a]: /x</p></div>',
+        )
+
+    def test_line_break_marker_in_source(self):
+        """Test that the internal line break marker in the source does not become a `<br>` tag."""
+        self.assertEqual(
+            markdown_to_html_node('a\ufdd0b\n\n* one\n    two\ufdd0').to_html(),
+            '<div><p>ab</p><ul><li>one<br>\ntwo</li></ul></div>',
+        )
+
+    def test_many_reference_links(self):
+        """Test that thousands of references resolve against a single definition index."""
+        count = 3000
+        body = ' '.join(f'[link {i}][r{i}]' for i in range(count))
+        definitions = '\n'.join(f'[r{i}]: /page-{i}.html' for i in range(count))
+        html = markdown_to_html_node(f'{body}\n\n{definitions}').to_html()
+        self.assertEqual(html.count('<a href="/page-'), count)
+        self.assertIn(f'<a href="/page-{count - 1}.html">link {count - 1}</a>', html)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,90 @@
+import io
+import json
+import unittest
+from contextlib import redirect_stdout
+
+from build_cache import BuildCache
+from filesystem import MemoryFileSystem
+from main import build_site
+from markdown_to_html_node import markdown_to_html_node
+from outputs import OutputTargets, TemplateTarget, TreeTarget, node_to_json
+
+class TestNodeToJson(unittest.TestCase):
+
+    def test_tree(self):
+        """Test that elements keep their attributes, text is unescaped and line breaks become elements."""
+        node = markdown_to_html_node('A & [b](/b.html)\n\n* one\n    two')
+        self.assertEqual(node_to_json(node, {'/b.html': '/b.1234.html'}), {'tag': 'div', 'children': [
+            {'tag': 'p', 'children': ['A & ', {'tag': 'a', 'props': {'href': '/b.1234.html'}, 'children': ['b']}]},
+            {'tag': 'ul', 'children': [{'tag': 'li', 'children': ['one', {'tag': 'br'}, '\ntwo']}]},
+        ]})
+
+class TestOutputTargets(unittest.TestCase):
+
+    def test_register_rejects_clashes(self):
+        targets = OutputTargets([TreeTarget()])
+        with self.assertRaises(ValueError):
+            targets.register(TreeTarget())
+        with self.assertRaises(ValueError):
+            targets.register(TreeTarget('json'))
+        with self.assertRaises(ValueError):
+            targets.register(TemplateTarget('copy', '{stem}.html', 'template.html'))
+
+class TestOutputsBuild(unittest.TestCase):
+
+    def setUp(self):
+        """Create an in-memory site with two pages, a page template and a print template."""
+        self.fs = MemoryFileSystem({
+            'static/index.css': b'',
+            'content/index.md': b'# Home\n\n[About](/about.html)',
+            'content/about.md': b'---\ntags: [me]\n---\n# About\n\nHello',
+            'template.html': b'<title>{{ Title }}</title><nav></nav><main>{{ Content }}</main>',
+            'print.html': b'<title>{{ Title }}</title>\n<article>{{ Content }}</article>',
+        })
+
+    def build(self, **kwargs) -> str:
+        """Runs an incremental build and returns what it printed."""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            build_site('static', 'content', 'template.html', 'public', fs=self.fs, incremental=True,
+                       manifest_path='.cache/manifest.json', **kwargs)
+        return output.getvalue()
+
+    def test_every_target_from_one_parse(self):
+        """Test that each page is parsed once and every target is written from that parse."""
+        cache = BuildCache()
+        self.build(cache=cache, print_template='print.html', fragments=True, node_trees=True)
+        self.assertEqual(cache.stats()['misses'], 2)
+
+        body = '<div><h1 id="about">About</h1><p>Hello</p></div>'
+        self.assertEqual(self.fs.read_text('public/about.print.html'),
+                         f'<title>About</title>\n<article>{body}</article>')
+        self.assertEqual(json.loads(self.fs.read_text('public/about.fragment.json'))['html'], body)
+        tree = json.loads(self.fs.read_text('public/about.tree.json'))
+        self.assertEqual(tree['metadata'], {'tags': ['me']})
+        self.assertEqual(tree['tree']['children'][1], {'tag': 'p', 'children': ['Hello']})
+        self.assertNotIn('<script>', self.fs.read_text('public/about.print.html'))
+
+    def test_target_serializer_options(self):
+        """Test that a target minifying the body does not change the page."""
+        targets = OutputTargets([TemplateTarget('small', '{stem}.min.html', 'print.html', minify=True)])
+        self.build(targets=targets)
+        self.assertEqual(self.fs.read_text('public/about.min.html'),
+                         '<title>About</title><article><div><h1 id=about>About</h1><p>Hello</div></article>')
+        self.assertIn('<p>Hello</p>', self.fs.read_text('public/about.html'))
+
+    def test_outputs_follow_pages(self):
+        """Test that outputs are removed with their page or target, and a changed target template rewrites them."""
+        self.build(print_template='print.html', node_trees=True)
+        self.fs.remove('content/about.md')
+        self.build(print_template='print.html', node_trees=True)
+        self.assertNotIn('about.print.html', self.fs.tree('public'))
+        self.assertNotIn('about.tree.json', self.fs.tree('public'))
+
+        self.fs.write_text('print.html', '<h1>Print</h1>{{ Content }}')
+        self.build(print_template='print.html')
+        self.assertTrue(self.fs.read_text('public/index.print.html').startswith('<h1>Print</h1>'))
+        self.assertNotIn('index.tree.json', self.fs.tree('public'))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import gzip
+import io
+import unittest
+from contextlib import redirect_stdout
+
+from filesystem import MemoryFileSystem
+from main import build_site
+from precompress import PrecompressingFileSystem, Precompressor
+
+# Large enough to pass the size threshold.
+LONG_TEXT = 'Far over the misty mountains cold. ' * 64
+
+class TestPrecompress(unittest.TestCase):
+
+    def setUp(self):
+        """Create an in-memory site with one long page and one short one."""
+        self.fs = MemoryFileSystem({
+            'static/index.css': f'/* {LONG_TEXT} */'.encode(),
+            'static/logo.png': b'\x89PNG' * 512,
+            'content/index.md': f'# Home\n\n{LONG_TEXT}'.encode(),
+            'content/short.md': b'# Short',
+            'template.html': b'{{ Content }}',
+        })
+
+    def build(self, precompress: bool = True) -> str:
+        """Runs an incremental, precompressed build and returns what it printed."""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            build_site('static', 'content', 'template.html', 'public', fs=self.fs, incremental=True,
+                       manifest_path='.cache/manifest.json', precompress=precompress)
+        return output.getvalue()
+
+    def test_siblings_written(self):
+        """Test that large text outputs get a `.gz` sibling and small or binary files do not."""
+        self.build()
+        tree = self.fs.tree('public')
+        self.assertEqual(gzip.decompress(tree['index.html.gz']), tree['index.html'])
+        self.assertIn('index.css.gz', tree)
+        self.assertNotIn('short.html.gz', tree)
+        self.assertNotIn('logo.png.gz', tree)
+
+    def test_unchanged_outputs_not_recompressed(self):
+        """Test that a file whose contents did not change keeps its sibling untouched."""
+        self.build()
+        mtime = self.fs.mtime_ns('public/index.html.gz')
+        self.build()
+        self.assertEqual(self.fs.mtime_ns('public/index.html.gz'), mtime)
+
+        self.fs.write_text('content/index.md', f'# Home\n\n{LONG_TEXT} Edited.')
+        self.build()
+        self.assertNotEqual(self.fs.mtime_ns('public/index.html.gz'), mtime)
+        self.assertIn(b'Edited.', gzip.decompress(self.fs.read_bytes('public/index.html.gz')))
+
+    def test_deleted_output_loses_sibling(self):
+        """Test that removing a page also removes its compressed copy."""
+        self.build()
+        self.fs.remove('content/index.md')
+        self.build()
+        self.assertNotIn('index.html.gz', self.fs.tree('public'))
+
+    def test_shrunk_output_loses_sibling(self):
+        """Test that a file rewritten below the size threshold does not keep its old compressed copy."""
+        self.build()
+        self.fs.write_text('content/index.md', '# Home')
+        self.build()
+        self.assertNotIn('index.html.gz', self.fs.tree('public'))
+        self.build()
+        self.assertNotIn('index.html.gz', self.fs.tree('public'))
+
+    def test_kept_outputs_compressed(self):
+        """Test that turning precompression on compresses the outputs an incremental build keeps."""
+        self.build(precompress=False)
+        self.build()
+        tree = self.fs.tree('public')
+        self.assertEqual(gzip.decompress(tree['index.css.gz']), tree['index.css'])
+        self.assertIn('index.html.gz', tree)
+        self.assertNotIn('short.html.gz', tree)
+
+    def test_only_public_files_compressed(self):
+        """Test that the wrapper ignores files outside the output directory."""
+        fs = MemoryFileSystem()
+        precompressor = Precompressor(fs, min_size=0)
+        wrapper = PrecompressingFileSystem(fs, './public/', precompressor)
+        wrapper.write_text('public/a.json', '{}')
+        wrapper.write_text('.cache/b.json', '{}')
+        hashes = precompressor.finish()
+
+        self.assertIn('public/a.json.gz', hashes)
+        self.assertTrue(all(path.startswith('public/a.json.') for path in hashes))
+        self.assertFalse(fs.exists('.cache/b.json.gz'))
+
+if __name__ == "__main__":
+    unittest.main()
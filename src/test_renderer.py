@@ -0,0 +1,75 @@
+import io
+import unittest
+
+from markdown_to_html_node import markdown_to_html_node
+from renderer import Renderer
+
+DOCUMENTS = [
+    "# Title\n\nSome **bold** and *italic* text.",
+    "* one\n* two\n* three",
+    "1. first\n2. second",
+    "> quoted\n> text",
+    "```\ncode block\n```",
+    "A [link](https://boot.dev) and ![image](img.png).",
+]
+
+class TestRenderer(unittest.TestCase):
+
+    def test_render_matches_function_api(self):
+        """Test that a Renderer produces exactly the output of the function API."""
+        renderer = Renderer()
+        for markdown in DOCUMENTS:
+            self.assertEqual(renderer.render(markdown), markdown_to_html_node(markdown).to_html())
+
+    def test_render_uses_cache(self):
+        """Test that repeated documents are served from the cache."""
+        renderer = Renderer()
+        first = renderer.render(DOCUMENTS[0])
+        self.assertEqual(renderer.render(DOCUMENTS[0]), first)
+        self.assertEqual((renderer.hits, renderer.misses), (1, 1))
+
+    def test_cache_eviction(self):
+        """Test that the least recently used document is evicted once the cache is full."""
+        renderer = Renderer(cache_size=2)
+        renderer.render(DOCUMENTS[0])
+        renderer.render(DOCUMENTS[1])
+        renderer.render(DOCUMENTS[0])
+        renderer.render(DOCUMENTS[2])
+
+        # DOCUMENTS[1] was the least recently used, so it has to be rendered again.
+        renderer.render(DOCUMENTS[1])
+        self.assertEqual(renderer.misses, 4)
+
+    def test_render_many_preserves_order_and_dedups(self):
+        """Test that a batch keeps input order and renders each distinct document once."""
+        renderer = Renderer()
+        batch = DOCUMENTS + DOCUMENTS[:2]
+        expected = [markdown_to_html_node(markdown).to_html() for markdown in batch]
+        self.assertEqual(renderer.render_many(batch), expected)
+        self.assertEqual(renderer.misses, len(DOCUMENTS))
+
+    def test_render_many_parallel(self):
+        """Test that a parallel batch matches a sequential one."""
+        batch = [f"# Page {i}\n\nBody of page {i}." for i in range(20)]
+        with Renderer(workers=2, chunk_size=4) as renderer:
+            self.assertEqual(
+                renderer.render_many(batch, parallel=True),
+                [markdown_to_html_node(markdown).to_html() for markdown in batch],
+            )
+
+    def test_render_to(self):
+        """Test that render_to writes the HTML to the stream and returns its length."""
+        stream = io.StringIO()
+        written = Renderer().render_to(DOCUMENTS[1], stream)
+        self.assertEqual(stream.getvalue(), '<div><ul><li>one</li><li>two</li><li>three</li></ul></div>')
+        self.assertEqual(written, len(stream.getvalue()))
+
+    def test_invalid_configuration(self):
+        """Test that invalid sizes are rejected."""
+        with self.assertRaises(ValueError):
+            Renderer(cache_size=-1)
+        with self.assertRaises(ValueError):
+            Renderer(chunk_size=0)
+
+if __name__ == "__main__":
+    unittest.main()
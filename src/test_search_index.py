@@ -0,0 +1,140 @@
+import io
+import json
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+from document import Document
+from filesystem import MemoryFileSystem
+from main import build_site
+from search_index import SearchIndex, choose_prefix_length, decode_postings, encode_postings, shard_name
+from taxonomy import Page
+
+def make_page(url: str, title: str, text: str) -> Page:
+    """Creates the record of a page rendered by the current build, with the words of `text`."""
+    page = Page(f'content{url}.md', f'public{url}.html', url, title)
+    page.postings = Document(f'# {title}\n\n{text}').terms
+    return page
+
+class TestSearchIndex(unittest.TestCase):
+
+    def test_terms_from_text_nodes(self):
+        """Test that words are collected from the inline nodes, without Markdown syntax or image alt text."""
+        document = Document("# The Ring\n\nThe **one** [ring](/ring.html) to `rule_them` ![all](/all.png)")
+        self.assertEqual(document.terms, {'the': [0, 2], 'ring': [1, 4], 'one': [3], 'to': [5], 'rule_them': [6]})
+
+    def test_delta_encoding(self):
+        """Test that page IDs and positions are delta-encoded and decode to the original postings."""
+        postings = {7: [3, 10, 12], 2: [0]}
+        self.assertEqual(encode_postings(postings), [[2, 0], [5, 3, 7, 2]])
+        self.assertEqual(decode_postings(encode_postings(postings)), postings)
+
+    def test_shard_names(self):
+        """Test that terms are partitioned by prefix, with unsafe prefixes hex-encoded."""
+        self.assertEqual(shard_name('majesty'), 'ma')
+        self.assertEqual(shard_name('a'), 'a')
+        self.assertEqual(shard_name('über'), 'xc3bc62')
+
+    def test_update_only_changed_shards(self):
+        """Test that re-indexing a page only reports the shards of terms it gained or lost."""
+        index = SearchIndex()
+        home = make_page('/', 'Home', 'Welcome to the shire')
+        post = make_page('/post.html', 'Post', 'Hobbits')
+        self.assertEqual(index.update([home, post]), {'ho', 'po', 'we', 'to', 'th', 'sh'})
+
+        # A reused record keeps its postings; the changed page swaps `shire` for `mordor`.
+        home.postings = None
+        post = make_page('/post.html', 'Post', 'Hobbits mordor')
+        self.assertEqual(index.update([home, post]), {'mo'})
+        self.assertEqual(index.postings['hobbits'], {2: [1]})
+
+        self.assertEqual(index.update([home]), {'ho', 'po', 'mo'})
+        self.assertNotIn('mordor', index.postings)
+        self.assertEqual(index.ids, {'/': 1})
+
+    def test_prefix_length_grows_with_index(self):
+        """Test that a small index is one shard and prefixes lengthen once shards would be large enough."""
+        self.assertEqual(choose_prefix_length(['hobbit', 'shire']), 0)
+        self.assertEqual(shard_name('hobbit', 0), 'all')
+        with mock.patch('search_index.MIN_SHARD_TERMS', 2):
+            self.assertEqual(choose_prefix_length(['ma', 'mb', 'na', 'nb']), 1)
+            self.assertEqual(choose_prefix_length(['maa', 'mab', 'naa', 'nab']), 2)
+
+        index = SearchIndex()
+        index.update([make_page('/', 'Home', 'Welcome to the shire')])
+        self.assertTrue(index.reshard())
+        self.assertEqual(index.shard_names(), {'all'})
+        self.assertEqual(index.manifest()['prefix_length'], 0)
+        self.assertFalse(index.reshard())
+
+    def test_save_and_load(self):
+        """Test that the stored index round-trips."""
+        fs = MemoryFileSystem()
+        index = SearchIndex()
+        index.update([make_page('/', 'Home', 'Welcome')])
+        index.save('.cache/search.json', fs)
+
+        loaded = SearchIndex.load('.cache/search.json', fs)
+        self.assertEqual(loaded.postings, index.postings)
+        self.assertEqual(loaded.forward, index.forward)
+        self.assertEqual(loaded.manifest(), index.manifest())
+
+class TestSearchIndexBuild(unittest.TestCase):
+
+    def setUp(self):
+        """Create an in-memory site with two pages, sharded as a large site would be."""
+        patcher = mock.patch('search_index.MIN_SHARD_TERMS', 1)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.fs = MemoryFileSystem({
+            'static/index.css': b'body {}',
+            'content/index.md': b'# Home\n\nWelcome to the shire.',
+            'content/post.md': b'# Post\n\nHobbits like mushrooms.',
+            'template.html': b'{{ Content }}',
+        })
+
+    def build(self) -> str:
+        """Runs an incremental build and returns what it printed."""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            build_site('static', 'content', 'template.html', 'public', fs=self.fs, incremental=True,
+                       manifest_path='.cache/manifest.json')
+        return output.getvalue()
+
+    def test_shards_written(self):
+        """Test that the shards and the search manifest are written."""
+        self.build()
+        manifest = json.loads(self.fs.read_text('public/search/index.json'))
+        self.assertEqual(manifest['pages'], {'1': ['/', 'Home'], '2': ['/post.html', 'Post']})
+        self.assertIn('mu', manifest['shards'])
+        self.assertEqual(json.loads(self.fs.read_text('public/search/mu.json')), {'mushrooms': [[2, 3]]})
+
+    def test_incremental_rewrites_changed_shards(self):
+        """Test that editing one page only rewrites the shards of the terms that changed."""
+        self.build()
+        self.assertIn('Search index public/search: 0 written, 9 unchanged', self.build())
+        mtime = self.fs.mtime_ns('public/search/ho.json')
+
+        # `mordor` adds a shard and `mushrooms` empties one, so only `mo.json` and the manifest are written.
+        self.fs.write_text('content/post.md', '# Post\n\nHobbits like mordor.')
+        self.assertIn('Search index public/search: 2 written, 7 unchanged', self.build())
+        self.assertEqual(self.fs.mtime_ns('public/search/ho.json'), mtime)
+        self.assertIn('mo.json', self.fs.tree('public/search'))
+        self.assertNotIn('mu.json', self.fs.tree('public/search'))
+
+    def test_small_site_is_one_shard(self):
+        """Test that without the large-site sharding, a small site's index is a single shard."""
+        with mock.patch('search_index.MIN_SHARD_TERMS', 500):
+            self.build()
+        self.assertEqual(sorted(self.fs.tree('public/search')), ['all.json', 'index.json'])
+        self.assertEqual(json.loads(self.fs.read_text('public/search/index.json'))['shards'], ['all'])
+
+    def test_lost_index_is_rebuilt(self):
+        """Test that reused pages are indexed again when the stored index is gone."""
+        self.build()
+        self.fs.remove('.cache/search-index.json')
+        self.build()
+        self.assertIn('mu.json', self.fs.tree('public/search'))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import gzip
+import http.client
+import os
+import tempfile
+import threading
+import unittest
+
+from serve import PreviewRequestHandler, PreviewServer, normalize_url_path, parse_range
+
+class QuietHandler(PreviewRequestHandler):
+    """Request handler that keeps the per-request access log out of the test output."""
+
+    def log_message(self, format, *args):
+        pass
+
+class TestServe(unittest.TestCase):
+
+    def setUp(self):
+        """Build a small output directory and start a preview server on a free port."""
+        self.test_dir = tempfile.TemporaryDirectory()
+
+        # A page large enough to be gzipped, a nested directory page and a binary "image".
+        self.page = ('<html><body>' + 'Tolkien ' * 200 + '</body></html>').encode()
+        with open(os.path.join(self.test_dir.name, 'index.html'), 'wb') as f:
+            f.write(self.page)
+        os.mkdir(os.path.join(self.test_dir.name, 'majesty'))
+        with open(os.path.join(self.test_dir.name, 'majesty', 'index.html'), 'wb') as f:
+            f.write(b'<html>majesty</html>')
+        self.image = bytes(range(256)) * 8
+        with open(os.path.join(self.test_dir.name, 'image.png'), 'wb') as f:
+            f.write(self.image)
+
+        self.server = PreviewServer(('127.0.0.1', 0), self.test_dir.name, QuietHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        """Stop the server and clean up temporary files."""
+        self.server.shutdown()
+        self.server.server_close()
+        self.test_dir.cleanup()
+
+    def request(self, path, headers=None, method='GET'):
+        """Helper that performs a request and returns the response and its body."""
+        connection = http.client.HTTPConnection('127.0.0.1', self.server.server_address[1])
+        connection.request(method, path, headers=headers or {})
+        response = connection.getresponse()
+        body = response.read()
+        connection.close()
+        return response, body
+
+    def test_directory_serves_index(self):
+        """Test that directory URLs serve `index.html` and slashless directories redirect."""
+        response, body = self.request('/majesty/')
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, b'<html>majesty</html>')
+
+        response, _ = self.request('/majesty')
+        self.assertEqual(response.status, 301)
+        self.assertEqual(response.getheader('Location'), '/majesty/')
+
+        response, _ = self.request('/missing.html')
+        self.assertEqual(response.status, 404)
+
+    def test_gzip_and_conditional(self):
+        """Test that gzip variants are served and matching ETags produce a 304."""
+        response, body = self.request('/', {'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.getheader('Content-Encoding'), 'gzip')
+        self.assertEqual(gzip.decompress(body), self.page)
+
+        etag = response.getheader('ETag')
+        response, body = self.request('/', {'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+        self.assertEqual(response.status, 304)
+        self.assertEqual(body, b'')
+
+        # Without `Accept-Encoding` the identity body is sent.
+        response, body = self.request('/')
+        self.assertIsNone(response.getheader('Content-Encoding'))
+        self.assertEqual(body, self.page)
+
+    def test_range_request(self):
+        """Test that single byte ranges are honoured and unsatisfiable ranges produce a 416."""
+        response, body = self.request('/image.png', {'Range': 'bytes=10-19'})
+        self.assertEqual(response.status, 206)
+        self.assertEqual(response.getheader('Content-Range'), f'bytes 10-19/{len(self.image)}')
+        self.assertEqual(body, self.image[10:20])
+
+        response, body = self.request('/image.png', {'Range': 'bytes=-5'})
+        self.assertEqual(body, self.image[-5:])
+
+        response, _ = self.request('/image.png', {'Range': f'bytes={len(self.image)}-'})
+        self.assertEqual(response.status, 416)
+
+    def test_reloads_changed_files(self):
+        """Test that a rebuilt file is served without restarting the server."""
+        self.request('/majesty/')
+        with open(os.path.join(self.test_dir.name, 'majesty', 'index.html'), 'wb') as f:
+            f.write(b'<html>rebuilt majesty</html>')
+        _, body = self.request('/majesty/')
+        self.assertEqual(body, b'<html>rebuilt majesty</html>')
+
+    def test_helpers(self):
+        """Test path normalization and range parsing edge cases."""
+        self.assertEqual(normalize_url_path('/a/../b/?q=1'), '/b/')
+        self.assertEqual(normalize_url_path('/../../etc/passwd'), '/etc/passwd')
+        self.assertEqual(parse_range('bytes=0-', 10), (0, 9))
+        self.assertIsNone(parse_range('bytes=0-1,4-5', 10))
+        self.assertIsNone(parse_range('items=0-1', 10))
+
+if __name__ == "__main__":
+    unittest.main()
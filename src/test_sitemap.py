@@ -0,0 +1,88 @@
+import io
+import unittest
+import xml.etree.ElementTree as ElementTree
+from contextlib import redirect_stdout
+
+from filesystem import MemoryFileSystem
+from main import build_site
+from sitemap import SITEMAP_NAMESPACE, generate_sitemaps, lastmod_date, split_sitemap
+from taxonomy import Page
+
+# One day in nanoseconds, for readable modification times.
+DAY = 86400 * 10**9
+
+def make_pages(count: int):
+    """Creates the records of `count` pages with names that sort in creation order."""
+    return [Page(f'content/{n:03}.md', f'public/{n:03}.html', f'/{n:03}.html', f'Page {n}') for n in range(count)]
+
+def locations(data: bytes):
+    """Returns the `<loc>` values of a sitemap or sitemap index."""
+    return [loc.text for loc in ElementTree.fromstring(data).iter(f'{{{SITEMAP_NAMESPACE}}}loc')]
+
+class TestSitemap(unittest.TestCase):
+
+    def test_single_sitemap(self):
+        """Test that a small site gets one sitemap with `lastmod` dates from the source mtimes."""
+        pages = make_pages(2)
+        fs = MemoryFileSystem()
+        with redirect_stdout(io.StringIO()):
+            generate_sitemaps(pages, 'public', 'https://example.com/', fs, {'content/000.md': DAY})
+
+        data = fs.read_bytes('public/sitemap.xml')
+        self.assertEqual(locations(data), ['https://example.com/000.html', 'https://example.com/001.html'])
+        self.assertIn(b'<lastmod>1970-01-02</lastmod>', data)
+        self.assertEqual(data.count(b'<lastmod>'), 1)
+
+    def test_sharded_sitemap(self):
+        """Test that a large site is split into shards listed by a sitemap index."""
+        pages = make_pages(5)
+        fs = MemoryFileSystem()
+        with redirect_stdout(io.StringIO()):
+            signatures = generate_sitemaps(pages, 'public', '', fs, shard_size=2)
+
+        self.assertEqual(sorted(signatures), [
+            'public/sitemap-1.xml', 'public/sitemap-2.xml', 'public/sitemap-3.xml', 'public/sitemap.xml',
+        ])
+        self.assertEqual(locations(fs.read_bytes('public/sitemap.xml')),
+                         ['/sitemap-1.xml', '/sitemap-2.xml', '/sitemap-3.xml'])
+        self.assertEqual(locations(fs.read_bytes('public/sitemap-3.xml')), ['/004.html'])
+
+    def test_only_changed_shards_rewritten(self):
+        """Test that a changed `lastmod` only rewrites its shard and the index."""
+        pages = make_pages(5)
+        mtimes = {page.source: DAY for page in pages}
+        fs = MemoryFileSystem()
+        with redirect_stdout(io.StringIO()):
+            previous = generate_sitemaps(pages, 'public', '', fs, mtimes, shard_size=2)
+
+        mtimes['content/002.md'] = 2 * DAY
+        output = io.StringIO()
+        with redirect_stdout(output):
+            generate_sitemaps(pages, 'public', '', fs, mtimes, previous, shard_size=2)
+
+        self.assertEqual(output.getvalue().split('\n')[:-1], [
+            'Generating sitemap /sitemap-2.xml', 'Generating sitemap /sitemap.xml',
+        ])
+
+    def test_lastmod_date(self):
+        """Test that modification times become UTC dates."""
+        self.assertEqual(lastmod_date(0), '1970-01-01')
+        self.assertEqual([shard.lastmod for shard in split_sitemap(make_pages(1), 'public', {'content/000.md': DAY})],
+                         ['1970-01-02'])
+
+    def test_incremental_build(self):
+        """Test that an unchanged incremental build does not rewrite the sitemap."""
+        fs = MemoryFileSystem({
+            'static/index.css': b'body {}',
+            'content/index.md': b'# Home',
+            'template.html': b'{{ Content }}',
+        })
+        for expected in (True, False):
+            output = io.StringIO()
+            with redirect_stdout(output):
+                build_site('static', 'content', 'template.html', 'public', fs=fs, incremental=True,
+                           manifest_path='.cache/manifest.json')
+            self.assertEqual('Generating sitemap /sitemap.xml' in output.getvalue(), expected)
+
+if __name__ == "__main__":
+    unittest.main()
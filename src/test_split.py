@@ -1,7 +1,7 @@
 import unittest
 
 from enums import TextType
-from split_node import split_nodes_delimiter, split_nodes_image, split_nodes_link
+from split_node import split_nodes_delimiter, split_nodes_image, split_nodes_link, split_nodes_reference
 from textnode import TextNode
 
 class TestSplitNode(unittest.TestCase):
@@ -79,5 +79,27 @@ class TestSplitNode(unittest.TestCase):
         ]
         self.assertEqual(result, expected)
 
+    def test_split_references(self):
+        """Test resolving full, collapsed and shortcut references, and leaving undefined ones as text."""
+        references = {'boot dev': 'https://www.boot.dev', 'logo': '/logo.png'}
+        node = TextNode("See [the site][Boot  Dev], [boot dev][], [boot dev], [missing][nope] and ![Logo][]", TextType.TEXT)
+        result = split_nodes_reference([node], references)
+        expected = [
+            TextNode("See ", TextType.TEXT),
+            TextNode("the site", TextType.LINK, "https://www.boot.dev"),
+            TextNode(", ", TextType.TEXT),
+            TextNode("boot dev", TextType.LINK, "https://www.boot.dev"),
+            TextNode(", ", TextType.TEXT),
+            TextNode("boot dev", TextType.LINK, "https://www.boot.dev"),
+            TextNode(", [missing][nope] and ", TextType.TEXT),
+            TextNode("Logo", TextType.IMAGE, "/logo.png", "Logo"),
+        ]
+        self.assertEqual(result, expected)
+
+    def test_split_references_leaves_inline_links(self):
+        """Test that inline links and non-text nodes are not treated as references."""
+        nodes = [TextNode("[boot dev](https://x.dev)", TextType.TEXT), TextNode("[boot dev]", TextType.CODE)]
+        self.assertEqual(split_nodes_reference(nodes, {'boot dev': 'https://www.boot.dev'}), nodes)
+
 if __name__ == "__main__":
     unittest.main()
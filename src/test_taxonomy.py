@@ -0,0 +1,160 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+
+from filesystem import MemoryFileSystem
+from main import build_site
+from taxonomy import Page, TaxonomyIndex, listing_url, paginate, slugify
+
+def make_page(url: str, title: str, **metadata) -> Page:
+    """Creates the record of the page published from `content{url}.md`."""
+    return Page(f'content{url}.md', f'public{url}.html', f'{url}.html', title, metadata)
+
+class TestTaxonomy(unittest.TestCase):
+
+    def test_slugify(self):
+        """Test that terms become URL-safe slugs."""
+        self.assertEqual(slugify('Middle Earth!'), 'middle-earth')
+        self.assertEqual(listing_url('tags', 'Middle Earth', 2), '/tags/middle-earth/page/2/')
+        self.assertEqual(listing_url('section', 'blog'), '/blog/')
+
+    def test_listing_slugs(self):
+        """Test that non-Latin terms get distinct hashed slugs and colliding slugs are told apart."""
+        self.assertRegex(listing_url('tags', 'эльфы'), r'^/tags/term-[0-9a-f]{8}/$')
+        self.assertNotEqual(listing_url('tags', 'эльфы'), listing_url('tags', '日本'))
+
+        pages = [make_page('/a', 'A', tags=['эльфы', '日本', 'C++', 'C']), make_page('/b', 'B', tags=['c'])]
+        with redirect_stdout(io.StringIO()) as output:
+            listings = paginate(TaxonomyIndex(pages), 'public')
+        urls = {listing.term: listing.url for listing in listings if listing.taxonomy == 'tags'}
+
+        self.assertEqual(len(set(urls.values())), 5)
+        self.assertEqual(urls['C'], '/tags/c/')
+        self.assertRegex(urls['C++'], r'^/tags/c-[0-9a-f]{8}/$')
+        self.assertIn("already used by 'C'", output.getvalue())
+
+    def test_index(self):
+        """Test that pages are indexed by tag, archive year and section, newest first."""
+        old = make_page('/blog/old', 'Old', date='2023-03-01', tags=['elves'])
+        new = make_page('/blog/new', 'New', date='2024-01-05', tags=['elves', 'rings'])
+        undated = make_page('/about', 'About', tags='elves')
+        index = TaxonomyIndex([old, new, undated])
+
+        self.assertEqual(index.taxonomies(), ['archive', 'section', 'tags'])
+        self.assertEqual(index.terms('tags'), ['elves', 'rings'])
+        self.assertEqual(index.pages('tags', 'elves'), [new, old, undated])
+        self.assertEqual(index.pages('archive', '2023'), [old])
+        self.assertEqual(index.pages('section', 'blog'), [new, old])
+
+    def test_paginate(self):
+        """Test that long listings are split into linked pages."""
+        pages = [make_page(f'/blog/p{i}', f'Post {i}', date=f'2024-01-{i + 1:02}', tags=['all']) for i in range(5)]
+        listings = paginate(TaxonomyIndex(pages), 'public', page_size=2)
+        listings = [listing for listing in listings if listing.taxonomy == 'tags']
+
+        self.assertEqual([len(listing.pages) for listing in listings], [2, 2, 1])
+        self.assertEqual(listings[1].destination, 'public/tags/all/page/2/index.html')
+        self.assertEqual(listings[1].title, 'Tagged: all (page 2 of 3)')
+
+        html = listings[1].to_html_node().to_html()
+        self.assertIn('<a href="/tags/all/" rel="prev">Newer</a>', html)
+        self.assertIn('<a href="/tags/all/page/3/" rel="next">Older</a>', html)
+        self.assertIn('<a href="/blog/p2.html">Post 2</a> <time datetime="2024-01-03">2024-01-03</time>', html)
+
+    def test_section_with_index_is_not_replaced(self):
+        """Test that a section with its own index page gets no generated listing."""
+        pages = [
+            make_page('/blog/post', 'Post', date='2024-01-01'),
+            Page('content/blog/index.md', 'public/blog/index.html', '/blog/', 'Blog'),
+        ]
+        self.assertEqual([listing.taxonomy for listing in paginate(TaxonomyIndex(pages), 'public')], ['archive'])
+
+class TestIncrementalBuild(unittest.TestCase):
+
+    def setUp(self):
+        """Create an in-memory site with tagged posts."""
+        self.fs = MemoryFileSystem({
+            'static/index.css': b'body {}',
+            'content/index.md': b'# Home',
+            'content/blog/one.md': b'---\ntags: [elves]\ndate: 2024-01-01\n---\n# One',
+            'content/blog/two.md': b'---\ntags: [elves, rings]\ndate: 2024-02-01\n---\n# Two',
+            'template.html': b'<title>{{ Title }}</title>{{ Content }}',
+        })
+
+    def build(self, **kwargs) -> str:
+        """Runs an incremental build and returns what it printed."""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            build_site('static', 'content', 'template.html', 'public', fs=self.fs, incremental=True,
+                       manifest_path='.cache/manifest.json', **kwargs)
+        return output.getvalue()
+
+    def test_listings_generated(self):
+        """Test that tag, archive and section listings are written."""
+        self.build()
+        tree = self.fs.tree('public')
+        for path in ('tags/elves/index.html', 'tags/rings/index.html', 'archive/2024/index.html', 'blog/index.html'):
+            self.assertIn(path, tree)
+        self.assertIn(b'<title>Tagged: elves</title>', tree['tags/elves/index.html'])
+
+    def test_listing_title_escaped(self):
+        """Test that a term from front matter is escaped in the listing's title as well as its heading."""
+        self.fs.write_text('content/blog/fish.md', '---\ntags: ["<b>Fish & Chips</b>"]\n---\n# Fish')
+        self.build()
+        html = self.fs.read_text('public/tags/b-fish-chips-b/index.html')
+        self.assertIn('<title>Tagged: &lt;b&gt;Fish &amp; Chips&lt;/b&gt;</title>', html)
+        self.assertIn('<h1>Tagged: &lt;b&gt;Fish &amp; Chips&lt;/b&gt;</h1>', html)
+
+    def test_unchanged_build_does_nothing(self):
+        """Test that a second build with no changes regenerates nothing."""
+        self.build()
+        output = self.build()
+        self.assertNotIn('Generating', output)
+
+    def test_only_affected_listings_regenerated(self):
+        """Test that changing one post's tags only regenerates the listings it joins or leaves."""
+        self.build()
+        self.fs.write_text('content/blog/one.md', '---\ntags: [rings]\ndate: 2024-01-01\n---\n# One')
+        output = self.build()
+
+        self.assertIn('content/blog/one.md', output)
+        self.assertNotIn('content/blog/two.md', output)
+        self.assertIn('Generating listing /tags/elves/', output)
+        self.assertIn('Generating listing /tags/rings/', output)
+        # Neither the archive nor the section listing shows tags, so they are untouched.
+        self.assertNotIn('/archive/2024/', output)
+        self.assertNotIn('listing /blog/', output)
+
+    def test_deleted_page_removed(self):
+        """Test that outputs of deleted sources, and listings that become empty, are removed."""
+        self.build()
+        self.fs.remove('content/blog/two.md')
+        self.build()
+
+        tree = self.fs.tree('public')
+        self.assertNotIn('blog/two.html', tree)
+        self.assertNotIn('tags/rings/index.html', tree)
+        self.assertIn('tags/elves/index.html', tree)
+
+    def test_template_change_rebuilds_everything(self):
+        """Test that editing the template regenerates every page and listing."""
+        self.build()
+        self.fs.write_text('template.html', '<h1>{{ Title }}</h1>{{ Content }}')
+        output = self.build()
+        self.assertIn('content/blog/two.md', output)
+        self.assertIn('Generating listing /tags/elves/', output)
+
+    def test_minify_change_rebuilds_everything(self):
+        """Test that turning minification on rewrites every page and listing minified."""
+        self.build()
+        output = self.build(minify=True)
+        self.assertIn('content/blog/two.md', output)
+        self.assertIn('Generating listing /tags/elves/', output)
+
+        tree = self.fs.tree('public')
+        self.assertIn(b'<li><a href=/blog/one.html>One</a>', tree['tags/elves/index.html'])
+        self.assertNotIn(b'</li>', tree['tags/elves/index.html'])
+        self.assertNotIn('Generating', self.build(minify=True))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+
+from template import Template
+
+class TestTemplate(unittest.TestCase):
+
+    def test_render(self):
+        """Test that placeholders are filled and unknown placeholders are left untouched."""
+        template = Template('<title>{{ Title }}</title><body>{{ Content }}{{ Footer }}</body>')
+        self.assertEqual(template.placeholders, ['Title', 'Content', 'Footer'])
+        self.assertEqual(
+            template.render({'Title': 'Home', 'Content': '<p>hi</p>'}),
+            '<title>Home</title><body><p>hi</p>{{ Footer }}</body>',
+        )
+
+    def test_values_are_not_rescanned(self):
+        """Test that placeholder syntax inside a value is not substituted again."""
+        template = Template('{{ Title }}|{{ Content }}')
+        self.assertEqual(template.render({'Title': '{{ Content }}', 'Content': 'x'}), '{{ Content }}|x')
+
+    def test_minify(self):
+        """Test that a minified template drops whitespace between tags but keeps it next to placeholders and in `<pre>`."""
+        template = Template('<html>\n  <head>\n    <title> {{ Title }} </title>\n  </head>\n'
+                            '  <body>\n    <pre>  keep\n  this</pre>\n    {{ Content }}\n  </body>\n</html>\n',
+                            minify=True)
+        self.assertEqual(
+            template.render({'Title': 'Home', 'Content': '<p>hi'}),
+            '<html><head><title> Home </title></head><body><pre>  keep\n  this</pre> <p>hi </body></html>',
+        )
+
+if __name__ == "__main__":
+    unittest.main()
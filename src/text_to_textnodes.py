@@ -1,10 +1,11 @@
 from typing import List
 
+from context import RenderContext
 from enums import TextType
-from split_node import split_nodes_delimiter, split_nodes_image, split_nodes_link
+from split_node import split_nodes_delimiter, split_nodes_image, split_nodes_link, split_nodes_reference
 from textnode import TextNode
 
-def text_to_textnodes(raw_text: str) -> List[TextNode]:
+def text_to_textnodes(raw_text: str, context: RenderContext = None) -> List[TextNode]:
     """
     Converts raw text into a list of `TextNode` objects by processing Markdown-style delimiters and syntax.
 
@@ -12,8 +13,13 @@ def text_to_textnodes(raw_text: str) -> List[TextNode]:
     italic (`*`), code (`` ` ``), links (`[text](url)`), and images (`![alt text](url)`). It returns a list of 
     `TextNode` objects where each object represents a portion of the text with its appropriate type.
 
+    Reference-style links (`[text][label]`) are resolved against the definitions collected in 
+    `context` while the document was split into blocks.
+
     Args:
         raw_text (str): A string representing the raw text to be processed.
+        context (RenderContext, optional): The document's context holding its link reference 
+            definitions. Defaults to None (reference-style links are left as text).
 
     Returns:
         List[TextNode]: A list of `TextNode` objects with appropriate text types based on Markdown formatting.
@@ -39,6 +45,11 @@ def text_to_textnodes(raw_text: str) -> List[TextNode]:
     # This step converts italic sections into `TextType.ITALIC`.
     nodes_v3 = split_nodes_delimiter(nodes_v2, delimiters[1])        
 
+    # Resolve reference-style links and images against the document's definitions.
+    # This happens before inline links so that `[text](url)` is never mistaken for a shortcut reference.
+    if context is not None:
+        nodes_v3 = split_nodes_reference(nodes_v3, context.references)
+
     # Process the `TextNode` objects to identify and convert Markdown-style links.
     # This step converts link sections into `TextType.LINK`.
     nodes_v4 = split_nodes_link(nodes_v3)
@@ -47,5 +58,11 @@ def text_to_textnodes(raw_text: str) -> List[TextNode]:
     # This step converts image sections into `TextType.IMAGE`.
     nodes_v5 = split_nodes_image(nodes_v4)
 
+    # Record the links found in this block so the build can assemble the site's link graph,
+    # and its words so the build can index the page for search.
+    if context is not None:
+        context.record_links(nodes_v5)
+        context.record_terms(nodes_v5)
+
     # Return the final list of `TextNode` objects with appropriate text types based on Markdown formatting.
     return nodes_v5